@@ -17,6 +17,7 @@
 # client for ryu.app.ofctl.service
 
 from ryu.base import app_manager
+from ryu.lib import hub
 import event
 
 
@@ -33,7 +34,7 @@ def get_datapath(app, dpid):
     return app.send_request(event.GetDatapathRequest(dpid=dpid))()
 
 
-def send_msg(app, msg, reply_cls=None, reply_multi=False):
+def send_msg(app, msg, reply_cls=None, reply_multi=False, timeout=None):
     """
     Send an OpenFlow message and wait for reply messages.
 
@@ -43,6 +44,9 @@ def send_msg(app, msg, reply_cls=None, reply_multi=False):
         None means no replies are expected.  The default is None.
     :param reply_multi: True if multipart replies are expected.
         The default is False.
+    :param timeout: Seconds to wait for the replies, after which
+        exception.RequestTimeout is raised.  None means no timeout.
+        The default is None.
 
     If no replies, returns None.
     If reply_multi=False, returns OpenFlow switch-to-controller message.
@@ -62,7 +66,102 @@ def send_msg(app, msg, reply_cls=None, reply_multi=False):
     """
     return app.send_request(event.SendMsgRequest(msg=msg,
                                                  reply_cls=reply_cls,
-                                                 reply_multi=reply_multi))()
+                                                 reply_multi=reply_multi,
+                                                 timeout=timeout))()
+
+
+class _Reply(object):
+    # The reply_q of a request sent by send_request_nowait().  The reply
+    # is kept, so that every Future of the request can read it.
+    def __init__(self):
+        self.reply = None
+        self.received = hub.Event()
+
+    def put(self, reply):
+        self.reply = reply
+        self.received.set()
+
+
+class Future(object):
+    """
+    Replies to a message sent by send_msg_async() or send_msgs_async().
+    """
+
+    def __init__(self, req, index=None):
+        self._req = req
+        self._index = index
+
+    def done(self):
+        """
+        Returns True if the replies have been received.
+        """
+        return self._req.reply_q.received.is_set()
+
+    def result(self):
+        """
+        Wait for the replies, and return them or raise an exception as
+        send_msg() does.
+        """
+        reply_q = self._req.reply_q
+        reply_q.received.wait()
+        if self._index is None:
+            return reply_q.reply()
+        return reply_q.reply()[self._index]()
+
+
+def _send_request(app, req):
+    app.send_request_nowait(req, _Reply())
+
+
+def send_msg_async(app, msg, reply_cls=None, reply_multi=False,
+                   timeout=None):
+    """
+    Send an OpenFlow message without waiting for reply messages.
+
+    The parameters are the same as send_msg().  Returns a Future of
+    the replies.
+
+    Example::
+
+        import ryu.app.ofctl.api as api
+
+        futures = [api.send_msg_async(
+            self, parser.OFPPortStatsRequest(datapath=datapath),
+            reply_cls=parser.OFPPortStatsReply, reply_multi=True,
+            timeout=5) for datapath in datapaths]
+        results = [f.result() for f in futures]
+    """
+    req = event.SendMsgRequest(msg=msg, reply_cls=reply_cls,
+                               reply_multi=reply_multi, timeout=timeout)
+    _send_request(app, req)
+    return Future(req)
+
+
+def send_msgs_async(app, msgs, reply_cls=None, reply_multi=False,
+                    timeout=None):
+    """
+    Send OpenFlow messages without waiting for reply messages, with a
+    barrier per datapath rather than per message.
+
+    The parameters are the same as send_msg() but msgs, a list of
+    messages to one or more datapaths.  Returns a list of Futures of
+    the replies to each message.
+
+    The timeout is shared by the messages to a datapath, which fail
+    together on timeout or disconnection.
+    """
+    futures = [None] * len(msgs)
+    indexes = {}        # datapath -> indexes of its messages in msgs
+    for i, msg in enumerate(msgs):
+        indexes.setdefault(msg.datapath, []).append(i)
+    for datapath_indexes in indexes.values():
+        req = event.SendMsgsRequest(msgs=[msgs[i] for i in datapath_indexes],
+                                    reply_cls=reply_cls,
+                                    reply_multi=reply_multi, timeout=timeout)
+        _send_request(app, req)
+        for j, i in enumerate(datapath_indexes):
+            futures[i] = Future(req, j)
+    return futures
 
 
 app_manager.require_app('ryu.app.ofctl.service', api_style=True)
@@ -40,11 +40,26 @@ class GetDatapathRequest(_RequestBase):
 # send msg
 
 class SendMsgRequest(_RequestBase):
-    def __init__(self, msg, reply_cls=None, reply_multi=False):
+    def __init__(self, msg, reply_cls=None, reply_multi=False,
+                 timeout=None):
         super(SendMsgRequest, self).__init__()
         self.msg = msg
         self.reply_cls = reply_cls
         self.reply_multi = reply_multi
+        self.timeout = timeout
+
+
+# send msgs to a datapath followed by a single barrier
+
+class SendMsgsRequest(_RequestBase):
+    def __init__(self, msgs, reply_cls=None, reply_multi=False,
+                 timeout=None):
+        assert msgs
+        super(SendMsgsRequest, self).__init__()
+        self.msgs = msgs
+        self.reply_cls = reply_cls
+        self.reply_multi = reply_multi
+        self.timeout = timeout
 
 
 # generic reply
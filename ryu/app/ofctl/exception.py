@@ -35,3 +35,16 @@ class OFError(_ExceptionBase):
     """OFPErrorMsg is received."""
 
     message = 'OpenFlow errors %(result)s'
+
+
+class InvalidDatapath(_ExceptionBase):
+    """The datapath is not connected, or is disconnected before the
+    replies are received."""
+
+    message = 'Invalid datapath %(result)s'
+
+
+class RequestTimeout(_ExceptionBase):
+    """No barrier reply is received within the timeout."""
+
+    message = 'Request timed out after %(result)s seconds'
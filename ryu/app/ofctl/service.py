@@ -22,6 +22,7 @@ from ryu.controller import ofp_event
 from ryu.controller.handler import CONFIG_DISPATCHER, MAIN_DISPATCHER,\
     DEAD_DISPATCHER
 from ryu.controller.handler import set_ev_cls
+from ryu.lib import hub
 
 import event
 import exception
@@ -30,9 +31,18 @@ import exception
 class _SwitchInfo(object):
     def __init__(self, datapath):
         self.datapath = datapath
-        self.xids = {}
-        self.barriers = {}
-        self.results = {}
+        self.xids = {}          # xid -> _PendingRequest
+        self.barriers = {}      # barrier xid -> _PendingRequest
+        self.results = {}       # xid -> replies received
+
+
+class _PendingRequest(object):
+    # A SendMsgRequest or SendMsgsRequest waiting for its barrier reply.
+    def __init__(self, req, xids, barrier_xid):
+        self.req = req
+        self.xids = xids
+        self.barrier_xid = barrier_xid
+        self.timer = None
 
 
 class OfctlService(app_manager.RyuApp):
@@ -92,6 +102,12 @@ class OfctlService(app_manager.RyuApp):
         if info.datapath is datapath:
             self.logger.debug('forget info %s' % (info,))
             self._switches.pop(id)
+            # no barrier replies are coming for the pending requests
+            for pending in info.barriers.values():
+                self._forget(info, pending)
+                rep = event.Reply(exception=exception.InvalidDatapath(
+                    result=id))
+                self.reply_to_request(pending.req, rep)
 
     @set_ev_cls(event.GetDatapathRequest, MAIN_DISPATCHER)
     def _handle_get_datapath(self, req):
@@ -105,30 +121,83 @@ class OfctlService(app_manager.RyuApp):
         rep = event.Reply(result=datapath)
         self.reply_to_request(req, rep)
 
-    @set_ev_cls(event.SendMsgRequest, MAIN_DISPATCHER)
+    @set_ev_cls([event.SendMsgRequest, event.SendMsgsRequest],
+                MAIN_DISPATCHER)
     def _handle_send_msg(self, req):
+        if isinstance(req, event.SendMsgRequest):
+            msgs = [req.msg]
+        else:
+            msgs = req.msgs
+        datapath = msgs[0].datapath
+        si = self._switches.get(datapath.id)
+        if si is None or si.datapath is not datapath:
+            rep = event.Reply(exception=exception.InvalidDatapath(
+                result=datapath.id))
+            self.reply_to_request(req, rep)
+            return
+
         if req.reply_cls is not None:
             self._observe_msg(req.reply_cls)
 
-        msg = req.msg
-        datapath = msg.datapath
-        datapath.set_xid(msg)
-        xid = msg.xid
+        # The messages are followed by a single barrier, as their
+        # replies come before the barrier reply.
+        xids = []
+        for msg in msgs:
+            assert msg.datapath is datapath
+            datapath.set_xid(msg)
+            xids.append(msg.xid)
         barrier = datapath.ofproto_parser.OFPBarrierRequest(datapath)
         datapath.set_xid(barrier)
         barrier_xid = barrier.xid
 
-        si = self._switches[datapath.id]
-        assert xid not in si.results
-        assert xid not in si.xids
+        pending = _PendingRequest(req, xids, barrier_xid)
+        for xid in xids:
+            assert xid not in si.results
+            assert xid not in si.xids
+            si.results[xid] = []
+            si.xids[xid] = pending
         assert barrier_xid not in si.barriers
-        si.results[xid] = []
-        si.xids[xid] = req
-        si.barriers[barrier_xid] = xid
-
-        datapath.send_msg(msg)
+        si.barriers[barrier_xid] = pending
+        if req.timeout is not None:
+            # the reply is sent to the event queue of the requester
+            pending.timer = hub.spawn_later(req.timeout,
+                                            self._handle_timeout, si, pending)
+
+        for msg in msgs:
+            datapath.send_msg(msg)
         datapath.send_msg(barrier)
 
+    def _forget(self, si, pending):
+        for xid in pending.xids:
+            si.xids.pop(xid)
+        del si.barriers[pending.barrier_xid]
+        if pending.timer is not None:
+            pending.timer.cancel()
+        req = pending.req
+        if req.reply_cls is not None:
+            self._unobserve_msg(req.reply_cls)
+        return [si.results.pop(xid) for xid in pending.xids]
+
+    def _handle_timeout(self, si, pending):
+        self._forget(si, pending)
+        rep = event.Reply(exception=exception.RequestTimeout(
+            result=pending.req.timeout))
+        self.reply_to_request(pending.req, rep)
+
+    @staticmethod
+    def _reply(req, result):
+        if any(OfctlService._is_error(r) for r in result):
+            return event.Reply(exception=exception.OFError(result=result))
+        elif req.reply_multi:
+            return event.Reply(result=result)
+        elif len(result) == 0:
+            return event.Reply()
+        elif len(result) == 1:
+            return event.Reply(result=result[0])
+        else:
+            return event.Reply(exception=exception.
+                               UnexpectedMultiReply(result=result))
+
     @set_ev_cls(ofp_event.EventOFPBarrierReply, MAIN_DISPATCHER)
     def _handle_barrier(self, ev):
         msg = ev.msg
@@ -139,25 +208,17 @@ class OfctlService(app_manager.RyuApp):
             self.logger.error('unknown dpid %s' % (datapath.id,))
             return
         try:
-            xid = si.barriers.pop(msg.xid)
+            pending = si.barriers[msg.xid]
         except KeyError:
             self.logger.error('unknown barrier xid %s' % (msg.xid,))
             return
-        result = si.results.pop(xid)
-        req = si.xids.pop(xid)
-        if req.reply_cls is not None:
-            self._unobserve_msg(req.reply_cls)
-        if any(self._is_error(r) for r in result):
-            rep = event.Reply(exception=exception.OFError(result=result))
-        elif req.reply_multi:
-            rep = event.Reply(result=result)
-        elif len(result) == 0:
-            rep = event.Reply()
-        elif len(result) == 1:
-            rep = event.Reply(result=result[0])
+        results = self._forget(si, pending)
+        req = pending.req
+        if isinstance(req, event.SendMsgRequest):
+            rep = self._reply(req, results[0])
         else:
-            rep = event.Reply(exception=exception.
-                              UnexpectedMultiReply(result=result))
+            rep = event.Reply(result=[self._reply(req, result)
+                                      for result in results])
         self.reply_to_request(req, rep)
 
     @set_ev_cls(ofp_event.EventOFPErrorMsg, MAIN_DISPATCHER)
@@ -170,7 +231,7 @@ class OfctlService(app_manager.RyuApp):
             self.logger.error('unknown dpid %s' % (datapath.id,))
             return
         try:
-            req = si.xids[msg.xid]
+            req = si.xids[msg.xid].req
         except KeyError:
             self.logger.error('unknown error xid %s' % (msg.xid,))
             return
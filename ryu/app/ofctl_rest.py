@@ -17,16 +17,19 @@ import logging
 
 import json
 import ast
+import time
 from webob import Response
 
 from ryu.base import app_manager
 from ryu.controller import ofp_event
 from ryu.controller import dpset
+from ryu.controller.handler import DEAD_DISPATCHER
 from ryu.controller.handler import MAIN_DISPATCHER
 from ryu.controller.handler import set_ev_cls
 from ryu.ofproto import ofproto_v1_0
 from ryu.ofproto import ofproto_v1_2
 from ryu.ofproto import ofproto_v1_3
+from ryu.lib import hub
 from ryu.lib import ofctl_v1_0
 from ryu.lib import ofctl_v1_2
 from ryu.lib import ofctl_v1_3
@@ -76,6 +79,38 @@ LOG = logging.getLogger('ryu.app.ofctl_rest')
 # get ports description of the switch
 # GET /stats/portdesc/<dpid>
 
+# Retrieve the stats of all the switches
+#
+# The requests are sent to the switches at once, and the response is a
+# JSON object by dpid which is streamed as the switches reply.  With the
+# max_age=<seconds> parameter, the stats of a switch are taken from
+# those got for another request up to that many seconds ago, or from
+# the replies to a request in flight, rather than asking the switch.
+#
+# get the desc stats of all switches
+# GET /stats/desc
+#
+# get flows stats of all switches
+# GET /stats/flow
+#
+# get flows stats of all switches filtered by the fields
+# POST /stats/flow
+#
+# get ports stats of all switches
+# GET /stats/port
+#
+# get meters stats of all switches
+# GET /stats/meter
+#
+# get groups desc stats of all switches
+# GET /stats/groupdesc
+#
+# get groups stats of all switches
+# GET /stats/group
+#
+# get ports description of all switches
+# GET /stats/portdesc
+
 # Update the switch stats
 #
 # add a flow entry
@@ -122,17 +157,174 @@ LOG = logging.getLogger('ryu.app.ofctl_rest')
 # POST /stats/experimenter/<dpid>
 
 
+# The functions getting the stats of a switch for the requests to all
+# switches, by OpenFlow version.  Switches of other versions are left
+# out of the response.
+_ALL_STATS = {
+    'desc': {ofproto_v1_0.OFP_VERSION: ofctl_v1_0.get_desc_stats,
+             ofproto_v1_2.OFP_VERSION: ofctl_v1_2.get_desc_stats,
+             ofproto_v1_3.OFP_VERSION: ofctl_v1_3.get_desc_stats},
+    'flow': {ofproto_v1_0.OFP_VERSION: ofctl_v1_0.get_flow_stats,
+             ofproto_v1_2.OFP_VERSION: ofctl_v1_2.get_flow_stats,
+             ofproto_v1_3.OFP_VERSION: ofctl_v1_3.get_flow_stats},
+    'port': {ofproto_v1_0.OFP_VERSION: ofctl_v1_0.get_port_stats,
+             ofproto_v1_2.OFP_VERSION: ofctl_v1_2.get_port_stats,
+             ofproto_v1_3.OFP_VERSION: ofctl_v1_3.get_port_stats},
+    'meter': {ofproto_v1_3.OFP_VERSION: ofctl_v1_3.get_meter_stats},
+    'groupdesc': {ofproto_v1_2.OFP_VERSION: ofctl_v1_2.get_group_desc,
+                  ofproto_v1_3.OFP_VERSION: ofctl_v1_3.get_group_desc},
+    'group': {ofproto_v1_2.OFP_VERSION: ofctl_v1_2.get_group_stats,
+              ofproto_v1_3.OFP_VERSION: ofctl_v1_3.get_group_stats},
+    'portdesc': {ofproto_v1_0.OFP_VERSION: ofctl_v1_0.get_port_desc,
+                 ofproto_v1_2.OFP_VERSION: ofctl_v1_2.get_port_desc,
+                 ofproto_v1_3.OFP_VERSION: ofctl_v1_3.get_port_desc},
+}
+
+
+class StatsCache(object):
+    """
+    The stats recently got from switches, by switch and kind of stats.
+
+    A request for stats which are being got for another request waits
+    for those rather than asking the switch again.
+    """
+
+    def __init__(self):
+        self._stats = {}        # (dpid, kind) -> (time, stats)
+        self._getting = {}      # (dpid, kind) -> hub.Event
+
+    def peek(self, key, max_age):
+        """
+        Returns the stats got up to max_age seconds ago, or None.
+        """
+        entry = self._stats.get(key)
+        if entry is not None and time.time() - entry[0] <= max_age:
+            return entry[1]
+        return None
+
+    def get(self, key, max_age, func, *args):
+        """
+        Returns the stats got up to max_age seconds ago, or those
+        func(*args) returns.
+        """
+        while True:
+            stats = self.peek(key, max_age)
+            if stats is not None:
+                return stats
+            getting = self._getting.get(key)
+            if getting is None:
+                break
+            getting.wait()
+            entry = self._stats.get(key)
+            if entry is not None:
+                return entry[1]
+
+        getting = self._getting[key] = hub.Event()
+        try:
+            stats = func(*args)
+            if self._getting.get(key) is getting:
+                self._stats[key] = (time.time(), stats)
+        finally:
+            if self._getting.get(key) is getting:
+                del self._getting[key]
+            getting.set()
+        return stats
+
+    def forget(self, dpid):
+        """
+        Drops the stats got, and those being got, from switch dpid.
+        """
+        for cache in (self._stats, self._getting):
+            for key in [key for key in cache if key[0] == dpid]:
+                del cache[key]
+
+
 class StatsController(ControllerBase):
     def __init__(self, req, link, data, **config):
         super(StatsController, self).__init__(req, link, data, **config)
         self.dpset = data['dpset']
         self.waiters = data['waiters']
+        self.cache = data['cache']
 
     def get_dpids(self, req, **_kwargs):
         dps = self.dpset.dps.keys()
         body = json.dumps(dps)
         return (Response(content_type='application/json', body=body))
 
+    def get_all_stats(self, req, kind, **_kwargs):
+        args = ()
+        if kind == 'flow' and req.body != '':
+            try:
+                args = (ast.literal_eval(req.body),)
+            except SyntaxError:
+                LOG.debug('invalid syntax %s', req.body)
+                return Response(status=400)
+
+        try:
+            max_age = float(req.GET.get('max_age', 0))
+        except ValueError:
+            LOG.debug('invalid max_age %s', req.GET['max_age'])
+            return Response(status=400)
+        if args:
+            # filtered stats are not shared
+            max_age = 0
+
+        funcs = _ALL_STATS[kind]
+        dps = [dp for dp in self.dpset.dps.values()
+               if dp.ofproto.OFP_VERSION in funcs]
+        return Response(content_type='application/json',
+                        app_iter=self._stream_stats(dps, kind, args,
+                                                    max_age))
+
+    def _stream_stats(self, dps, kind, args, max_age):
+        # yields the JSON object of the stats a switch at a time, in
+        # the order the switches reply
+        replies = hub.Queue()
+        threads = []
+        cached = []
+        for dp in dps:
+            members = None
+            if max_age > 0:
+                members = self.cache.peek((dp.id, kind), max_age)
+            if members is None:
+                threads.append(hub.spawn(self._get_stats, replies, dp, kind,
+                                         args, max_age))
+            elif members:
+                cached.append(members)
+        try:
+            yield '{' + ', '.join(cached)
+            sep = ', ' if cached else ''
+            for _i in range(len(threads)):
+                members = replies.get()
+                if members:
+                    yield sep + members
+                    sep = ', '
+            yield '}'
+        finally:
+            # the client may have gone before all the replies
+            for thread in threads:
+                hub.kill(thread)
+
+    def _get_stats(self, replies, dp, kind, args, max_age):
+        func = _ALL_STATS[kind][dp.ofproto.OFP_VERSION]
+        members = ''
+        try:
+            if max_age > 0:
+                members = self.cache.get((dp.id, kind), max_age,
+                                         self._encode_stats, func, dp,
+                                         self.waiters)
+            else:
+                members = self._encode_stats(func, dp, self.waiters, *args)
+        finally:
+            replies.put(members)
+
+    @staticmethod
+    def _encode_stats(func, *args):
+        # the members of a JSON object of the stats func returns, which
+        # are kept encoded in the cache
+        return ', '.join('%s: %s' % (json.dumps(key), json.dumps(value))
+                         for key, value in func(*args).items())
+
     def get_desc_stats(self, req, dpid, **_kwargs):
         dp = self.dpset.get(int(dpid))
         if dp is None:
@@ -532,6 +724,7 @@ class RestStatsApi(app_manager.RyuApp):
         self.data = {}
         self.data['dpset'] = self.dpset
         self.data['waiters'] = self.waiters
+        self.data['cache'] = StatsCache()
         mapper = wsgi.mapper
 
         wsgi.registory['StatsController'] = self.data
@@ -541,6 +734,15 @@ class RestStatsApi(app_manager.RyuApp):
                        controller=StatsController, action='get_dpids',
                        conditions=dict(method=['GET']))
 
+        for kind in _ALL_STATS:
+            methods = ['GET']
+            if kind == 'flow':
+                methods.append('POST')
+            uri = path + '/' + kind
+            mapper.connect('stats', uri,
+                           controller=StatsController, action='get_all_stats',
+                           kind=kind, conditions=dict(method=methods))
+
         uri = path + '/desc/{dpid}'
         mapper.connect('stats', uri,
                        controller=StatsController, action='get_desc_stats',
@@ -657,6 +859,14 @@ class RestStatsApi(app_manager.RyuApp):
         del self.waiters[dp.id][msg.xid]
         lock.set()
 
+    @set_ev_cls(ofp_event.EventOFPStateChange, DEAD_DISPATCHER)
+    def state_change_handler(self, ev):
+        dp = ev.datapath
+
+        if dp.id is None:
+            return
+        self.data['cache'].forget(dp.id)
+
     @set_ev_cls([ofp_event.EventOFPSwitchFeatures], MAIN_DISPATCHER)
     def features_reply_handler(self, ev):
         msg = ev.msg
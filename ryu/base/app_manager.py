@@ -56,15 +56,22 @@ def _lookup_service_brick_by_mod_name(mod_name):
     return lookup_service_brick(mod_name.split('.')[-1])
 
 
+def _invalidate_observer_bricks():
+    for brick in SERVICE_BRICKS.values():
+        brick._observer_bricks_cache.clear()
+
+
 def register_app(app):
     assert isinstance(app, RyuApp)
     assert app.name not in SERVICE_BRICKS
     SERVICE_BRICKS[app.name] = app
+    _invalidate_observer_bricks()
     register_instance(app)
 
 
 def unregister_app(app):
     SERVICE_BRICKS.pop(app.name)
+    _invalidate_observer_bricks()
 
 
 def require_app(app_name, api_style=False):
@@ -153,6 +160,12 @@ class RyuApp(object):
         self.name = self.__class__.__name__
         self.event_handlers = {}        # ev_cls -> handlers:list
         self.observers = {}     # ev_cls -> observer-name -> states:set
+        # dispatch tables compiled from event_handlers and observers.
+        # they are cleared whenever a handler or an observer is
+        # (un)registered.
+        self._handlers_cache = {}  # (ev_cls, state) -> handlers:tuple
+        self._observers_cache = {}  # (ev_cls, state) -> names:tuple
+        self._observer_bricks_cache = {}  # (ev_cls, state) -> bricks:tuple
         self.threads = []
         self.events = hub.Queue(128)
         if hasattr(self.__class__, 'LOGGER_NAME'):
@@ -182,25 +195,34 @@ class RyuApp(object):
         assert callable(handler)
         self.event_handlers.setdefault(ev_cls, [])
         self.event_handlers[ev_cls].append(handler)
+        self._handlers_cache.clear()
 
     def unregister_handler(self, ev_cls, handler):
         assert callable(handler)
         self.event_handlers[ev_cls].remove(handler)
         if not self.event_handlers[ev_cls]:
             del self.event_handlers[ev_cls]
+        self._handlers_cache.clear()
+
+    def _invalidate_observers(self):
+        self._observers_cache.clear()
+        self._observer_bricks_cache.clear()
 
     def register_observer(self, ev_cls, name, states=None):
         states = states or set()
         ev_cls_observers = self.observers.setdefault(ev_cls, {})
         ev_cls_observers.setdefault(name, set()).update(states)
+        self._invalidate_observers()
 
     def unregister_observer(self, ev_cls, name):
         observers = self.observers.get(ev_cls, {})
         observers.pop(name)
+        self._invalidate_observers()
 
     def unregister_observer_all_event(self, name):
         for observers in self.observers.values():
             observers.pop(name, None)
+        self._invalidate_observers()
 
     def observe_event(self, ev_cls, states=None):
         brick = _lookup_service_brick_by_ev_cls(ev_cls)
@@ -223,8 +245,16 @@ class RyuApp(object):
                       The default is None.
         """
         ev_cls = ev.__class__
+        key = (ev_cls, state)
+        try:
+            return self._handlers_cache[key]
+        except KeyError:
+            pass
+
         handlers = self.event_handlers.get(ev_cls, [])
         if state is None:
+            handlers = tuple(handlers)
+            self._handlers_cache[key] = handlers
             return handlers
 
         def test(h):
@@ -238,16 +268,47 @@ class RyuApp(object):
                 return True
             return state in states
 
-        return filter(test, handlers)
+        handlers = tuple(filter(test, handlers))
+        self._handlers_cache[key] = handlers
+        return handlers
 
     def get_observers(self, ev, state):
+        ev_cls = ev.__class__
+        key = (ev_cls, state)
+        try:
+            return self._observers_cache[key]
+        except KeyError:
+            pass
+
         observers = []
-        for k, v in self.observers.get(ev.__class__, {}).iteritems():
+        for k, v in self.observers.get(ev_cls, {}).iteritems():
             if not state or not v or state in v:
                 observers.append(k)
 
+        observers = tuple(observers)
+        self._observers_cache[key] = observers
         return observers
 
+    def _get_observer_bricks(self, ev, state):
+        key = (ev.__class__, state)
+        try:
+            return self._observer_bricks_cache[key]
+        except KeyError:
+            pass
+
+        bricks = []
+        for name in self.get_observers(ev, state):
+            brick = SERVICE_BRICKS.get(name)
+            if brick is None:
+                LOG.debug("EVENT LOST %s->%s %s",
+                          self.name, name, ev.__class__.__name__)
+                continue
+            bricks.append((name, brick))
+
+        bricks = tuple(bricks)
+        self._observer_bricks_cache[key] = bricks
+        return bricks
+
     def send_request(self, req):
         """
         Make a synchronous request.
@@ -257,12 +318,22 @@ class RyuApp(object):
         The argument should be an instance of EventRequestBase.
         """
 
+        self.send_request_nowait(req, hub.Queue())
+        # going to sleep for the reply
+        return req.reply_q.get()
+
+    def send_request_nowait(self, req, reply_q):
+        """
+        Make a synchronous request without waiting for the reply.
+        As send_request, but returns at once. The reply is put to
+        reply_q, an object with a put method such as hub.Queue, which
+        is set to req.reply_q.
+        """
+
         assert isinstance(req, EventRequestBase)
         req.sync = True
-        req.reply_q = hub.Queue()
+        req.reply_q = reply_q
         self.send_event(req.dst, req)
-        # going to sleep for the reply
-        return req.reply_q.get()
 
     def _event_loop(self):
         while self.is_active or not self.events.empty():
@@ -284,20 +355,29 @@ class RyuApp(object):
         if name in SERVICE_BRICKS:
             if isinstance(ev, EventRequestBase):
                 ev.src = self.name
-            LOG.debug("EVENT %s->%s %s" %
-                      (self.name, name, ev.__class__.__name__))
+            LOG.debug("EVENT %s->%s %s",
+                      self.name, name, ev.__class__.__name__)
             SERVICE_BRICKS[name]._send_event(ev, state)
         else:
-            LOG.debug("EVENT LOST %s->%s %s" %
-                      (self.name, name, ev.__class__.__name__))
+            LOG.debug("EVENT LOST %s->%s %s",
+                      self.name, name, ev.__class__.__name__)
 
     def send_event_to_observers(self, ev, state=None):
         """
         Send the specified event to all observers of this RyuApp.
         """
 
-        for observer in self.get_observers(ev, state):
-            self.send_event(observer, ev, state)
+        bricks = self._get_observer_bricks(ev, state)
+        if not bricks:
+            return
+        if isinstance(ev, EventRequestBase):
+            ev.src = self.name
+        debug = LOG.isEnabledFor(logging.DEBUG)
+        for name, brick in bricks:
+            if debug:
+                LOG.debug("EVENT %s->%s %s",
+                          self.name, name, ev.__class__.__name__)
+            brick._send_event(ev, state)
 
     def reply_to_request(self, req, rep):
         """
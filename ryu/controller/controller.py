@@ -22,6 +22,7 @@ The main component of OpenFlow controller.
 
 """
 
+import collections
 import contextlib
 from ryu import cfg
 import logging
@@ -56,7 +57,18 @@ CONF.register_cli_opts([
                help='openflow ssl listen port'),
     cfg.StrOpt('ctl-privkey', default=None, help='controller private key'),
     cfg.StrOpt('ctl-cert', default=None, help='controller certificate'),
-    cfg.StrOpt('ca-certs', default=None, help='CA certificates')
+    cfg.StrOpt('ca-certs', default=None, help='CA certificates'),
+    cfg.IntOpt('ofp-recv-buf-size', default=64 * 1024,
+               help='size of a single socket read from a datapath'),
+    cfg.IntOpt('ofp-send-high-watermark', default=256 * 1024,
+               help='bytes queued for a datapath at which senders block'),
+    cfg.IntOpt('ofp-send-low-watermark', default=64 * 1024,
+               help='bytes queued for a datapath at which blocked '
+               'senders resume'),
+    cfg.BoolOpt('ofp-lazy-parse', default=False,
+                help='decode match, port and multipart reply bodies of '
+                'received messages on first access; handlers get '
+                'OFPMalformedMessage then if they are malformed')
 ])
 
 
@@ -106,6 +118,9 @@ def _deactivate(method):
 
 
 class Datapath(ofproto_protocol.ProtocolDesc):
+    # Upper limit of bytes joined into a single sendall()
+    SEND_BATCH_SIZE = 64 * 1024
+
     def __init__(self, socket, address):
         super(Datapath, self).__init__()
 
@@ -114,9 +129,25 @@ class Datapath(ofproto_protocol.ProtocolDesc):
         self.address = address
         self.is_active = True
 
-        # The limit is arbitrary. We need to limit queue size to
-        # prevent it from eating memory up
-        self.send_q = hub.Queue(16)
+        # Pending buffers are limited by size in bytes rather than by
+        # count to prevent the queue from eating memory up.  Senders
+        # block once send_high_watermark bytes are queued and resume
+        # when the send loop drains it down to send_low_watermark.
+        self.send_q = collections.deque()
+        self.send_high_watermark = CONF.ofp_send_high_watermark
+        self.send_low_watermark = min(CONF.ofp_send_low_watermark,
+                                      self.send_high_watermark)
+        self._send_ready = hub.Event()
+        self._send_drained = hub.Event()
+        self._send_drained.set()
+
+        # counters
+        self.send_queued_bytes = 0
+        self.send_flushes = 0
+        self.send_stalls = 0
+
+        # see ofproto_parser.MsgBase._parse_attr
+        self.lazy_parse = CONF.ofp_lazy_parse
 
         self.xid = random.randint(0, self.ofproto.MAX_XID)
         self.id = None  # datapath_id is unknown yet
@@ -137,38 +168,52 @@ class Datapath(ofproto_protocol.ProtocolDesc):
     # Low level socket handling layer
     @_deactivate
     def _recv_loop(self):
-        buf = bytearray()
-        required_len = ofproto_common.OFP_HEADER_SIZE
+        # Read the socket in large chunks and frame every complete
+        # message in a chunk by offset.  Chunks returned by recv() are
+        # immutable, so each message is handed to the parser as a
+        # buffer() view on the chunk instead of a copy.  Only the
+        # trailing partial message is carried over to the next read.
+        recv_buf_size = max(CONF.ofp_recv_buf_size,
+                            ofproto_common.OFP_HEADER_SIZE)
+        buf = ''
 
         count = 0
         while self.is_active:
-            ret = self.socket.recv(required_len)
+            ret = self.socket.recv(recv_buf_size)
             if len(ret) == 0:
                 self.is_active = False
                 break
-            buf += ret
-            while len(buf) >= required_len:
-                (version, msg_type, msg_len, xid) = ofproto_parser.header(buf)
-                required_len = msg_len
-                if len(buf) < required_len:
+            if buf:
+                buf += ret
+            else:
+                buf = ret
+
+            offset = 0
+            buf_len = len(buf)
+            while buf_len - offset >= ofproto_common.OFP_HEADER_SIZE:
+                (version, msg_type, msg_len, xid) = ofproto_parser.header(
+                    buf, offset)
+                if msg_len < ofproto_common.OFP_HEADER_SIZE:
+                    LOG.error('malformed message length %d from %s',
+                              msg_len, self.address)
+                    self.is_active = False
+                    return
+                if buf_len - offset < msg_len:
                     break
 
                 msg = ofproto_parser.msg(self,
-                                         version, msg_type, msg_len, xid, buf)
+                                         version, msg_type, msg_len, xid,
+                                         buffer(buf, offset, msg_len))
                 # LOG.debug('queue msg %s cls %s', msg, msg.__class__)
                 if msg:
                     ev = ofp_event.ofp_msg_to_ev(msg)
                     self.ofp_brick.send_event_to_observers(ev, self.state)
 
-                    dispatchers = lambda x: x.callers[ev.__class__].dispatchers
-                    handlers = [handler for handler in
-                                self.ofp_brick.get_handlers(ev) if
-                                self.state in dispatchers(handler)]
+                    handlers = self.ofp_brick.get_handlers(ev, self.state)
                     for handler in handlers:
                         handler(ev)
 
-                buf = buf[required_len:]
-                required_len = ofproto_common.OFP_HEADER_SIZE
+                offset += msg_len
 
                 # We need to schedule other greenlets. Otherwise, ryu
                 # can't accept new switches or handle the existing
@@ -179,27 +224,57 @@ class Datapath(ofproto_protocol.ProtocolDesc):
                     count = 0
                     hub.sleep(0)
 
+            buf = buf[offset:]
+
     @_deactivate
     def _send_loop(self):
         try:
             while self.is_active:
-                buf = self.send_q.get()
-                self.socket.sendall(buf)
+                if not self.send_q:
+                    self._send_ready.clear()
+                    self._send_ready.wait()
+                    continue
+
+                # drain all pending buffers and write them at once
+                bufs = []
+                size = 0
+                while self.send_q and size < self.SEND_BATCH_SIZE:
+                    buf = self.send_q.popleft()
+                    bufs.append(buf)
+                    size += len(buf)
+                self.send_queued_bytes -= size
+                if (self.send_queued_bytes <= self.send_low_watermark and
+                        not self._send_drained.is_set()):
+                    self._send_drained.set()
+
+                if len(bufs) == 1:
+                    self.socket.sendall(bufs[0])
+                else:
+                    self.socket.sendall(bytearray().join(bufs))
+                self.send_flushes += 1
         finally:
-            q = self.send_q
             # first, clear self.send_q to prevent new references.
             self.send_q = None
-            # there might be threads currently blocking in send_q.put().
-            # unblock them by draining the queue.
-            try:
-                while q.get(block=False):
-                    pass
-            except hub.QueueEmpty:
-                pass
+            self.send_queued_bytes = 0
+            # there might be threads currently blocking in send().
+            # unblock them.
+            self._send_drained.set()
+
+    def send_would_block(self):
+        """True if send() would wait for the send queue to drain."""
+        return (self.send_q is not None and
+                self.send_queued_bytes >= self.send_high_watermark)
 
     def send(self, buf):
-        if self.send_q:
-            self.send_q.put(buf)
+        while self.send_would_block():
+            self.send_stalls += 1
+            self._send_drained.clear()
+            self._send_drained.wait()
+        if self.send_q is not None:
+            self.send_q.append(buf)
+            self.send_queued_bytes += len(buf)
+            if not self._send_ready.is_set():
+                self._send_ready.set()
 
     def set_xid(self, msg):
         self.xid += 1
@@ -21,6 +21,8 @@ OpenFlow event definitions.
 import inspect
 
 from ryu.controller import handler
+from ryu.lib.packet import classifier
+from ryu.lib.packet import packet
 from ryu import ofproto
 from ryu import utils
 from . import event
@@ -32,6 +34,42 @@ class EventOFPMsgBase(event.EventBase):
         self.msg = msg
 
 
+class EventOFPPacketInBase(EventOFPMsgBase):
+    """Base class of the PacketIn events.
+
+    The payload is decoded at most once per message, when first asked
+    for, and the results are shared by all the handlers of the event.
+    They must be treated as read-only.
+
+    ========== ==========================================================
+    Attribute  Description
+    ========== ==========================================================
+    key        ryu.lib.packet.classifier.PacketKey of msg.data, read from
+               the headers without decoding the whole frame
+    packet     ryu.lib.packet.packet.Packet decoded from msg.data
+    ========== ==========================================================
+    """
+    _key = None
+    _packet = None
+
+    @property
+    def key(self):
+        if self._key is None:
+            key = None
+            if self._packet is None:
+                key = classifier._classify(self.msg.data)
+            if key is None:
+                key = classifier.packet_key(self.packet)
+            self._key = key
+        return self._key
+
+    @property
+    def packet(self):
+        if self._packet is None:
+            self._packet = packet.Packet(self.msg.data)
+        return self._packet
+
+
 #
 # Create ofp_event type corresponding to OFP Msg
 #
@@ -59,7 +97,10 @@ def _create_ofp_msg_ev_class(msg_cls):
     if name in _OFP_MSG_EVENTS:
         return
 
-    cls = type(name, (EventOFPMsgBase,),
+    base = EventOFPMsgBase
+    if msg_cls.__name__ == 'OFPPacketIn':
+        base = EventOFPPacketInBase
+    cls = type(name, (base,),
                dict(__init__=lambda self, msg:
                     super(self.__class__, self).__init__(msg)))
     globals()[name] = cls
@@ -14,6 +14,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import binascii
+import socket
+
 import netaddr
 
 
@@ -30,11 +33,142 @@ class AddressConverter(object):
         return str(self._addr(self._strat.packed_to_int(bin),
                               **self._addr_kwargs))
 
-ipv4 = AddressConverter(netaddr.IPAddress, netaddr.strategy.ipv4, version=4)
-ipv6 = AddressConverter(netaddr.IPAddress, netaddr.strategy.ipv6, version=6)
+
+class _CachedConverter(object):
+    """Converter for the addresses seen in packets and flow entries.
+
+    Canonical forms are converted by _text_to_bin and _bin_to_text,
+    which return None for anything else; that is left to the netaddr
+    based converter so that the accepted forms, the output and the
+    errors raised stay the same as with netaddr alone.
+
+    Results are kept in caches of at most cache_size entries in each
+    direction. When a cache is full it is retired, and entries looked
+    up again while it is retired move to the new one, so the addresses
+    in use survive while the rest is dropped.
+    """
+
+    def __init__(self, fallback, cache_size=1024):
+        self._fallback = fallback
+        self._cache_size = cache_size
+        self._bins = {}
+        self._old_bins = {}
+        self._texts = {}
+        self._old_texts = {}
+
+    def _text_to_bin(self, text):
+        return None
+
+    def _bin_to_text(self, bin):
+        return None
+
+    def text_to_bin(self, text):
+        try:
+            bin = self._bins.get(text)
+        except TypeError:
+            return self._fallback.text_to_bin(text)
+        if bin is not None:
+            return bin
+        bin = self._old_bins.get(text)
+        if bin is None:
+            bin = self._text_to_bin(text)
+            if bin is None:
+                return self._fallback.text_to_bin(text)
+        if len(self._bins) >= self._cache_size:
+            self._old_bins = self._bins
+            self._bins = {}
+        self._bins[text] = bin
+        return bin
+
+    def bin_to_text(self, bin):
+        if not isinstance(bin, str):
+            # A buffer hashes like its contents but never equals a str,
+            # and would keep the data it is a view of alive in the
+            # cache. Bytearrays and memoryviews are not hashable.
+            bin = str(bytearray(bin))
+        text = self._texts.get(bin)
+        if text is not None:
+            return text
+        text = self._old_texts.get(bin)
+        if text is None:
+            text = self._bin_to_text(bin)
+            if text is None:
+                return self._fallback.bin_to_text(bin)
+        if len(self._texts) >= self._cache_size:
+            self._old_texts = self._texts
+            self._texts = {}
+        self._texts[bin] = text
+        return text
+
+
+class _InetConverter(_CachedConverter):
+    # socket.inet_pton accepts the canonical forms only, e.g. not
+    # '10.1' or '010.0.0.1' which netaddr takes.
+    def __init__(self, fallback, family, cache_size=1024):
+        super(_InetConverter, self).__init__(fallback, cache_size)
+        self._family = family
+
+    def _text_to_bin(self, text):
+        try:
+            return socket.inet_pton(self._family, text)
+        except (socket.error, TypeError, ValueError):
+            return None
+
+    def _bin_to_text(self, bin):
+        try:
+            return socket.inet_ntop(self._family, bin)
+        except (socket.error, TypeError, ValueError):
+            return None
+
+
+class _MacConverter(_CachedConverter):
+    def _text_to_bin(self, text):
+        # 'xx:xx:xx:xx:xx:xx' in either case
+        if (not isinstance(text, basestring) or len(text) != 17 or
+                text[2::3] != ':::::'):
+            return None
+        try:
+            return binascii.unhexlify(text[0:2] + text[3:5] + text[6:8] +
+                                      text[9:11] + text[12:14] + text[15:17])
+        except (TypeError, ValueError, UnicodeError):
+            return None
+
+    def _bin_to_text(self, bin):
+        if not isinstance(bin, str) or len(bin) != 6:
+            return None
+        h = binascii.hexlify(bin)
+        return ':'.join((h[0:2], h[2:4], h[4:6], h[6:8], h[8:10], h[10:12]))
+
+
+def _inet_is_usable():
+    # inet_pton is missing on some platforms, and inet_ntop must format
+    # IPv6 addresses as netaddr does.
+    samples = ['::', '::1', '1::', 'ff02::1:ff00:1', '::ffff:192.0.2.1',
+               '1:0:2::', '1::2:0:0:3', '2001:db8:0:1:1:1:1:1']
+    try:
+        for text in samples:
+            bin = netaddr.IPAddress(text, version=6).packed
+            if socket.inet_ntop(socket.AF_INET6, bin) != text:
+                return False
+            if socket.inet_pton(socket.AF_INET6, text) != bin:
+                return False
+    except (AttributeError, socket.error, ValueError):
+        return False
+    return True
 
 
 class mac_mydialect(netaddr.mac_unix):
     word_fmt = '%.2x'
-mac = AddressConverter(netaddr.EUI, netaddr.strategy.eui48, version=48,
-                       dialect=mac_mydialect)
+
+_ipv4 = AddressConverter(netaddr.IPAddress, netaddr.strategy.ipv4, version=4)
+_ipv6 = AddressConverter(netaddr.IPAddress, netaddr.strategy.ipv6, version=6)
+_mac = AddressConverter(netaddr.EUI, netaddr.strategy.eui48, version=48,
+                        dialect=mac_mydialect)
+
+if _inet_is_usable():
+    ipv4 = _InetConverter(_ipv4, socket.AF_INET)
+    ipv6 = _InetConverter(_ipv6, socket.AF_INET6)
+else:
+    ipv4 = _ipv4
+    ipv6 = _ipv6
+mac = _MacConverter(_mac)
@@ -169,7 +169,9 @@ class BFDSession(object):
         # _enable_send indicates the switch of the periodic transmission of
         # BFD Control packets.
         self._enable_send = True
-        self._lock = None
+        self._send_timer = None
+        self._detect_timer = None
+        self._last_wait = None
 
         # L2/L3/L4 Header fields
         self.src_mac = src_mac
@@ -190,8 +192,8 @@ class BFDSession(object):
         self.datapath = None
         self.ofport = ofport
 
-        # Spawn a periodic transmission loop for BFD Control packets.
-        hub.spawn(self._send_loop)
+        # Start the periodic transmission of BFD Control packets.
+        self._start_send_timer()
 
         LOG.info("[BFD][%s][INIT] BFD Session initialized.",
                  hex(self._local_discr))
@@ -279,14 +281,13 @@ class BFDSession(object):
                 self._remote_session_state != bfd.BFD_STATE_UP:
             if not self._enable_send:
                 self._enable_send = True
-                hub.spawn(self._send_loop)
+                if self._send_timer is None:
+                    self._start_send_timer()
 
         # Update the detection time (RFC5880 Section 6.8.4.)
         if self._detect_time == 0:
             self._detect_time = bfd_pkt.desired_min_tx_interval * \
                 bfd_pkt.detect_mult / 1000000.0
-            # Start the timeout loop.
-            hub.spawn(self._recv_timeout_loop)
 
         if bfd_pkt.flags & bfd.BFD_FLAG_POLL:
             self._pending_final = True
@@ -301,9 +302,8 @@ class BFDSession(object):
             self._rcv_auth_seq = bfd_pkt.auth_cls.seq
             self._auth_seq_known = 1
 
-        # Set the lock.
-        if self._lock is not None:
-            self._lock.set()
+        # Restart the detection timer.
+        self._start_detect_timer()
 
     def _set_state(self, new_state, diag=None):
         """
@@ -331,34 +331,44 @@ class BFDSession(object):
         self.app.send_event_to_observers(
             EventBFDSessionStateChanged(self, old_state, new_state))
 
-    def _recv_timeout_loop(self):
+    def _start_detect_timer(self):
         """
-        A loop to check timeout of receiving remote BFD packet.
+        Start the timer of receiving remote BFD packet, or restart it
+        if it is running.
         """
-        while self._detect_time:
-            last_wait = time.time()
-            self._lock = hub.Event()
+        if self._detect_timer is not None:
+            self._detect_timer.cancel()
+            # Authentication variable check (RFC5880 Section 6.8.1.)
+            if getattr(self, "_auth_seq_known", 0):
+                if self._last_wait > time.time() + 2 * self._detect_time:
+                    self._auth_seq_known = 0
 
-            self._lock.wait(timeout=self._detect_time)
+        if not self._detect_time:
+            return
+        self._last_wait = time.time()
+        # the state change may block on the event queues of observers
+        self._detect_timer = hub.spawn_later(self._detect_time,
+                                             self._detect_timeout)
 
-            if self._lock.is_set():
-                # Authentication variable check (RFC5880 Section 6.8.1.)
-                if getattr(self, "_auth_seq_known", 0):
-                    if last_wait > time.time() + 2 * self._detect_time:
-                        self._auth_seq_known = 0
+    def _detect_timeout(self):
+        """
+        Timeout of receiving remote BFD packet.
+        """
+        self._detect_timer = None
 
-            else:
-                # Check Detection Time expiration (RFC5880 section 6.8.4.)
-                LOG.info("[BFD][%s][RECV] BFD Session timed out.",
-                         hex(self._local_discr))
-                if self._session_state not in [bfd.BFD_STATE_DOWN,
-                                               bfd.BFD_STATE_ADMIN_DOWN]:
-                    self._set_state(bfd.BFD_STATE_DOWN,
-                                    bfd.BFD_DIAG_CTRL_DETECT_TIME_EXPIRED)
+        # Check Detection Time expiration (RFC5880 section 6.8.4.)
+        LOG.info("[BFD][%s][RECV] BFD Session timed out.",
+                 hex(self._local_discr))
+        if self._session_state not in [bfd.BFD_STATE_DOWN,
+                                       bfd.BFD_STATE_ADMIN_DOWN]:
+            self._set_state(bfd.BFD_STATE_DOWN,
+                            bfd.BFD_DIAG_CTRL_DETECT_TIME_EXPIRED)
 
-                # Authentication variable check (RFC5880 Section 6.8.1.)
-                if getattr(self, "_auth_seq_known", 0):
-                    self._auth_seq_known = 0
+        # Authentication variable check (RFC5880 Section 6.8.1.)
+        if getattr(self, "_auth_seq_known", 0):
+            self._auth_seq_known = 0
+
+        self._start_detect_timer()
 
     def _update_xmit_period(self):
         """
@@ -381,28 +391,57 @@ class BFDSession(object):
         LOG.info("[BFD][%s][XMIT] Transmission period changed to %f",
                  hex(self._local_discr), self._xmit_period)
 
-    def _send_loop(self):
+    def _start_send_timer(self):
         """
-        A loop to proceed periodic BFD packet transmission.
+        Schedule the next periodic BFD packet transmission.
         """
-        while self._enable_send:
-            hub.sleep(self._xmit_period)
+        self._send_timer = hub.call_later(self._xmit_period,
+                                          self._send_timeout)
 
-            # Send BFD packet. (RFC5880 Section 6.8.7.)
+    def _send_timeout(self):
+        """
+        Proceed periodic BFD packet transmission.
+        """
+        datapath = self.datapath
+        if datapath is not None and datapath.send_would_block():
+            # Wait for the datapath to drain in a greenthread of its own,
+            # not in the timer wheel, and schedule the next transmission
+            # once this one is sent.  _send_timer is kept until then, not
+            # to start another.
+            hub.spawn(self._send_blocked)
+            return
 
-            if self._remote_discr == 0 and not self._active_role:
-                continue
+        if self._enable_send:
+            self._start_send_timer()
+        else:
+            self._send_timer = None
+        self._transmit()
+
+    def _send_blocked(self):
+        try:
+            self._transmit()
+        finally:
+            if self._enable_send:
+                self._start_send_timer()
+            else:
+                self._send_timer = None
 
-            if self._remote_min_rx_interval == 0:
-                continue
+    def _transmit(self):
+        # Send BFD packet. (RFC5880 Section 6.8.7.)
 
-            if self._remote_demand_mode and \
-                    self._session_state == bfd.BFD_STATE_UP and \
-                    self._remote_session_state == bfd.BFD_STATE_UP and \
-                    not self._is_polling:
-                continue
+        if self._remote_discr == 0 and not self._active_role:
+            return
+
+        if self._remote_min_rx_interval == 0:
+            return
+
+        if self._remote_demand_mode and \
+                self._session_state == bfd.BFD_STATE_UP and \
+                self._remote_session_state == bfd.BFD_STATE_UP and \
+                not self._is_polling:
+            return
 
-            self._send()
+        self._send()
 
     def _send(self):
         """
@@ -563,8 +602,12 @@ class BFDPacket(object):
     def bfd_parse(data):
         """
         Parse raw packet and return BFD class from packet library.
+        *data* can also be the packet decoded with Packet.
         """
-        pkt = packet.Packet(data)
+        if isinstance(data, packet.Packet):
+            pkt = data
+        else:
+            pkt = packet.Packet(data)
         i = iter(pkt)
         eth_pkt = i.next()
 
@@ -611,9 +654,13 @@ class ARPPacket(object):
     def arp_parse(data):
         """
         Parse ARP packet, return ARP class from packet library.
+        *data* can also be the packet decoded with Packet.
         """
         # Iteratize pkt
-        pkt = packet.Packet(data)
+        if isinstance(data, packet.Packet):
+            pkt = data
+        else:
+            pkt = packet.Packet(data)
         i = iter(pkt)
         eth_pkt = i.next()
         # Ensure it's an ethernet frame.
@@ -744,13 +791,15 @@ class BFDLib(app_manager.RyuApp):
         ofproto = datapath.ofproto
         parser = datapath.ofproto_parser
         in_port = msg.match['in_port']
-
-        pkt = packet.Packet(msg.data)
+        key = ev.key
 
         # If there's someone asked for an IP address associated
         # with a BFD session, generate an ARP reply for it.
-        if arp.arp in pkt:
-            arp_pkt = ARPPacket.arp_parse(msg.data)
+        if key.eth_type == ETH_TYPE_ARP:
+            pkt = ev.packet
+            if arp.arp not in pkt:
+                return
+            arp_pkt = ARPPacket.arp_parse(pkt)
             if arp_pkt.opcode == ARP_REQUEST:
                 for s in self.session.values():
                     if s.dpid == datapath.id and \
@@ -774,15 +823,13 @@ class BFDLib(app_manager.RyuApp):
             return
 
         # Check whether it's BFD packet or not.
-        if ipv4.ipv4 not in pkt or udp.udp not in pkt:
-            return
-
-        udp_hdr = pkt.get_protocols(udp.udp)[0]
-        if udp_hdr.dst_port != BFD_CONTROL_UDP_PORT:
+        if (key.eth_type != ETH_TYPE_IP or
+                key.ip_proto != inet.IPPROTO_UDP or
+                key.dst_port != BFD_CONTROL_UDP_PORT):
             return
 
         # Parse BFD packet here.
-        self.recv_bfd_pkt(datapath, in_port, msg.data)
+        self.recv_bfd_pkt(datapath, in_port, ev.packet)
 
     def add_bfd_session(self, dpid, ofport, src_mac, src_ip,
                         dst_mac="FF:FF:FF:FF:FF:FF", dst_ip="255.255.255.255",
@@ -854,7 +901,10 @@ class BFDLib(app_manager.RyuApp):
         return my_discr
 
     def recv_bfd_pkt(self, datapath, in_port, data):
-        pkt = packet.Packet(data)
+        if isinstance(data, packet.Packet):
+            pkt = data
+        else:
+            pkt = packet.Packet(data)
         eth = pkt.get_protocols(ethernet.ethernet)[0]
 
         if eth.ethertype != ETH_TYPE_IP:
@@ -867,7 +917,7 @@ class BFDLib(app_manager.RyuApp):
             return
 
         # Parse BFD packet here.
-        bfd_pkt = BFDPacket.bfd_parse(data)
+        bfd_pkt = BFDPacket.bfd_parse(pkt)
 
         if not isinstance(bfd_pkt, bfd.bfd):
             return
@@ -15,7 +15,9 @@
 # limitations under the License.
 
 import logging
+import math
 import os
+import time
 
 
 # we don't bother to use cfg.py because monkey patch needs to be
@@ -170,3 +172,205 @@ if HUB_TYPE == 'eventlet':
                     pass
 
             return self._cond
+
+
+class _WheelTimer(object):
+    __slots__ = ['expires', '_func', '_args', '_kwargs', '_slot', '_wheel',
+                 '_spawned']
+
+    def __init__(self, wheel, expires, func, args, kwargs, spawned=False):
+        self.expires = expires
+        self._func = func
+        self._args = args
+        self._kwargs = kwargs
+        self._slot = None
+        self._wheel = wheel
+        self._spawned = spawned
+
+    def cancel(self):
+        """Cancel the timer. This is a no-op once its callback has started.
+        """
+        # a spawned callback checks it when its greenthread starts
+        self._func = None
+        slot = self._slot
+        if slot is not None:
+            slot.discard(self)
+            self._slot = None
+            self._wheel._count -= 1
+
+    def is_pending(self):
+        return self._slot is not None
+
+
+class TimerWheel(object):
+    """Timers kept in a hierarchical timing wheel.
+
+    Time is counted in ticks of resolution seconds. Timers due within
+    256 ticks are kept in the slot of their tick; later ones in coarser
+    slots of the upper wheels, and move down as their time gets near.
+    Starting and cancelling a timer takes the same time whatever the
+    number of timers.
+
+    The timers are run by a single greenthread, which is started with
+    the first timer and exits when none is left. Callbacks of
+    call_later() are called from it, one after another, and must not
+    block, or they delay every timer due after them. Callbacks which
+    may block, e.g. by sending to a datapath or an event queue, are
+    started with spawn_later() instead. A timer does not run before
+    its time.
+    """
+
+    # the bits of the tick each wheel is indexed with
+    _BITS = [8, 6, 6, 6]
+
+    def __init__(self, resolution=0.001):
+        self.resolution = resolution
+        self._wheels = [[set() for _i in range(1 << bits)]
+                        for bits in self._BITS]
+        # (ticks ahead covered, shift, mask, wheel) of each wheel
+        self._levels = []
+        shift = 0
+        for bits, wheel in zip(self._BITS, self._wheels):
+            shift += bits
+            self._levels.append((1 << shift, shift - bits, (1 << bits) - 1,
+                                 wheel))
+        # the tick of the next slot to run
+        self._tick = self._now()
+        self._count = 0
+        self._thread = None
+        self._wakeup = None
+        # the tick the thread sleeps until, None while it runs timers
+        self._wakeup_tick = None
+
+    def __len__(self):
+        return self._count
+
+    def _now(self):
+        return int(time.time() / self.resolution)
+
+    def call_later(self, seconds, func, *args, **kwargs):
+        """Call func(*args, **kwargs) after seconds.
+
+        func is called from the greenthread of the wheel and must not
+        block. Returns the timer, which has a cancel() method.
+        """
+        return self._start(seconds, func, args, kwargs, False)
+
+    def spawn_later(self, seconds, func, *args, **kwargs):
+        """Call func(*args, **kwargs) after seconds in a greenthread of
+        its own, spawned when the timer is due, so that func may block.
+
+        Returns the timer, which has a cancel() method.
+        """
+        return self._start(seconds, func, args, kwargs, True)
+
+    def _start(self, seconds, func, args, kwargs, spawned):
+        if not self._count:
+            self._tick = self._now()
+        expires = int(math.ceil((time.time() + seconds) / self.resolution))
+        timer = _WheelTimer(self, expires, func, args, kwargs, spawned)
+        self._add(timer)
+        self._count += 1
+        if self._thread is None:
+            self._thread = spawn(self._run)
+        elif self._wakeup_tick is not None and expires < self._wakeup_tick:
+            self._wakeup.set()
+        return timer
+
+    def _add(self, timer):
+        tick = self._tick
+        expires = timer.expires
+        if expires < tick:
+            expires = tick
+        delta = expires - tick
+        for limit, shift, mask, wheel in self._levels:
+            if delta < limit:
+                break
+        else:
+            # beyond the last wheel, wait there for the rest of the time
+            expires = tick + limit - 1
+        slot = wheel[(expires >> shift) & mask]
+        slot.add(timer)
+        timer._slot = slot
+
+    def _cascade(self, level):
+        # move the timers of the current slot of the wheel down
+        _limit, shift, mask, wheel = self._levels[level]
+        index = (self._tick >> shift) & mask
+        slot = wheel[index]
+        wheel[index] = set()
+        for timer in slot:
+            self._add(timer)
+        return index
+
+    def _run_tick(self):
+        index = self._tick & ((1 << self._BITS[0]) - 1)
+        if index == 0:
+            level = 1
+            while level < len(self._wheels) and self._cascade(level) == 0:
+                level += 1
+        slot = self._wheels[0][index]
+        self._wheels[0][index] = set()
+        self._tick += 1
+        while slot:
+            timer = slot.pop()
+            timer._slot = None
+            self._count -= 1
+            if timer._spawned:
+                spawn(self._call, timer)
+            else:
+                self._call(timer)
+
+    @staticmethod
+    def _call(timer):
+        func = timer._func
+        if func is None:
+            # cancelled after it was due, before its greenthread started
+            return
+        try:
+            func(*timer._args, **timer._kwargs)
+        except:
+            LOG.error('hub: uncaught exception in timer: %s',
+                      traceback.format_exc())
+
+    def _next_tick(self):
+        # the tick of the next slot with timers, or of the next cascade
+        mask = (1 << self._BITS[0]) - 1
+        wheel = self._wheels[0]
+        tick = self._tick
+        while True:
+            if wheel[tick & mask]:
+                return tick
+            tick += 1
+            if not tick & mask:
+                return tick
+
+    def _run(self):
+        try:
+            while self._count:
+                now = self._now()
+                while self._tick <= now and self._count:
+                    self._run_tick()
+                if not self._count:
+                    break
+                self._wakeup_tick = self._next_tick()
+                self._wakeup = Event()
+                self._wakeup.wait(max((self._wakeup_tick - now) *
+                                      self.resolution, 0))
+                self._wakeup_tick = None
+        finally:
+            self._thread = None
+
+
+_timer_wheel = TimerWheel()
+
+
+# call_later(seconds, func, *args, **kwargs) on the timer wheel shared
+# by the process. Unlike spawn_after(), no greenthread is created for
+# the timer.
+call_later = _timer_wheel.call_later
+
+# spawn_later(seconds, func, *args, **kwargs) on the shared wheel, for
+# callbacks which may block. Unlike spawn_after(), the greenthread is
+# only created when the timer is due.
+spawn_later = _timer_wheel.spawn_later
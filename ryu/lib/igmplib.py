@@ -107,8 +107,10 @@ class IgmpLib(app_manager.RyuApp):
         msg = evt.msg
         dpid = msg.datapath.id
 
-        req_pkt = packet.Packet(msg.data)
-        req_igmp = req_pkt.get_protocol(igmp.igmp)
+        req_pkt = req_igmp = None
+        if evt.key.ip_proto == inet.IPPROTO_IGMP:
+            req_pkt = evt.packet
+            req_igmp = req_pkt.get_protocol(igmp.igmp)
         if req_igmp:
             if self._querier.dpid == dpid:
                 self._querier.packet_in_handler(req_igmp, msg)
@@ -591,7 +593,7 @@ class IgmpSnooper(IgmpBase):
             datapath, msg.data, in_port, actions)
 
         # wait for REPORT messages.
-        hub.spawn(self._do_timeout_for_query, timeout, datapath)
+        hub.spawn_later(timeout, self._do_timeout_for_query, datapath)
 
     def _do_report(self, report, in_port, msg):
         """the process when the snooper received a REPORT message."""
@@ -713,8 +715,8 @@ class IgmpSnooper(IgmpBase):
         self._do_packet_out(datapath, res_pkt.data, in_port, actions)
 
         # wait for REPORT messages.
-        hub.spawn(self._do_timeout_for_leave, timeout, datapath,
-                  leave.address, in_port)
+        hub.spawn_later(timeout, self._do_timeout_for_leave, datapath,
+                        leave.address, in_port)
 
     def _do_flood(self, in_port, msg):
         """the process when the snooper received a message of the
@@ -726,11 +728,10 @@ class IgmpSnooper(IgmpBase):
         actions = [parser.OFPActionOutput(ofproto.OFPP_FLOOD)]
         self._do_packet_out(datapath, msg.data, in_port, actions)
 
-    def _do_timeout_for_query(self, timeout, datapath):
+    def _do_timeout_for_query(self, datapath):
         """the process when the QUERY from the querier timeout expired."""
         dpid = datapath.id
 
-        hub.sleep(timeout)
         outport = self._to_querier[dpid]['port']
 
         remove_dsts = []
@@ -745,12 +746,11 @@ class IgmpSnooper(IgmpBase):
         for dst in remove_dsts:
             del self._to_hosts[dpid][dst]
 
-    def _do_timeout_for_leave(self, timeout, datapath, dst, in_port):
+    def _do_timeout_for_leave(self, datapath, dst, in_port):
         """the process when the QUERY from the switch timeout expired."""
         parser = datapath.ofproto_parser
         dpid = datapath.id
 
-        hub.sleep(timeout)
         outport = self._to_querier[dpid]['port']
 
         if self._to_hosts[dpid][dst]['ports'][in_port]['out']:
@@ -99,8 +99,10 @@ class LacpLib(app_manager.RyuApp):
     def packet_in_handler(self, evt):
         """PacketIn event handler. when the received packet was LACP,
         proceed it. otherwise, send a event."""
-        req_pkt = packet.Packet(evt.msg.data)
-        if slow.lacp in req_pkt:
+        req_pkt = None
+        if evt.key.eth_type == ether.ETH_TYPE_SLOW:
+            req_pkt = evt.packet
+        if req_pkt is not None and slow.lacp in req_pkt:
             (req_lacp, ) = req_pkt.get_protocols(slow.lacp)
             (req_eth, ) = req_pkt.get_protocols(ethernet.ethernet)
             self._do_lacp(req_lacp, req_eth.src, evt.msg)
@@ -18,7 +18,6 @@ import logging
 from abc import ABCMeta, abstractmethod
 import six
 
-from ryu.lib.packet import packet
 
 LOG = logging.getLogger(__name__)
 
@@ -26,7 +25,7 @@ LOG = logging.getLogger(__name__)
 def packet_in_filter(cls, args=None, logging=False):
     def _packet_in_filter(packet_in_handler):
         def __packet_in_filter(self, ev):
-            pkt = packet.Packet(ev.msg.data)
+            pkt = ev.packet
             if not packet_in_handler.pkt_in_filter.filter(pkt):
                 if logging:
                     LOG.debug('The packet is discarded by %s: %s' % (cls, pkt))
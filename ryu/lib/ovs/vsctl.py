@@ -186,10 +186,13 @@ class VSCtlQueue(object):
 class VSCtlContext(object):
 
     def _invalidate_cache(self):
+        # The dicts are replaced rather than cleared, they may be reused
+        # by a later context (see release_cache()).
         self.cache_valid = False
-        self.bridges.clear()
-        self.ports.clear()
-        self.ifaces.clear()
+        self.cache_key = None
+        self.bridges = {}
+        self.ports = {}
+        self.ifaces = {}
 
     def __init__(self, idl_, txn, ovsrec_open_vswitch):
         super(VSCtlContext, self).__init__()
@@ -204,6 +207,7 @@ class VSCtlContext(object):
 
         # A cache of the contents of the database.
         self.cache_valid = False
+        self.cache_key = None   # state of the replica the cache reflects
         self.bridges = {}       # bridge name -> VSCtlBridge
         self.ports = {}         # port name -> VSCtlPort
         self.ifaces = {}        # iface name -> VSCtlIface
@@ -302,8 +306,27 @@ class VSCtlContext(object):
         self._invalidate_cache()
 
     def populate_cache(self):
+        if self.cache_valid:
+            return
+        cache = self.idl.pop_cache()
+        if cache is not None:
+            self.cache_key, self.bridges, self.ports, self.ifaces = cache
+            self.cache_valid = True
+            return
+        self.cache_key = self.idl.cache_key()
         self._populate_cache(self.idl.tables[vswitch_idl.OVSREC_TABLE_BRIDGE])
 
+    def release_cache(self):
+        """Hands the cache over to the replica for later contexts.
+
+        Only to be called when the transaction of this context left the
+        database unchanged, i.e. the cache holds no uncommitted rows.
+        """
+        if self.cache_valid:
+            self.idl.push_cache((self.cache_key, self.bridges, self.ports,
+                                 self.ifaces))
+        self._invalidate_cache()
+
     @staticmethod
     def port_is_fake_bridge(ovsrec_port):
         return (ovsrec_port.fake_bridge and
@@ -853,6 +876,129 @@ class VSCtlCommand(object):
         return option in self.options
 
 
+class _IdlReplica(idl.Idl):
+    """Monitored replica of the whole database of an OVSDB remote.
+
+    One replica is kept per remote and shared by every VSCtl of the
+    remote. It is kept up to date from monitor updates between commands,
+    so that commands which only read the database are answered from
+    memory and commands which change it only wait for their own
+    transaction, instead of fetching the whole database every time.
+    """
+
+    # Seconds between runs applying the monitor updates received while
+    # no command is running.
+    RUN_INTERVAL = 1
+
+    # Columns the cache of VSCtlContext is built from.
+    _CACHE_COLUMNS = {
+        vswitch_idl.OVSREC_TABLE_BRIDGE: frozenset([
+            vswitch_idl.OVSREC_BRIDGE_COL_NAME,
+            vswitch_idl.OVSREC_BRIDGE_COL_PORTS]),
+        vswitch_idl.OVSREC_TABLE_PORT: frozenset([
+            vswitch_idl.OVSREC_PORT_COL_NAME,
+            vswitch_idl.OVSREC_PORT_COL_INTERFACES,
+            vswitch_idl.OVSREC_PORT_COL_QOS,
+            vswitch_idl.OVSREC_PORT_COL_TAG,
+            vswitch_idl.OVSREC_PORT_COL_FAKE_BRIDGE]),
+        vswitch_idl.OVSREC_TABLE_INTERFACE: frozenset([
+            vswitch_idl.OVSREC_INTERFACE_COL_NAME]),
+        vswitch_idl.OVSREC_TABLE_QOS: frozenset([
+            vswitch_idl.OVSREC_QOS_COL_QUEUES]),
+    }
+
+    # Older ovs libraries have no row change notifications, any change
+    # to the database then invalidates the cache.
+    _HAS_NOTIFY = hasattr(idl.Idl, 'notify')
+
+    def __init__(self, remote, schema_json):
+        schema_helper = idl.SchemaHelper(None, schema_json)
+        schema_helper.register_all()
+        idl.Idl.__init__(self, remote, schema_helper)
+        self.schema_json = schema_json
+        self.lock = hub.Semaphore()
+        self._cache_seqno = 0
+        self._cache = None
+        self._closed = False
+        hub.spawn(self._run_loop)
+
+    def close(self):
+        self._closed = True
+        idl.Idl.close(self)
+
+    def run_all(self):
+        """Applies all the monitor updates received so far."""
+        while self.run():
+            pass
+
+    def _run_loop(self):
+        # Keeps the connection alive and the replica fresh between
+        # commands. Never blocks on the connection, a command may be
+        # waiting on it.
+        while True:
+            hub.sleep(self.RUN_INTERVAL)
+            if self._closed:
+                break
+            if self.lock.acquire(blocking=False):
+                try:
+                    self.run_all()
+                finally:
+                    self.lock.release()
+
+    def notify(self, event, row, updates=None):
+        columns = self._CACHE_COLUMNS.get(row._table.name)
+        if columns is None:
+            return
+        if (event == idl.ROW_UPDATE and updates is not None and
+                columns.isdisjoint(getattr(updates, '_data', columns))):
+            return
+        self._cache_seqno += 1
+
+    def cache_key(self):
+        """Returns the state of the replica a VSCtlContext cache reflects.
+
+        It changes when a row the cache is built from is created,
+        deleted or has one of _CACHE_COLUMNS changed, and when the
+        replica is reloaded after a reconnection.
+        """
+        if self._HAS_NOTIFY:
+            seqno = self._cache_seqno
+        else:
+            seqno = self.change_seqno
+        return (seqno, [self.tables[name].rows
+                        for name in self._CACHE_COLUMNS])
+
+    def _is_current(self, key):
+        seqno, rows = self.cache_key()
+        return (key[0] == seqno and
+                all(old is new for old, new in zip(key[1], rows)))
+
+    def pop_cache(self):
+        """Takes the cache released by the last context, if still current.
+
+        Returns None if there is none.
+        """
+        cache = self._cache
+        self._cache = None
+        if cache is None or not self._is_current(cache[0]):
+            return None
+        return cache
+
+    def push_cache(self, cache):
+        self._cache = cache
+
+
+# remote -> _IdlReplica
+_replicas = {}
+
+
+def close_replica(remote):
+    """Closes the database replica kept for remote, if any."""
+    replica = _replicas.pop(remote, None)
+    if replica is not None:
+        replica.close()
+
+
 class VSCtl(object):
 
     def _reset(self):
@@ -893,8 +1039,12 @@ class VSCtl(object):
 
     def _init_schema_helper(self):
         if self.schema_json is None:
-            self.schema_json = self._rpc_get_schema_json(
-                vswitch_idl.OVSREC_DB_NAME)
+            replica = _replicas.get(self.remote)
+            if replica is not None:
+                self.schema_json = replica.schema_json
+            else:
+                self.schema_json = self._rpc_get_schema_json(
+                    vswitch_idl.OVSREC_DB_NAME)
             schema_helper = idl.SchemaHelper(None, self.schema_json)
             schema_helper.register_all()
             self.schema = schema_helper.get_idl_schema()
@@ -956,11 +1106,14 @@ class VSCtl(object):
             if ctx.try_again:
                 return False
         LOG.debug('result:\n%s', [command.result for command in commands])
-        ctx.done()
 
         # TODO:XXX check if created symbols are really created, referenced.
 
         status = txn.commit_block()
+        if status == idl.Transaction.UNCHANGED:
+            ctx.release_cache()
+        else:
+            ctx.done()
         next_cfg = 0
         if self.wait_for_reload and status == idl.Transaction.SUCCESS:
             next_cfg = txn.get_increment_new_value()
@@ -1012,11 +1165,29 @@ class VSCtl(object):
         self._init_schema_helper()
         self._run_prerequisites(commands)
 
-        idl_ = idl.Idl(self.remote, self.schema_helper)
+        idl_ = self._get_replica()
+        with idl_.lock:
+            try:
+                self._do_main_locked(idl_, commands)
+            finally:
+                if self.txn:
+                    self.txn.abort()
+                    self.txn = None
+
+    def _get_replica(self):
+        replica = _replicas.get(self.remote)
+        if replica is None:
+            replica = _IdlReplica(self.remote, self.schema_json)
+            _replicas[self.remote] = replica
+        return replica
+
+    def _do_main_locked(self, idl_, commands):
+        idl_.run_all()
         seqno = idl_.change_seqno
-        while True:
+        if seqno == 0:
+            # No contents received yet.
             self._idl_wait(idl_, seqno)
-
+        while True:
             seqno = idl_.change_seqno
             if self._do_vsctl(idl_, commands):
                 break
@@ -1027,7 +1198,7 @@ class VSCtl(object):
             # TODO:XXX
             # ovsdb_symbol_table_destroy(symtab)
 
-        idl_.close()
+            self._idl_wait(idl_, seqno)
 
     def _run_command(self, commands):
         """
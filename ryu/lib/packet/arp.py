@@ -79,13 +79,18 @@ class arp(packet_base.PacketBase):
 
     @classmethod
     def parser(cls, buf):
+        return cls._parser_by_offset(buf)
+
+    @classmethod
+    def parser_from(cls, buf, offset, end):
         (hwtype, proto, hlen, plen, opcode, src_mac, src_ip,
-         dst_mac, dst_ip) = struct.unpack_from(cls._PACK_STR, buf)
-        return cls(hwtype, proto, hlen, plen, opcode,
-                   addrconv.mac.bin_to_text(src_mac),
-                   addrconv.ipv4.bin_to_text(src_ip),
-                   addrconv.mac.bin_to_text(dst_mac),
-                   addrconv.ipv4.bin_to_text(dst_ip)), None, buf[arp._MIN_LEN:]
+         dst_mac, dst_ip) = cls._unpack_from(buf, offset, end)
+        return (cls(hwtype, proto, hlen, plen, opcode,
+                    addrconv.mac.bin_to_text(src_mac),
+                    addrconv.ipv4.bin_to_text(src_ip),
+                    addrconv.mac.bin_to_text(dst_mac),
+                    addrconv.ipv4.bin_to_text(dst_ip)),
+                None, buf, offset + arp._MIN_LEN, end)
 
     def serialize(self, payload, prev):
         return struct.pack(arp._PACK_STR, self.hwtype, self.proto,
@@ -150,6 +150,7 @@ BGP_ERROR_SUB_OUT_OF_RESOURCES = 8
 
 
 class _Value(object):
+    __slots__ = ()
     _VALUE_PACK_STR = None
     _VALUE_FIELDS = ['value']
 
@@ -162,7 +163,8 @@ class _Value(object):
             ourfields[f] = v
         kwargs.update(extra_kwargs)
         super(cls, self).__init__(**kwargs)
-        self.__dict__.update(ourfields)
+        for f, v in ourfields.iteritems():
+            setattr(self, f, v)
 
     @classmethod
     def parse_value(cls, buf):
@@ -179,6 +181,7 @@ class _Value(object):
 
 
 class _TypeDisp(object):
+    __slots__ = ()
     _TYPES = {}
     _REV_TYPES = None
     _UNKNOWN_TYPE = None
@@ -602,6 +605,7 @@ def pad(bin, len_):
 
 
 class _RouteDistinguisher(StringifyMixin, _TypeDisp, _Value):
+    __slots__ = ('type', 'admin', 'assigned')
     _PACK_STR = '!H'
     TWO_OCTET_AS = 0
     IPV4_ADDRESS = 1
@@ -649,6 +653,7 @@ class _RouteDistinguisher(StringifyMixin, _TypeDisp, _Value):
 
 @_RouteDistinguisher.register_type(_RouteDistinguisher.TWO_OCTET_AS)
 class BGPTwoOctetAsRD(_RouteDistinguisher):
+    __slots__ = ()
     _VALUE_PACK_STR = '!HI'
     _VALUE_FIELDS = ['admin', 'assigned']
 
@@ -658,6 +663,7 @@ class BGPTwoOctetAsRD(_RouteDistinguisher):
 
 @_RouteDistinguisher.register_type(_RouteDistinguisher.IPV4_ADDRESS)
 class BGPIPv4AddressRD(_RouteDistinguisher):
+    __slots__ = ()
     _VALUE_PACK_STR = '!4sH'
     _VALUE_FIELDS = ['admin', 'assigned']
     _TYPE = {
@@ -689,6 +695,7 @@ class BGPIPv4AddressRD(_RouteDistinguisher):
 
 @_RouteDistinguisher.register_type(_RouteDistinguisher.FOUR_OCTET_AS)
 class BGPFourOctetAsRD(_RouteDistinguisher):
+    __slots__ = ()
     _VALUE_PACK_STR = '!IH'
     _VALUE_FIELDS = ['admin', 'assigned']
 
@@ -699,6 +706,10 @@ class BGPFourOctetAsRD(_RouteDistinguisher):
 
 @six.add_metaclass(abc.ABCMeta)
 class _AddrPrefix(StringifyMixin):
+    # NLRIs are held by every path and destination of the BGP tables.
+    # A parsed prefix keeps its on-wire octets in _bin, and addr is
+    # decoded from them when it is first asked for.
+    __slots__ = ('length', '_addr', '_bin')
     _PACK_STR = '!B'  # length
 
     def __init__(self, length, addr, prefixes=None):
@@ -713,6 +724,22 @@ class _AddrPrefix(StringifyMixin):
             addr = prefixes + (addr,)
         self.addr = addr
 
+    @property
+    def addr(self):
+        addr = self._addr
+        if addr is None:
+            addr = self._addr = self._from_bin(self._bin)
+        return addr
+
+    @addr.setter
+    def addr(self, addr):
+        self._addr = addr
+        self._bin = None
+
+    def stringify_attrs(self):
+        yield 'addr', self.addr
+        yield 'length', self.length
+
     @staticmethod
     @abc.abstractmethod
     def _to_bin(addr):
@@ -723,35 +750,65 @@ class _AddrPrefix(StringifyMixin):
     def _from_bin(addr):
         pass
 
+    @classmethod
+    def _from_wire(cls, length, bin_addr):
+        prefix = cls(length=length, addr=cls._from_bin(bin_addr))
+        prefix._bin = bin_addr
+        return prefix
+
     @classmethod
     def parser(cls, buf):
         (length, ) = struct.unpack_from(cls._PACK_STR, buffer(buf))
         rest = buf[struct.calcsize(cls._PACK_STR):]
         byte_length = (length + 7) / 8
-        addr = cls._from_bin(rest[:byte_length])
+        assert len(rest) >= byte_length
+        prefix = cls._from_wire(length, bytes(rest[:byte_length]))
         rest = rest[byte_length:]
-        return cls(length=length, addr=addr), rest
+        return prefix, rest
+
+    @classmethod
+    def parser_list(cls, buf):
+        """
+        Parse consecutive prefixes filling buf, e.g. the Withdrawn
+        Routes or NLRI field of an UPDATE, and return a list of them.
+        """
+        buf = bytes(buf)
+        end = len(buf)
+        from_wire = cls._from_wire
+        prefixes = []
+        offset = 0
+        while offset < end:
+            length = ord(buf[offset])
+            next_offset = offset + 1 + (length + 7) / 8
+            assert next_offset <= end
+            prefixes.append(from_wire(length, buf[offset + 1:next_offset]))
+            offset = next_offset
+        return prefixes
 
     def serialize(self):
         # fixup
         byte_length = (self.length + 7) / 8
-        bin_addr = self._to_bin(self.addr)
-        if (self.length % 8) == 0:
-            bin_addr = bin_addr[:byte_length]
-        else:
+        bin_addr = self._bin
+        if bin_addr is None or len(bin_addr) != byte_length:
+            bin_addr = self._to_bin(self.addr)[:byte_length]
+        if self.length % 8:
             # clear trailing bits in the last octet.
             # rfc doesn't require this.
             mask = 0xff00 >> (self.length % 8)
             last_byte = chr(ord(bin_addr[byte_length - 1]) & mask)
             bin_addr = bin_addr[:byte_length - 1] + last_byte
-        self.addr = self._from_bin(bin_addr)
+        if bin_addr != self._bin:
+            # addr is decoded again from the octets sent
+            self._addr = None
+            self._bin = bytes(bin_addr)
 
-        buf = bytearray()
-        msg_pack_into(self._PACK_STR, buf, 0, self.length)
-        return buf + bytes(bin_addr)
+        return bytearray(struct.pack(self._PACK_STR, self.length) +
+                         self._bin)
 
 
 class _BinAddrPrefix(_AddrPrefix):
+    __slots__ = ()
+
     @staticmethod
     def _to_bin(addr):
         return addr
@@ -762,6 +819,7 @@ class _BinAddrPrefix(_AddrPrefix):
 
 
 class _LabelledAddrPrefix(_AddrPrefix):
+    __slots__ = ()
     _LABEL_PACK_STR = '!3B'
 
     def __init__(self, length, addr, labels=[], **kwargs):
@@ -841,6 +899,8 @@ class _LabelledAddrPrefix(_AddrPrefix):
 
 
 class _UnlabelledAddrPrefix(_AddrPrefix):
+    __slots__ = ()
+
     @classmethod
     def _to_bin(cls, addr):
         return cls._prefix_to_bin((addr,))
@@ -850,8 +910,32 @@ class _UnlabelledAddrPrefix(_AddrPrefix):
         (addr,) = cls._prefix_from_bin(binaddr)
         return addr
 
+    @classmethod
+    def _from_wire(cls, length, bin_addr):
+        # __init__ is not called, so that the address is left undecoded
+        # until it is used; its length is checked as decoding would
+        assert length <= cls._ADDR_LEN * 8
+        prefix = cls.__new__(cls)
+        prefix.length = length
+        prefix._addr = None
+        prefix._bin = bin_addr
+        return prefix
+
+    @property
+    def packed_addr(self):
+        """
+        The address in network byte order, as socket.inet_pton()
+        returns.
+        """
+        if self._bin is None:
+            return self._to_bin(self.addr)
+        return pad(self._bin, self._ADDR_LEN)
+
 
 class _IPAddrPrefix(_AddrPrefix):
+    __slots__ = ()
+    _ADDR_LEN = 4
+
     @staticmethod
     def _prefix_to_bin(addr):
         (addr,) = addr
@@ -863,6 +947,9 @@ class _IPAddrPrefix(_AddrPrefix):
 
 
 class _IP6AddrPrefix(_AddrPrefix):
+    __slots__ = ()
+    _ADDR_LEN = 16
+
     @staticmethod
     def _prefix_to_bin(addr):
         (addr,) = addr
@@ -874,6 +961,7 @@ class _IP6AddrPrefix(_AddrPrefix):
 
 
 class _VPNAddrPrefix(_AddrPrefix):
+    __slots__ = ()
     _RD_PACK_STR = '!Q'
 
     def __init__(self, length, addr, prefixes=(), route_dist=0):
@@ -910,6 +998,7 @@ class _VPNAddrPrefix(_AddrPrefix):
 
 
 class IPAddrPrefix(_UnlabelledAddrPrefix, _IPAddrPrefix):
+    __slots__ = ()
     ROUTE_FAMILY = RF_IPv4_UC
     _TYPE = {
         'ascii': [
@@ -927,6 +1016,7 @@ class IPAddrPrefix(_UnlabelledAddrPrefix, _IPAddrPrefix):
 
 
 class IP6AddrPrefix(_UnlabelledAddrPrefix, _IP6AddrPrefix):
+    __slots__ = ()
     ROUTE_FAMILY = RF_IPv6_UC
     _TYPE = {
         'ascii': [
@@ -944,15 +1034,18 @@ class IP6AddrPrefix(_UnlabelledAddrPrefix, _IP6AddrPrefix):
 
 
 class LabelledIPAddrPrefix(_LabelledAddrPrefix, _IPAddrPrefix):
+    __slots__ = ()
     ROUTE_FAMILY = RF_IPv4_MPLS
 
 
 class LabelledIP6AddrPrefix(_LabelledAddrPrefix, _IP6AddrPrefix):
+    __slots__ = ()
     ROUTE_FAMILY = RF_IPv6_MPLS
 
 
 class LabelledVPNIPAddrPrefix(_LabelledAddrPrefix, _VPNAddrPrefix,
                               _IPAddrPrefix):
+    __slots__ = ()
     ROUTE_FAMILY = RF_IPv4_VPN
 
     @property
@@ -976,6 +1069,7 @@ class LabelledVPNIPAddrPrefix(_LabelledAddrPrefix, _VPNAddrPrefix,
 
 class LabelledVPNIP6AddrPrefix(_LabelledAddrPrefix, _VPNAddrPrefix,
                                _IP6AddrPrefix):
+    __slots__ = ()
     ROUTE_FAMILY = RF_IPv6_VPN
 
     @property
@@ -1004,6 +1098,7 @@ class RouteTargetMembershipNLRI(StringifyMixin):
     the MP_REACH_NLRI and MP_UNREACH_NLRI attributes.
     """
 
+    __slots__ = ('origin_as', 'route_target')
     ROUTE_FAMILY = RF_RTC_UC
     DEFAULT_AS = '0:0'
     DEFAULT_RT = '0:0'
@@ -1326,7 +1421,7 @@ class BGPOptParamCapabilityCarryingLabelInfo(_OptParamEmptyCapability):
 
 
 class BGPWithdrawnRoute(IPAddrPrefix):
-    pass
+    __slots__ = ()
 
 
 class _PathAttribute(StringifyMixin, _TypeDisp, _Value):
@@ -2006,10 +2101,7 @@ class BGPPathAttributeMpReachNLRI(_PathAttribute):
         assert reserved == '\0'
         binnlri = rest[1:]
         addr_cls = _get_addr_class(afi, safi)
-        nlri = []
-        while binnlri:
-            n, binnlri = addr_cls.parser(binnlri)
-            nlri.append(n)
+        nlri = addr_cls.parser_list(binnlri)
 
         rf = RouteFamily(afi, safi)
         if rf == RF_IPv6_VPN:
@@ -2098,10 +2190,7 @@ class BGPPathAttributeMpUnreachNLRI(_PathAttribute):
         (afi, safi,) = struct.unpack_from(cls._VALUE_PACK_STR, buffer(buf))
         binnlri = buf[struct.calcsize(cls._VALUE_PACK_STR):]
         addr_cls = _get_addr_class(afi, safi)
-        nlri = []
-        while binnlri:
-            n, binnlri = addr_cls.parser(binnlri)
-            nlri.append(n)
+        nlri = addr_cls.parser_list(binnlri)
         return {
             'afi': afi,
             'safi': safi,
@@ -2123,7 +2212,7 @@ class BGPPathAttributeMpUnreachNLRI(_PathAttribute):
 
 
 class BGPNLRI(IPAddrPrefix):
-    pass
+    __slots__ = ()
 
 
 class BGPMessage(packet_base.PacketBase, _TypeDisp):
@@ -2168,9 +2257,17 @@ class BGPMessage(packet_base.PacketBase, _TypeDisp):
                 '%d < %d' % (len(buf), msglen))
         binmsg = buf[cls._HDR_LEN:msglen]
         rest = buf[msglen:]
+        return cls.parser_body(marker, len_, type_, binmsg), rest
+
+    @classmethod
+    def parser_body(cls, marker, len_, type_, binmsg):
+        """Build a message from an already decoded header.
+
+        binmsg is the message body, i.e. the bytes following the header.
+        """
         subcls = cls._lookup_type(type_)
         kwargs = subcls.parser(binmsg)
-        return subcls(marker=marker, len_=len_, type_=type_, **kwargs), rest
+        return subcls(marker=marker, len_=len_, type_=type_, **kwargs)
 
     def serialize(self):
         # fixup
@@ -2346,19 +2443,13 @@ class BGPUpdate(BGPMessage):
         binpathattrs = buffer(buf[offset + 2:
                                   offset + 2 + total_path_attribute_len])
         binnlri = buffer(buf[offset + 2 + total_path_attribute_len:])
-        withdrawn_routes = []
-        while binroutes:
-            r, binroutes = BGPWithdrawnRoute.parser(binroutes)
-            withdrawn_routes.append(r)
+        withdrawn_routes = BGPWithdrawnRoute.parser_list(binroutes)
         path_attributes = []
         while binpathattrs:
             pa, binpathattrs = _PathAttribute.parser(binpathattrs)
             path_attributes.append(pa)
         offset += 2 + total_path_attribute_len
-        nlri = []
-        while binnlri:
-            n, binnlri = BGPNLRI.parser(binnlri)
-            nlri.append(n)
+        nlri = BGPNLRI.parser_list(binnlri)
         return {
             "withdrawn_routes_len": withdrawn_routes_len,
             "withdrawn_routes": withdrawn_routes,
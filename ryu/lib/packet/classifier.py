@@ -0,0 +1,174 @@
+# Copyright (C) 2014 Nippon Telegraph and Telephone Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Header-only classification of frames.
+
+classify() reads the L2 to L4 fields most packet-in handlers look at
+without building a Packet, by unpacking the headers in place with
+precompiled structs.  The headers followed are the ones Packet decodes
+through the same registries of protocol classes, so a field is set
+exactly when Packet(data) has the corresponding protocol header.
+"""
+
+import collections
+import struct
+
+from ryu.lib import addrconv
+from . import ethernet
+from . import ipv4
+from . import ipv6
+from . import mpls
+from . import packet
+from . import sctp
+from . import tcp
+from . import udp
+from . import vlan
+
+
+class PacketKey(collections.namedtuple('PacketKey', [
+        'eth_dst', 'eth_src', 'eth_type', 'vlan_vid', 'ip_src', 'ip_dst',
+        'ip_proto', 'src_port', 'dst_port'])):
+    """The common L2 to L4 fields of a frame.
+
+    ========== ==========================================================
+    Attribute  Description
+    ========== ==========================================================
+    eth_dst    Destination MAC address of the ethernet header
+    eth_src    Source MAC address of the ethernet header
+    eth_type   Ethertype after the VLAN tags, if any
+    vlan_vid   VLAN ID of the outermost VLAN tag
+    ip_src     Source address of the IPv4 or IPv6 header
+    ip_dst     Destination address of the IPv4 or IPv6 header
+    ip_proto   Protocol of the IPv4 header, or the last next header of
+               the IPv6 header
+    src_port   Source port of the TCP, UDP or SCTP header
+    dst_port   Destination port of the TCP, UDP or SCTP header
+    ========== ==========================================================
+
+    Fields are None when the frame has no such header.  Addresses are
+    in text representation as in the protocol classes.
+    """
+    __slots__ = ()
+
+_EMPTY = PacketKey(*([None] * len(PacketKey._fields)))
+
+_ETH = struct.Struct('!6s6sH')
+_VLAN = struct.Struct('!HH')
+_MPLS = struct.Struct('!I')
+# version and header length, total length, protocol, src, dst
+_IPV4 = struct.Struct('!BxH5xB2x4s4s')
+# payload length, next header, src, dst
+_IPV6 = struct.Struct('!4xHBx16s16s')
+# ports, data offset
+_TCP = struct.Struct('!HH8xB')
+_UDP = struct.Struct('!HH')
+
+_VLANS = (vlan.vlan, vlan.svlan)
+_L4 = (tcp.tcp, udp.udp, sctp.sctp)
+
+
+def _classify(data):
+    # Returns None for frames only Packet can classify.
+    end = len(data)
+    if end < ethernet.ethernet._MIN_LEN:
+        return _EMPTY
+    eth_dst, eth_src, eth_type = _ETH.unpack_from(data)
+    offset = ethernet.ethernet._MIN_LEN
+    cls = ethernet.ethernet.get_packet_type(eth_type)
+    vlan_vid = None
+    while cls in _VLANS and end - offset >= cls._MIN_LEN:
+        tci, eth_type = _VLAN.unpack_from(data, offset)
+        offset += cls._MIN_LEN
+        if vlan_vid is None:
+            vlan_vid = tci & 0xfff
+        cls = vlan.vlan.get_packet_type(eth_type)
+    while cls is mpls.mpls and end - offset >= cls._MIN_LEN:
+        (label,) = _MPLS.unpack_from(data, offset)
+        offset += cls._MIN_LEN
+        if label & 0x100:
+            cls = ipv4.ipv4
+
+    ip_src = ip_dst = ip_proto = src_port = dst_port = None
+    if cls is ipv4.ipv4 and end - offset >= cls._MIN_LEN:
+        (ver_hlen, total_length, proto, src,
+         dst) = _IPV4.unpack_from(data, offset)
+        # Packet leaves out headers of length 0, and goes on after them.
+        if ver_hlen & 0xf:
+            ip_src = addrconv.ipv4.bin_to_text(src)
+            ip_dst = addrconv.ipv4.bin_to_text(dst)
+            ip_proto = proto
+        end = min(offset + total_length, end)
+        offset += (ver_hlen & 0xf) * 4
+        cls = cls.get_packet_type(proto)
+    elif cls is ipv6.ipv6 and end - offset >= cls._MIN_LEN:
+        (payload_length, ip_proto, src,
+         dst) = _IPV6.unpack_from(data, offset)
+        if ip_proto in ipv6.ipv6._IPV6_EXT_HEADER_TYPE:
+            return None
+        ip_src = addrconv.ipv6.bin_to_text(src)
+        ip_dst = addrconv.ipv6.bin_to_text(dst)
+        offset += cls._MIN_LEN
+        end = min(offset + payload_length, end)
+        cls = cls.get_packet_type(ip_proto)
+    else:
+        cls = None
+    if cls is sctp.sctp:
+        # Packet drops sctp when its chunks do not decode
+        return None
+    if cls is tcp.tcp and end - offset >= cls._MIN_LEN:
+        src_port, dst_port, data_offset = _TCP.unpack_from(data, offset)
+        if not data_offset >> 4:
+            src_port = dst_port = None
+    elif cls is udp.udp and end - offset >= cls._MIN_LEN:
+        src_port, dst_port = _UDP.unpack_from(data, offset)
+
+    return PacketKey(addrconv.mac.bin_to_text(eth_dst),
+                     addrconv.mac.bin_to_text(eth_src), eth_type, vlan_vid,
+                     ip_src, ip_dst, ip_proto, src_port, dst_port)
+
+
+def packet_key(pkt):
+    """Return the PacketKey of a decoded Packet *pkt*."""
+    fields = {}
+    for p in pkt.protocols:
+        if isinstance(p, ethernet.ethernet):
+            fields['eth_dst'] = p.dst
+            fields['eth_src'] = p.src
+            fields['eth_type'] = p.ethertype
+        elif isinstance(p, _VLANS):
+            fields.setdefault('vlan_vid', p.vid)
+            fields['eth_type'] = p.ethertype
+        elif isinstance(p, ipv4.ipv4):
+            fields.update(ip_src=p.src, ip_dst=p.dst, ip_proto=p.proto)
+        elif isinstance(p, ipv6.ipv6):
+            nxt = p.nxt
+            if p.ext_hdrs:
+                nxt = p.ext_hdrs[-1].nxt
+            fields.update(ip_src=p.src, ip_dst=p.dst, ip_proto=nxt)
+        elif isinstance(p, _L4):
+            fields.update(src_port=p.src_port, dst_port=p.dst_port)
+    return _EMPTY._replace(**fields)
+
+
+def classify(data):
+    """Return the PacketKey of the frame *data*.
+
+    Frames with IPv6 extension headers or SCTP are decoded with Packet.
+    """
+    key = _classify(data)
+    if key is None:
+        key = packet_key(packet.Packet(data))
+    return key
@@ -54,11 +54,15 @@ class ethernet(packet_base.PacketBase):
 
     @classmethod
     def parser(cls, buf):
-        dst, src, ethertype = struct.unpack_from(cls._PACK_STR, buf)
+        return cls._parser_by_offset(buf)
+
+    @classmethod
+    def parser_from(cls, buf, offset, end):
+        dst, src, ethertype = cls._unpack_from(buf, offset, end)
         return (cls(addrconv.mac.bin_to_text(dst),
                     addrconv.mac.bin_to_text(src), ethertype),
                 ethernet.get_packet_type(ethertype),
-                buf[ethernet._MIN_LEN:])
+                buf, offset + ethernet._MIN_LEN, end)
 
     def serialize(self, payload, prev):
         return struct.pack(ethernet._PACK_STR,
@@ -102,15 +102,20 @@ class ipv4(packet_base.PacketBase):
 
     @classmethod
     def parser(cls, buf):
+        return cls._parser_by_offset(buf)
+
+    @classmethod
+    def parser_from(cls, buf, buf_offset, end):
         (version, tos, total_length, identification, flags, ttl, proto, csum,
-         src, dst) = struct.unpack_from(cls._PACK_STR, buf)
+         src, dst) = cls._unpack_from(buf, buf_offset, end)
         header_length = version & 0xf
         version = version >> 4
         offset = flags & ((1 << 13) - 1)
         flags = flags >> 13
         length = header_length * 4
         if length > ipv4._MIN_LEN:
-            option = buf[ipv4._MIN_LEN:length]
+            option = buf[buf_offset + ipv4._MIN_LEN:
+                         min(buf_offset + length, end)]
         else:
             option = None
         msg = cls(version, header_length, tos, total_length, identification,
@@ -118,7 +123,8 @@ class ipv4(packet_base.PacketBase):
                   addrconv.ipv4.bin_to_text(src),
                   addrconv.ipv4.bin_to_text(dst), option)
 
-        return msg, ipv4.get_packet_type(proto), buf[length:total_length]
+        return (msg, ipv4.get_packet_type(proto), buf, buf_offset + length,
+                min(buf_offset + total_length, end))
 
     def serialize(self, payload, prev):
         length = len(self)
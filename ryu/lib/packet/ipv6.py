@@ -94,20 +94,24 @@ class ipv6(packet_base.PacketBase):
 
     @classmethod
     def parser(cls, buf):
-        (v_tc_flow, payload_length, nxt, hlim, src, dst) = struct.unpack_from(
-            cls._PACK_STR, buf)
+        return cls._parser_by_offset(buf)
+
+    @classmethod
+    def parser_from(cls, buf, offset, end):
+        (v_tc_flow, payload_length, nxt, hlim, src, dst) = cls._unpack_from(
+            buf, offset, end)
         version = v_tc_flow >> 28
         traffic_class = (v_tc_flow >> 20) & 0xff
         flow_label = v_tc_flow & 0xfffff
         hop_limit = hlim
-        offset = cls._MIN_LEN
+        offset += cls._MIN_LEN
         last = nxt
         ext_hdrs = []
         while True:
             cls_ = cls._IPV6_EXT_HEADER_TYPE.get(last)
             if not cls_:
                 break
-            hdr = cls_.parser(buf[offset:])
+            hdr = cls_.parser(buf[offset:end])
             ext_hdrs.append(hdr)
             offset += len(hdr)
             last = hdr.nxt
@@ -115,7 +119,7 @@ class ipv6(packet_base.PacketBase):
                   nxt, hop_limit, addrconv.ipv6.bin_to_text(src),
                   addrconv.ipv6.bin_to_text(dst), ext_hdrs)
         return (msg, ipv6.get_packet_type(last),
-                buf[offset:offset + payload_length])
+                buf, offset, min(offset + payload_length, end))
 
     def serialize(self, payload, prev):
         hdr = bytearray(40)
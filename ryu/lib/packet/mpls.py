@@ -53,16 +53,20 @@ class mpls(packet_base.PacketBase):
 
     @classmethod
     def parser(cls, buf):
-        (label,) = struct.unpack_from(cls._PACK_STR, buf)
+        return cls._parser_by_offset(buf)
+
+    @classmethod
+    def parser_from(cls, buf, offset, end):
+        (label,) = cls._unpack_from(buf, offset, end)
         ttl = label & 0xff
         bsb = (label >> 8) & 1
         exp = (label >> 9) & 7
         label = label >> 12
         msg = cls(label, exp, bsb, ttl)
         if bsb:
-            return msg, ipv4.ipv4, buf[msg._MIN_LEN:]
+            return msg, ipv4.ipv4, buf, offset + msg._MIN_LEN, end
         else:
-            return msg, mpls, buf[msg._MIN_LEN:]
+            return msg, mpls, buf, offset + msg._MIN_LEN, end
 
     def serialize(self, payload, prev):
         val = self.label << 12 | self.exp << 9 | self.bsb << 8 | self.ttl
@@ -45,16 +45,19 @@ class Packet(object):
             self._parser(parse_cls)
 
     def _parser(self, cls):
-        rest_data = self.data
+        buf = self.data
+        offset = 0
+        end = len(buf)
         while cls:
             try:
-                proto, cls, rest_data = cls.parser(rest_data)
+                proto, cls, buf, offset, end = cls.parser_from(buf, offset,
+                                                               end)
             except struct.error:
                 break
             if proto:
                 self.protocols.append(proto)
-        if rest_data:
-            self.protocols.append(rest_data)
+        if offset < end:
+            self.protocols.append(buf[offset:end])
 
     def serialize(self):
         """Encode a packet and store the resulted bytearray in self.data.
@@ -15,10 +15,23 @@
 
 import abc
 import six
+import struct
+
 from ryu.lib import stringify
 
 
-@six.add_metaclass(abc.ABCMeta)
+class _PacketBaseMeta(abc.ABCMeta):
+    def __init__(cls, name, bases, dict_):
+        super(_PacketBaseMeta, cls).__init__(name, bases, dict_)
+        if 'parser_from' in dict_:
+            cls._parser_from_in_place = dict_['parser_from']
+        elif 'parser' in dict_:
+            # A subclass overriding parser() only is decoded by it, not
+            # by the parser_from() it would inherit.
+            cls.parser_from = PacketBase.__dict__['parser_from']
+
+
+@six.add_metaclass(_PacketBaseMeta)
 class PacketBase(stringify.StringifyMixin):
     """A base class for a protocol (ethernet, ipv4, ...) header."""
     _TYPES = {}
@@ -70,6 +83,51 @@ class PacketBase(stringify.StringifyMixin):
         """
         pass
 
+    @classmethod
+    def parser_from(cls, buf, offset, end):
+        """Decode a protocol header in place.
+
+        This method is used only when decoding a packet.
+
+        Decode a protocol header at offset *offset* in *buf*, where
+        buf[offset:end] is the header and the rest of the packet.
+        Returns the following five objects.
+
+        * An object to describe the decoded header.
+
+        * A packet_base.PacketBase subclass appropriate for the rest of
+          the packet.  None when the rest of the packet should be considered
+          as raw payload.
+
+        * The buffer, offset and end of the rest of the packet.
+
+        The default implementation calls parser() with a copy of
+        buf[offset:end] and returns the rest of the packet as a new buffer.
+        Subclasses override it to decode a packet without copying it at
+        each header.  Their own subclasses which override parser() but not
+        parser_from() get the default implementation back.
+        """
+        msg, next_cls, rest = cls.parser(buf[offset:end])
+        # parsers may return None for no rest
+        rest = rest or ''
+        return msg, next_cls, rest, 0, len(rest)
+
+    @classmethod
+    def _parser_by_offset(cls, buf):
+        # parser() for subclasses which implement parser_from()
+        msg, next_cls, buf, offset, end = cls._parser_from_in_place(
+            buf, 0, len(buf))
+        return msg, next_cls, buf[offset:end]
+
+    @classmethod
+    def _unpack_from(cls, buf, offset, end):
+        # struct.unpack_from(cls._PACK_STR, buf[offset:end]) without
+        # copying buf.
+        if end - offset < cls._MIN_LEN:
+            raise struct.error('unpack_from requires a buffer of at least '
+                               '%d bytes' % cls._MIN_LEN)
+        return struct.unpack_from(cls._PACK_STR, buf, offset)
+
     def serialize(self, payload, prev):
         """Encode a protocol header.
 
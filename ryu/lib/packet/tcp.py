@@ -67,19 +67,24 @@ class tcp(packet_base.PacketBase):
 
     @classmethod
     def parser(cls, buf):
+        return cls._parser_by_offset(buf)
+
+    @classmethod
+    def parser_from(cls, buf, buf_offset, end):
         (src_port, dst_port, seq, ack, offset, bits, window_size,
-         csum, urgent) = struct.unpack_from(cls._PACK_STR, buf)
+         csum, urgent) = cls._unpack_from(buf, buf_offset, end)
         offset = offset >> 4
         bits = bits & 0x3f
         length = offset * 4
         if length > tcp._MIN_LEN:
-            option = buf[tcp._MIN_LEN:length]
+            option = buf[buf_offset + tcp._MIN_LEN:
+                         min(buf_offset + length, end)]
         else:
             option = None
         msg = cls(src_port, dst_port, seq, ack, offset, bits,
                   window_size, csum, urgent, option)
 
-        return msg, None, buf[length:]
+        return msg, None, buf, buf_offset + length, end
 
     def serialize(self, payload, prev):
         offset = self.offset << 4
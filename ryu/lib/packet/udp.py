@@ -50,10 +50,15 @@ class udp(packet_base.PacketBase):
 
     @classmethod
     def parser(cls, buf):
-        (src_port, dst_port, total_length, csum) = struct.unpack_from(
-            cls._PACK_STR, buf)
+        return cls._parser_by_offset(buf)
+
+    @classmethod
+    def parser_from(cls, buf, offset, end):
+        (src_port, dst_port, total_length, csum) = cls._unpack_from(
+            buf, offset, end)
         msg = cls(src_port, dst_port, total_length, csum)
-        return msg, None, buf[msg._MIN_LEN:total_length]
+        return (msg, None, buf, offset + msg._MIN_LEN,
+                min(offset + total_length, end))
 
     def serialize(self, payload, prev):
         if self.total_length == 0:
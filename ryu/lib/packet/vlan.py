@@ -43,12 +43,17 @@ class _vlan(packet_base.PacketBase):
 
     @classmethod
     def parser(cls, buf):
-        tci, ethertype = struct.unpack_from(cls._PACK_STR, buf)
+        return cls._parser_by_offset(buf)
+
+    @classmethod
+    def parser_from(cls, buf, offset, end):
+        tci, ethertype = cls._unpack_from(buf, offset, end)
         pcp = tci >> 13
         cfi = (tci >> 12) & 1
         vid = tci & ((1 << 12) - 1)
         return (cls(pcp, cfi, vid, ethertype),
-                vlan.get_packet_type(ethertype), buf[vlan._MIN_LEN:])
+                vlan.get_packet_type(ethertype),
+                buf, offset + vlan._MIN_LEN, end)
 
     def serialize(self, payload, prev):
         tci = self.pcp << 13 | self.cfi << 12 | self.vid
@@ -22,7 +22,6 @@ from ryu.controller import event
 from ryu.controller import handler
 from ryu.controller import ofp_event
 from ryu.controller.handler import set_ev_cls
-from ryu.exception import RyuException
 from ryu.exception import OFPUnknownVersion
 from ryu.lib import hub
 from ryu.lib.dpid import dpid_to_str
@@ -729,33 +728,26 @@ class Port(object):
         self.designated_times = None
         # BPDU handling threads
         self.send_bpdu_thread = PortThread(self._transmit_bpdu)
-        self.wait_bpdu_thread = PortThread(self._wait_bpdu_timer)
+        self.wait_bpdu_timer = None
         self.send_tc_flg = None
         self.send_tc_timer = None
         self.send_tcn_flg = None
-        self.wait_timer_event = None
-        # State machine thread
-        self.state_machine = PortThread(self._state_machine)
-        self.state_event = None
+        # State machine timer
+        self.state_timer = None
 
         self.up(DESIGNATED_PORT,
                 Priority(bridge_id, 0, None, None),
                 bridge_times)
 
-        self.state_machine.start()
+        if self.state is PORT_STATE_DISABLE:
+            self.ofctl.set_port_status(self.ofport, self.state)
         self.logger.debug('[port=%d] Start port state machine.',
                           self.ofport.port_no, extra=self.dpid_str)
 
     def delete(self):
-        self.state_machine.stop()
+        self._stop_state_timer()
         self.send_bpdu_thread.stop()
-        self.wait_bpdu_thread.stop()
-        if self.state_event is not None:
-            self.state_event.set()
-            self.state_event = None
-        if self.wait_timer_event is not None:
-            self.wait_timer_event.set()
-            self.wait_timer_event = None
+        self._stop_wait_bpdu_timer()
         self.logger.debug('[port=%d] Stop port threads.',
                           self.ofport.port_no, extra=self.dpid_str)
 
@@ -784,7 +776,7 @@ class Port(object):
         self._change_role(DESIGNATED_PORT)
         self._change_status(state)
 
-    def _state_machine(self):
+    def _start_state_timer(self):
         """ Port state machine.
              Change next status when timer is exceeded
              or _change_status() method is called."""
@@ -797,32 +789,25 @@ class Port(object):
                      PORT_STATE_LEARN: 'LEARN',
                      PORT_STATE_FORWARD: 'FORWARD'}
 
-        if self.state is PORT_STATE_DISABLE:
-            self.ofctl.set_port_status(self.ofport, self.state)
+        self.logger.info('[port=%d] %s / %s', self.ofport.port_no,
+                         role_str[self.role], state_str[self.state],
+                         extra=self.dpid_str)
 
-        while True:
-            self.logger.info('[port=%d] %s / %s', self.ofport.port_no,
-                             role_str[self.role], state_str[self.state],
-                             extra=self.dpid_str)
-
-            self.state_event = hub.Event()
-            timer = self._get_timer()
-            if timer:
-                timeout = hub.Timeout(timer)
-                try:
-                    self.state_event.wait()
-                except hub.Timeout as t:
-                    if t is not timeout:
-                        err_msg = 'Internal error. Not my timeout.'
-                        raise RyuException(msg=err_msg)
-                    new_state = self._get_next_state()
-                    self._change_status(new_state, thread_switch=False)
-                finally:
-                    timeout.cancel()
-            else:
-                self.state_event.wait()
+        self._stop_state_timer()
+        timer = self._get_timer()
+        if timer:
+            # the port status is set on the datapath
+            self.state_timer = hub.spawn_later(timer, self._state_timeout)
 
-            self.state_event = None
+    def _stop_state_timer(self):
+        if self.state_timer is not None:
+            self.state_timer.cancel()
+            self.state_timer = None
+
+    def _state_timeout(self):
+        self.state_timer = None
+        new_state = self._get_next_state()
+        self._change_status(new_state, thread_switch=False)
 
     def _get_timer(self):
         timer = {PORT_STATE_DISABLE: None,
@@ -865,9 +850,7 @@ class Port(object):
         self.state = new_state
         self.send_event(EventPortStateChange(self.dp, self))
 
-        if self.state_event is not None:
-            self.state_event.set()
-            self.state_event = None
+        self._start_state_timer()
         if thread_switch:
             hub.sleep(0)  # For thread switching.
 
@@ -877,10 +860,10 @@ class Port(object):
         self.role = new_role
         if (new_role is ROOT_PORT
                 or new_role is NON_DESIGNATED_PORT):
-            self.wait_bpdu_thread.start()
+            self._start_wait_bpdu_timer()
         else:
             assert new_role is DESIGNATED_PORT
-            self.wait_bpdu_thread.stop()
+            self._stop_wait_bpdu_timer()
 
     def rcv_config_bpdu(self, bpdu_pkt):
         # Check received BPDU is superior to currently held BPDU.
@@ -936,40 +919,31 @@ class Port(object):
         return rcv_info, rcv_tc
 
     def _update_wait_bpdu_timer(self):
-        if self.wait_timer_event is not None:
-            self.wait_timer_event.set()
-            self.wait_timer_event = None
+        if self.wait_bpdu_timer is not None:
+            self._start_wait_bpdu_timer()
             self.logger.debug('[port=%d] Wait BPDU timer is updated.',
                               self.ofport.port_no, extra=self.dpid_str)
         hub.sleep(0)  # For thread switching.
 
-    def _wait_bpdu_timer(self):
-        time_exceed = False
-
-        while True:
-            self.wait_timer_event = hub.Event()
-            message_age = (self.designated_times.message_age
-                           if self.designated_times else 0)
-            timer = self.port_times.max_age - message_age
-            timeout = hub.Timeout(timer)
-            try:
-                self.wait_timer_event.wait()
-            except hub.Timeout as t:
-                if t is not timeout:
-                    err_msg = 'Internal error. Not my timeout.'
-                    raise RyuException(msg=err_msg)
-                self.logger.info('[port=%d] Wait BPDU timer is exceeded.',
-                                 self.ofport.port_no, extra=self.dpid_str)
-                time_exceed = True
-            finally:
-                timeout.cancel()
-                self.wait_timer_event = None
-
-            if time_exceed:
-                break
-
-        if time_exceed:  # Bridge.recalculate_spanning_tree
-            hub.spawn(self.wait_bpdu_timeout)
+    def _start_wait_bpdu_timer(self):
+        self._stop_wait_bpdu_timer()
+        message_age = (self.designated_times.message_age
+                       if self.designated_times else 0)
+        timer = self.port_times.max_age - message_age
+        self.wait_bpdu_timer = hub.call_later(timer,
+                                              self._wait_bpdu_timer_exceeded)
+
+    def _stop_wait_bpdu_timer(self):
+        if self.wait_bpdu_timer is not None:
+            self.wait_bpdu_timer.cancel()
+            self.wait_bpdu_timer = None
+
+    def _wait_bpdu_timer_exceeded(self):
+        self.wait_bpdu_timer = None
+        self.logger.info('[port=%d] Wait BPDU timer is exceeded.',
+                         self.ofport.port_no, extra=self.dpid_str)
+        # Bridge.recalculate_spanning_tree
+        hub.spawn(self.wait_bpdu_timeout)
 
     def _transmit_bpdu(self):
         while True:
@@ -78,6 +78,10 @@ _types = {
 
 class StringifyMixin(object):
 
+    # Empty so that subclasses can do without per-instance __dict__ by
+    # defining __slots__ of their own.
+    __slots__ = ()
+
     _TYPE = {}
     """_TYPE class attribute is used to annotate types of attributes.
 
@@ -332,7 +336,9 @@ def obj_python_attrs(msg_):
             continue
         if k in base:
             continue
-        if hasattr(msg_.__class__, k):
+        if (hasattr(msg_.__class__, k) and
+                not inspect.ismemberdescriptor(getattr(msg_.__class__, k))):
+            # class attributes other than __slots__
             continue
         yield (k, v)
 
@@ -30,10 +30,11 @@ from . import ofproto_common
 LOG = logging.getLogger('ryu.ofproto.ofproto_parser')
 
 
-def header(buf):
-    assert len(buf) >= ofproto_common.OFP_HEADER_SIZE
+def header(buf, offset=0):
+    assert len(buf) - offset >= ofproto_common.OFP_HEADER_SIZE
     # LOG.debug('len %d bufsize %d', len(buf), ofproto.OFP_HEADER_SIZE)
-    return struct.unpack_from(ofproto_common.OFP_HEADER_PACK_STR, buffer(buf))
+    return struct.unpack_from(ofproto_common.OFP_HEADER_PACK_STR, buffer(buf),
+                              offset)
 
 
 _MSG_PARSERS = {}
@@ -56,14 +57,22 @@ def msg(datapath, version, msg_type, msg_len, xid, buf):
     try:
         return msg_parser(datapath, version, msg_type, msg_len, xid, buf)
     except:
-        LOG.exception(
-            'Encounter an error during parsing OpenFlow packet from switch.'
-            'This implies switch sending a malformed OpenFlow packet.'
-            'version 0x%02x msg_type %d msg_len %d xid %d buf %s',
-            version, msg_type, msg_len, xid, utils.hex_array(buf))
+        _log_malformed(version, msg_type, msg_len, xid, buf)
         return None
 
 
+def _log_malformed(version, msg_type, msg_len, xid, buf):
+    LOG.exception(
+        'Encounter an error during parsing OpenFlow packet from switch.'
+        'This implies switch sending a malformed OpenFlow packet.'
+        'version 0x%02x msg_type %d msg_len %d xid %d buf %s',
+        version, msg_type, msg_len, xid, utils.hex_array(buf))
+
+
+# MsgBase._lazy_attrs entry of an attribute which failed to be decoded
+_LAZY_MALFORMED = object()
+
+
 def create_list_of_base_attributes(f):
     @functools.wraps(f)
     def wrapper(self, *args, **kwargs):
@@ -135,6 +144,13 @@ class MsgBase(StringifyMixin):
     xid       Transaction id
     buf       Raw data
     ========= ==============================
+
+    When the datapath has lazy_parse set, costly attributes of received
+    messages (e.g. match, desc and multipart reply body) are decoded on
+    first access instead of in parser().  A malformed message is then
+    not dropped by the parser: accessing such an attribute of it raises
+    exception.OFPMalformedMessage, which handlers must expect.  str() of
+    the message leaves those attributes out.
     """
 
     @create_list_of_base_attributes
@@ -162,6 +178,52 @@ class MsgBase(StringifyMixin):
     def set_buf(self, buf):
         self.buf = buffer(buf)
 
+    def _parse_attr(self, name, parser, *args):
+        """Set the attribute name to parser(*args).
+
+        If the datapath has lazy_parse set, the call is deferred until
+        the attribute is accessed for the first time and the result is
+        kept as an ordinary attribute afterwards. If the call fails then,
+        the error is logged as a malformed message would be, and this
+        access and any later one raise exception.OFPMalformedMessage.
+        """
+        if getattr(self.datapath, 'lazy_parse', False):
+            self.__dict__.pop(name, None)
+            self.__dict__.setdefault('_lazy_attrs', {})[name] = (parser, args)
+        else:
+            setattr(self, name, parser(*args))
+
+    def __getattr__(self, name):
+        # only called when the ordinary attribute lookup fails
+        lazy_attrs = self.__dict__.get('_lazy_attrs')
+        if not lazy_attrs or name not in lazy_attrs:
+            raise AttributeError("'%s' object has no attribute '%s'" %
+                                 (self.__class__.__name__, name))
+        entry = lazy_attrs[name]
+        if entry is _LAZY_MALFORMED:
+            # logged on the first access already
+            raise exception.OFPMalformedMessage()
+        parser, args = entry
+        try:
+            value = parser(*args)
+        except Exception:
+            lazy_attrs[name] = _LAZY_MALFORMED
+            _log_malformed(self.version, self.msg_type, self.msg_len,
+                           self.xid, self.buf)
+            raise exception.OFPMalformedMessage()
+        del lazy_attrs[name]
+        setattr(self, name, value)
+        return value
+
+    def stringify_attrs(self):
+        for name in self.__dict__.get('_lazy_attrs', {}).keys():
+            try:
+                getattr(self, name)
+            except exception.OFPMalformedMessage:
+                # left out
+                pass
+        return super(MsgBase, self).stringify_attrs()
+
     def __str__(self):
         buf = 'version: 0x%x msg_type 0x%x xid 0x%x ' % (self.version,
                                                          self.msg_type,
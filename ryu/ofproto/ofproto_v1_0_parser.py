@@ -1710,8 +1710,8 @@ class OFPPortStatus(MsgBase):
         msg.reason = struct.unpack_from(
             ofproto.OFP_PORT_STATUS_PACK_STR,
             msg.buf, ofproto.OFP_HEADER_SIZE)[0]
-        msg.desc = OFPPhyPort.parser(msg.buf,
-                                     ofproto.OFP_PORT_STATUS_DESC_OFFSET)
+        msg._parse_attr('desc', OFPPhyPort.parser, msg.buf,
+                        ofproto.OFP_PORT_STATUS_DESC_OFFSET)
         return msg
 
 
@@ -1778,7 +1778,8 @@ class OFPFlowRemoved(MsgBase):
         msg = super(OFPFlowRemoved, cls).parser(datapath, version, msg_type,
                                                 msg_len, xid, buf)
 
-        msg.match = OFPMatch.parse(msg.buf, ofproto.OFP_HEADER_SIZE)
+        msg._parse_attr('match', OFPMatch.parse, msg.buf,
+                        ofproto.OFP_HEADER_SIZE)
 
         (msg.cookie,
          msg.priority,
@@ -1868,8 +1869,8 @@ class OFPStatsReply(MsgBase):
         # call MsgBase::parser, not OFPStatsReply::parser
         msg = MsgBase.parser.__func__(
             cls, datapath, version, msg_type, msg_len, xid, buf)
-        msg.body = msg.parser_stats_body(msg.buf, msg.msg_len,
-                                         ofproto.OFP_STATS_MSG_SIZE)
+        msg._parse_attr('body', msg.parser_stats_body, msg.buf, msg.msg_len,
+                        ofproto.OFP_STATS_MSG_SIZE)
         return msg
 
     @classmethod
@@ -607,12 +607,13 @@ class OFPPacketIn(MsgBase):
             ofproto.OFP_PACKET_IN_PACK_STR,
             msg.buf, ofproto.OFP_HEADER_SIZE)
 
-        msg.match = OFPMatch.parser(msg.buf, ofproto.OFP_PACKET_IN_SIZE -
-                                    ofproto.OFP_MATCH_SIZE)
+        offset = ofproto.OFP_PACKET_IN_SIZE - ofproto.OFP_MATCH_SIZE
+        msg._parse_attr('match', OFPMatch.parser, msg.buf, offset)
 
-        match_len = utils.round_up(msg.match.length, 8)
-        msg.data = msg.buf[(ofproto.OFP_PACKET_IN_SIZE -
-                            ofproto.OFP_MATCH_SIZE + match_len + 2):]
+        # only the length of the match is needed to locate the data
+        (_type, length) = struct.unpack_from('!HH', msg.buf, offset)
+        match_len = utils.round_up(length, 8)
+        msg.data = msg.buf[(offset + match_len + 2):]
 
         if msg.total_len < len(msg.data):
             # discard padding for 8-byte alignment of OFP packet
@@ -713,7 +714,7 @@ class OFPFlowRemoved(MsgBase):
         offset = (ofproto.OFP_FLOW_REMOVED_SIZE -
                   ofproto.OFP_MATCH_SIZE)
 
-        msg.match = OFPMatch.parser(msg.buf, offset)
+        msg._parse_attr('match', OFPMatch.parser, msg.buf, offset)
 
         return msg
 
@@ -769,8 +770,8 @@ class OFPPortStatus(MsgBase):
         msg.reason = struct.unpack_from(
             ofproto.OFP_PORT_STATUS_PACK_STR, msg.buf,
             ofproto.OFP_HEADER_SIZE)[0]
-        msg.desc = OFPPort.parser(msg.buf,
-                                  ofproto.OFP_PORT_STATUS_DESC_OFFSET)
+        msg._parse_attr('desc', OFPPort.parser, msg.buf,
+                        ofproto.OFP_PORT_STATUS_DESC_OFFSET)
         return msg
 
 
@@ -1887,20 +1888,22 @@ class OFPStatsReply(MsgBase):
             ofproto.OFP_STATS_REPLY_PACK_STR, msg.buf,
             ofproto.OFP_HEADER_SIZE)
         stats_type_cls = cls._STATS_TYPES.get(msg.type)
+        msg._parse_attr('body', cls.parser_stats_body, stats_type_cls,
+                        msg.buf, msg_len)
+        return msg
 
+    @staticmethod
+    def parser_stats_body(stats_type_cls, buf, msg_len):
         offset = ofproto.OFP_STATS_REPLY_SIZE
         body = []
         while offset < msg_len:
-            r = stats_type_cls.parser(msg.buf, offset)
+            r = stats_type_cls.parser(buf, offset)
             body.append(r)
             offset += r.length
 
         if stats_type_cls.cls_body_single_struct:
-            msg.body = body[0]
-        else:
-            msg.body = body
-
-        return msg
+            return body[0]
+        return body
 
 
 @_set_msg_type(ofproto.OFPT_STATS_REQUEST)
@@ -3533,7 +3536,7 @@ class OFPMatch(StringifyMixin):
         self.fields.append(OFPMatchField.make(header, value, mask))
 
     def _composed_with_old_api(self):
-        return (self.fields and not self._fields2) or \
+        return (not self._fields2 and self.fields) or \
             self._wc.__dict__ != FlowWildcards().__dict__
 
     def serialize(self, buf, offset):
@@ -3787,18 +3790,28 @@ class OFPMatch(StringifyMixin):
         length -= 4
 
         # XXXcompat
-        cls.parser_old(match, buf, offset, length)
+        # OFPMatchField objects are built by the fields property only
+        # when the old api is used.
+        match._old_fields = None
+        match._old_fields_buf = buf[offset:offset + length]
 
-        fields = []
-        while length > 0:
-            n, value, mask, field_len = ofproto.oxm_parse(buf, offset)
-            k, uv = ofproto.oxm_to_user(n, value, mask)
-            fields.append((k, uv))
-            offset += field_len
-            length -= field_len
-        match._fields2 = fields
+        match._fields2 = ofproto.oxm_parse_fields(buf, offset, length)
         return match
 
+    @property
+    def fields(self):
+        # XXX old api compat
+        if self._old_fields is None:
+            buf = self._old_fields_buf
+            self._old_fields = []
+            self._old_fields_buf = None
+            self.parser_old(self, buf, 0, len(buf))
+        return self._old_fields
+
+    @fields.setter
+    def fields(self, fields):
+        self._old_fields = fields
+
     @staticmethod
     def parser_old(match, buf, offset, length):
         while length > 0:
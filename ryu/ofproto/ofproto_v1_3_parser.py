@@ -969,7 +969,7 @@ class OFPMatch(StringifyMixin):
         self.fields.append(OFPMatchField.make(header, value, mask))
 
     def _composed_with_old_api(self):
-        return (self.fields and not self._fields2) or \
+        return (not self._fields2 and self.fields) or \
             self._wc.__dict__ != FlowWildcards().__dict__
 
     def serialize(self, buf, offset):
@@ -1251,18 +1251,28 @@ class OFPMatch(StringifyMixin):
         length -= 4
 
         # XXXcompat
-        cls.parser_old(match, buf, offset, length)
+        # OFPMatchField objects are built by the fields property only
+        # when the old api is used.
+        match._old_fields = None
+        match._old_fields_buf = buf[offset:offset + length]
 
-        fields = []
-        while length > 0:
-            n, value, mask, field_len = ofproto.oxm_parse(buf, offset)
-            k, uv = ofproto.oxm_to_user(n, value, mask)
-            fields.append((k, uv))
-            offset += field_len
-            length -= field_len
-        match._fields2 = fields
+        match._fields2 = ofproto.oxm_parse_fields(buf, offset, length)
         return match
 
+    @property
+    def fields(self):
+        # XXX old api compat
+        if self._old_fields is None:
+            buf = self._old_fields_buf
+            self._old_fields = []
+            self._old_fields_buf = None
+            self.parser_old(self, buf, 0, len(buf))
+        return self._old_fields
+
+    @fields.setter
+    def fields(self, fields):
+        self._old_fields = fields
+
     @staticmethod
     def parser_old(match, buf, offset, length):
         while length > 0:
@@ -2134,12 +2144,13 @@ class OFPPacketIn(MsgBase):
             ofproto.OFP_PACKET_IN_PACK_STR,
             msg.buf, ofproto.OFP_HEADER_SIZE)
 
-        msg.match = OFPMatch.parser(msg.buf, ofproto.OFP_PACKET_IN_SIZE -
-                                    ofproto.OFP_MATCH_SIZE)
+        offset = ofproto.OFP_PACKET_IN_SIZE - ofproto.OFP_MATCH_SIZE
+        msg._parse_attr('match', OFPMatch.parser, msg.buf, offset)
 
-        match_len = utils.round_up(msg.match.length, 8)
-        msg.data = msg.buf[(ofproto.OFP_PACKET_IN_SIZE -
-                            ofproto.OFP_MATCH_SIZE + match_len + 2):]
+        # only the length of the match is needed to locate the data
+        (_type, length) = struct.unpack_from('!HH', msg.buf, offset)
+        match_len = utils.round_up(length, 8)
+        msg.data = msg.buf[(offset + match_len + 2):]
 
         if msg.total_len < len(msg.data):
             # discard padding for 8-byte alignment of OFP packet
@@ -2239,7 +2250,7 @@ class OFPFlowRemoved(MsgBase):
         offset = (ofproto.OFP_FLOW_REMOVED_SIZE -
                   ofproto.OFP_MATCH_SIZE)
 
-        msg.match = OFPMatch.parser(msg.buf, offset)
+        msg._parse_attr('match', OFPMatch.parser, msg.buf, offset)
 
         return msg
 
@@ -2323,8 +2334,8 @@ class OFPPortStatus(MsgBase):
         msg.reason = struct.unpack_from(
             ofproto.OFP_PORT_STATUS_PACK_STR, msg.buf,
             ofproto.OFP_HEADER_SIZE)[0]
-        msg.desc = OFPPort.parser(msg.buf,
-                                  ofproto.OFP_PORT_STATUS_DESC_OFFSET)
+        msg._parse_attr('desc', OFPPort.parser, msg.buf,
+                        ofproto.OFP_PORT_STATUS_DESC_OFFSET)
         return msg
 
 
@@ -3573,7 +3584,7 @@ class OFPMultipartReply(MsgBase):
         while offset < msg_len:
             entry = body_cls.parser(buf, offset)
             body.append(entry)
-            offset += entry.length
+            offset += entry.length if hasattr(entry, 'length') else entry.len
 
         if cls.cls_body_single_struct:
             return body[0]
@@ -3598,17 +3609,8 @@ class OFPMultipartReply(MsgBase):
         msg.type = type_
         msg.flags = flags
 
-        offset = ofproto.OFP_MULTIPART_REPLY_SIZE
-        body = []
-        while offset < msg_len:
-            b = stats_type_cls.cls_stats_body_cls.parser(msg.buf, offset)
-            body.append(b)
-            offset += b.length if hasattr(b, 'length') else b.len
-
-        if stats_type_cls.cls_body_single_struct:
-            msg.body = body[0]
-        else:
-            msg.body = body
+        msg._parse_attr('body', stats_type_cls.parser_stats_body, msg.buf,
+                        msg_len, ofproto.OFP_MULTIPART_REPLY_SIZE)
         return msg
 
 
@@ -739,14 +739,7 @@ class OFPMatch(StringifyMixin):
         offset += 4
         length -= 4
 
-        fields = []
-        while length > 0:
-            n, value, mask, field_len = ofproto.oxm_parse(buf, offset)
-            k, uv = ofproto.oxm_to_user(n, value, mask)
-            fields.append((k, uv))
-            offset += field_len
-            length -= field_len
-        match._fields2 = fields
+        match._fields2 = ofproto.oxm_parse_fields(buf, offset, length)
         return match
 
     def serialize(self, buf, offset):
@@ -1702,12 +1695,13 @@ class OFPPacketIn(MsgBase):
             ofproto.OFP_PACKET_IN_PACK_STR,
             msg.buf, ofproto.OFP_HEADER_SIZE)
 
-        msg.match = OFPMatch.parser(msg.buf, ofproto.OFP_PACKET_IN_SIZE -
-                                    ofproto.OFP_MATCH_SIZE)
+        offset = ofproto.OFP_PACKET_IN_SIZE - ofproto.OFP_MATCH_SIZE
+        msg._parse_attr('match', OFPMatch.parser, msg.buf, offset)
 
-        match_len = utils.round_up(msg.match.length, 8)
-        msg.data = msg.buf[(ofproto.OFP_PACKET_IN_SIZE -
-                            ofproto.OFP_MATCH_SIZE + match_len + 2):]
+        # only the length of the match is needed to locate the data
+        (_type, length) = struct.unpack_from('!HH', msg.buf, offset)
+        match_len = utils.round_up(length, 8)
+        msg.data = msg.buf[(offset + match_len + 2):]
 
         if msg.total_len < len(msg.data):
             # discard padding for 8-byte alignment of OFP packet
@@ -1808,7 +1802,7 @@ class OFPFlowRemoved(MsgBase):
 
         offset = (ofproto.OFP_FLOW_REMOVED_SIZE - ofproto.OFP_MATCH_SIZE)
 
-        msg.match = OFPMatch.parser(msg.buf, offset)
+        msg._parse_attr('match', OFPMatch.parser, msg.buf, offset)
 
         return msg
 
@@ -2044,7 +2038,7 @@ class OFPMultipartReply(MsgBase):
         while offset < msg_len:
             entry = body_cls.parser(buf, offset)
             body.append(entry)
-            offset += entry.length
+            offset += entry.length if hasattr(entry, 'length') else entry.len
 
         if cls.cls_body_single_struct:
             return body[0]
@@ -2069,17 +2063,8 @@ class OFPMultipartReply(MsgBase):
         msg.type = type_
         msg.flags = flags
 
-        offset = ofproto.OFP_MULTIPART_REPLY_SIZE
-        body = []
-        while offset < msg_len:
-            b = stats_type_cls.cls_stats_body_cls.parser(msg.buf, offset)
-            body.append(b)
-            offset += b.length if hasattr(b, 'length') else b.len
-
-        if stats_type_cls.cls_body_single_struct:
-            msg.body = body[0]
-        else:
-            msg.body = body
+        msg._parse_attr('body', stats_type_cls.parser_stats_body, msg.buf,
+                        msg_len, ofproto.OFP_MULTIPART_REPLY_SIZE)
         return msg
 
 
@@ -4443,7 +4428,8 @@ class OFPPortStatus(MsgBase):
         msg.reason = struct.unpack_from(
             ofproto.OFP_PORT_STATUS_PACK_STR, msg.buf,
             ofproto.OFP_HEADER_SIZE)[0]
-        msg.desc = OFPPort.parser(msg.buf, ofproto.OFP_PORT_STATUS_DESC_OFFSET)
+        msg._parse_attr('desc', OFPPort.parser, msg.buf,
+                        ofproto.OFP_PORT_STATUS_DESC_OFFSET)
         return msg
 
 
@@ -37,23 +37,27 @@ class TypeDescr(object):
 
 
 class IntDescr(TypeDescr):
+    _formats = {1: '!B', 2: '!H', 3: '!BH', 4: '!I', 8: '!Q'}
+
     def __init__(self, size):
         self.size = size
+        self._max = (1 << (size * 8)) - 1
+        self._struct = struct.Struct(self._formats[size])
+
+    def unpack_from(self, buf, offset=0):
+        v = self._struct.unpack_from(buf, offset)
+        if self.size == 3:
+            return (v[0] << 16) | v[1]
+        return v[0]
 
     def to_user(self, bin):
-        i = 0
-        for x in xrange(self.size):
-            c = bin[:1]
-            i = i * 256 + ord(c)
-            bin = bin[1:]
-        return i
+        return self.unpack_from(bin)
 
     def from_user(self, i):
-        bin = ''
-        for x in xrange(self.size):
-            bin = chr(i & 255) + bin
-            i /= 256
-        return bin
+        i &= self._max
+        if self.size == 3:
+            return self._struct.pack(i >> 16, i & 0xffff)
+        return self._struct.pack(i)
 
 Int1 = IntDescr(1)
 Int2 = IntDescr(2)
@@ -168,6 +172,7 @@ def generate(modname):
     add_attr('_oxm_field_desc', functools.partial(_field_desc, num_to_field))
     add_attr('oxm_normalize_user', functools.partial(normalize_user, mod))
     add_attr('oxm_parse', functools.partial(parse, mod))
+    add_attr('oxm_parse_fields', functools.partial(parse_fields, mod, {}))
     add_attr('oxm_serialize', functools.partial(serialize, mod))
     add_attr('oxm_to_jsondict', to_jsondict)
     add_attr('oxm_from_jsondict', from_jsondict)
@@ -278,6 +283,67 @@ def parse(mod, buf, offset):
     return num, value, mask, field_len
 
 
+_oxm_header = struct.Struct('!I')
+
+
+def _value_decoder(t, size):
+    if isinstance(t, IntDescr):
+        return t.unpack_from
+    return lambda buf, offset: t.to_user(buf[offset:offset + size])
+
+
+def _field_decoder(mod, header):
+    oxm_type = header >> 9
+    if oxm_type >> 7 == OFPXMC_EXPERIMENTER:
+        return None
+    try:
+        f = mod._oxm_field_desc(oxm_type)
+    except KeyError:
+        return None
+    value_len = mod.oxm_tlv_header_extract_length(header)
+    if getattr(f.type, 'size', None) != value_len:
+        return None
+    hasmask = mod.oxm_tlv_header_extract_hasmask(header)
+    field_len = _oxm_header.size + (header & 0xff)
+    return (f.name, _value_decoder(f.type, value_len), value_len, hasmask,
+            field_len)
+
+
+def parse_fields(mod, decoders, buf, offset, length):
+    """Decode a sequence of OXM TLVs into a list of (name, user_value).
+
+    Decoders are looked up by the 32-bit OXM header and built on first
+    use.  Experimenter OXMs, unknown fields, unexpected payload lengths
+    and truncated TLVs are left to parse() and to_user().
+    """
+    if isinstance(buf, bytearray):
+        buf = buffer(buf)
+    buf_len = len(buf)
+    end = offset + length
+    fields = []
+    while offset < end:
+        (header, ) = _oxm_header.unpack_from(buf, offset)
+        d = decoders.get(header)
+        if d is None:
+            d = _field_decoder(mod, header)
+            if d is not None:
+                decoders[header] = d
+        if d is None or offset + d[4] > buf_len:
+            n, value, mask, field_len = parse(mod, buf, offset)
+            fields.append(mod.oxm_to_user(n, value, mask))
+            offset += field_len
+            continue
+        name, decode, value_len, hasmask, field_len = d
+        value_offset = offset + _oxm_header.size
+        if hasmask:
+            fields.append((name, (decode(buf, value_offset),
+                                  decode(buf, value_offset + value_len))))
+        else:
+            fields.append((name, decode(buf, value_offset)))
+        offset += field_len
+    return fields
+
+
 def serialize(mod, n, value, mask, buf, offset):
     exp_hdr = bytearray()
     if isinstance(n, tuple):
@@ -18,8 +18,13 @@
 """
 import logging
 
+from ryu.lib.packet.bgp import RF_IPv4_UC
+from ryu.lib.packet.bgp import RF_IPv6_UC
+from ryu.lib.packet.bgp import RF_IPv4_VPN
+from ryu.lib.packet.bgp import RF_IPv6_VPN
 from ryu.services.protocols.bgp.api.base import NEXT_HOP
 from ryu.services.protocols.bgp.api.base import PREFIX
+from ryu.services.protocols.bgp.api.base import PREFIX_MATCH
 from ryu.services.protocols.bgp.api.base import RegisterWithArgChecks
 from ryu.services.protocols.bgp.api.base import ROUTE_DISTINGUISHER
 from ryu.services.protocols.bgp.api.base import VPN_LABEL
@@ -28,6 +33,8 @@ from ryu.services.protocols.bgp.base import PREFIX_ERROR_CODE
 from ryu.services.protocols.bgp.base import validate
 from ryu.services.protocols.bgp.core import BgpCoreError
 from ryu.services.protocols.bgp.core_manager import CORE_MANAGER
+from ryu.services.protocols.bgp.core_managers.table_manager import \
+    PREFIX_MATCH_EXACT
 from ryu.services.protocols.bgp.rtconf.base import RuntimeConfigError
 from ryu.services.protocols.bgp.rtconf.vrfs import VRF_RF
 from ryu.services.protocols.bgp.rtconf.vrfs import VRF_RF_IPV4
@@ -36,6 +43,14 @@ from ryu.services.protocols.bgp.utils import validation
 
 LOG = logging.getLogger('bgpspeaker.api.prefix')
 
+# Route families of prefix.lookup
+LOOKUP_RF = {
+    'ipv4': RF_IPv4_UC,
+    'ipv6': RF_IPv6_UC,
+    'vpnv4': RF_IPv4_VPN,
+    'vpnv6': RF_IPv6_VPN,
+}
+
 
 @add_bgp_error_metadata(code=PREFIX_ERROR_CODE,
                         sub_code=1,
@@ -93,3 +108,35 @@ def delete_local(route_dist, prefix, route_family=VRF_RF_IPV4):
                  VRF_RF: route_family}]
     except BgpCoreError as e:
         raise PrefixError(desc=e)
+
+
+@RegisterWithArgChecks(name='prefix.lookup',
+                       req_args=[PREFIX],
+                       opt_args=[ROUTE_DISTINGUISHER, VRF_RF, PREFIX_MATCH])
+def lookup(prefix, route_dist=None, route_family=VRF_RF_IPV4,
+           match=PREFIX_MATCH_EXACT):
+    """Looks up *prefix* in the table of *route_family*.
+
+    *route_family* is one of 'ipv4', 'ipv6', 'vpnv4' or 'vpnv6'. For
+    IPv4/IPv6 *route_dist* selects a VRF instead of the global table,
+    VPN prefixes require it. *match* is one of 'exact', 'longest',
+    'covering' or 'more-specific'. Returns the matching prefixes with
+    the next hop of their best path.
+    """
+    if route_family not in LOOKUP_RF:
+        raise PrefixError(desc='Unsupported route family %s' % route_family)
+    try:
+        tm = CORE_MANAGER.get_core_service().table_manager
+        dests = tm.lookup_dests(LOOKUP_RF[route_family], prefix,
+                                route_dist=route_dist, match=match)
+    except ValueError as e:
+        raise PrefixError(desc=str(e))
+
+    ret = []
+    for dest in dests:
+        best_path = dest.best_path
+        ret.append({ROUTE_DISTINGUISHER: route_dist,
+                    PREFIX: dest.nlri.prefix,
+                    VRF_RF: route_family,
+                    NEXT_HOP: best_path.nexthop if best_path else None})
+    return ret
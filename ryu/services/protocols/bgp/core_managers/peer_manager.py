@@ -4,6 +4,7 @@ import netaddr
 from ryu.services.protocols.bgp.base import SUPPORTED_GLOBAL_RF
 from ryu.services.protocols.bgp.model import OutgoingRoute
 from ryu.services.protocols.bgp.peer import Peer
+from ryu.services.protocols.bgp.peer import UpdateGroup
 from ryu.lib.packet.bgp import BGPPathAttributeCommunities
 from ryu.lib.packet.bgp import BGP_ATTR_TYPE_MULTI_EXIT_DISC
 from ryu.lib.packet.bgp import BGP_ATTR_TYPE_COMMUNITIES
@@ -34,6 +35,9 @@ class PeerManager(object):
         self._peer_to_rtfilter_map = {}
         self._neighbors_conf = neighbors_conf
 
+        # Update groups by key, see Peer.update_group_key
+        self._update_groups = {}
+
     @property
     def iterpeers(self):
         return self._peers.itervalues()
@@ -57,6 +61,35 @@ class PeerManager(object):
     def get_by_addr(self, addr):
         return self._peers.get(str(netaddr.IPAddress(addr)))
 
+    def join_update_group(self, peer, dump=False):
+        """Adds `peer` to the update group of its outbound policy, creating
+        the group if need be, and returns the group.  See
+        `UpdateGroup.add_member` for `dump`.
+
+        Returns None if `peer` cannot join any update group.
+        """
+        key = peer.update_group_key
+        if key is None:
+            return None
+        group = self._update_groups.get(key)
+        if group is None:
+            group = UpdateGroup(key)
+            self._update_groups[key] = group
+        group.add_member(peer, dump)
+        LOG.debug('Peer %s joined update group of %d peers',
+                  peer, len(group.members))
+        return group
+
+    def leave_update_group(self, peer, group):
+        """Removes `peer` from update group `group` and returns the routes
+        of the group it has not sent yet.
+        """
+        outgoing_routes = group.remove_member(peer)
+        if not group.members:
+            del self._update_groups[group.key]
+        LOG.debug('Peer %s left update group', peer)
+        return outgoing_routes
+
     def on_peer_down(self, peer):
         """Peer down handler.
 
@@ -263,9 +296,16 @@ class PeerManager(object):
             new_best_path
         )
 
-        # Distribute new best-path to qualified peers.
+        # Distribute new best-path to qualified peers, once per update
+        # group.
+        groups = set()
         for peer in qualified_peers:
-            peer.communicate_path(new_best_path)
+            group = peer.update_group
+            if group is None:
+                peer.communicate_path(new_best_path)
+            elif group not in groups:
+                groups.add(group)
+                group.communicate_path(new_best_path)
 
     def _collect_peers_of_interest(self, new_best_path):
         """Collect all peers that qualify for sharing a path with given RTs.
@@ -39,6 +39,14 @@ from ryu.services.protocols.bgp.utils.validation import is_valid_ipv6_prefix
 
 LOG = logging.getLogger('bgpspeaker.core_managers.table_mixin')
 
+# Kinds of prefix lookups of TableCoreManager.lookup_dests
+PREFIX_MATCH_EXACT = 'exact'
+PREFIX_MATCH_LONGEST = 'longest'
+PREFIX_MATCH_COVERING = 'covering'
+PREFIX_MATCH_MORE_SPECIFIC = 'more-specific'
+PREFIX_MATCHES = (PREFIX_MATCH_EXACT, PREFIX_MATCH_LONGEST,
+                  PREFIX_MATCH_COVERING, PREFIX_MATCH_MORE_SPECIFIC)
+
 
 class TableCoreManager(object):
     """Methods performing core operations on tables."""
@@ -194,6 +202,55 @@ class TableCoreManager(object):
             vrf_tables[(scope_id, table_id)] = table
         return vrf_tables
 
+    def lookup_dests(self, route_family, prefix, route_dist=None,
+                     match=PREFIX_MATCH_EXACT):
+        """Returns the list of destinations of *route_family* matching
+        *prefix*.
+
+        For VPN route families *route_dist* qualifies *prefix* and is
+        required. For IPv4/IPv6 *route_dist*, if given, selects the VRF
+        table to look up instead of the global table.
+        *match* is one of:
+            - PREFIX_MATCH_EXACT: the destination of *prefix*
+            - PREFIX_MATCH_LONGEST: the destination with the longest
+              prefix containing *prefix*, which may be a host address
+            - PREFIX_MATCH_COVERING: all destinations with prefixes
+              containing *prefix*, shortest first
+            - PREFIX_MATCH_MORE_SPECIFIC: all destinations with prefixes
+              contained in *prefix*, in address order
+
+        Raises ValueError for invalid arguments.
+        """
+        if match not in PREFIX_MATCHES:
+            raise ValueError('Invalid prefix match %s' % match)
+        if (route_dist is not None and
+                route_family in (RF_IPv4_UC, RF_IPv6_UC)):
+            if route_family == RF_IPv4_UC:
+                vrf_rf = VRF_RF_IPV4
+            else:
+                vrf_rf = VRF_RF_IPV6
+            table = self.get_vrf_table(route_dist, vrf_rf)
+            if table is None:
+                raise ValueError('No VRF with route distinguisher %s and '
+                                 'route family %s' % (route_dist,
+                                                      route_family))
+            route_dist = None
+        elif route_family == RF_RTC_UC:
+            raise ValueError('Prefix lookup is not supported for %s'
+                             % route_family)
+        else:
+            table = self.get_global_table_by_route_family(route_family)
+
+        if match == PREFIX_MATCH_EXACT:
+            dest = table.get_dest_by_prefix(prefix, route_dist)
+            return [dest] if dest is not None else []
+        elif match == PREFIX_MATCH_LONGEST:
+            dest = table.get_longest_match_dest(prefix, route_dist)
+            return [dest] if dest is not None else []
+        elif match == PREFIX_MATCH_COVERING:
+            return table.get_covering_dests(prefix, route_dist)
+        return table.get_more_specific_dests(prefix, route_dist)
+
     def get_ipv4_table(self):
         """Returns global IPv4 table.
 
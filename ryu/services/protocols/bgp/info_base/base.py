@@ -24,12 +24,21 @@ from abc import abstractmethod
 from copy import copy
 import logging
 import netaddr
+import socket
+import struct
+import weakref
 
+from ryu.lib import hub
 from ryu.lib.packet.bgp import RF_IPv4_UC
+from ryu.lib.packet.bgp import RF_IPv6_UC
 from ryu.lib.packet.bgp import RouteTargetMembershipNLRI
 from ryu.lib.packet.bgp import BGP_ATTR_TYPE_EXTENDED_COMMUNITIES
 from ryu.lib.packet.bgp import BGPPathAttributeLocalPref
+from ryu.lib.packet.bgp import BGPPathAttributeMpReachNLRI
 from ryu.lib.packet.bgp import BGP_ATTR_TYPE_AS_PATH
+from ryu.lib.packet.bgp import BGP_ATTR_TYPE_MP_REACH_NLRI
+from ryu.lib.packet.bgp import BGP_ATTR_TYPE_MP_UNREACH_NLRI
+from ryu.lib.packet.bgp import _RouteDistinguisher
 
 from ryu.services.protocols.bgp.base import OrderedDict
 from ryu.services.protocols.bgp.constants import VPN_TABLE
@@ -37,6 +46,8 @@ from ryu.services.protocols.bgp.constants import VRF_TABLE
 from ryu.services.protocols.bgp.model import OutgoingRoute
 from ryu.services.protocols.bgp.processor import BPR_ONLY_PATH
 from ryu.services.protocols.bgp.processor import BPR_UNKNOWN
+from ryu.services.protocols.bgp.utils.internable import Internable
+from ryu.services.protocols.bgp.utils.radix import RadixTree
 
 
 LOG = logging.getLogger('bgpspeaker.info_base.base')
@@ -51,9 +62,23 @@ class Table(object):
     """
     __metaclass__ = abc.ABCMeta
     ROUTE_FAMILY = RF_IPv4_UC
+    # Address length in bits of the prefixes of this table, for tables
+    # which support prefix lookups. None for others.
+    PREFIX_INDEX_BITS = None
+    # True if prefixes are qualified by a route distinguisher.
+    PREFIX_INDEX_RD = False
+    # Number of destinations indexed between yields to other threads
+    # while the prefix index is built.
+    PREFIX_INDEX_BUILD_CHUNK = 1000
 
     def __init__(self, scope_id, core_service, signal_bus):
         self._destinations = dict()
+        # Destinations by prefix, built on the first prefix lookup so
+        # that tables nobody looks up don't pay for it.
+        self._prefix_index = None
+        # Event set when the prefix index is built, None unless it is
+        # being built.
+        self._prefix_index_building = None
         # Scope in which this table exists.
         # If this table represents the VRF, then this could be a VPN ID.
         # For global/VPN tables this should be None
@@ -163,11 +188,18 @@ class Table(object):
         self._validate_nlri(nlri)
         dest = self._get_dest(nlri)
         if dest:
-            self._destinations.pop(dest)
+            self.delete_dest(dest)
         return dest
 
     def delete_dest(self, dest):
         del self._destinations[self._table_key(dest.nlri)]
+        if self._prefix_index is not None:
+            try:
+                self._prefix_index.remove(*self._nlri_index_key(dest.nlri))
+            except KeyError:
+                # not indexed yet while the index is being built
+                if self._prefix_index_building is None:
+                    raise
 
     def _validate_nlri(self, nlri):
         """Validated *nlri* is the type that this table stores/supports.
@@ -191,6 +223,9 @@ class Table(object):
         if dest is None:
             dest = self._create_dest(nlri)
             self._destinations[table_key] = dest
+            if self._prefix_index is not None:
+                self._prefix_index.insert(*self._nlri_index_key(nlri),
+                                          value=dest)
         return dest
 
     def _get_dest(self, nlri):
@@ -214,6 +249,133 @@ class Table(object):
         """
         raise NotImplementedError()
 
+    def _nlri_index_key(self, nlri):
+        if self.PREFIX_INDEX_RD:
+            return self._prefix_index_key(nlri.prefix, nlri.route_dist)
+        return self._prefix_index_key(nlri.prefix)
+
+    def _prefix_index_key(self, prefix, route_dist=None):
+        """Returns the (key, length) of *prefix* in the prefix index.
+
+        *prefix* is a string, e.g. '10.0.0.0/8'. Without a length it is
+        a host address. Raises ValueError if either *prefix* or
+        *route_dist* is invalid.
+        """
+        bits = self.PREFIX_INDEX_BITS
+        if bits is None:
+            raise ValueError('%s does not support prefix lookups' % self)
+        addr, _sep, length = prefix.partition('/')
+        try:
+            length = int(length) if length else bits
+            key = _ip_addr_key(addr, bits)
+        except (ValueError, socket.error):
+            raise ValueError('Invalid prefix %s' % prefix)
+        if not 0 <= length <= bits:
+            raise ValueError('Invalid prefix %s' % prefix)
+        if not self.PREFIX_INDEX_RD:
+            return key, length
+        if route_dist is None:
+            raise ValueError('Route distinguisher is required for %s' % self)
+        return (_route_dist_key(route_dist) << bits) | key, 64 + length
+
+    def _get_prefix_index(self):
+        while self._prefix_index_building is not None:
+            self._prefix_index_building.wait()
+        if self._prefix_index is None:
+            # Not built yet, or the build waited for failed.
+            self._build_prefix_index()
+        return self._prefix_index
+
+    def _build_prefix_index(self):
+        # Indexing a full table takes seconds, so destinations are
+        # indexed in chunks, yielding to other threads in between.
+        # Meanwhile destinations created and deleted update the index as
+        # they do once it is built, and destinations of the snapshot
+        # deleted or replaced since are skipped.
+        bits = self.PREFIX_INDEX_BITS
+        if self.PREFIX_INDEX_RD:
+            bits += 64
+        index = RadixTree(bits)
+        building = hub.Event()
+        self._prefix_index = index
+        self._prefix_index_building = building
+        try:
+            dests = self._destinations.items()
+            chunk = self.PREFIX_INDEX_BUILD_CHUNK
+            for i in xrange(0, len(dests), chunk):
+                for table_key, dest in dests[i:i + chunk]:
+                    if self._destinations.get(table_key) is dest:
+                        index.insert(*self._nlri_index_key(dest.nlri),
+                                     value=dest)
+                hub.sleep(0)
+        except:
+            self._prefix_index = None
+            raise
+        finally:
+            self._prefix_index_building = None
+            building.set()
+
+    def get_dest_by_prefix(self, prefix, route_dist=None):
+        """Returns the destination of exactly *prefix*, or None.
+
+        *route_dist* qualifies *prefix* in VPN tables and is required
+        there.
+        """
+        key, length = self._prefix_index_key(prefix, route_dist)
+        return self._get_prefix_index().get(key, length)
+
+    def get_longest_match_dest(self, prefix, route_dist=None):
+        """Returns the destination with the longest prefix which
+        contains *prefix*, or None. *prefix* may be a host address.
+        """
+        key, length = self._prefix_index_key(prefix, route_dist)
+        return self._get_prefix_index().longest_match(key, length)
+
+    def get_covering_dests(self, prefix, route_dist=None):
+        """Returns the destinations whose prefix contains *prefix*,
+        including its own, shortest prefix first.
+        """
+        key, length = self._prefix_index_key(prefix, route_dist)
+        return self._get_prefix_index().covering(key, length)
+
+    def get_more_specific_dests(self, prefix, route_dist=None):
+        """Returns the destinations whose prefix is contained in
+        *prefix*, including its own, in order of address then length.
+        """
+        key, length = self._prefix_index_key(prefix, route_dist)
+        return self._get_prefix_index().more_specifics(key, length)
+
+
+def _ip_addr_key(addr, bits):
+    # IPv4 (bits == 32) or IPv6 address string as an integer.
+    if bits == 32:
+        return _packed_addr_key(socket.inet_pton(socket.AF_INET, addr))
+    return _packed_addr_key(socket.inet_pton(socket.AF_INET6, addr))
+
+
+def _packed_addr_key(packed):
+    # IPv4 or IPv6 address in network byte order as an integer.
+    if len(packed) == 4:
+        key, = struct.unpack('!I', packed)
+        return key
+    high, low = struct.unpack('!QQ', packed)
+    return (high << 64) | low
+
+
+_route_dist_keys = {}
+
+
+def _route_dist_key(route_dist):
+    key = _route_dist_keys.get(route_dist)
+    if key is None:
+        try:
+            rd = _RouteDistinguisher.from_str(str(route_dist))
+            key, = struct.unpack('!Q', str(rd.serialize()))
+        except (ValueError, AssertionError, struct.error):
+            raise ValueError('Invalid route distinguisher %s' % route_dist)
+        _route_dist_keys[route_dist] = key
+    return key
+
 
 class NonVrfPathProcessingMixin(object):
     """Mixin reacting to best-path selection algorithm on main table
@@ -222,6 +384,8 @@ class NonVrfPathProcessingMixin(object):
     because they are processed at VRF level, so different logic applies.
     """
 
+    __slots__ = ()
+
     def _best_path_lost(self):
         self._best_path = None
 
@@ -233,8 +397,8 @@ class NonVrfPathProcessingMixin(object):
                 withdraw_clone = sent_path.clone(for_withdrawal=True)
                 outgoing_route = OutgoingRoute(withdraw_clone)
                 sent_route.sent_peer.enque_outgoing_msg(outgoing_route)
-                LOG.debug('Sending withdrawal to %s for %s' %
-                          (sent_route.sent_peer, outgoing_route))
+                LOG.debug('Sending withdrawal to %s for %s',
+                          sent_route.sent_peer, outgoing_route)
 
             # Have to clear sent_route list for this destination as
             # best path is removed.
@@ -243,7 +407,7 @@ class NonVrfPathProcessingMixin(object):
     def _new_best_path(self, new_best_path):
         old_best_path = self._best_path
         self._best_path = new_best_path
-        LOG.debug('New best path selected for destination %s' % (self))
+        LOG.debug('New best path selected for destination %s', self)
 
         # If old best path was withdrawn
         if (old_best_path and old_best_path not in self._known_path_list
@@ -264,8 +428,8 @@ class NonVrfPathProcessingMixin(object):
                 withdraw_clone = sent_path.clone(for_withdrawal=True)
                 outgoing_route = OutgoingRoute(withdraw_clone)
                 sent_route.sent_peer.enque_outgoing_msg(outgoing_route)
-                LOG.debug('Sending withdrawal to %s for %s' %
-                          (sent_route.sent_peer, outgoing_route))
+                LOG.debug('Sending withdrawal to %s for %s',
+                          sent_route.sent_peer, outgoing_route)
 
 
 class Destination(object):
@@ -276,6 +440,10 @@ class Destination(object):
     """
 
     __metaclass__ = abc.ABCMeta
+    __slots__ = ('_table', '_core_service', '_nlri', '_known_path_list',
+                 '_new_path_list', '_best_path', '_best_path_reason',
+                 '_decided_count', '_withdraw_list', '_sent_routes',
+                 'next_dest_to_process', 'prev_dest_to_process')
     ROUTE_FAMILY = RF_IPv4_UC
 
     def __init__(self, table, nlri):
@@ -303,6 +471,10 @@ class Destination(object):
         # Reason current best path was chosen as best path.
         self._best_path_reason = None
 
+        # Number of known paths current best path was chosen among, see
+        # `_compute_best_known_path`.
+        self._decided_count = 0
+
         # List of withdrawn paths.
         self._withdraw_list = []
 
@@ -378,6 +550,7 @@ class Destination(object):
         LOG.debug('Processing destination: %s', self)
         new_best_path, reason = self._process_paths()
         self._best_path_reason = reason
+        self._decided_count = len(self._known_path_list)
 
         if self._best_path == new_best_path:
             return
@@ -431,6 +604,8 @@ class Destination(object):
                 # If this peer is source of any paths, remove those path.
                 del(self._known_path_list[path_idx])
                 removed_paths.append(path)
+        if removed_paths:
+            self._decided_count = 0
         return removed_paths
 
     def withdraw_if_sent_to(self, peer):
@@ -465,6 +640,8 @@ class Destination(object):
         Modifies destination's state related to stored paths. Removes withdrawn
         paths from known paths. Also, adds new paths to known paths.
         """
+        known_count = len(self._known_path_list)
+
         # First remove the withdrawn paths.
         # Note: If we want to support multiple paths per destination we may
         # have to maintain sent-routes per path.
@@ -483,6 +660,11 @@ class Destination(object):
         # one.
         self._remove_old_paths()
 
+        # Known paths removed, best path has to be computed among all of
+        # them again.
+        if len(self._known_path_list) != known_count:
+            self._decided_count = 0
+
         # Collect all new paths into known paths.
         self._known_path_list.extend(self._new_path_list)
 
@@ -576,7 +758,7 @@ class Destination(object):
             for old_path in old_paths:
                 known_paths.remove(old_path)
                 LOG.debug('Implicit withdrawal of old path, since we have'
-                          ' learned new path from same source: %s' % old_path)
+                          ' learned new path from same source: %s', old_path)
 
     def _compute_best_known_path(self):
         """Computes the best path among known paths.
@@ -588,12 +770,21 @@ class Destination(object):
             raise BgpProcessorError(desc='Need at-least one known path to'
                                     ' compute best path')
 
-        # We pick the first path as current best path. This helps in breaking
-        # tie between two new paths learned in one cycle for which best-path
-        # calculation steps lead to tie.
-        current_best_path = self._known_path_list[0]
-        best_path_reason = BPR_ONLY_PATH
-        for next_path in self._known_path_list[1:]:
+        # Known paths are only appended to until some are removed, so that
+        # when paths were added only, the current best path is compared with
+        # the new ones rather than all paths compared again.
+        start = self._decided_count
+        if start and self._best_path is not None:
+            current_best_path = self._best_path
+            best_path_reason = self._best_path_reason
+        else:
+            # We pick the first path as current best path. This helps in
+            # breaking tie between two new paths learned in one cycle for
+            # which best-path calculation steps lead to tie.
+            start = 1
+            current_best_path = self._known_path_list[0]
+            best_path_reason = BPR_ONLY_PATH
+        for next_path in self._known_path_list[start:]:
             from ryu.services.protocols.bgp.processor import compute_best_path
             # Compare next path with current best path.
             new_best_path, reason = \
@@ -658,6 +849,78 @@ class Destination(object):
         return result
 
 
+class PathAttrMap(dict, Internable):
+    """Read-only map of path attribute type to path attribute.
+
+    Received path attributes are interned by their wire encoding, so that
+    identical attributes are held once whichever UPDATE carried them, and
+    maps are meant to be interned too: all paths learned with identical
+    path attributes then share one map which compares by identity.
+
+    MP_REACH_NLRI and MP_UNREACH_NLRI attributes carry the NLRIs of their
+    own UPDATE: MP_REACH_NLRI is held without NLRIs, so that it is shared
+    by UPDATEs of the same route family and next hop, and MP_UNREACH_NLRI,
+    which is no attribute of the paths advertised, is left out.
+    """
+
+    # Interned path attributes by wire encoding.
+    _pathattrs = weakref.WeakValueDictionary()
+
+    def __init__(self, pathattr_map):
+        items = []
+        for attr_type, attr in pathattr_map.iteritems():
+            if attr_type == BGP_ATTR_TYPE_MP_UNREACH_NLRI:
+                continue
+            elif attr_type == BGP_ATTR_TYPE_MP_REACH_NLRI and attr.nlri:
+                attr = BGPPathAttributeMpReachNLRI(attr.afi, attr.safi,
+                                                   attr.next_hop, [])
+            items.append((attr_type, self._intern_pathattr(attr)))
+        items.sort(key=lambda item: item[0])
+        super(PathAttrMap, self).__init__(items)
+        # Attributes are canonical objects here, hence compared by identity.
+        self._key = tuple(id(attr) for _attr_type, attr in items)
+        self._decision_key = None
+
+    @classmethod
+    def _intern_pathattr(cls, attr):
+        wire = str(attr.serialize())
+        interned = cls._pathattrs.get(wire)
+        if interned is None:
+            cls._pathattrs[wire] = interned = attr
+        return interned
+
+    def __hash__(self):
+        return hash(self._key)
+
+    def __eq__(self, other):
+        if isinstance(other, PathAttrMap):
+            return self._key == other._key
+        return super(PathAttrMap, self).__eq__(other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    @property
+    def decision_key(self):
+        """`DecisionKey` shared by the paths of these path attributes."""
+        if self._decision_key is None:
+            from ryu.services.protocols.bgp.processor import decision_key
+            self._decision_key = decision_key(self)
+        return self._decision_key
+
+    def __copy__(self):
+        # Copies are plain maps which can be modified.
+        return dict(self)
+
+    copy = __copy__
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError('%s is read-only' % self.__class__.__name__)
+
+    __setitem__ = __delitem__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+
 class Path(object):
     """Represents a way of reaching an IP destination.
 
@@ -667,7 +930,8 @@ class Path(object):
     __metaclass__ = ABCMeta
     __slots__ = ('_source', '_path_attr_map', '_nlri', '_source_version_num',
                  '_exported_from', '_nexthop', 'next_path', 'prev_path',
-                 '_is_withdraw', 'med_set_by_target_neighbor')
+                 '_is_withdraw', 'med_set_by_target_neighbor',
+                 '_decision_key')
     ROUTE_FAMILY = RF_IPv4_UC
 
     def __init__(self, source, nlri, src_ver_num, pattrs=None, nexthop=None,
@@ -682,6 +946,7 @@ class Path(object):
             - `src_ver_num`: (int) version number of *source* when this path
             was learned.
             - `pattrs`: (OrderedDict) various path attributes for this path.
+            An interned `PathAttrMap` is shared rather than copied.
             - `nexthop`: (str) nexthop advertised for this path.
             - `is_withdraw`: (bool) True if this represents a withdrawal.
         """
@@ -711,11 +976,17 @@ class Path(object):
         self._source = source
 
         # Path attribute of this path.
-        if pattrs:
+        if isinstance(pattrs, PathAttrMap):
+            self._path_attr_map = pattrs
+        elif pattrs:
             self._path_attr_map = copy(pattrs)
         else:
             self._path_attr_map = OrderedDict()
 
+        # Path attributes the best path selection compares, see
+        # `decision_key`.
+        self._decision_key = None
+
         # NLRI that this path represents.
         self._nlri = nlri
 
@@ -770,10 +1041,49 @@ class Path(object):
         """
         return self._path_attr_map.get(pattr_type, default)
 
+    @property
+    def decision_key(self):
+        """`DecisionKey` of the path attributes of this path the best path
+        selection compares, computed once.
+        """
+        key = self._decision_key
+        if key is None:
+            pattrs = self._path_attr_map
+            if isinstance(pattrs, PathAttrMap):
+                key = pattrs.decision_key
+            else:
+                from ryu.services.protocols.bgp.processor import decision_key
+                key = decision_key(pattrs)
+            self._decision_key = key
+        return key
+
+    @property
+    def shared_pathattr_map(self):
+        """The read-only `PathAttrMap` this path shares with paths learned
+        with identical path attributes, None if the path attributes of this
+        path are its own.
+        """
+        if isinstance(self._path_attr_map, PathAttrMap):
+            return self._path_attr_map
+        return None
+
+    def is_interned_pattr(self, pathattr):
+        """Returns True if *pathattr* is one of the interned path attributes
+        of this path.
+        """
+        return (isinstance(self._path_attr_map, PathAttrMap) and
+                self._path_attr_map.get(pathattr.type) is pathattr)
+
+    def has_same_pattrs(self, other):
+        """Returns True if *other* path shares the path attributes of this
+        path, as do paths learned with identical interned attributes.
+        """
+        return self._path_attr_map is other._path_attr_map
+
     def clone(self, for_withdrawal=False):
         pathattrs = None
         if not for_withdrawal:
-            pathattrs = self.pathattr_map
+            pathattrs = self._path_attr_map
         clone = self.__class__(
             self.source,
             self.nlri,
@@ -967,22 +1277,25 @@ class PrefixFilter(Filter):
         net = netaddr.IPNetwork(nlri.prefix)
 
         if net in self._network:
-            if self._ge is None and self._le is None:
-                result = True
+            result = self._length_matches(length)
 
-            elif self._ge is None and self._le:
-                if length <= self._le:
-                    result = True
+        return self.policy, result
 
-            elif self._ge and self._le is None:
-                if self._ge <= length:
-                    result = True
+    def _length_matches(self, length):
+        # Whether prefixes of *length* within our prefix match ge and le.
+        if self._ge is None and self._le is None:
+            return True
 
-            elif self._ge and self._le:
-                if self._ge <= length <= self._le:
-                    result = True
+        elif self._ge is None and self._le:
+            return length <= self._le
 
-        return self.policy, result
+        elif self._ge and self._le is None:
+            return self._ge <= length
+
+        elif self._ge and self._le:
+            return self._ge <= length <= self._le
+
+        return False
 
     def clone(self):
         """ This method clones PrefixFilter object.
@@ -1124,6 +1437,91 @@ class ASPathFilter(Filter):
                               policy=self._policy)
 
 
+class FilterList(object):
+    """An ordered list of filters compiled for evaluation of paths.
+
+    Prefix filters of IPv4/IPv6 unicast are indexed by prefix, so that a
+    path is only evaluated against filters whose prefix covers its own.
+    Other filters are evaluated in turn. Either way the first matching
+    filter in list order wins, as if all filters were evaluated in turn.
+
+    The list does not follow changes to the filters, compile a new one
+    instead.
+    """
+
+    _PREFIX_BITS = {
+        RF_IPv4_UC: (4, 32),
+        RF_IPv6_UC: (6, 128),
+    }
+
+    def __init__(self, filters):
+        self._filters = list(filters)
+        # Route family -> RadixTree of lists of (index, filter)
+        self._prefix_filters = {}
+        # Route family -> list of (index, filter)
+        self._other_filters = {}
+        for index, filter_ in enumerate(self._filters):
+            route_family = filter_.ROUTE_FAMILY
+            if (route_family not in self._PREFIX_BITS or
+                    not isinstance(filter_, PrefixFilter) or
+                    type(filter_).evaluate != PrefixFilter.evaluate):
+                self._other_filters.setdefault(route_family, []).append(
+                    (index, filter_))
+                continue
+
+            version, bits = self._PREFIX_BITS[route_family]
+            network = filter_._network
+            if network.version != version:
+                # Never contains a path of route_family.
+                continue
+            tree = self._prefix_filters.get(route_family)
+            if tree is None:
+                tree = self._prefix_filters[route_family] = RadixTree(bits)
+            entries = tree.get(network.first, network.prefixlen)
+            if entries is None:
+                entries = []
+                tree.insert(network.first, network.prefixlen, entries)
+            entries.append((index, filter_))
+
+    def __iter__(self):
+        return iter(self._filters)
+
+    def __len__(self):
+        return len(self._filters)
+
+    def first_match(self, path):
+        """Returns the first filter which matches *path* with policy
+        Filter.POLICY_PERMIT or Filter.POLICY_DENY, or None.
+        """
+        route_family = path.ROUTE_FAMILY
+        match_index = len(self._filters)
+        match = None
+
+        tree = self._prefix_filters.get(route_family)
+        if tree is not None:
+            nlri = path.nlri
+            length = nlri.length
+            key = _packed_addr_key(nlri.packed_addr)
+            for entries in tree.covering(key, length):
+                for index, filter_ in entries:
+                    if index >= match_index:
+                        break
+                    if filter_._length_matches(length):
+                        match_index = index
+                        match = filter_
+                        break
+
+        for index, filter_ in self._other_filters.get(route_family, ()):
+            if index >= match_index:
+                break
+            policy, is_matched = filter_.evaluate(path)
+            if is_matched and policy in (Filter.POLICY_PERMIT,
+                                         Filter.POLICY_DENY):
+                return filter_
+
+        return match
+
+
 class AttributeMap(object):
     """
     This class is used to specify an attribute to add if the path matches
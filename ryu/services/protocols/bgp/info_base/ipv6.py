@@ -35,6 +35,7 @@ class IPv6Dest(Destination, NonVrfPathProcessingMixin):
 
     Store IPv6 Paths.
     """
+    __slots__ = ()
     ROUTE_FAMILY = RF_IPv6_UC
 
     def _best_path_lost(self):
@@ -55,6 +56,7 @@ class Ipv6Table(Table):
     """
     ROUTE_FAMILY = RF_IPv6_UC
     VPN_DEST_CLASS = IPv6Dest
+    PREFIX_INDEX_BITS = 128
 
     def __init__(self, core_service, signal_bus):
         super(Ipv6Table, self).__init__(None, core_service, signal_bus)
@@ -76,6 +78,7 @@ class Ipv6Table(Table):
 
 class Ipv6Path(Path):
     """Represents a way of reaching an v6 destination."""
+    __slots__ = ()
     ROUTE_FAMILY = RF_IPv6_UC
     VRF_PATH_CLASS = None  # defined in init - anti cyclic import hack
     NLRI_CLASS = IPAddrPrefix
@@ -83,7 +86,7 @@ class Ipv6Path(Path):
     def __init__(self, *args, **kwargs):
         super(Ipv6Path, self).__init__(*args, **kwargs)
         from ryu.services.protocols.bgp.info_base.vrf6 import Vrf6Path
-        self.VRF_PATH_CLASS = Vrf6Path
+        Ipv6Path.VRF_PATH_CLASS = Vrf6Path
 
 
 class Ipv6PrefixFilter(PrefixFilter):
@@ -36,6 +36,7 @@ class VpnTable(Table):
     """
     ROUTE_FAMILY = None
     VPN_DEST_CLASS = None
+    PREFIX_INDEX_RD = True
 
     def __init__(self, core_service, signal_bus):
         super(VpnTable, self).__init__(None, core_service, signal_bus)
@@ -56,6 +57,7 @@ class VpnTable(Table):
 
 
 class VpnPath(Path):
+    __slots__ = ()
     __metaclass__ = abc.ABCMeta
     ROUTE_FAMILY = None
     VRF_PATH_CLASS = None
@@ -85,6 +87,7 @@ class VpnPath(Path):
 class VpnDest(Destination, NonVrfPathProcessingMixin):
     """Base class for VPN destinations."""
 
+    __slots__ = ()
     __metaclass__ = abc.ABCMeta
 
     def _best_path_lost(self):
@@ -34,6 +34,7 @@ class Vpnv4Dest(VpnDest):
 
     Store IPv4 Paths.
     """
+    __slots__ = ()
     ROUTE_FAMILY = RF_IPv4_VPN
 
 
@@ -45,10 +46,12 @@ class Vpnv4Table(VpnTable):
     """
     ROUTE_FAMILY = RF_IPv4_VPN
     VPN_DEST_CLASS = Vpnv4Dest
+    PREFIX_INDEX_BITS = 32
 
 
 class Vpnv4Path(VpnPath):
     """Represents a way of reaching an VPNv4 destination."""
+    __slots__ = ()
     ROUTE_FAMILY = RF_IPv4_VPN
     VRF_PATH_CLASS = None  # defined in init - anti cyclic import hack
     NLRI_CLASS = IPAddrPrefix
@@ -56,4 +59,4 @@ class Vpnv4Path(VpnPath):
     def __init__(self, *args, **kwargs):
         super(Vpnv4Path, self).__init__(*args, **kwargs)
         from ryu.services.protocols.bgp.info_base.vrf4 import Vrf4Path
-        self.VRF_PATH_CLASS = Vrf4Path
+        Vpnv4Path.VRF_PATH_CLASS = Vrf4Path
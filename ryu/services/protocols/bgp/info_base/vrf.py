@@ -275,6 +275,7 @@ class VrfTable(Table):
 
 class VrfDest(Destination):
     """Base class for VRF destination."""
+    __slots__ = ('_route_dist',)
     __metaclass__ = abc.ABCMeta
 
     def __init__(self, table, nlri):
@@ -306,7 +307,7 @@ class VrfDest(Destination):
             tm.learn_path(gpath)
 
     def _new_best_path(self, best_path):
-        LOG.debug('New best path selected for destination %s' % (self))
+        LOG.debug('New best path selected for destination %s', self)
 
         old_best_path = self._best_path
         assert (best_path != old_best_path)
@@ -335,8 +336,8 @@ class VrfDest(Destination):
             gpath = best_path.clone_to_vpn(self._route_dist)
             tm = self._core_service.table_manager
             tm.learn_path(gpath)
-            LOG.debug('VRF table %s has new best path: %s' %
-                      (self._route_dist, self.best_path))
+            LOG.debug('VRF table %s has new best path: %s',
+                      self._route_dist, self.best_path)
 
     def _remove_withdrawals(self):
         """Removes withdrawn paths.
@@ -416,7 +417,7 @@ class VrfDest(Destination):
             for old_path in old_paths:
                 known_paths.remove(old_path)
                 LOG.debug('Implicit withdrawal of old path, since we have'
-                          ' learned new path from same source: %s' % old_path)
+                          ' learned new path from same source: %s', old_path)
 
     def _validate_path(self, path):
         if not path or not hasattr(path, 'label_list'):
@@ -37,12 +37,14 @@ LOG = logging.getLogger('bgpspeaker.info_base.vrf4')
 
 class Vrf4Path(VrfPath):
     """Represents a way of reaching an IP destination with a VPN."""
+    __slots__ = ()
     ROUTE_FAMILY = RF_IPv4_UC
     VPN_PATH_CLASS = Vpnv4Path
     VPN_NLRI_CLASS = LabelledVPNIPAddrPrefix
 
 
 class Vrf4Dest(VrfDest):
+    __slots__ = ()
     ROUTE_FAMILY = RF_IPv4_UC
 
 
@@ -53,6 +55,7 @@ class Vrf4Table(VrfTable):
     NLRI_CLASS = IPAddrPrefix
     VRF_PATH_CLASS = Vrf4Path
     VRF_DEST_CLASS = Vrf4Dest
+    PREFIX_INDEX_BITS = 32
 
 
 class Vrf4NlriImportMap(VrfNlriImportMap):
@@ -37,6 +37,7 @@ LOG = logging.getLogger('bgpspeaker.info_base.vrf6')
 
 class Vrf6Path(VrfPath):
     """Represents a way of reaching an IP destination with a VPN."""
+    __slots__ = ()
     ROUTE_FAMILY = RF_IPv6_UC
     VPN_PATH_CLASS = Vpnv6Path
     VPN_NLRI_CLASS = LabelledVPNIP6AddrPrefix
@@ -44,6 +45,7 @@ class Vrf6Path(VrfPath):
 
 class Vrf6Dest(VrfDest):
     """Destination for IPv6 VRFs."""
+    __slots__ = ()
     ROUTE_FAMILY = RF_IPv6_UC
 
 
@@ -54,6 +56,7 @@ class Vrf6Table(VrfTable):
     NLRI_CLASS = IP6AddrPrefix
     VRF_PATH_CLASS = Vrf6Path
     VRF_DEST_CLASS = Vrf6Dest
+    PREFIX_INDEX_BITS = 128
 
 
 class Vrf6NlriImportMap(VrfNlriImportMap):
@@ -131,6 +131,9 @@ class SentRoute(object):
     about a particular BGP destination.
     """
 
+    __slots__ = ('path', '_sent_peer', 'filtered', 'timestamp',
+                 'next_sent_route', 'prev_sent_route')
+
     def __init__(self, path, peer, filtered=None, timestamp=None):
         assert(path and hasattr(peer, 'version_num'))
 
@@ -161,6 +164,8 @@ class ReceivedRoute(object):
     about a particular BGP destination.
     """
 
+    __slots__ = ('path', '_received_peer', 'filtered', 'timestamp')
+
     def __init__(self, path, peer, filtered=None, timestamp=None):
         assert(path and hasattr(peer, 'version_num'))
 
@@ -6,6 +6,14 @@ from ryu.services.protocols.bgp.operator.command import STATUS_ERROR
 from ryu.services.protocols.bgp.operator.command import STATUS_OK
 
 from ryu.services.protocols.bgp.base import ActivityException
+from ryu.services.protocols.bgp.core_managers.table_manager import \
+    PREFIX_MATCH_COVERING
+from ryu.services.protocols.bgp.core_managers.table_manager import \
+    PREFIX_MATCH_EXACT
+from ryu.services.protocols.bgp.core_managers.table_manager import \
+    PREFIX_MATCH_LONGEST
+from ryu.services.protocols.bgp.core_managers.table_manager import \
+    PREFIX_MATCH_MORE_SPECIFIC
 from ryu.services.protocols.bgp.operator.commands.responses import \
     WrongParamResp
 
@@ -15,24 +23,47 @@ class RibBase(Command, RouteFormatterMixin):
 
 
 class Rib(RibBase):
-    help_msg = 'show all routes for address family'
-    param_help_msg = '<address-family>'
+    help_msg = 'show all routes for address family, or only those' \
+        ' matching prefix'
+    param_help_msg = '<address-family> [[<route-dist>] <prefix>' \
+        ' [longer-prefixes|shorter-prefixes|longest-match]]'
     command = 'rib'
 
+    vpn_families = ['vpnv4', 'vpnv6']
+    prefix_matches = {
+        'longer-prefixes': PREFIX_MATCH_MORE_SPECIFIC,
+        'shorter-prefixes': PREFIX_MATCH_COVERING,
+        'longest-match': PREFIX_MATCH_LONGEST,
+    }
+
     def __init__(self, *args, **kwargs):
         super(Rib, self).__init__(*args, **kwargs)
         self.subcommands = {
             'all': self.All}
 
     def action(self, params):
-        if len(params) != 1 or params[0] not in self.supported_families:
+        if len(params) < 1 or params[0] not in self.supported_families:
+            return WrongParamResp()
+        family = params[0]
+        params = params[1:]
+        route_dist = None
+        if params and family in self.vpn_families:
+            route_dist = params.pop(0)
+        prefix = params.pop(0) if params else None
+        match = PREFIX_MATCH_EXACT
+        if params:
+            match = self.prefix_matches.get(params.pop(0))
+        if (params or match is None or
+                (route_dist is not None and prefix is None)):
             return WrongParamResp()
+
         from ryu.services.protocols.bgp.operator.internal_api \
             import WrongParamError
         try:
             return CommandsResponse(
                 STATUS_OK,
-                self.api.get_single_rib_routes(params[0])
+                self.api.get_single_rib_routes(family, prefix, route_dist,
+                                               match)
             )
         except WrongParamError as e:
             return WrongParamResp(e)
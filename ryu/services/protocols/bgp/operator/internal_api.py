@@ -19,6 +19,8 @@ from ryu.services.protocols.bgp.base import add_bgp_error_metadata
 from ryu.services.protocols.bgp.base import BGPSException
 from ryu.services.protocols.bgp.base import SUPPORTED_GLOBAL_RF
 from ryu.services.protocols.bgp.core_manager import CORE_MANAGER
+from ryu.services.protocols.bgp.core_managers.table_manager import \
+    PREFIX_MATCH_EXACT
 
 
 LOG = logging.getLogger('bgpspeaker.operator.internal_api')
@@ -76,7 +78,8 @@ class InternalApi(object):
     def _get_vrf_tables(self):
         return CORE_MANAGER.get_core_service().table_manager.get_vrf_tables()
 
-    def get_single_rib_routes(self, addr_family):
+    def get_single_rib_routes(self, addr_family, prefix=None,
+                              route_dist=None, match=PREFIX_MATCH_EXACT):
         rfs = {
             'ipv4': RF_IPv4_UC,
             'ipv6': RF_IPv6_UC,
@@ -89,6 +92,14 @@ class InternalApi(object):
 
         rf = rfs.get(addr_family)
         table_manager = self.get_core_service().table_manager
+        if prefix is not None:
+            try:
+                dests = table_manager.lookup_dests(rf, prefix, route_dist,
+                                                   match)
+            except ValueError as e:
+                raise WrongParamError(str(e))
+            return [self._dst_to_dict(dst) for dst in dests]
+
         gtable = table_manager.get_global_table_by_route_family(rf)
         if gtable is not None:
             return [self._dst_to_dict(dst)
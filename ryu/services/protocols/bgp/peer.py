@@ -16,10 +16,13 @@
  BGP peer related classes and utils.
 """
 from collections import namedtuple
+import copy
 import logging
 import socket
+import struct
 import time
 import traceback
+import weakref
 
 from ryu.services.protocols.bgp.base import Activity
 from ryu.services.protocols.bgp.base import OrderedDict
@@ -31,12 +34,15 @@ from ryu.services.protocols.bgp.model import OutgoingRoute
 from ryu.services.protocols.bgp.model import SentRoute
 from ryu.services.protocols.bgp.info_base.base import PrefixFilter
 from ryu.services.protocols.bgp.info_base.base import AttributeMap
+from ryu.services.protocols.bgp.info_base.base import PathAttrMap
+from ryu.services.protocols.bgp.info_base.base import FilterList
 from ryu.services.protocols.bgp.model import ReceivedRoute
 from ryu.services.protocols.bgp.net_ctrl import NET_CONTROLLER
 from ryu.services.protocols.bgp.rtconf.neighbors import NeighborConfListener
 from ryu.services.protocols.bgp.rtconf.neighbors import CONNECT_MODE_PASSIVE
 from ryu.services.protocols.bgp.signals.emit import BgpSignalBus
 from ryu.services.protocols.bgp.speaker import BgpProtocol
+from ryu.services.protocols.bgp.speaker import BGP_MAX_MSG_LEN
 from ryu.services.protocols.bgp.info_base.ipv4 import Ipv4Path
 from ryu.services.protocols.bgp.info_base.vpnv4 import Vpnv4Path
 from ryu.services.protocols.bgp.info_base.vpnv6 import Vpnv6Path
@@ -91,6 +97,23 @@ from ryu.lib.packet.bgp import BGPIPv4AddressSpecificExtendedCommunity
 
 LOG = logging.getLogger('bgpspeaker.peer')
 
+# Kinds of UPDATE messages outgoing routes are packed into.
+_UPDATE_WITHDRAW = 'withdraw'
+_UPDATE_NLRI = 'nlri'
+_UPDATE_MP_UNREACH = 'mp_unreach'
+_UPDATE_MP_REACH = 'mp_reach'
+
+# Inputs of the outbound transformation of path attributes sent to a peer.
+_OutboundPolicy = namedtuple('_OutboundPolicy',
+                             ('ebgp', 'local_as', 'next_hop',
+                              'multi_exit_disc', 'local_pref', 'soo_list'))
+
+# Routes of an update group sent together: the outgoing routes paired with
+# whether out-bound filters block them, the members the paths of which
+# are among them and the serialized UPDATE messages.
+_UpdateBatch = namedtuple('_UpdateBatch',
+                          ('filtered_routes', 'excluded', 'msgs'))
+
 
 def is_valid_state(state):
     """Returns True if given state is a valid bgp finite state machine state.
@@ -116,23 +139,56 @@ PeerCounterNames = namedtuple(
     ('RECV_PREFIXES',
      'RECV_UPDATES',
      'SENT_UPDATES',
+     'SENT_PREFIXES',
      'RECV_NOTIFICATION',
      'SENT_NOTIFICATION',
      'SENT_REFRESH',
      'RECV_REFRESH',
-     'FSM_ESTB_TRANSITIONS')
+     'FSM_ESTB_TRANSITIONS',
+     'SENT_PATHATTRS_CACHE_HITS',
+     'SENT_PATHATTRS_CACHE_MISSES')
 )(
     'recv_prefixes',
     'recv_updates',
     'sent_updates',
+    'sent_prefixes',
     'recv_notification',
     'sent_notification',
     'sent_refresh',
     'recv_refresh',
-    'fms_established_transitions'
+    'fms_established_transitions',
+    'sent_pathattrs_cache_hits',
+    'sent_pathattrs_cache_misses'
 )
 
 
+class _PreSerializedUpdate(BGPUpdate):
+    """UPDATE message whose path attributes, but the first
+    `serialized_from` ones, are given serialized as `binpathattrs`.
+
+    Has no withdrawn routes.
+    """
+
+    def __init__(self, binpathattrs, serialized_from=0, **kwargs):
+        super(_PreSerializedUpdate, self).__init__(**kwargs)
+        self._binpathattrs = binpathattrs
+        self._serialized_from = serialized_from
+
+    def serialize_tail(self):
+        binpathattrs = bytearray()
+        for pa in self.path_attributes[:self._serialized_from]:
+            binpathattrs += pa.serialize()
+        binpathattrs += self._binpathattrs
+        self.withdrawn_routes_len = 0
+        self.total_path_attribute_len = len(binpathattrs)
+        msg = bytearray(struct.pack('!HH', self.withdrawn_routes_len,
+                                    self.total_path_attribute_len))
+        msg += binpathattrs
+        for n in self.nlri:
+            msg += n.serialize()
+        return msg
+
+
 class PeerState(object):
     """A BGP neighbor state. Think of this class as of information and stats
     container for Peer.
@@ -149,11 +205,14 @@ class PeerState(object):
             'recv_prefixes': 0,
             'recv_updates': 0,
             'sent_updates': 0,
+            'sent_prefixes': 0,
             'recv_notification': 0,
             'sent_notification': 0,
             'sent_refresh': 0,
             'recv_refresh': 0,
             'fms_established_transitions': 0,
+            'sent_pathattrs_cache_hits': 0,
+            'sent_pathattrs_cache_misses': 0,
         }
         self._signal_bus = signal_bus
 
@@ -250,6 +309,18 @@ class PeerState(object):
                 self.get_count(PeerCounterNames.RECV_REFRESH) +
                 self.get_count(PeerCounterNames.RECV_NOTIFICATION))
 
+    @property
+    def pathattrs_cache_hit_ratio(self):
+        """Returns the ratio of paths sent to this peer with path attributes
+        already serialized, for this peer or another, to the paths sent
+        which could have been.
+        """
+        hits = self.get_count(PeerCounterNames.SENT_PATHATTRS_CACHE_HITS)
+        misses = self.get_count(PeerCounterNames.SENT_PATHATTRS_CACHE_MISSES)
+        if not hits + misses:
+            return 0.0
+        return float(hits) / (hits + misses)
+
     def get_stats_summary_dict(self):
         """Returns basic stats.
 
@@ -262,15 +333,265 @@ class PeerState(object):
             stats.UPDATE_MSG_OUT: self.get_count(
                 PeerCounterNames.SENT_UPDATES
             ),
+            stats.PREFIXES_OUT: self.get_count(
+                PeerCounterNames.SENT_PREFIXES
+            ),
             stats.TOTAL_MSG_IN: self.total_msg_recv,
             stats.TOTAL_MSG_OUT: self.total_msg_sent,
             stats.FMS_EST_TRANS: self.get_count(
                 PeerCounterNames.FSM_ESTB_TRANSITIONS
             ),
+            stats.PATHATTRS_CACHE_HITS: self.get_count(
+                PeerCounterNames.SENT_PATHATTRS_CACHE_HITS
+            ),
+            stats.PATHATTRS_CACHE_MISSES: self.get_count(
+                PeerCounterNames.SENT_PATHATTRS_CACHE_MISSES
+            ),
             stats.UPTIME: uptime
         }
 
 
+class UpdateGroup(object):
+    """Peers of identical outbound policies, see `Peer.update_group_key`.
+
+    Routes are queued once for the group instead of once per member.  The
+    first member to be done with the routes batched already takes the next
+    batch of routes queued, filters them and serializes their UPDATE
+    messages, then every member sends the same messages.  Batches are
+    dropped once every member has sent them.  Paths learned from a member
+    are not sent back to it: it constructs its own messages for the
+    batches having any.
+
+    Members joining on session establishment first send the best paths of
+    the global tables, see `add_member`.
+    """
+
+    def __init__(self, key):
+        self.key = key
+        self.outgoing_msg_list = Sink.OutgoingMsgList()
+        # Member to the sequence number of the next batch it sends
+        self._positions = {}
+        self._batches = []
+        # Sequence number of self._batches[0]
+        self._first_seq = 0
+        # Formatted NLRI to the last outgoing route queued for it
+        self._last_queued = {}
+        # The _TableDump members are sending, if any
+        self._dump = None
+
+    @property
+    def members(self):
+        return self._positions.keys()
+
+    def communicate_path(self, path):
+        """Queues `path` to be sent to the members if it qualifies, see
+        `Peer.communicate_path`.
+        """
+        if not self._positions:
+            return
+        member = next(iter(self._positions))
+        path = member._outgoing_path(path, check_source=False)
+        if path is not None:
+            self._enque(OutgoingRoute(path))
+
+    def enque_withdrawal(self, outgoing_route):
+        """Queues `outgoing_route`, a withdrawal queued for any member,
+        unless it is queued already.
+        """
+        nlri_str = outgoing_route.path.nlri.formatted_nlri_str
+        last = self._last_queued.get(nlri_str)
+        if last is not None and last.path.is_withdraw:
+            return
+        self._enque(outgoing_route)
+
+    def _enque(self, outgoing_route):
+        self.outgoing_msg_list.append(outgoing_route)
+        self._last_queued[outgoing_route.path.nlri.formatted_nlri_str] = \
+            outgoing_route
+        for member in self._positions:
+            member.outgoing_msg_event.set()
+
+    def _make_batch(self, builder):
+        outgoing_route = self.outgoing_msg_list.pop_first()
+        if outgoing_route is None:
+            return None
+        outgoing_routes = builder._pop_outgoing_routes(
+            outgoing_route, self.outgoing_msg_list, wait=False)
+        for outgoing_route in outgoing_routes:
+            nlri_str = outgoing_route.path.nlri.formatted_nlri_str
+            if self._last_queued.get(nlri_str) is outgoing_route:
+                del self._last_queued[nlri_str]
+        batch = self._build_batch(builder, outgoing_routes)
+        self._batches.append(batch)
+        return batch
+
+    def _make_dump_batch(self, builder):
+        dump = self._dump
+        if dump.dests is None:
+            dump.dests = self._dump_dests(builder)
+        outgoing_routes = []
+        while (dump.index < len(dump.dests) and
+               len(outgoing_routes) < builder.OUTGOING_ROUTE_BATCH_SIZE):
+            best_path = dump.dests[dump.index].best_path
+            dump.index += 1
+            if not best_path:
+                continue
+            path = builder._outgoing_path(best_path, check_source=False)
+            if path is not None:
+                outgoing_routes.append(OutgoingRoute(path))
+        if not outgoing_routes:
+            return None
+        batch = self._build_batch(builder, outgoing_routes)
+        dump.batches.append(batch)
+        return batch
+
+    @staticmethod
+    def _dump_dests(member):
+        # Destinations of the global tables, as of now, whose best paths
+        # are sent on session establishment, see Peer.comm_all_best_paths.
+        global_tables = member._core_service.table_manager.global_tables
+        dests = []
+        for route_family, table in global_tables.iteritems():
+            if (route_family != RF_RTC_UC and
+                    member.is_mbgp_cap_valid(route_family)):
+                dests.extend(table.itervalues())
+        return dests
+
+    def _build_batch(self, builder, outgoing_routes):
+        filtered_routes = builder._filter_outgoing_routes(outgoing_routes)
+        paths = [outgoing_route.path
+                 for outgoing_route, block in filtered_routes if not block]
+        excluded = frozenset(path.source for path in paths
+                             if path.source in self._positions)
+        msgs = [str(update_msg.serialize())
+                for update_msg in builder._construct_updates(paths)]
+        return _UpdateBatch(filtered_routes, excluded, msgs)
+
+    def next_batch(self, member):
+        """Returns the next batch for `member` to send, None if there is
+        none.
+        """
+        dump = self._dump
+        if dump is not None and member in dump.positions:
+            index = dump.positions[member]
+            if index < len(dump.batches):
+                batch = dump.batches[index]
+            else:
+                batch = self._make_dump_batch(member)
+            if batch is not None:
+                dump.positions[member] = index + 1
+                return batch
+            self._end_dump(member)
+
+        seq = self._positions[member]
+        index = seq - self._first_seq
+        if index < len(self._batches):
+            batch = self._batches[index]
+        else:
+            batch = self._make_batch(member)
+            if batch is None:
+                return None
+        self._positions[member] = seq + 1
+        self._trim()
+        return batch
+
+    def _trim(self):
+        if not self._positions:
+            self._first_seq += len(self._batches)
+            del self._batches[:]
+            return
+        count = min(self._positions.itervalues()) - self._first_seq
+        if count:
+            del self._batches[:count]
+            self._first_seq += count
+
+    def add_member(self, peer, dump=False):
+        """Adds `peer`, which is to send the routes queued from now on.
+
+        If `dump` is True, `peer` sends the best paths of the global tables
+        first, as on session establishment.  Members doing so share the
+        same table dump as long as any of them is sending it: the batches
+        of the dump are kept until then, as are the batches of the routes
+        queued since it started, which they send after it.
+        """
+        # Routes queued already are for the members so far.
+        while self._make_batch(peer) is not None:
+            pass
+        seq = self._first_seq + len(self._batches)
+        if dump:
+            if self._dump is None:
+                self._dump = _TableDump(seq)
+            self._dump.positions[peer] = 0
+            seq = self._dump.seq
+        self._positions[peer] = seq
+        self._trim()
+
+    def _end_dump(self, member):
+        del self._dump.positions[member]
+        if not self._dump.positions:
+            self._dump = None
+
+    def remove_member(self, peer):
+        """Removes `peer` and returns the routes it has not sent yet, as new
+        `OutgoingRoute`s.
+        """
+        outgoing_routes = []
+        dump = self._dump
+        if dump is not None and peer in dump.positions:
+            for batch in dump.batches[dump.positions[peer]:]:
+                outgoing_routes.extend(self._unsent_routes(peer, batch))
+            dests = dump.dests
+            if dests is None:
+                dests = self._dump_dests(peer)
+            for dest in dests[dump.index:]:
+                if dest.best_path:
+                    path = peer._outgoing_path(dest.best_path)
+                    if path is not None:
+                        outgoing_routes.append(OutgoingRoute(path))
+            self._end_dump(peer)
+
+        seq = self._positions.pop(peer)
+        for batch in self._batches[seq - self._first_seq:]:
+            outgoing_routes.extend(self._unsent_routes(peer, batch))
+        outgoing_routes.extend(self.outgoing_msg_list)
+        self._trim()
+        if not self._positions:
+            self.outgoing_msg_list.clear()
+            self._last_queued.clear()
+        return [OutgoingRoute(outgoing_route.path,
+                              outgoing_route.for_route_refresh)
+                for outgoing_route in outgoing_routes]
+
+    @staticmethod
+    def _unsent_routes(peer, batch):
+        return [outgoing_route
+                for outgoing_route, _block in batch.filtered_routes
+                if not (peer in batch.excluded and
+                        outgoing_route.path.source is peer)]
+
+
+class _TableDump(object):
+    """The best paths of the global tables sent to the members of an update
+    group that joined it on session establishment.
+
+    Destinations are taken as of the first batch, then batched as members
+    run out of batches.  Members send the routes queued for the group
+    since `seq` afterwards, so that they catch up with the changes made
+    while the dump was being sent.
+    """
+
+    def __init__(self, seq):
+        # Sequence number of the first batch of routes queued after the
+        # dump started
+        self.seq = seq
+        self.dests = None
+        # Index of the next destination in self.dests to batch
+        self.index = 0
+        self.batches = []
+        # Member to the index of the next batch of the dump it sends
+        self.positions = {}
+
+
 class Peer(Source, Sink, NeighborConfListener, Activity):
     """A BGP neighbor/peer.
 
@@ -284,6 +605,22 @@ class Peer(Source, Sink, NeighborConfListener, Activity):
 
     RTC_EOR_TIMER_NAME = 'RTC_EOR_Timer'
 
+    # Outgoing routes queued within this many seconds of each other are
+    # grouped by path attributes and packed into as few UPDATEs as
+    # possible, up to this many routes at a time.
+    OUTGOING_ROUTE_BATCH_WINDOW = 0.01
+    OUTGOING_ROUTE_BATCH_SIZE = 4096
+
+    # Peers of identical outbound policies join an update group, see
+    # UpdateGroup.
+    USE_UPDATE_GROUPS = True
+
+    # Path attributes sent and their wire encoding, by the PathAttrMap
+    # they are made from, then by route family and `_OutboundPolicy`.
+    # Shared by all peers, so that peers with the same outbound policy
+    # serialize the attributes of a path once.
+    _outgoing_pathattrs = weakref.WeakKeyDictionary()
+
     def __init__(self, common_conf, neigh_conf,
                  core_service, signal_bus, peer_manager):
         peer_activity_name = 'Peer: %s' % neigh_conf.ip_address
@@ -346,9 +683,11 @@ class Peer(Source, Sink, NeighborConfListener, Activity):
 
         # in-bound filters
         self._in_filters = self._neigh_conf.in_filter
+        self._in_filter_list = FilterList(self._in_filters)
 
         # out-bound filters
         self._out_filters = self._neigh_conf.out_filter
+        self._out_filter_list = FilterList(self._out_filters)
 
         # Adj-rib-in
         self._adj_rib_in = {}
@@ -359,6 +698,9 @@ class Peer(Source, Sink, NeighborConfListener, Activity):
         # attribute maps
         self._attribute_maps = {}
 
+        # UpdateGroup this peer is a member of
+        self._update_group = None
+
     @property
     def remote_as(self):
         return self._neigh_conf.remote_as
@@ -539,6 +881,7 @@ class Peer(Source, Sink, NeighborConfListener, Activity):
 
     def on_update_med(self, conf_evt):
         LOG.debug('on_update_med fired')
+        self._leave_update_group()
         if self._protocol is not None and self._protocol.started:
             negotiated_afs = self._protocol.negotiated_afs
             for af in negotiated_afs:
@@ -557,33 +900,26 @@ class Peer(Source, Sink, NeighborConfListener, Activity):
     def on_update_connect_mode(self, conf_evt):
         self._on_update_connect_mode(conf_evt.value)
 
-    def _apply_filter(self, filters, path):
+    def _apply_filter(self, filter_list, path):
         block = False
         blocked_cause = None
 
-        for filter_ in filters:
-            if filter_.ROUTE_FAMILY != path.ROUTE_FAMILY:
-                continue
-
-            policy, is_matched = filter_.evaluate(path)
-            if policy == PrefixFilter.POLICY_PERMIT and is_matched:
-                block = False
-                break
-            elif policy == PrefixFilter.POLICY_DENY and is_matched:
-                block = True
-                blocked_cause = filter_.prefix + ' - DENY'
-                break
+        filter_ = filter_list.first_match(path)
+        if filter_ is not None and filter_.policy == PrefixFilter.POLICY_DENY:
+            block = True
+            blocked_cause = filter_.prefix + ' - DENY'
 
         return block, blocked_cause
 
     def _apply_in_filter(self, path):
-        return self._apply_filter(self._in_filters, path)
+        return self._apply_filter(self._in_filter_list, path)
 
     def _apply_out_filter(self, path):
-        return self._apply_filter(self._out_filters, path)
+        return self._apply_filter(self._out_filter_list, path)
 
     def on_update_in_filter(self):
         LOG.debug('on_update_in_filter fired')
+        self._in_filter_list = FilterList(self._in_filters)
         for received_path in self._adj_rib_in.itervalues():
             LOG.debug('received_path: %s' % received_path)
             path = received_path.path
@@ -594,7 +930,7 @@ class Peer(Source, Sink, NeighborConfListener, Activity):
                 continue
             elif block:
                 # path wasn't blocked, but must be blocked by this update
-                path = sent_route.path.clone(for_withdrawal=True)
+                path = path.clone(for_withdrawal=True)
                 LOG.debug('withdraw %s because of in filter update'
                           % nlri_str)
             else:
@@ -607,6 +943,8 @@ class Peer(Source, Sink, NeighborConfListener, Activity):
 
     def on_update_out_filter(self):
         LOG.debug('on_update_out_filter fired')
+        self._leave_update_group()
+        self._out_filter_list = FilterList(self._out_filters)
         for sent_path in self._adj_rib_out.itervalues():
             LOG.debug('sent_path: %s' % sent_path)
             path = sent_path.path
@@ -617,7 +955,7 @@ class Peer(Source, Sink, NeighborConfListener, Activity):
                 continue
             elif block:
                 # path wasn't blocked, but must be blocked by this update
-                withdraw_clone = sent_route.path.clone(for_withdrawal=True)
+                withdraw_clone = path.clone(for_withdrawal=True)
                 outgoing_route = OutgoingRoute(withdraw_clone)
                 LOG.debug('send withdraw %s because of out filter update'
                           % nlri_str)
@@ -632,6 +970,7 @@ class Peer(Source, Sink, NeighborConfListener, Activity):
     def on_update_attribute_maps(self):
         # resend sent_route in case of filter matching
         LOG.debug('on_update_attribute_maps fired')
+        self._leave_update_group()
         for sent_path in self._adj_rib_out.itervalues():
             LOG.debug('resend path: %s' % sent_path)
             path = sent_path.path
@@ -678,37 +1017,100 @@ class Peer(Source, Sink, NeighborConfListener, Activity):
     def _send_outgoing_route(self, outgoing_route):
         """Constructs `Update` message from given `outgoing_route` and sends
         it to peer.
+        """
+        self._send_outgoing_routes([outgoing_route])
 
-        Also, checks if any policies prevent sending this message.
-        Populates Adj-RIB-out with corresponding `SentRoute`.
+    def _send_outgoing_routes(self, outgoing_routes):
+        """Constructs `Update` messages from given `outgoing_routes` and sends
+        them to peer.
+
+        Also, checks if any policies prevent sending these routes.
+        Populates Adj-RIB-out with corresponding `SentRoute`s.
         """
+        paths = self._remember_sent_routes(
+            self._filter_outgoing_routes(outgoing_routes))
+
+        # Construct and send update messages.
+        if paths:
+            for update_msg in self._construct_updates(paths):
+                self._protocol.send(update_msg)
+                # Collect update statistics.
+                self.state.incr(PeerCounterNames.SENT_UPDATES)
+            self.state.incr(PeerCounterNames.SENT_PREFIXES,
+                            incr_by=len(paths))
 
-        path = outgoing_route.path
-        block, blocked_cause = self._apply_out_filter(path)
+    def _filter_outgoing_routes(self, outgoing_routes):
+        """Returns `outgoing_routes` paired with whether out-bound filters
+        block them, as (outgoing_route, block) tuples.
+        """
+        filtered_routes = []
+        for outgoing_route in outgoing_routes:
+            path = outgoing_route.path
+            block, blocked_cause = self._apply_out_filter(path)
+            if block:
+                LOG.debug('prefix : %s is not sent by filter : %s',
+                          path.nlri, blocked_cause)
+            filtered_routes.append((outgoing_route, block))
+        return filtered_routes
+
+    def _remember_sent_routes(self, filtered_routes):
+        """Populates Adj-RIB-out with `SentRoute`s for `filtered_routes`, as
+        returned by `_filter_outgoing_routes`, and returns the paths of the
+        routes not blocked.
+        """
+        paths = []
+        for outgoing_route, block in filtered_routes:
+            path = outgoing_route.path
+            nlri_str = path.nlri.formatted_nlri_str
+            sent_route = SentRoute(path, self, block)
+            self._adj_rib_out[nlri_str] = sent_route
+            self._signal_bus.adj_rib_out_changed(self, sent_route)
 
-        nlri_str = outgoing_route.path.nlri.formatted_nlri_str
-        sent_route = SentRoute(outgoing_route.path, self, block)
-        self._adj_rib_out[nlri_str] = sent_route
-        self._signal_bus.adj_rib_out_changed(self, sent_route)
-
-        # TODO(PH): optimized by sending several prefixes per update.
-        # Construct and send update message.
-        if not block:
-            update_msg = self._construct_update(outgoing_route)
-            self._protocol.send(update_msg)
-            # Collect update statistics.
-            self.state.incr(PeerCounterNames.SENT_UPDATES)
-        else:
-            LOG.debug('prefix : %s is not sent by filter : %s'
-                      % (path.nlri, blocked_cause))
-
-        # We have to create sent_route for every OutgoingRoute which is
-        # not a withdraw or was for route-refresh msg.
-        if (not outgoing_route.path.is_withdraw and
-                not outgoing_route.for_route_refresh):
-            # Update the destination with new sent route.
-            tm = self._core_service.table_manager
-            tm.remember_sent_route(sent_route)
+            if not block:
+                paths.append(path)
+
+            # We have to create sent_route for every OutgoingRoute which is
+            # not a withdraw or was for route-refresh msg.
+            if (not path.is_withdraw and
+                    not outgoing_route.for_route_refresh):
+                # Update the destination with new sent route.
+                tm = self._core_service.table_manager
+                tm.remember_sent_route(sent_route)
+        return paths
+
+    def _pop_outgoing_routes(self, outgoing_route, msg_list=None,
+                             wait=True):
+        """Returns `outgoing_route` followed by the routes queued right after
+        it, to be sent together.
+
+        Routes are taken from `msg_list`, the outgoing message list of this
+        peer by default.  If the queue runs dry, waits once for
+        OUTGOING_ROUTE_BATCH_WINDOW seconds for more routes, unless `wait`
+        is False.  A batch stops at OUTGOING_ROUTE_BATCH_SIZE routes, at a
+        message other than an `OutgoingRoute` and at a second route for the
+        same prefix, so that the order of messages sent for a prefix is
+        kept.
+        """
+        if msg_list is None:
+            msg_list = self.outgoing_msg_list
+        outgoing_routes = [outgoing_route]
+        nlri_strs = set([outgoing_route.path.nlri.formatted_nlri_str])
+        waited = not (wait and self.OUTGOING_ROUTE_BATCH_WINDOW)
+        while len(outgoing_routes) < self.OUTGOING_ROUTE_BATCH_SIZE:
+            outgoing_msg = msg_list.pop_first()
+            if outgoing_msg is None:
+                if waited or self._protocol is None:
+                    break
+                self.pause(self.OUTGOING_ROUTE_BATCH_WINDOW)
+                waited = True
+                continue
+            if (not isinstance(outgoing_msg, OutgoingRoute) or
+                    outgoing_msg.path.nlri.formatted_nlri_str in nlri_strs):
+                msg_list.prepend(outgoing_msg)
+                break
+            outgoing_routes.append(outgoing_msg)
+            nlri_strs.add(outgoing_msg.path.nlri.formatted_nlri_str)
+        return outgoing_routes
 
     def _process_outgoing_msg_list(self):
         while True:
@@ -717,6 +1119,12 @@ class Peer(Source, Sink, NeighborConfListener, Activity):
             if self._protocol is not None:
                 # We pick the first outgoing msg. available and send it.
                 outgoing_msg = self.outgoing_msg_list.pop_first()
+                # Then the routes queued for our update group.
+                if outgoing_msg is None and self._send_update_group_batch():
+                    # Let the other members, likely to send the same batch,
+                    # and other threads run in between batches.
+                    self.pause(0)
+                    continue
 
             # If we do not have any outgoing route, we wait.
             if outgoing_msg is None:
@@ -735,15 +1143,118 @@ class Peer(Source, Sink, NeighborConfListener, Activity):
             if isinstance(outgoing_msg, BGPRouteRefresh):
                 self._send_outgoing_route_refresh_msg(outgoing_msg)
             elif isinstance(outgoing_msg, OutgoingRoute):
-                self._send_outgoing_route(outgoing_msg)
+                outgoing_routes = self._pop_outgoing_routes(outgoing_msg)
+                # The session may have gone down while we were waiting.
+                if self._protocol is not None:
+                    self._send_outgoing_routes(outgoing_routes)
 
             # EOR are enqueued as plain Update messages.
             elif isinstance(outgoing_msg, BGPUpdate):
                 self._protocol.send(outgoing_msg)
-                LOG.debug('Update %s>> %s' % (self._neigh_conf.ip_address,
-                                              outgoing_msg))
+                LOG.debug('Update %s>> %s', self._neigh_conf.ip_address,
+                          outgoing_msg)
                 self.state.incr(PeerCounterNames.SENT_UPDATES)
 
+    @property
+    def update_group(self):
+        return self._update_group
+
+    @property
+    def update_group_key(self):
+        """Returns the key of the update group this peer can join, None if it
+        cannot join any.
+
+        Peers in the same update group have identical outbound policies:
+        they are in the same AS, have the same route families negotiated,
+        the same next hop, MED and SOO list configured, and the same
+        out-bound filters and attribute maps.  Peers with RTC capability,
+        which have their own route target filter, are not grouped.  Nor
+        are route server clients: they are sent the paths learned from
+        them, which members are not, and are usually each in an AS of
+        their own, so that groups of them would have a single member.
+        """
+        if (not self.in_established() or self.is_route_server_client or
+                self.is_mbgp_cap_valid(RF_RTC_UC)):
+            return None
+        route_families = tuple(sorted((rf.afi, rf.safi) for rf in
+                                      self._protocol.negotiated_afs))
+        attribute_maps = tuple(sorted(
+            (key, repr(at_maps.get(const.ATTR_MAPS_ORG_KEY)))
+            for key, at_maps in self._attribute_maps.iteritems()))
+        return (self.remote_as, self._core_service.asn, route_families,
+                self._neigh_conf.next_hop or self.host_bind_ip,
+                self._neigh_conf.is_next_hop_self,
+                self._neigh_conf.multi_exit_disc,
+                tuple(self._neigh_conf.soo_list or ()),
+                tuple(repr(f) for f in self._out_filters), attribute_maps)
+
+    def enque_outgoing_msg(self, msg):
+        if self._update_group is not None and isinstance(msg, OutgoingRoute):
+            if msg.path.is_withdraw and not msg.for_route_refresh:
+                # Routes are withdrawn from every member of the group.
+                self._update_group.enque_withdrawal(msg)
+                return
+            # Routes of our own are sent after those of the group.
+            self._leave_update_group()
+        Sink.enque_outgoing_msg(self, msg)
+
+    def _leave_update_group(self, requeue=True):
+        """Leaves the update group of this peer, if any, queuing the routes
+        of the group this peer has not sent yet unless `requeue` is False.
+        """
+        group = self._update_group
+        if group is None:
+            return
+        self._update_group = None
+        outgoing_routes = self._peer_manager.leave_update_group(self, group)
+        if requeue:
+            for outgoing_route in outgoing_routes:
+                Sink.enque_outgoing_msg(self, outgoing_route)
+
+    def _join_update_group(self, dump=False):
+        """Joins the update group of this peer if possible, see
+        `UpdateGroup.add_member` for `dump`.  Returns True if it did.
+        """
+        if not self.USE_UPDATE_GROUPS:
+            return False
+        self._update_group = self._peer_manager.join_update_group(self, dump)
+        return self._update_group is not None
+
+    def _send_update_group_batch(self):
+        """Sends the next batch of routes of the update group of this peer,
+        joining one first if possible.
+
+        This peer has no outgoing message of its own left to send.  Returns
+        True if a batch was sent.
+        """
+        if self._update_group is None and not self._join_update_group():
+            return False
+        batch = self._update_group.next_batch(self)
+        if batch is None:
+            return False
+
+        filtered_routes = batch.filtered_routes
+        own = self in batch.excluded
+        if own:
+            # Paths learned from this peer are not sent back to it.
+            filtered_routes = [(outgoing_route, block)
+                               for outgoing_route, block in filtered_routes
+                               if outgoing_route.path.source is not self]
+        paths = self._remember_sent_routes(filtered_routes)
+        if not paths:
+            return True
+        if own:
+            for update_msg in self._construct_updates(paths):
+                self._protocol.send(update_msg)
+                self.state.incr(PeerCounterNames.SENT_UPDATES)
+        else:
+            for buf in batch.msgs:
+                self._protocol.send_serialized(buf)
+            self.state.incr(PeerCounterNames.SENT_UPDATES,
+                            incr_by=len(batch.msgs))
+        self.state.incr(PeerCounterNames.SENT_PREFIXES, incr_by=len(paths))
+        return True
+
     def request_route_refresh(self, *route_families):
         """Request route refresh to peer for given `route_families`.
 
@@ -822,16 +1333,239 @@ class Peer(Source, Sink, NeighborConfListener, Activity):
         """Construct update message with Outgoing-routes path attribute
         appropriately cloned/copied/updated.
         """
-        update = None
-        path = outgoing_route.path
+        return self._construct_updates([outgoing_route.path])[0]
+
+    def _construct_updates(self, paths):
+        """Construct update messages for given `paths`.
+
+        Paths whose outgoing path attributes are identical are advertised
+        together, as are withdrawals of the same route family, packing as
+        many NLRIs per message as fit in BGP_MAX_MSG_LEN.  Messages are
+        returned in the order the first path of each group was given.
+        """
+        groups = OrderedDict()
+        for path in paths:
+            binpathattrs = None
+            if path.is_withdraw and isinstance(path, Ipv4Path):
+                key = (_UPDATE_WITHDRAW, None)
+                new_pathattr = []
+            else:
+                cached = None
+                if not (path.is_withdraw or self.is_route_server_client):
+                    cached = self._cached_path_attrs(path)
+                if cached is not None:
+                    new_pathattr, binpathattrs, key = cached
+                else:
+                    new_pathattr = self._construct_path_attrs(path)
+                    key = self._update_group_key(path, new_pathattr)
+            group = groups.get(key)
+            if group is None:
+                group = groups[key] = (new_pathattr, binpathattrs, [])
+            group[2].append(path.nlri)
+
+        updates = []
+        for (kind, _key), (new_pathattr, binpathattrs, nlri_list) in \
+                groups.iteritems():
+            if kind is None:
+                # Sent as is, see _update_group_key.
+                updates.append(BGPUpdate(path_attributes=new_pathattr))
+                continue
+            base_len = len(self._pack_update(kind, new_pathattr, [],
+                                             binpathattrs).serialize())
+            if kind in (_UPDATE_MP_REACH, _UPDATE_MP_UNREACH):
+                # room for the extended length of MP_(UN)REACH_NLRI
+                base_len += 1
+            msg_len = base_len
+            packed = []
+            for nlri in nlri_list:
+                nlri_len = len(nlri.serialize())
+                if packed and msg_len + nlri_len > BGP_MAX_MSG_LEN:
+                    updates.append(self._pack_update(kind, new_pathattr,
+                                                     packed, binpathattrs))
+                    msg_len = base_len
+                    packed = []
+                packed.append(nlri)
+                msg_len += nlri_len
+            updates.append(self._pack_update(kind, new_pathattr, packed,
+                                             binpathattrs))
+        return updates
+
+    def _cached_path_attrs(self, path):
+        """Returns the path attributes to send `path` with, as constructed
+        by `_construct_path_attrs`, their wire encoding and the key grouping
+        `path` with others sharing them, as (new_pathattr, binpathattrs,
+        key) tuple.
+
+        The NLRI of MP_REACH_NLRI is not part of the wire encoding, which
+        starts at the next attribute.  Returns None if the path attributes
+        of `path` are not shared, see `Path.shared_pathattr_map`.
+        """
+        pathattr_map = path.shared_pathattr_map
+        if pathattr_map is None:
+            return None
+        by_policy = self._outgoing_pathattrs.get(pathattr_map)
+        if by_policy is None:
+            by_policy = self._outgoing_pathattrs[pathattr_map] = {}
+        policy = self._outbound_policy(path)
+        cached = by_policy.get((path.route_family, policy))
+        if cached is not None:
+            self.state.incr(PeerCounterNames.SENT_PATHATTRS_CACHE_HITS)
+            return cached
+
+        self.state.incr(PeerCounterNames.SENT_PATHATTRS_CACHE_MISSES)
+        new_pathattr = self._construct_path_attrs(path, policy)
+        binpathattrs = bytearray()
+        if isinstance(path, Ipv4Path):
+            for pa in new_pathattr:
+                binpathattrs += pa.serialize()
+            binpathattrs = str(binpathattrs)
+            key = (_UPDATE_NLRI, binpathattrs)
+        else:
+            for pa in new_pathattr[1:]:
+                binpathattrs += pa.serialize()
+            binpathattrs = str(binpathattrs)
+            mpnlri_attr = new_pathattr[0]
+            key = (_UPDATE_MP_REACH,
+                   (mpnlri_attr.afi, mpnlri_attr.safi, mpnlri_attr.next_hop,
+                    binpathattrs))
+        cached = (new_pathattr, binpathattrs, key)
+        by_policy[(path.route_family, policy)] = cached
+        return cached
+
+    @staticmethod
+    def _update_group_key(path, new_pathattr):
+        """Returns the key grouping `path` with others sharing its outgoing
+        path attributes, as (kind, attributes) tuple.
+        """
+        if path.is_withdraw:
+            mpunreach_attr = new_pathattr[0]
+            return (_UPDATE_MP_UNREACH,
+                    (mpunreach_attr.afi, mpunreach_attr.safi))
+        if isinstance(path, Ipv4Path):
+            return (_UPDATE_NLRI,
+                    tuple(Peer._pathattr_group_key(path, pa)
+                          for pa in new_pathattr))
+        mpnlri_attr = new_pathattr[0]
+        if (not isinstance(mpnlri_attr, BGPPathAttributeMpReachNLRI) or
+                mpnlri_attr.nlri != [path.nlri]):
+            # Route server clients get the attributes of the path as
+            # received, MP_REACH_NLRI carrying the NLRI of the path.
+            return (None, id(path))
+        return (_UPDATE_MP_REACH,
+                ((mpnlri_attr.afi, mpnlri_attr.safi, mpnlri_attr.next_hop),) +
+                tuple(Peer._pathattr_group_key(path, pa)
+                      for pa in new_pathattr[1:]))
+
+    @staticmethod
+    def _pathattr_group_key(path, pathattr):
+        # Interned attributes passed on unchanged are shared by all paths
+        # with identical attributes, so their identity is enough.
+        if path.is_interned_pattr(pathattr):
+            return pathattr
+        return str(pathattr.serialize())
+
+    @staticmethod
+    def _pack_update(kind, new_pathattr, nlri_list, binpathattrs=None):
+        if kind == _UPDATE_WITHDRAW:
+            return BGPUpdate(withdrawn_routes=nlri_list)
+        elif kind == _UPDATE_NLRI:
+            if binpathattrs is not None:
+                return _PreSerializedUpdate(binpathattrs,
+                                            path_attributes=new_pathattr,
+                                            nlri=nlri_list)
+            return BGPUpdate(path_attributes=new_pathattr, nlri=nlri_list)
+        elif kind == _UPDATE_MP_UNREACH:
+            mpunreach_attr = new_pathattr[0]
+            return BGPUpdate(path_attributes=[
+                BGPPathAttributeMpUnreachNLRI(mpunreach_attr.afi,
+                                              mpunreach_attr.safi,
+                                              nlri_list)])
+        mpnlri_attr = new_pathattr[0]
+        mpnlri_attr = BGPPathAttributeMpReachNLRI(mpnlri_attr.afi,
+                                                  mpnlri_attr.safi,
+                                                  mpnlri_attr.next_hop,
+                                                  nlri_list)
+        if binpathattrs is not None:
+            return _PreSerializedUpdate(binpathattrs, serialized_from=1,
+                                        path_attributes=[mpnlri_attr] +
+                                        new_pathattr[1:])
+        return BGPUpdate(path_attributes=[mpnlri_attr] + new_pathattr[1:])
+
+    def _outbound_policy(self, path):
+        """Returns the `_OutboundPolicy` to send `path` to this peer with.
+
+        Paths sharing their path attributes and route family are sent with
+        the same path attributes to peers of equal outbound policies.
+        """
+        ebgp = self.is_ebgp_peer()
+
+        # By default we use BGPS's interface IP with this peer as next_hop.
+        # TODO(PH): change to use protocol's local address.
+        # next_hop = self.host_bind_ip
+        next_hop = self._session_next_hop(path)
+        # If this is a iBGP peer.
+        if not ebgp and path.source is not None:
+            # If the path came from a bgp peer and not from NC, according
+            # to RFC 4271 we should not modify next_hop.
+            # However RFC 4271 allows us to change next_hop
+            # if configured to announce its own ip address.
+            if self._neigh_conf.is_next_hop_self:
+                next_hop = self.host_bind_ip
+                if path.route_family == RF_IPv6_VPN:
+                    next_hop = self._ipv4_mapped_ipv6(next_hop)
+                LOG.debug('using %s as a next_hop address instead'
+                          ' of path.nexthop %s' % (next_hop, path.nexthop))
+            else:
+                next_hop = path.nexthop
+
+        local_as = None
+        multi_exit_disc = None
+        local_pref = None
+        if ebgp:
+            local_as = self._core_service.asn
+            # For eBGP session we can send multi-exit-disc if configured.
+            multi_exit_disc = self._neigh_conf.multi_exit_disc
+        else:
+            # For iBGP peers we are required to send local-pref attribute
+            # for connected or local prefixes. We check if the path matches
+            # attribute_maps and set local-pref value.
+            # If the path doesn't match, we set default local-pref 100.
+            local_pref = 100
+            if self._attribute_maps:
+                key = const.ATTR_MAPS_LABEL_DEFAULT
+
+                if isinstance(path, (Vpnv4Path, Vpnv6Path)):
+                    rf = VRF_RF_IPV4 if isinstance(path, Vpnv4Path)\
+                        else VRF_RF_IPV6
+                    key = ':'.join([path.nlri.route_dist, rf])
+
+                attr_type = AttributeMap.ATTR_LOCAL_PREF
+                at_maps = self._attribute_maps.get(key, {})
+                result = self._lookup_attribute_map(at_maps, attr_type, path)
+                if result:
+                    local_pref = result.value
+
+        # Added to the extended communities sent, see _construct_path_attrs.
+        soo_list = tuple(self._neigh_conf.soo_list or ())
+
+        return _OutboundPolicy(ebgp, local_as, next_hop, multi_exit_disc,
+                               local_pref, soo_list)
+
+    def _construct_path_attrs(self, path, policy=None):
+        """Construct path attributes to send `path` to this peer with,
+        appropriately cloned/copied/updated.
+
+        MP_REACH_NLRI and MP_UNREACH_NLRI attributes come first and carry
+        only the NLRI of `path`.  `policy` defaults to the
+        `_OutboundPolicy` of this peer for `path`.
+        """
         # Get copy of path's path attributes.
         pathattr_map = path.pathattr_map
         new_pathattr = []
 
         if path.is_withdraw:
             if isinstance(path, Ipv4Path):
-                update = BGPUpdate(withdrawn_routes=[path.nlri])
-                return update
+                return new_pathattr
             else:
                 mpunreach_attr = BGPPathAttributeMpUnreachNLRI(
                     path.route_family.afi, path.route_family.safi, [path.nlri]
@@ -840,6 +1574,11 @@ class Peer(Source, Sink, NeighborConfListener, Activity):
         elif self.is_route_server_client:
             nlri_list = [path.nlri]
             for pathattr in path.pathattr_map.itervalues():
+                if isinstance(pathattr, BGPPathAttributeMpReachNLRI):
+                    # Held without NLRIs, see PathAttrMap.
+                    pathattr = BGPPathAttributeMpReachNLRI(
+                        pathattr.afi, pathattr.safi, pathattr.next_hop,
+                        nlri_list)
                 new_pathattr.append(pathattr)
         else:
             # Supported and un-supported/unknown attributes.
@@ -852,24 +1591,9 @@ class Peer(Source, Sink, NeighborConfListener, Activity):
             unkown_opttrans_attrs = None
             nlri_list = [path.nlri]
 
-            # By default we use BGPS's interface IP with this peer as next_hop.
-            # TODO(PH): change to use protocol's local address.
-            # next_hop = self.host_bind_ip
-            next_hop = self._session_next_hop(path)
-            # If this is a iBGP peer.
-            if not self.is_ebgp_peer() and path.source is not None:
-                # If the path came from a bgp peer and not from NC, according
-                # to RFC 4271 we should not modify next_hop.
-                # However RFC 4271 allows us to change next_hop
-                # if configured to announce its own ip address.
-                if self._neigh_conf.is_next_hop_self:
-                    next_hop = self.host_bind_ip
-                    if path.route_family == RF_IPv6_VPN:
-                        next_hop = self._ipv4_mapped_ipv6(next_hop)
-                    LOG.debug('using %s as a next_hop address instead'
-                              ' of path.nexthop %s' % (next_hop, path.nexthop))
-                else:
-                    next_hop = path.nexthop
+            if policy is None:
+                policy = self._outbound_policy(path)
+            next_hop = policy.next_hop
 
             nexthop_attr = BGPPathAttributeNextHop(next_hop)
             assert nexthop_attr, 'Missing NEXTHOP mandatory attribute.'
@@ -895,9 +1619,9 @@ class Peer(Source, Sink, NeighborConfListener, Activity):
             path_aspath = pathattr_map.get(BGP_ATTR_TYPE_AS_PATH)
             assert path_aspath, 'Missing AS_PATH mandatory attribute.'
             # Deep copy aspath_attr value
-            path_seg_list = path_aspath.path_seg_list
+            path_seg_list = copy.deepcopy(path_aspath.path_seg_list)
             # If this is a iBGP peer.
-            if not self.is_ebgp_peer():
+            if not policy.ebgp:
                 # When a given BGP speaker advertises the route to an internal
                 # peer, the advertising speaker SHALL NOT modify the AS_PATH
                 # attribute associated with the route.
@@ -926,45 +1650,27 @@ class Peer(Source, Sink, NeighborConfListener, Activity):
                 if (len(path_seg_list) > 0 and
                         isinstance(path_seg_list[0], list) and
                         len(path_seg_list[0]) < 255):
-                    path_seg_list[0].insert(0, self._core_service.asn)
+                    path_seg_list[0].insert(0, policy.local_as)
                 else:
-                    path_seg_list.insert(0, [self._core_service.asn])
+                    path_seg_list.insert(0, [policy.local_as])
                 aspath_attr = BGPPathAttributeAsPath(path_seg_list)
 
             # MULTI_EXIT_DISC Attribute.
             # For eBGP session we can send multi-exit-disc if configured.
             multi_exit_disc = None
-            if self.is_ebgp_peer():
-                if self._neigh_conf.multi_exit_disc:
+            if policy.ebgp:
+                if policy.multi_exit_disc:
                     multi_exit_disc = BGPPathAttributeMultiExitDisc(
-                        self._neigh_conf.multi_exit_disc
+                        policy.multi_exit_disc
                     )
-                else:
-                    pass
-            if not self.is_ebgp_peer():
+            else:
                 multi_exit_disc = pathattr_map.get(
                     BGP_ATTR_TYPE_MULTI_EXIT_DISC)
 
             # LOCAL_PREF Attribute.
-            if not self.is_ebgp_peer():
-                # For iBGP peers we are required to send local-pref attribute
-                # for connected or local prefixes. We check if the path matches
-                # attribute_maps and set local-pref value.
-                # If the path doesn't match, we set default local-pref 100.
-                localpref_attr = BGPPathAttributeLocalPref(100)
-                key = const.ATTR_MAPS_LABEL_DEFAULT
-
-                if isinstance(path, (Vpnv4Path, Vpnv6Path)):
-                    nlri = nlri_list[0]
-                    rf = VRF_RF_IPV4 if isinstance(path, Vpnv4Path)\
-                        else VRF_RF_IPV6
-                    key = ':'.join([nlri.route_dist, rf])
-
-                attr_type = AttributeMap.ATTR_LOCAL_PREF
-                at_maps = self._attribute_maps.get(key, {})
-                result = self._lookup_attribute_map(at_maps, attr_type, path)
-                if result:
-                    localpref_attr = result
+            # Set for iBGP peers only, see _outbound_policy.
+            if policy.local_pref is not None:
+                localpref_attr = BGPPathAttributeLocalPref(policy.local_pref)
 
             # COMMUNITY Attribute.
             community_attr = pathattr_map.get(BGP_ATTR_TYPE_COMMUNITIES)
@@ -977,12 +1683,11 @@ class Peer(Source, Sink, NeighborConfListener, Activity):
             if path_extcomm_attr:
                 # SOO list can be configured per VRF and/or per Neighbor.
                 # NeighborConf has this setting we add this to existing list.
-                communities = path_extcomm_attr.communities
-                if self._neigh_conf.soo_list:
+                communities = list(path_extcomm_attr.communities)
+                if policy.soo_list:
                     # construct extended community
-                    soo_list = self._neigh_conf.soo_list
                     subtype = 0x03
-                    for soo in soo_list:
+                    for soo in policy.soo_list:
                         first, second = soo.split(':')
                         if '.' in first:
                             c = BGPIPv4AddressSpecificExtendedCommunity(
@@ -1025,12 +1730,7 @@ class Peer(Source, Sink, NeighborConfListener, Activity):
             if unkown_opttrans_attrs:
                 new_pathattr.extend(unkown_opttrans_attrs.values())
 
-        if isinstance(path, Ipv4Path):
-            update = BGPUpdate(path_attributes=new_pathattr,
-                               nlri=nlri_list)
-        else:
-            update = BGPUpdate(path_attributes=new_pathattr)
-        return update
+        return new_pathattr
 
     def _connect_loop(self, client_factory):
         """In the current greeenlet we try to establish connection with peer.
@@ -1390,16 +2090,19 @@ class Peer(Source, Sink, NeighborConfListener, Activity):
             LOG.debug('Update message did not have any new MP_REACH_NLRIs.')
             return
 
+        # Paths with identical attributes share one interned map.
+        umsg_pattrs = PathAttrMap(umsg_pattrs).intern()
+
         # Create path instances for each NLRI from the update message.
         for msg_nlri in msg_nlri_list:
-            LOG.debug('NLRI: %s' % msg_nlri)
+            LOG.debug('NLRI: %s', msg_nlri)
             new_path = bgp_utils.create_path(
                 self,
                 msg_nlri,
                 pattrs=umsg_pattrs,
                 nexthop=next_hop
             )
-            LOG.debug('Extracted paths from Update msg.: %s' % new_path)
+            LOG.debug('Extracted paths from Update msg.: %s', new_path)
 
             block, blocked_cause = self._apply_in_filter(new_path)
 
@@ -1544,6 +2247,9 @@ class Peer(Source, Sink, NeighborConfListener, Activity):
             LOG.debug('Update message did not have any new MP_REACH_NLRIs.')
             return
 
+        # Paths with identical attributes share one interned map.
+        umsg_pattrs = PathAttrMap(umsg_pattrs).intern()
+
         # Create path instances for each NLRI from the update message.
         for msg_nlri in msg_nlri_list:
             new_path = bgp_utils.create_path(
@@ -1834,7 +2540,11 @@ class Peer(Source, Sink, NeighborConfListener, Activity):
             self._schedule_sending_init_updates()
         else:
             # Enqueues all best-path to be sent as initial update to this peer
-            # expect for RTC route-family.
+            # expect for RTC route-family, once for the update group if any.
+            if (self._update_group is None and
+                    self._join_update_group(dump=True)):
+                self.outgoing_msg_event.set()
+                return
             tm = self._core_service.table_manager
             self.comm_all_best_paths(tm.global_tables)
 
@@ -1862,22 +2572,38 @@ class Peer(Source, Sink, NeighborConfListener, Activity):
         to various conditions: like bgp state, transmit side loop, local and
         remote AS path, community attribute, etc.
         """
-        LOG.debug('Peer %s asked to communicate path' % self)
+        LOG.debug('Peer %s asked to communicate path', self)
         if not path:
             raise ValueError('Invalid path %s given.' % path)
 
         # We do not send anything to peer who is not in established state.
         if not self.in_established():
             LOG.debug('Skipping sending path as peer is not in '
-                      'ESTABLISHED state %s' % path)
+                      'ESTABLISHED state %s', path)
             return
 
+        path = self._outgoing_path(path)
+        if path is not None:
+            # Construct OutgoingRoute specific for this peer and put it in
+            # its sink.
+            outgoing_route = OutgoingRoute(path)
+            self.enque_outgoing_msg(outgoing_route)
+            LOG.debug('Enqueued outgoing route %s for peer %s',
+                      outgoing_route.path.nlri, self)
+
+    def _outgoing_path(self, path, check_source=True):
+        """Returns the path to send this peer for best path `path`, None if
+        `path` does not qualify.
+
+        Unless `check_source` is False, `path` does not qualify either if
+        it was learned from this peer.
+        """
         # Check if this session is available for given paths afi/safi
         path_rf = path.route_family
         if not self.is_mpbgp_cap_valid(path_rf):
             LOG.debug('Skipping sending path as %s route family is not'
                       ' available for this session' % path_rf)
-            return
+            return None
 
         # If RTC capability is available and path afi/saif is other than  RT
         # nlri
@@ -1891,7 +2617,7 @@ class Peer(Source, Sink, NeighborConfListener, Activity):
                 LOG.debug('Skipping sending path as rffilter %s and path '
                           'rts %s have no RT in common' %
                           (rtfilter, path.get_rts()))
-                return
+                return None
 
         # Transmit side loop detection: We check if leftmost AS matches
         # peers AS, if so we do not send UPDATE message to this peer.
@@ -1899,14 +2625,13 @@ class Peer(Source, Sink, NeighborConfListener, Activity):
         if as_path and as_path.has_matching_leftmost(self.remote_as):
             LOG.debug('Skipping sending path as AS_PATH has peer AS %s' %
                       self.remote_as)
-            return
+            return None
 
         # If this peer is a route server client, we forward the path
         # regardless of AS PATH loop, whether the connction is iBGP or eBGP,
         # or path's communities.
         if self.is_route_server_client:
-            outgoing_route = OutgoingRoute(path)
-            self.enque_outgoing_msg(outgoing_route)
+            return path
 
         if self._neigh_conf.multi_exit_disc:
             med_attr = path.get_pattr(BGP_ATTR_TYPE_MULTI_EXIT_DISC)
@@ -1918,62 +2643,56 @@ class Peer(Source, Sink, NeighborConfListener, Activity):
 
         # For connected/local-prefixes, we send update to all peers.
         if path.source is None:
-            # Construct OutgoingRoute specific for this peer and put it in
-            # its sink.
-            outgoing_route = OutgoingRoute(path)
-            self.enque_outgoing_msg(outgoing_route)
+            return path
 
         # If path from a bgp-peer is new best path, we share it with
         # all bgp-peers except the source peer and other peers in his AS.
         # This is default JNOS setting that in JNOS can be disabled with
         # 'advertise-peer-as' setting.
-        elif (self != path.source or
-              self.remote_as != path.source.remote_as):
-            # When BGP speaker receives an UPDATE message from an internal
-            # peer, the receiving BGP speaker SHALL NOT re-distribute the
-            # routing information contained in that UPDATE message to other
-            # internal peers (unless the speaker acts as a BGP Route
-            # Reflector) [RFC4271].
-            if (self.remote_as == self._core_service.asn and
-                    self.remote_as == path.source.remote_as):
-                return
-
-            # If new best path has community attribute, it should be taken into
-            # account when sending UPDATE to peers.
-            comm_attr = path.get_pattr(BGP_ATTR_TYPE_COMMUNITIES)
-            if comm_attr:
-                comm_attr_na = comm_attr.has_comm_attr(
-                    BGPPathAttributeCommunities.NO_ADVERTISE
-                )
-                # If we have NO_ADVERTISE attribute present, we do not send
-                # UPDATE to any peers
-                if comm_attr_na:
-                    LOG.debug('Path has community attr. NO_ADVERTISE = %s'
-                              '. Hence not advertising to peer' %
-                              comm_attr_na)
-                    return
-
-                comm_attr_ne = comm_attr.has_comm_attr(
-                    BGPPathAttributeCommunities.NO_EXPORT
-                )
-                comm_attr_nes = comm_attr.has_comm_attr(
-                    BGPPathAttributeCommunities.NO_EXPORT_SUBCONFED
-                )
-                # If NO_EXPORT_SUBCONFED/NO_EXPORT is one of the attribute, we
-                # do not advertise to eBGP peers as we do not have any
-                # confederation feature at this time.
-                if ((comm_attr_nes or comm_attr_ne) and
-                        (self.remote_as != self._core_service.asn)):
-                    LOG.debug('Skipping sending UPDATE to peer: %s as per '
-                              'community attribute configuration' % self)
-                    return
+        if (check_source and self == path.source and
+                self.remote_as == path.source.remote_as):
+            return None
+
+        # When BGP speaker receives an UPDATE message from an internal
+        # peer, the receiving BGP speaker SHALL NOT re-distribute the
+        # routing information contained in that UPDATE message to other
+        # internal peers (unless the speaker acts as a BGP Route
+        # Reflector) [RFC4271].
+        if (self.remote_as == self._core_service.asn and
+                self.remote_as == path.source.remote_as):
+            return None
+
+        # If new best path has community attribute, it should be taken into
+        # account when sending UPDATE to peers.
+        comm_attr = path.get_pattr(BGP_ATTR_TYPE_COMMUNITIES)
+        if comm_attr:
+            comm_attr_na = comm_attr.has_comm_attr(
+                BGPPathAttributeCommunities.NO_ADVERTISE
+            )
+            # If we have NO_ADVERTISE attribute present, we do not send
+            # UPDATE to any peers
+            if comm_attr_na:
+                LOG.debug('Path has community attr. NO_ADVERTISE = %s'
+                          '. Hence not advertising to peer' %
+                          comm_attr_na)
+                return None
+
+            comm_attr_ne = comm_attr.has_comm_attr(
+                BGPPathAttributeCommunities.NO_EXPORT
+            )
+            comm_attr_nes = comm_attr.has_comm_attr(
+                BGPPathAttributeCommunities.NO_EXPORT_SUBCONFED
+            )
+            # If NO_EXPORT_SUBCONFED/NO_EXPORT is one of the attribute, we
+            # do not advertise to eBGP peers as we do not have any
+            # confederation feature at this time.
+            if ((comm_attr_nes or comm_attr_ne) and
+                    (self.remote_as != self._core_service.asn)):
+                LOG.debug('Skipping sending UPDATE to peer: %s as per '
+                          'community attribute configuration' % self)
+                return None
 
-            # Construct OutgoingRoute specific for this peer and put it in
-            # its sink.
-            outgoing_route = OutgoingRoute(path)
-            self.enque_outgoing_msg(outgoing_route)
-            LOG.debug('Enqueued outgoing route %s for peer %s' %
-                      (outgoing_route.path.nlri, self))
+        return path
 
     def connection_made(self):
         """Protocols connection established handler
@@ -2008,6 +2727,7 @@ class Peer(Source, Sink, NeighborConfListener, Activity):
             self._init_rtc_nlri_path = []
             self._sent_init_non_rtc_update = False
             # Clear sink.
+            self._leave_update_group(requeue=False)
             self.clear_outgoing_msg_list()
             # Un-schedule timers
             self._unschedule_sending_init_updates()
@@ -16,6 +16,7 @@
  Module related to processing bgp paths.
 """
 
+from collections import namedtuple
 import logging
 
 from ryu.services.protocols.bgp.base import Activity
@@ -171,6 +172,41 @@ BPR_IGP_COST = 'IGP Cost'
 BPR_ROUTER_ID = 'Router ID'
 
 
+# Path attributes of a path the best path selection compares: local
+# preference or None if not known, AS path length, origin preference and
+# MED.  See `Path.decision_key`.
+DecisionKey = namedtuple('DecisionKey',
+                         'local_pref as_path_len origin_pref med')
+
+
+def _origin_pref(origin):
+    if origin == BGP_ATTR_ORIGIN_IGP:
+        return 3
+    elif origin == BGP_ATTR_ORIGIN_EGP:
+        return 2
+    elif origin == BGP_ATTR_ORIGIN_INCOMPLETE:
+        return 1
+    else:
+        LOG.error('Invalid origin value encountered %s.' % origin)
+        return 0
+
+
+def decision_key(pattrs):
+    """Returns the `DecisionKey` of given map of path attributes."""
+    local_pref = pattrs.get(BGP_ATTR_TYPE_LOCAL_PREF)
+    if local_pref:
+        local_pref = local_pref.value
+    else:
+        local_pref = None
+    as_path = pattrs.get(BGP_ATTR_TYPE_AS_PATH)
+    as_path_len = as_path and as_path.get_as_path_len()
+    origin = pattrs.get(BGP_ATTR_TYPE_ORIGIN)
+    origin = origin and _origin_pref(origin.value)
+    med = pattrs.get(BGP_ATTR_TYPE_MULTI_EXIT_DISC)
+    med = med.value if med else 0
+    return DecisionKey(local_pref, as_path_len, origin, med)
+
+
 def _compare_by_version(path1, path2):
     """Returns the current/latest learned path.
 
@@ -219,6 +255,11 @@ def compute_best_path(local_asn, path1, path2):
     """
     best_path = None
     best_path_reason = BPR_UNKNOWN
+    # Paths sharing interned path attributes tie on all of them.
+    same_pattrs = path1.has_same_pattrs(path2)
+    # Path attributes are compared by the decision keys of paths.
+    key1 = path1.decision_key
+    key2 = path2.decision_key
 
     # Follow best path calculation algorithm steps.
     if best_path is None:
@@ -227,20 +268,20 @@ def compute_best_path(local_asn, path1, path2):
     if best_path is None:
         best_path = _cmp_by_higest_wg(path1, path2)
         best_path_reason = BPR_HIGHEST_WEIGHT
-    if best_path is None:
-        best_path = _cmp_by_local_pref(path1, path2)
+    if best_path is None and not same_pattrs:
+        best_path = _cmp_by_local_pref(path1, path2, key1, key2)
         best_path_reason = BPR_LOCAL_PREF
     if best_path is None:
         best_path = _cmp_by_local_origin(path1, path2)
         best_path_reason = BPR_LOCAL_ORIGIN
-    if best_path is None:
-        best_path = _cmp_by_aspath(path1, path2)
+    if best_path is None and not same_pattrs:
+        best_path = _cmp_by_aspath(path1, path2, key1, key2)
         best_path_reason = BPR_ASPATH
-    if best_path is None:
-        best_path = _cmp_by_origin(path1, path2)
+    if best_path is None and not same_pattrs:
+        best_path = _cmp_by_origin(path1, path2, key1, key2)
         best_path_reason = BPR_ORIGIN
-    if best_path is None:
-        best_path = _cmp_by_med(path1, path2)
+    if best_path is None and not same_pattrs:
+        best_path = _cmp_by_med(path1, path2, key1, key2)
         best_path_reason = BPR_MED
     if best_path is None:
         best_path = _cmp_by_asn(local_asn, path1, path2)
@@ -280,7 +321,7 @@ def _cmp_by_higest_wg(path1, path2):
     return None
 
 
-def _cmp_by_local_pref(path1, path2):
+def _cmp_by_local_pref(path1, path2, key1, key2):
     """Selects a path with highest local-preference.
 
     Unlike the weight attribute, which is only relevant to the local
@@ -291,14 +332,12 @@ def _cmp_by_local_pref(path1, path2):
     # TODO(PH): Revisit this when BGPS has concept of policy to be applied to
     # in-bound NLRIs.
     # Default local-pref values is 100
-    lp1 = path1.get_pattr(BGP_ATTR_TYPE_LOCAL_PREF)
-    lp2 = path2.get_pattr(BGP_ATTR_TYPE_LOCAL_PREF)
-    if not (lp1 and lp2):
+    lp1 = key1.local_pref
+    lp2 = key2.local_pref
+    if lp1 is None or lp2 is None:
         return None
 
     # Highest local-preference value is preferred.
-    lp1 = lp1.value
-    lp2 = lp2.value
     if lp1 > lp2:
         return path1
     elif lp2 > lp1:
@@ -331,17 +370,14 @@ def _cmp_by_local_origin(path1, path2):
     return None
 
 
-def _cmp_by_aspath(path1, path2):
+def _cmp_by_aspath(path1, path2, key1, key2):
     """Calculated the best-paths by comparing as-path lengths.
 
     Shortest as-path length is preferred. If both path have same lengths,
     we return None.
     """
-    as_path1 = path1.get_pattr(BGP_ATTR_TYPE_AS_PATH)
-    as_path2 = path2.get_pattr(BGP_ATTR_TYPE_AS_PATH)
-    assert as_path1 and as_path2
-    l1 = as_path1.get_as_path_len()
-    l2 = as_path2.get_as_path_len()
+    l1 = key1.as_path_len
+    l2 = key2.as_path_len
     assert l1 is not None and l2 is not None
     if l1 > l2:
         return path2
@@ -351,34 +387,17 @@ def _cmp_by_aspath(path1, path2):
         return None
 
 
-def _cmp_by_origin(path1, path2):
+def _cmp_by_origin(path1, path2, key1, key2):
     """Select the best path based on origin attribute.
 
     IGP is preferred over EGP; EGP is preferred over Incomplete.
     If both paths have same origin, we return None.
     """
-    def get_origin_pref(origin):
-        if origin.value == BGP_ATTR_ORIGIN_IGP:
-            return 3
-        elif origin.value == BGP_ATTR_ORIGIN_EGP:
-            return 2
-        elif origin.value == BGP_ATTR_ORIGIN_INCOMPLETE:
-            return 1
-        else:
-            LOG.error('Invalid origin value encountered %s.' % origin)
-            return 0
-
-    origin1 = path1.get_pattr(BGP_ATTR_TYPE_ORIGIN)
-    origin2 = path2.get_pattr(BGP_ATTR_TYPE_ORIGIN)
+    # Origin values translated to preference.
+    origin1 = key1.origin_pref
+    origin2 = key2.origin_pref
     assert origin1 is not None and origin2 is not None
 
-    # If both paths have same origins
-    if origin1.value == origin2.value:
-        return None
-
-    # Translate origin values to preference.
-    origin1 = get_origin_pref(origin1)
-    origin2 = get_origin_pref(origin2)
     # Return preferred path.
     if origin1 == origin2:
         return None
@@ -387,7 +406,7 @@ def _cmp_by_origin(path1, path2):
     return path2
 
 
-def _cmp_by_med(path1, path2):
+def _cmp_by_med(path1, path2, key1, key2):
     """Select the path based with lowest MED value.
 
     If both paths have same MED, return None.
@@ -395,14 +414,8 @@ def _cmp_by_med(path1, path2):
     had a MED of 0, the most preferred value.
     RFC says lower MED is preferred over higher MED value.
     """
-    def get_path_med(path):
-        med = path.get_pattr(BGP_ATTR_TYPE_MULTI_EXIT_DISC)
-        if not med:
-            return 0
-        return med.value
-
-    med1 = get_path_med(path1)
-    med2 = get_path_med(path2)
+    med1 = key1.med
+    med2 = key2.med
 
     if med1 == med2:
         return None
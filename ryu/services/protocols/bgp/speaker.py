@@ -61,6 +61,11 @@ LOG = logging.getLogger('bgpspeaker.speaker')
 BGP_MIN_MSG_LEN = 19
 BGP_MAX_MSG_LEN = 4096
 
+# Number of bytes requested from the socket per recv() call.
+BGP_RECV_BUF_SIZE = 64 * 1024
+
+_BGP_HEADER = struct.Struct('!16sHB')
+
 # Keep-alive singleton.
 _KEEP_ALIVE = BGPKeepAlive()
 
@@ -300,21 +305,25 @@ class BgpProtocol(Protocol, Activity):
         Validates bgp message marker, length, type and data and constructs
         appropriate bgp message instance and calls handler.
 
+        All complete messages in the buffer are framed by offset; only the
+        trailing partial message, if any, is kept for the next call.
+
         :Parameters:
             - `next_bytes`: next set of bytes received from peer.
         """
         # Append buffer with received bytes.
-        self._recv_buff += next_bytes
-
-        while True:
-            # If current buffer size is less then minimum bgp message size, we
-            # return as we do not have a complete bgp message to work with.
-            if len(self._recv_buff) < BGP_MIN_MSG_LEN:
-                return
+        if self._recv_buff:
+            buf = self._recv_buff + next_bytes
+        else:
+            buf = next_bytes
+        buf_len = len(buf)
+        offset = 0
 
+        # If remaining buffer size is less then minimum bgp message size, we
+        # stop as we do not have a complete bgp message to work with.
+        while buf_len - offset >= BGP_MIN_MSG_LEN:
             # Parse message header into elements.
-            auth, length, ptype = BgpProtocol.parse_msg_header(
-                self._recv_buff[:BGP_MIN_MSG_LEN])
+            auth, length, ptype = _BGP_HEADER.unpack_from(buf, offset)
 
             # Check if we have valid bgp message marker.
             # We should get default marker since we are not supporting any
@@ -324,36 +333,33 @@ class BgpProtocol(Protocol, Activity):
                 raise bgp.NotSync()
 
             # Check if we have valid bgp message length.
-            check = lambda: length < BGP_MIN_MSG_LEN\
-                or length > BGP_MAX_MSG_LEN
-
-            # RFC says: The minimum length of the OPEN message is 29
-            # octets (including the message header).
-            check2 = lambda: ptype == BGP_MSG_OPEN\
-                and length < BGPOpen._MIN_LEN
-
-            # RFC says: A KEEPALIVE message consists of only the
-            # message header and has a length of 19 octets.
-            check3 = lambda: ptype == BGP_MSG_KEEPALIVE\
-                and length != BGPKeepAlive._MIN_LEN
-
-            # RFC says: The minimum length of the UPDATE message is 23
-            # octets.
-            check4 = lambda: ptype == BGP_MSG_UPDATE\
-                and length < BGPUpdate._MIN_LEN
-
-            if check() or check2() or check3() or check4():
+            if (length < BGP_MIN_MSG_LEN or length > BGP_MAX_MSG_LEN or
+                    # RFC says: The minimum length of the OPEN message is 29
+                    # octets (including the message header).
+                    (ptype == BGP_MSG_OPEN and length < BGPOpen._MIN_LEN) or
+                    # RFC says: A KEEPALIVE message consists of only the
+                    # message header and has a length of 19 octets.
+                    (ptype == BGP_MSG_KEEPALIVE and
+                     length != BGPKeepAlive._MIN_LEN) or
+                    # RFC says: The minimum length of the UPDATE message is
+                    # 23 octets.
+                    (ptype == BGP_MSG_UPDATE and
+                     length < BGPUpdate._MIN_LEN)):
                 raise bgp.BadLen(ptype, length)
 
             # If we have partial message we wait for rest of the message.
-            if len(self._recv_buff) < length:
-                return
-            msg, rest = BGPMessage.parser(self._recv_buff)
-            self._recv_buff = rest
+            if buf_len - offset < length:
+                break
+            msg = BGPMessage.parser_body(
+                auth, length, ptype,
+                buf[offset + BGP_MIN_MSG_LEN:offset + length])
+            offset += length
 
             # If we have a valid bgp message we call message handler.
             self._handle_msg(msg)
 
+        self._recv_buff = buf[offset:]
+
     def send_notification(self, code, subcode):
         """Utility to send notification message.
 
@@ -377,9 +383,12 @@ class BgpProtocol(Protocol, Activity):
         self._socket.close()
 
     def _send_with_lock(self, msg):
+        self._send_buf_with_lock(msg.serialize())
+
+    def _send_buf_with_lock(self, buf):
         self._sendlock.acquire()
         try:
-            self._socket.sendall(msg.serialize())
+            self._socket.sendall(buf)
         except socket.error as err:
             self.connection_lost('failed to write to socket')
         finally:
@@ -398,7 +407,19 @@ class BgpProtocol(Protocol, Activity):
 
             self._signal_bus.bgp_notification_sent(self._peer, msg)
         else:
-            LOG.debug('Sent msg to %s >> %s' % (self._remotename, msg))
+            LOG.debug('Sent msg to %s >> %s', self._remotename, msg)
+
+    def send_serialized(self, buf):
+        """Sends `buf`, a message serialized already, e.g. an UPDATE
+        shared by the peers of an update group.
+        """
+        if not self.started:
+            raise BgpProtocolException('Tried to send message to peer when '
+                                       'this protocol instance is not started'
+                                       ' or is no longer is started state.')
+        self._send_buf_with_lock(buf)
+        LOG.debug('Sent serialized msg to %s >> %d bytes',
+                  self._remotename, len(buf))
 
     def stop(self):
         Activity.stop(self)
@@ -430,7 +451,7 @@ class BgpProtocol(Protocol, Activity):
         message except for *Open* and *Notification* message. On receiving
         *Notification* message we close connection with peer.
         """
-        LOG.debug('Received msg from %s << %s' % (self._remotename, msg))
+        LOG.debug('Received msg from %s << %s', self._remotename, msg)
 
         # If we receive open message we try to bind to protocol
         if (msg.type == BGP_MSG_OPEN):
@@ -535,11 +556,10 @@ class BgpProtocol(Protocol, Activity):
         """Sits in tight loop collecting data received from peer and
         processing it.
         """
-        required_len = BGP_MIN_MSG_LEN
         conn_lost_reason = "Connection lost as protocol is no longer active"
         try:
             while True:
-                next_bytes = self._socket.recv(required_len)
+                next_bytes = self._socket.recv(BGP_RECV_BUF_SIZE)
                 if len(next_bytes) == 0:
                     conn_lost_reason = 'Peer closed connection'
                     break
@@ -71,7 +71,8 @@ class Internable(object):
 
         # If this is an interned object, return it
         if hasattr(self, '_interned'):
-            return self._internable_stats.incr('self')
+            self._internable_stats.incr('self')
+            return self
 
         #
         # Got to find or create an interned object identical to this
@@ -82,8 +83,9 @@ class Internable(object):
         if not hasattr(kls, dict_name):
             kls._internable_init()
 
-        obj = kls._internable_dict.get(self)
-        if (obj):
+        ref = kls._internable_dict.get(self)
+        obj = ref() if ref is not None else None
+        if obj is not None:
             # Found an interned copy.
             kls._internable_stats.incr('found')
             return obj
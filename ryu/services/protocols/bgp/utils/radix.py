@@ -0,0 +1,289 @@
+# Copyright (C) 2014 Nippon Telegraph and Telephone Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+ Path-compressed binary (Patricia) trie of bit string prefixes.
+"""
+
+# Marks nodes which only join two subtrees and hold no value.
+_EMPTY = object()
+
+
+class _Node(object):
+    __slots__ = ('key', 'length', 'value', 'left', 'right')
+
+    def __init__(self, key, length, value):
+        self.key = key
+        self.length = length
+        self.value = value
+        self.left = None
+        self.right = None
+
+
+class RadixTree(object):
+    """A map of prefixes to values.
+
+    A prefix is given as a pair of *key* and *length*, where *key* is
+    an integer of *bits* bits, most significant bit first, of which
+    only the first *length* bits are significant. E.g. 10.0.0.0/8 is
+    (0x0a000000, 8) in a tree of 32 bits.
+
+    Exact, longest match, covering and more specific prefix lookups
+    visit at most one node per bit of the prefix looked up, whatever
+    the number of prefixes in the tree.
+    """
+
+    def __init__(self, bits):
+        self._bits = bits
+        self._root = None
+        self._count = 0
+
+    @property
+    def bits(self):
+        return self._bits
+
+    def __len__(self):
+        return self._count
+
+    def _mask(self, key, length):
+        shift = self._bits - length
+        return (key >> shift) << shift
+
+    def _bit(self, key, index):
+        return (key >> (self._bits - 1 - index)) & 1
+
+    def _common(self, key1, length1, key2, length2):
+        # Number of leading bits the two prefixes have in common.
+        length = min(length1, length2)
+        diff = (key1 ^ key2) >> (self._bits - length)
+        return length - diff.bit_length()
+
+    def _check(self, key, length):
+        if not 0 <= length <= self._bits:
+            raise ValueError('Invalid prefix length %s' % length)
+        if not 0 <= key < (1 << self._bits):
+            raise ValueError('Invalid prefix key %s' % key)
+        return self._mask(key, length)
+
+    def _replace(self, parent, node, new):
+        if parent is None:
+            self._root = new
+        elif parent.left is node:
+            parent.left = new
+        else:
+            parent.right = new
+
+    def _attach(self, parent, child):
+        if self._bit(child.key, parent.length):
+            parent.right = child
+        else:
+            parent.left = child
+
+    def insert(self, key, length, value):
+        """Maps prefix *key*/*length* to *value*.
+
+        Replaces the value already mapped to the prefix, if any.
+        """
+        key = self._check(key, length)
+        bits = self._bits
+        parent = None
+        node = self._root
+        while node is not None:
+            node_length = node.length
+            if (node_length > length or
+                    (key ^ node.key) >> (bits - node_length)):
+                # The new prefix goes between parent and node.
+                common = self._common(key, length, node.key, node_length)
+                if common == length:
+                    new = _Node(key, length, value)
+                else:
+                    new = _Node(self._mask(key, common), common, _EMPTY)
+                    self._attach(new, _Node(key, length, value))
+                self._attach(new, node)
+                self._replace(parent, node, new)
+                self._count += 1
+                return
+            if node_length == length:
+                if node.value is _EMPTY:
+                    self._count += 1
+                node.value = value
+                return
+            parent = node
+            if (key >> (bits - 1 - node_length)) & 1:
+                node = node.right
+            else:
+                node = node.left
+
+        new = _Node(key, length, value)
+        if parent is None:
+            self._root = new
+        else:
+            self._attach(parent, new)
+        self._count += 1
+
+    def _find(self, key, length):
+        # Returns the node of the prefix and the list of its ancestors.
+        bits = self._bits
+        path = []
+        node = self._root
+        while node is not None:
+            node_length = node.length
+            if (node_length > length or
+                    (key ^ node.key) >> (bits - node_length)):
+                break
+            if node_length == length:
+                return node, path
+            path.append(node)
+            if (key >> (bits - 1 - node_length)) & 1:
+                node = node.right
+            else:
+                node = node.left
+        return None, path
+
+    def remove(self, key, length):
+        """Removes prefix *key*/*length* and returns its value.
+
+        Raises KeyError if the prefix is not in the tree.
+        """
+        key = self._check(key, length)
+        node, path = self._find(key, length)
+        if node is None or node.value is _EMPTY:
+            raise KeyError((key, length))
+        value = node.value
+        node.value = _EMPTY
+        self._count -= 1
+
+        parent = path[-1] if path else None
+        if node.left is not None and node.right is not None:
+            # Still joins two subtrees.
+            return value
+        self._replace(parent, node, node.left or node.right)
+        if (parent is not None and parent.value is _EMPTY and
+                node.left is None and node.right is None):
+            # The parent only joined node and its sibling.
+            grandparent = path[-2] if len(path) > 1 else None
+            self._replace(grandparent, parent, parent.left or parent.right)
+        return value
+
+    def get(self, key, length, default=None):
+        """Returns the value of prefix *key*/*length*, or *default*."""
+        key = self._check(key, length)
+        bits = self._bits
+        node = self._root
+        while node is not None:
+            node_length = node.length
+            if (node_length > length or
+                    (key ^ node.key) >> (bits - node_length)):
+                break
+            if node_length == length:
+                if node.value is _EMPTY:
+                    break
+                return node.value
+            if (key >> (bits - 1 - node_length)) & 1:
+                node = node.right
+            else:
+                node = node.left
+        return default
+
+    def __contains__(self, prefix):
+        return self.get(prefix[0], prefix[1], _EMPTY) is not _EMPTY
+
+    def covering(self, key, length):
+        """Returns the values of the prefixes which contain *key*/*length*,
+        the prefix itself included, shortest prefix first.
+        """
+        key = self._check(key, length)
+        bits = self._bits
+        values = []
+        node = self._root
+        while node is not None:
+            node_length = node.length
+            if (node_length > length or
+                    (key ^ node.key) >> (bits - node_length)):
+                break
+            if node.value is not _EMPTY:
+                values.append(node.value)
+            if node_length == length:
+                break
+            if (key >> (bits - 1 - node_length)) & 1:
+                node = node.right
+            else:
+                node = node.left
+        return values
+
+    def longest_match(self, key, length=None, default=None):
+        """Returns the value of the longest prefix which contains
+        *key*/*length*, or *default* if there is none.
+
+        *length* defaults to a host address.
+        """
+        if length is None:
+            length = self._bits
+        key = self._check(key, length)
+        bits = self._bits
+        value = default
+        node = self._root
+        while node is not None:
+            node_length = node.length
+            if (node_length > length or
+                    (key ^ node.key) >> (bits - node_length)):
+                break
+            if node.value is not _EMPTY:
+                value = node.value
+            if node_length == length:
+                break
+            if (key >> (bits - 1 - node_length)) & 1:
+                node = node.right
+            else:
+                node = node.left
+        return value
+
+    def more_specifics(self, key, length):
+        """Returns the values of the prefixes contained in *key*/*length*,
+        the prefix itself included, in order of address then length.
+        """
+        key = self._check(key, length)
+        bits = self._bits
+        node = self._root
+        while node is not None and node.length < length:
+            node_length = node.length
+            if (key ^ node.key) >> (bits - node_length):
+                return []
+            if (key >> (bits - 1 - node_length)) & 1:
+                node = node.right
+            else:
+                node = node.left
+        if node is None or (key ^ node.key) >> (bits - length):
+            return []
+        return self._values(node)
+
+    def _values(self, node):
+        # Pre-order walk, which yields prefixes in address order.
+        values = []
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if node.value is not _EMPTY:
+                values.append(node.value)
+            if node.right is not None:
+                stack.append(node.right)
+            if node.left is not None:
+                stack.append(node.left)
+        return values
+
+    def itervalues(self):
+        if self._root is None:
+            return iter([])
+        return iter(self._values(self._root))
@@ -44,9 +44,12 @@ LOCAL_ROUTES = 'local_routes'
 # Peer related stat constant.
 UPDATE_MSG_IN = 'update_message_in'
 UPDATE_MSG_OUT = 'update_message_out'
+PREFIXES_OUT = 'prefixes_out'
 TOTAL_MSG_IN = 'total_message_in'
 TOTAL_MSG_OUT = 'total_message_out'
 FMS_EST_TRANS = 'fsm_established_transitions'
+PATHATTRS_CACHE_HITS = 'pathattrs_cache_hits'
+PATHATTRS_CACHE_MISSES = 'pathattrs_cache_misses'
 UPTIME = 'uptime'
 
 
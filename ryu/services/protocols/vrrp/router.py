@@ -39,37 +39,26 @@ class Timer(object):
 
         super(Timer, self).__init__()
         self._handler = handler_
-        self._event = hub.Event()
-        self._thread = None
+        self._timer = None
 
     def start(self, interval):
         """interval is in seconds"""
-        if self._thread:
+        if self._timer:
             self.cancel()
-        self._event.clear()
-        self._thread = hub.spawn(self._timer, interval)
+        self._timer = hub.spawn_later(interval, self._handler)
 
     def cancel(self):
-        if self._thread is None:
+        if self._timer is None:
             return
-        self._event.set()
-        hub.joinall([self._thread])
-        self._thread = None
+        self._timer.cancel()
+        self._timer = None
 
     def is_running(self):
-        return self._thread is not None
-
-    def _timer(self, interval):
-        # Avoid cancellation during execution of self._callable()
-        cancel = self._event.wait(interval)
-        if cancel:
-            return
-
-        self._handler()
+        return self._timer is not None
 
 
 class TimerEventSender(Timer):
-    # timeout handler is called by timer thread context.
+    # timeout handler is called in a greenthread spawned by the timer wheel.
     # So in order to actual execution context to application's event thread,
     # post the event to the application
     def __init__(self, app, ev_cls):
@@ -0,0 +1,138 @@
+# Copyright (C) 2014 Nippon Telegraph and Telephone Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Convert addresses with ryu.lib.addrconv, and parse ARP, IPv4/UDP and
+IPv6/UDP frames with Packet(data), and report the rates with the
+converters of addrconv and with the plain netaddr based ones.
+
+Addresses are drawn from --hosts distinct hosts, so that conversions
+hit the address caches as they would for the hosts of a network.
+"""
+
+import optparse
+import random
+import struct
+
+from ryu.lib import addrconv
+from ryu.lib.packet import arp
+from ryu.lib.packet import ethernet
+from ryu.lib.packet import ipv4
+from ryu.lib.packet import ipv6
+from ryu.lib.packet import packet
+from ryu.lib.packet import udp
+from ryu.ofproto import ether
+from ryu.ofproto import inet
+from ryu.tests.benchmark import util
+
+
+CONVERTERS = {
+    'addrconv': (addrconv.ipv4, addrconv.ipv6, addrconv.mac),
+    'netaddr': (addrconv._ipv4, addrconv._ipv6, addrconv._mac),
+}
+
+
+def _use(name):
+    addrconv.ipv4, addrconv.ipv6, addrconv.mac = CONVERTERS[name]
+
+
+def generate_hosts(count, seed=0):
+    """Return a list of (mac, ipv4, ipv6) binary addresses."""
+    rand = random.Random(seed)
+    hosts = []
+    for _i in xrange(count):
+        mac = struct.pack('!Q', rand.getrandbits(48))[2:]
+        ip = struct.pack('!I', rand.getrandbits(32))
+        ip6 = '\xfe\x80' + '\x00' * 6 + struct.pack('!Q', rand.getrandbits(64))
+        hosts.append((mac, ip, ip6))
+    return hosts
+
+
+def generate_frames(hosts, count, seed=0):
+    """Return lists of count ARP, IPv4 and IPv6 frames between hosts."""
+    rand = random.Random(seed)
+    frames = {'arp': [], 'ipv4': [], 'ipv6': []}
+    for _i in xrange(count):
+        src, dst = [[addrconv._mac.bin_to_text(h[0]),
+                     addrconv._ipv4.bin_to_text(h[1]),
+                     addrconv._ipv6.bin_to_text(h[2])]
+                    for h in rand.sample(hosts, 2)]
+
+        pkt = packet.Packet()
+        pkt.add_protocol(ethernet.ethernet(dst[0], src[0],
+                                           ether.ETH_TYPE_ARP))
+        pkt.add_protocol(arp.arp_ip(arp.ARP_REQUEST, src[0], src[1],
+                                    '00:00:00:00:00:00', dst[1]))
+        pkt.serialize()
+        frames['arp'].append(str(pkt.data))
+
+        pkt = packet.Packet()
+        pkt.add_protocol(ethernet.ethernet(dst[0], src[0],
+                                           ether.ETH_TYPE_IP))
+        pkt.add_protocol(ipv4.ipv4(src=src[1], dst=dst[1],
+                                   proto=inet.IPPROTO_UDP))
+        pkt.add_protocol(udp.udp(src_port=1024, dst_port=53))
+        pkt.serialize()
+        frames['ipv4'].append(str(pkt.data))
+
+        pkt = packet.Packet()
+        pkt.add_protocol(ethernet.ethernet(dst[0], src[0],
+                                           ether.ETH_TYPE_IPV6))
+        pkt.add_protocol(ipv6.ipv6(src=src[2], dst=dst[2],
+                                   nxt=inet.IPPROTO_UDP))
+        pkt.add_protocol(udp.udp(src_port=1024, dst_port=53))
+        pkt.serialize()
+        frames['ipv6'].append(str(pkt.data))
+    return frames
+
+
+def bench_conv(name, conv, bins):
+    texts = [conv.bin_to_text(b) for b in bins]
+    _ret, elapsed = util.measure(lambda: [conv.bin_to_text(b) for b in bins])
+    util.report('%s bin_to_text' % name, len(bins), elapsed, 'addrs')
+    _ret, elapsed = util.measure(lambda: [conv.text_to_bin(t)
+                                          for t in texts])
+    util.report('%s text_to_bin' % name, len(texts), elapsed, 'addrs')
+
+
+def main():
+    parser = optparse.OptionParser()
+    parser.add_option('-n', '--count', type='int', default=100000,
+                      help='number of addresses and frames of each kind')
+    parser.add_option('--hosts', type='int', default=1000,
+                      help='number of distinct hosts')
+    options, _args = parser.parse_args()
+
+    hosts = generate_hosts(options.hosts)
+    rand = random.Random(1)
+    picks = [rand.choice(hosts) for _i in xrange(options.count)]
+    frames = generate_frames(hosts, options.count)
+
+    for name in ['netaddr', 'addrconv']:
+        _use(name)
+        ipv4_conv, ipv6_conv, mac_conv = CONVERTERS[name]
+        bench_conv(name + ' ipv4', ipv4_conv, [p[1] for p in picks])
+        bench_conv(name + ' ipv6', ipv6_conv, [p[2] for p in picks])
+        bench_conv(name + ' mac', mac_conv, [p[0] for p in picks])
+        for kind in ['arp', 'ipv4', 'ipv6']:
+            _ret, elapsed = util.measure(
+                lambda: [packet.Packet(f) for f in frames[kind]])
+            util.report('%s Packet(%s)' % (name, kind), options.count,
+                        elapsed, 'frames')
+    _use('addrconv')
+
+
+if __name__ == '__main__':
+    main()
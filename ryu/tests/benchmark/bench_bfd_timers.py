@@ -0,0 +1,130 @@
+# Copyright (C) 2014 Nippon Telegraph and Telephone Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Run 10k BFD sessions transmitting every 50 ms, and report how late the
+transmissions are and the CPU used, with the sessions driven by the
+timer wheel of ryu.lib.hub, and with a greenthread sleeping in a loop
+per session as bfdlib did before.
+
+The sessions have no datapath, so that only the timers are measured.
+Transmission periods are jittered to 75-100% of the interval as
+RFC 5880 requires.
+"""
+
+from ryu.lib import hub
+hub.patch()
+
+import optparse
+import resource
+import time
+
+from ryu.lib import bfdlib
+from ryu.lib.packet import bfd
+
+
+class WheelSession(bfdlib.BFDSession):
+    lateness = []
+
+    def _start_send_timer(self):
+        self._due = time.time() + self._xmit_period
+        super(WheelSession, self)._start_send_timer()
+
+    def _send_timeout(self):
+        self.lateness.append(time.time() - self._due)
+        super(WheelSession, self)._send_timeout()
+
+
+class LoopSession(bfdlib.BFDSession):
+    lateness = []
+
+    def _start_send_timer(self):
+        hub.spawn(self._send_loop)
+
+    def _send_loop(self):
+        while self._enable_send:
+            due = time.time() + self._xmit_period
+            hub.sleep(self._xmit_period)
+            self.lateness.append(time.time() - due)
+
+            if self._remote_discr == 0 and not self._active_role:
+                continue
+
+            if self._remote_min_rx_interval == 0:
+                continue
+
+            if self._remote_demand_mode and \
+                    self._session_state == bfd.BFD_STATE_UP and \
+                    self._remote_session_state == bfd.BFD_STATE_UP and \
+                    not self._is_polling:
+                continue
+
+            self._send()
+
+
+def _cpu():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def run(cls, count, interval, duration):
+    sessions = []
+    for i in xrange(count):
+        sess = cls(None, i + 1, 1, 1, '00:00:00:00:00:01', '10.0.0.1',
+                   49152, desired_min_tx_interval=interval)
+        # as in the Up state
+        sess._desired_min_tx_interval = interval
+        sess._update_xmit_period()
+        sessions.append(sess)
+
+    # let the sessions get in step before measuring
+    hub.sleep(1)
+    del cls.lateness[:]
+    cpu = _cpu()
+    hub.sleep(duration)
+    cpu = _cpu() - cpu
+    lateness = sorted(cls.lateness)
+
+    for sess in sessions:
+        sess._enable_send = False
+    hub.sleep(interval / 1000000.0 * 2)
+    return lateness, cpu
+
+
+def main():
+    parser = optparse.OptionParser()
+    parser.add_option('-n', '--sessions', type='int', default=10000,
+                      help='number of BFD sessions')
+    parser.add_option('-i', '--interval', type='int', default=50,
+                      help='transmission interval in milliseconds')
+    parser.add_option('-d', '--duration', type='float', default=10,
+                      help='seconds to measure')
+    options, _args = parser.parse_args()
+
+    for name, cls in [('timer wheel', WheelSession),
+                      ('greenthread per session', LoopSession)]:
+        lateness, cpu = run(cls, options.sessions,
+                            options.interval * 1000, options.duration)
+        print '%s: %d transmissions in %.1f sec, cpu %.1f%%' % (
+            name, len(lateness), options.duration,
+            cpu * 100 / options.duration)
+        n = len(lateness)
+        print '    late by (ms): mean %.2f, p50 %.2f, p99 %.2f, max %.2f' % (
+            sum(lateness) * 1000 / n, lateness[n / 2] * 1000,
+            lateness[n * 99 / 100] * 1000, lateness[-1] * 1000)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+# Copyright (C) 2014 Nippon Telegraph and Telephone Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Feed a table into a BGPSpeaker from one peer stand-in, then connect a
+second eBGP peer stand-in and report how long the speaker takes to
+advertise the whole table to it, with the number of UPDATEs, wire bytes
+and prefixes per UPDATE.
+
+--legacy limits outgoing route batches to a single route, i.e. one
+UPDATE per prefix as before.
+"""
+
+from ryu.lib import hub
+hub.patch()
+
+import logging
+import optparse
+import struct
+import time
+
+from ryu.lib.packet import bgp
+from ryu.services.protocols.bgp import peer
+from ryu.services.protocols.bgp.bgpspeaker import BGPSpeaker
+from ryu.tests.benchmark import bench_bgp_convergence as convergence
+from ryu.tests.benchmark import util
+
+
+RECEIVER_ADDR = '127.0.0.2'
+RECEIVER_AS = 64514
+RECEIVER_ID = '10.255.255.3'
+
+
+def _receive(sock, nprefixes, stats):
+    buf = ''
+    while stats['prefixes'] < nprefixes:
+        data = sock.recv(65536)
+        if not data:
+            break
+        stats['bytes'] += len(data)
+        buf += data
+        while len(buf) >= 19:
+            (_marker, length, type_) = struct.unpack_from('!16sHB', buf)
+            if len(buf) < length:
+                break
+            msg, buf = bgp.BGPMessage.parser(buf)
+            if type_ == bgp.BGP_MSG_UPDATE:
+                stats['updates'] += 1
+                stats['prefixes'] += len(msg.nlri)
+
+
+def main():
+    parser = optparse.OptionParser()
+    parser.add_option('-n', '--count', type='int', default=100000,
+                      help='number of prefixes to generate')
+    parser.add_option('--port', type='int', default=17900,
+                      help='BGP server port of the speaker')
+    parser.add_option('--legacy', action='store_true', default=False,
+                      help='send one prefix per UPDATE')
+    parser.add_option('--timeout', type='int', default=3600)
+    options, _args = parser.parse_args()
+
+    logging.basicConfig(level=logging.CRITICAL)
+    msgs, nprefixes = convergence.generate_stream(options.count)
+    if options.legacy:
+        peer.Peer.OUTGOING_ROUTE_BATCH_SIZE = 1
+        peer.Peer.OUTGOING_ROUTE_BATCH_WINDOW = 0
+
+    best = [0]
+    converged = hub.Event()
+
+    def best_path_change_handler(ev):
+        best[0] += 1
+        if best[0] == nprefixes:
+            converged.set()
+
+    bgp_speaker = BGPSpeaker(
+        as_number=convergence.LOCAL_AS, router_id='10.255.255.1',
+        bgp_server_port=options.port,
+        best_path_change_handler=best_path_change_handler)
+    bgp_speaker.neighbor_add('127.0.0.1', convergence.PEER_AS)
+    bgp_speaker.neighbor_add(RECEIVER_ADDR, RECEIVER_AS)
+    feeder, _start = convergence.run_peer(options.port, msgs)
+    converged.wait(timeout=options.timeout)
+
+    stats = {'updates': 0, 'bytes': 0, 'prefixes': 0}
+    start = time.time()
+    receiver = convergence.open_session(options.port, RECEIVER_ADDR,
+                                        RECEIVER_AS, RECEIVER_ID)
+    thr = hub.spawn(_receive, receiver, nprefixes, stats)
+    hub.joinall([thr])
+    elapsed = time.time() - start
+
+    label = 'one per update' if options.legacy else 'packed'
+    util.report('advertise %s' % label, stats['prefixes'], elapsed,
+                'prefixes')
+    print '%d updates, %d bytes, %.1f prefixes/update' % (
+        stats['updates'], stats['bytes'],
+        float(stats['prefixes']) / max(stats['updates'], 1))
+    feeder.close()
+    receiver.close()
+    bgp_speaker.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,271 @@
+# Copyright (C) 2014 Nippon Telegraph and Telephone Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Select the best paths of an IPv4 table of 8 paths per prefix, learned
+from 8 peers, 4 eBGP and 4 iBGP ones, a full table after another, then
+of every prefix again after a peer changes its path, and report the
+rates of paths processed
+
+- with the path attributes read by the _cmp_by_* helpers of
+  compute_best_path, and the best path computed among all known paths
+  whenever paths change, as it was done before, and
+- with the decision keys of paths, and the best path updated with the
+  new paths only when paths are added.
+
+The best paths selected are checked to be the same.  The tables take
+about 8 KB a prefix, some 7 GB for 800k prefixes, -n 800000.
+"""
+
+import gc
+import optparse
+import random
+
+from ryu.lib.packet import bgp
+from ryu.services.protocols.bgp import processor
+from ryu.services.protocols.bgp.base import OrderedDict
+from ryu.services.protocols.bgp.info_base.base import PathAttrMap
+from ryu.services.protocols.bgp.info_base.ipv4 import Ipv4Path
+from ryu.services.protocols.bgp.info_base.ipv4 import Ipv4Table
+from ryu.tests.benchmark import bench_bgp_update_cache as update_cache
+from ryu.tests.benchmark import util
+
+
+LOCAL_AS = 64512
+PEERS = 8
+
+
+class _Conf(object):
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+def _core_service():
+    # best paths are not advertised
+    return _Conf(asn=LOCAL_AS,
+                 peer_manager=_Conf(
+                     comm_new_best_to_bgp_peers=lambda path: None),
+                 _signal_bus=_Conf(
+                     best_path_changed=lambda path, is_withdraw: None))
+
+
+def _source(i):
+    open_msg = _Conf(bgp_identifier='10.255.0.%d' % (1 + i))
+    return _Conf(version_num=1,
+                 remote_as=LOCAL_AS if i % 2 else 64600 + i,
+                 protocol=_Conf(recv_open_msg=open_msg,
+                                sent_open_msg=_Conf(
+                                    bgp_identifier='10.255.255.1')))
+
+
+def feeds(count, rand):
+    """Return the paths learned from each peer, then the paths a peer
+    changes them to, for `count` prefixes.
+    """
+    nlris = [path.nlri for path in
+             update_cache.full_table(count, 1, rand)]
+
+    def feed(source):
+        ibgp = source.remote_as == LOCAL_AS
+        paths = []
+        pattrs = None
+        for nlri in nlris:
+            # path attributes shared by about 4 prefixes
+            if pattrs is None or rand.randint(1, 4) == 1:
+                pattrs = OrderedDict()
+                pattrs[bgp.BGP_ATTR_TYPE_ORIGIN] = \
+                    bgp.BGPPathAttributeOrigin(rand.choice(
+                        [bgp.BGP_ATTR_ORIGIN_IGP] * 3 +
+                        [bgp.BGP_ATTR_ORIGIN_INCOMPLETE]))
+                pattrs[bgp.BGP_ATTR_TYPE_AS_PATH] = \
+                    bgp.BGPPathAttributeAsPath([[
+                        rand.randint(1, 65000)
+                        for _j in xrange(rand.randint(1, 6))]])
+                pattrs[bgp.BGP_ATTR_TYPE_MULTI_EXIT_DISC] = \
+                    bgp.BGPPathAttributeMultiExitDisc(rand.randint(0, 3))
+                if ibgp:
+                    pattrs[bgp.BGP_ATTR_TYPE_LOCAL_PREF] = \
+                        bgp.BGPPathAttributeLocalPref(
+                            rand.choice([100, 100, 100, 200]))
+                pattrs = PathAttrMap(pattrs).intern()
+            paths.append(Ipv4Path(source, nlri, 1, pattrs=pattrs,
+                                  nexthop='192.0.2.1'))
+        return paths
+
+    sources = [_source(i) for i in xrange(PEERS)]
+    return [feed(source) for source in sources], feed(sources[0])
+
+
+# compute_best_path reading path attributes, as it was
+
+def _cmp_by_local_pref(path1, path2):
+    lp1 = path1.get_pattr(bgp.BGP_ATTR_TYPE_LOCAL_PREF)
+    lp2 = path2.get_pattr(bgp.BGP_ATTR_TYPE_LOCAL_PREF)
+    if not (lp1 and lp2):
+        return None
+    lp1 = lp1.value
+    lp2 = lp2.value
+    if lp1 > lp2:
+        return path1
+    elif lp2 > lp1:
+        return path2
+    else:
+        return None
+
+
+def _cmp_by_aspath(path1, path2):
+    as_path1 = path1.get_pattr(bgp.BGP_ATTR_TYPE_AS_PATH)
+    as_path2 = path2.get_pattr(bgp.BGP_ATTR_TYPE_AS_PATH)
+    assert as_path1 and as_path2
+    l1 = as_path1.get_as_path_len()
+    l2 = as_path2.get_as_path_len()
+    assert l1 is not None and l2 is not None
+    if l1 > l2:
+        return path2
+    elif l2 > l1:
+        return path1
+    else:
+        return None
+
+
+def _cmp_by_origin(path1, path2):
+    def get_origin_pref(origin):
+        if origin.value == bgp.BGP_ATTR_ORIGIN_IGP:
+            return 3
+        elif origin.value == bgp.BGP_ATTR_ORIGIN_EGP:
+            return 2
+        elif origin.value == bgp.BGP_ATTR_ORIGIN_INCOMPLETE:
+            return 1
+        else:
+            return 0
+
+    origin1 = path1.get_pattr(bgp.BGP_ATTR_TYPE_ORIGIN)
+    origin2 = path2.get_pattr(bgp.BGP_ATTR_TYPE_ORIGIN)
+    assert origin1 is not None and origin2 is not None
+    if origin1.value == origin2.value:
+        return None
+    origin1 = get_origin_pref(origin1)
+    origin2 = get_origin_pref(origin2)
+    if origin1 == origin2:
+        return None
+    elif origin1 > origin2:
+        return path1
+    return path2
+
+
+def _cmp_by_med(path1, path2):
+    def get_path_med(path):
+        med = path.get_pattr(bgp.BGP_ATTR_TYPE_MULTI_EXIT_DISC)
+        if not med:
+            return 0
+        return med.value
+
+    med1 = get_path_med(path1)
+    med2 = get_path_med(path2)
+    if med1 == med2:
+        return None
+    elif med1 < med2:
+        return path1
+    return path2
+
+
+def _compute_best_path(local_asn, path1, path2):
+    best_path = None
+    best_path_reason = processor.BPR_UNKNOWN
+    same_pattrs = path1.has_same_pattrs(path2)
+    if best_path is None and not same_pattrs:
+        best_path = _cmp_by_local_pref(path1, path2)
+        best_path_reason = processor.BPR_LOCAL_PREF
+    if best_path is None:
+        best_path = processor._cmp_by_local_origin(path1, path2)
+        best_path_reason = processor.BPR_LOCAL_ORIGIN
+    if best_path is None and not same_pattrs:
+        best_path = _cmp_by_aspath(path1, path2)
+        best_path_reason = processor.BPR_ASPATH
+    if best_path is None and not same_pattrs:
+        best_path = _cmp_by_origin(path1, path2)
+        best_path_reason = processor.BPR_ORIGIN
+    if best_path is None and not same_pattrs:
+        best_path = _cmp_by_med(path1, path2)
+        best_path_reason = processor.BPR_MED
+    if best_path is None:
+        best_path = processor._cmp_by_asn(local_asn, path1, path2)
+        best_path_reason = processor.BPR_ASN
+    if best_path is None:
+        best_path = processor._cmp_by_router_id(local_asn, path1, path2)
+        best_path_reason = processor.BPR_ROUTER_ID
+    if best_path is None:
+        best_path_reason = processor.BPR_UNKNOWN
+    return (best_path, best_path_reason)
+
+
+_decision_key_compute_best_path = processor.compute_best_path
+
+
+def _use(decision_keys):
+    if decision_keys:
+        processor.compute_best_path = _decision_key_compute_best_path
+    else:
+        processor.compute_best_path = _compute_best_path
+
+
+def process(table, paths, incremental):
+    dests = []
+    for path in paths:
+        dests.append(table.insert(path))
+    for dest in dests:
+        if not incremental:
+            # best path computed among all known paths
+            dest._decided_count = 0
+        dest.process()
+
+
+def run(name, decision_keys, peer_feeds, changed_feed):
+    _use(decision_keys)
+    table = Ipv4Table(_core_service(), None)
+    nprefixes = len(changed_feed)
+    for i, paths in enumerate(peer_feeds):
+        _ret, elapsed = util.measure(process, table, paths, decision_keys)
+        util.report('%s, %d paths per prefix' % (name, i + 1), nprefixes,
+                    elapsed, 'paths')
+    _ret, elapsed = util.measure(process, table, changed_feed,
+                                 decision_keys)
+    util.report('%s, path changed' % name, nprefixes, elapsed, 'paths')
+    best_paths = [id(dest.best_path) for dest in table.itervalues()]
+    _use(True)
+    return best_paths
+
+
+def main():
+    parser = optparse.OptionParser()
+    parser.add_option('-n', '--count', type='int', default=100000,
+                      help='number of prefixes in the table')
+    options, _args = parser.parse_args()
+
+    peer_feeds, changed_feed = feeds(options.count, random.Random(0))
+    print '%d prefixes, %d paths per prefix' % (len(changed_feed),
+                                                len(peer_feeds))
+    best_paths = None
+    for name, decision_keys in [('path attributes', False),
+                                ('decision keys', True)]:
+        selected = run(name, decision_keys, peer_feeds, changed_feed)
+        assert best_paths is None or selected == best_paths
+        best_paths = selected
+        # not to free the table of a run while measuring the next one
+        gc.collect()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,276 @@
+# Copyright (C) 2014 Nippon Telegraph and Telephone Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Replay a full-table IPv4 UPDATE stream from a local peer stand-in into
+a BGPSpeaker and report the time until every prefix has been selected
+as best path, together with the peak RSS of the process.
+
+The stream is either generated (-n prefixes, deterministic) or loaded
+from a file of raw BGP messages previously written with --save.
+
+--legacy-recv reproduces the former 19-byte recv() and per-message
+buffer reslicing of BgpProtocol for comparison.  As path processing
+dominates convergence time, --recv-only replays the stream into a bare
+BgpProtocol receive loop instead and compares both framings.
+"""
+
+from ryu.lib import hub
+hub.patch()
+
+import logging
+import optparse
+import random
+import socket
+import struct
+import time
+
+from ryu.lib.packet import afi
+from ryu.lib.packet import bgp
+from ryu.lib.packet import safi
+from ryu.services.protocols.bgp import speaker
+from ryu.services.protocols.bgp.bgpspeaker import BGPSpeaker
+from ryu.tests.benchmark import util
+
+
+LOCAL_AS = 64512
+PEER_AS = 64513
+PEER_ID = '10.255.255.2'
+NEXT_HOP = '192.0.2.1'
+
+
+def generate_stream(count, max_prefixes=400, seed=0):
+    """Return (serialized UPDATE messages, number of prefixes).
+
+    Prefixes are grouped into UPDATEs sharing an AS_PATH, the way a
+    full-table feed packs routes with identical attributes.
+    """
+    rand = random.Random(seed)
+    msgs = []
+    seen = set()
+    prefixes = []
+    while len(prefixes) < count:
+        length = rand.choice([16, 19, 20, 21, 22, 22, 23, 24, 24, 24, 24])
+        addr = rand.randint(0x01000000, 0xdfffffff)
+        addr &= (0xffffffff << (32 - length)) & 0xffffffff
+        if (addr, length) in seen:
+            continue
+        seen.add((addr, length))
+        prefixes.append(bgp.BGPNLRI(
+            length, socket.inet_ntoa(struct.pack('!I', addr))))
+    i = 0
+    while i < len(prefixes):
+        n = min(rand.randint(1, max_prefixes), len(prefixes) - i)
+        as_path = [PEER_AS] + [rand.randint(1, 65000)
+                               for _j in xrange(rand.randint(1, 6))]
+        attrs = [
+            bgp.BGPPathAttributeOrigin(bgp.BGP_ATTR_ORIGIN_IGP),
+            bgp.BGPPathAttributeAsPath([as_path]),
+            bgp.BGPPathAttributeNextHop(NEXT_HOP),
+        ]
+        nlri = prefixes[i:i + n]
+        msg = bgp.BGPUpdate(path_attributes=attrs, nlri=nlri)
+        buf = msg.serialize()
+        # stay within BGP_MAX_MSG_LEN
+        while len(buf) > speaker.BGP_MAX_MSG_LEN:
+            nlri = nlri[:len(nlri) / 2]
+            msg = bgp.BGPUpdate(path_attributes=attrs, nlri=nlri)
+            buf = msg.serialize()
+        msgs.append(str(buf))
+        i += len(nlri)
+    return msgs, len(prefixes)
+
+
+def load_stream(path):
+    data = open(path, 'rb').read()
+    msgs = []
+    nprefixes = 0
+    while data:
+        msg, data = bgp.BGPMessage.parser(data)
+        if isinstance(msg, bgp.BGPUpdate):
+            msgs.append(str(msg.serialize()))
+            nprefixes += len(msg.nlri)
+    return msgs, nprefixes
+
+
+def _legacy_data_received(self, next_bytes):
+    self._recv_buff += next_bytes
+    while True:
+        if len(self._recv_buff) < speaker.BGP_MIN_MSG_LEN:
+            return
+        auth, length, ptype = speaker.BgpProtocol.parse_msg_header(
+            self._recv_buff[:speaker.BGP_MIN_MSG_LEN])
+        if len(self._recv_buff) < length:
+            return
+        msg, rest = bgp.BGPMessage.parser(self._recv_buff)
+        self._recv_buff = rest
+        self._handle_msg(msg)
+
+
+def _legacy_recv_loop(self):
+    conn_lost_reason = "Connection lost as protocol is no longer active"
+    try:
+        while True:
+            next_bytes = self._socket.recv(speaker.BGP_MIN_MSG_LEN)
+            if len(next_bytes) == 0:
+                conn_lost_reason = 'Peer closed connection'
+                break
+            self.data_received(next_bytes)
+    except socket.error as err:
+        conn_lost_reason = 'Connection to peer lost: %s.' % err
+    finally:
+        self.connection_lost(conn_lost_reason)
+
+
+def _read_msg(sock):
+    buf = ''
+    while len(buf) < speaker.BGP_MIN_MSG_LEN:
+        buf += sock.recv(speaker.BGP_MIN_MSG_LEN - len(buf))
+    (_marker, length, _type) = struct.unpack_from('!16sHB', buf)
+    while len(buf) < length:
+        buf += sock.recv(length - len(buf))
+    return bgp.BGPMessage.parser(buf)[0]
+
+
+def _drain(sock):
+    try:
+        while sock.recv(65536):
+            pass
+    except socket.error:
+        pass
+
+
+def open_session(port, address='127.0.0.1', my_as=PEER_AS,
+                 bgp_identifier=PEER_ID):
+    """Connect to the speaker from address and establish the session."""
+    sock = socket.create_connection(('127.0.0.1', port),
+                                    source_address=(address, 0))
+    caps = [bgp.BGPOptParamCapabilityRouteRefresh(),
+            bgp.BGPOptParamCapabilityMultiprotocol(afi=afi.IP,
+                                                   safi=safi.UNICAST)]
+    open_msg = bgp.BGPOpen(my_as=my_as, bgp_identifier=bgp_identifier,
+                           hold_time=180, opt_param=caps)
+    sock.sendall(str(open_msg.serialize()))
+    while not isinstance(_read_msg(sock), bgp.BGPOpen):
+        pass
+    sock.sendall(str(bgp.BGPKeepAlive().serialize()))
+    while not isinstance(_read_msg(sock), bgp.BGPKeepAlive):
+        pass
+    return sock
+
+
+def run_peer(port, msgs):
+    """Connect to the speaker, establish the session and send msgs.
+
+    Returns the socket and the time the first UPDATE was sent.
+    """
+    sock = open_session(port)
+    hub.spawn(_drain, sock)
+    start = time.time()
+    sock.sendall(''.join(msgs))
+    return sock, start
+
+
+def run_recv_only(msgs, legacy):
+    """Time BgpProtocol._recv_loop alone, with message handling stubbed."""
+    class _Protocol(speaker.BgpProtocol):
+        def _handle_msg(self, msg):
+            self.received += 1
+            if self.received == len(msgs):
+                done.set()
+
+        def connection_lost(self, reason):
+            pass
+    if legacy:
+        _Protocol._recv_loop = _legacy_recv_loop
+        _Protocol._data_received = _legacy_data_received
+
+    done = hub.Event()
+    server, client = util.tcp_socketpair()
+    proto = _Protocol(server, signal_bus=None)
+    proto.received = 0
+    thr = hub.spawn(proto._recv_loop)
+    start = time.time()
+    client.sendall(''.join(msgs))
+    done.wait()
+    elapsed = time.time() - start
+    client.close()
+    hub.joinall([thr])
+    server.close()
+    return elapsed
+
+
+def main():
+    parser = optparse.OptionParser()
+    parser.add_option('-n', '--count', type='int', default=100000,
+                      help='number of prefixes to generate')
+    parser.add_option('--load', help='replay UPDATEs from this file')
+    parser.add_option('--save', help='write the UPDATE stream to this file')
+    parser.add_option('--port', type='int', default=17900,
+                      help='BGP server port of the speaker')
+    parser.add_option('--legacy-recv', action='store_true', default=False)
+    parser.add_option('--recv-only', action='store_true', default=False,
+                      help='measure the receive loop alone')
+    parser.add_option('--timeout', type='int', default=3600)
+    options, _args = parser.parse_args()
+
+    logging.basicConfig(level=logging.CRITICAL)
+    if options.load:
+        msgs, nprefixes = load_stream(options.load)
+    else:
+        msgs, nprefixes = generate_stream(options.count)
+    if options.save:
+        with open(options.save, 'wb') as f:
+            f.write(''.join(msgs))
+    if options.recv_only:
+        for legacy in (True, False):
+            elapsed = run_recv_only(msgs, legacy)
+            label = 'legacy recv' if legacy else 'framed recv'
+            util.report('recv %s (%d prefixes)' % (label, nprefixes),
+                        len(msgs), elapsed, 'msgs')
+        return
+    if options.legacy_recv:
+        speaker.BgpProtocol._recv_loop = _legacy_recv_loop
+        speaker.BgpProtocol._data_received = _legacy_data_received
+
+    rss_before = util.max_rss_kb()
+    best = [0]
+    done = hub.Event()
+
+    def best_path_change_handler(ev):
+        best[0] += 1
+        if best[0] == nprefixes:
+            done.set()
+
+    bgp_speaker = BGPSpeaker(
+        as_number=LOCAL_AS, router_id='10.255.255.1',
+        bgp_server_port=options.port,
+        best_path_change_handler=best_path_change_handler)
+    bgp_speaker.neighbor_add('127.0.0.1', PEER_AS)
+    sock, start = run_peer(options.port, msgs)
+    done.wait(timeout=options.timeout)
+    elapsed = time.time() - start
+
+    label = 'legacy recv' if options.legacy_recv else 'framed recv'
+    util.report('converge %s (%d updates)' % (label, len(msgs)),
+                best[0], elapsed, 'prefixes')
+    print 'peak rss %d KiB (%d KiB before the speaker started)' % (
+        util.max_rss_kb(), rss_before)
+    sock.close()
+    bgp_speaker.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+# Copyright (C) 2014 Nippon Telegraph and Telephone Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Evaluate a full table of IPv4 paths against prefix lists of 1k and 10k
+entries, as Peer does for in and out filters, and report the rate of
+paths filtered through a compiled FilterList.
+
+Evaluating every filter in turn, as Peer did before filter lists were
+compiled, is too slow to run over the whole table, so it is run over
+the first --linear paths only.
+"""
+
+import optparse
+import random
+
+from ryu.lib.packet import bgp
+from ryu.services.protocols.bgp.info_base.base import FilterList
+from ryu.services.protocols.bgp.info_base.base import PrefixFilter
+from ryu.services.protocols.bgp.info_base.ipv4 import Ipv4Path
+from ryu.tests.benchmark import bench_bgp_table_memory as table_memory
+from ryu.tests.benchmark import util
+
+
+def generate_paths(count):
+    source = table_memory._Source(table_memory.PEER_AS)
+    pattrs = table_memory._pattrs(source.remote_as)
+    paths = []
+    for wire in table_memory.generate_nlris('ipv4', count):
+        nlri, _rest = bgp.IPAddrPrefix.parser(wire)
+        paths.append(Ipv4Path(source, nlri, source.version_num,
+                              pattrs=pattrs, nexthop='192.0.2.1'))
+    return paths
+
+
+def generate_filters(count, seed=0):
+    """Return a prefix list of count entries ending with a deny all."""
+    rand = random.Random(seed)
+    filters = []
+    for _i in xrange(count - 1):
+        length = rand.choice([8, 12, 16, 16, 20, 24, 24, 24])
+        addr = rand.randint(0x01000000, 0xdfffffff)
+        addr &= (0xffffffff << (32 - length)) & 0xffffffff
+        prefix = '%d.%d.%d.%d/%d' % (addr >> 24, (addr >> 16) & 0xff,
+                                     (addr >> 8) & 0xff, addr & 0xff, length)
+        ge, le = rand.choice([(None, None), (None, 24), (length + 1, 24)])
+        if ge is not None and ge > le:
+            ge = le
+        policy = rand.choice([PrefixFilter.POLICY_PERMIT,
+                              PrefixFilter.POLICY_DENY])
+        filters.append(PrefixFilter(prefix, policy, ge=ge, le=le))
+    filters.append(PrefixFilter('0.0.0.0/0', PrefixFilter.POLICY_DENY,
+                                le=32))
+    return filters
+
+
+def linear_first_match(filters, path):
+    for filter_ in filters:
+        if filter_.ROUTE_FAMILY != path.ROUTE_FAMILY:
+            continue
+        policy, is_matched = filter_.evaluate(path)
+        if is_matched and policy in (PrefixFilter.POLICY_PERMIT,
+                                     PrefixFilter.POLICY_DENY):
+            return filter_
+    return None
+
+
+def main():
+    parser = optparse.OptionParser()
+    parser.add_option('-n', '--count', type='int', default=800000,
+                      help='number of paths')
+    parser.add_option('-f', '--filters', default='1000,10000',
+                      help='comma separated sizes of prefix lists')
+    parser.add_option('--linear', type='int', default=200,
+                      help='number of paths to evaluate filter by filter')
+    options, _args = parser.parse_args()
+
+    paths = generate_paths(options.count)
+    for size in [int(s) for s in options.filters.split(',')]:
+        filters = generate_filters(size)
+        filter_list, elapsed = util.measure(FilterList, filters)
+        util.report('compile %d filters' % size, size, elapsed, 'filters')
+
+        denied = [0]
+
+        def apply_compiled(paths):
+            for path in paths:
+                filter_ = filter_list.first_match(path)
+                if filter_.policy == PrefixFilter.POLICY_DENY:
+                    denied[0] += 1
+
+        _ret, elapsed = util.measure(apply_compiled, paths)
+        util.report('compiled, %d filters' % size, len(paths), elapsed,
+                    'paths')
+
+        sample = paths[:options.linear]
+        matches, elapsed = util.measure(
+            lambda: [linear_first_match(filters, p) for p in sample])
+        util.report('filter by filter, %d filters' % size, len(sample),
+                    elapsed, 'paths')
+        assert matches == [filter_list.first_match(p) for p in sample]
+        print '%d of %d paths denied' % (denied[0], len(paths))
+
+
+if __name__ == '__main__':
+    main()
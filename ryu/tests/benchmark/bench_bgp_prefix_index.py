@@ -0,0 +1,122 @@
+# Copyright (C) 2014 Nippon Telegraph and Telephone Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Fill an Ipv4Table with a full table worth of prefixes, build its prefix
+index and report the rate of exact, longest match and more specifics
+queries through the index, next to the same queries answered from the
+destination dict alone: a dict lookup per candidate prefix length for
+the longest match, and a scan of every destination for more specifics.
+"""
+
+import optparse
+import random
+import socket
+import struct
+
+from ryu.lib.packet import bgp
+from ryu.services.protocols.bgp.info_base.ipv4 import Ipv4Path
+from ryu.services.protocols.bgp.info_base.ipv4 import Ipv4Table
+from ryu.tests.benchmark import bench_bgp_table_memory as table_memory
+from ryu.tests.benchmark import util
+
+
+def fill(nlris):
+    table = Ipv4Table(table_memory._CoreService(), None)
+    source = table_memory._Source(table_memory.PEER_AS)
+    pattrs = table_memory._pattrs(source.remote_as)
+    for wire in nlris:
+        nlri, _rest = bgp.IPAddrPrefix.parser(wire)
+        table.insert(Ipv4Path(source, nlri, source.version_num,
+                              pattrs=pattrs, nexthop='192.0.2.1'))
+    return table
+
+
+def _network(addr, length):
+    addr, = struct.unpack('!I', socket.inet_aton(addr))
+    addr &= (0xffffffff << (32 - length)) & 0xffffffff
+    return socket.inet_ntoa(struct.pack('!I', addr))
+
+
+def dict_longest_match(table, addr):
+    for length in xrange(32, -1, -1):
+        dest = table._destinations.get(
+            '%s/%d' % (_network(addr, length), length))
+        if dest is not None:
+            return dest
+    return None
+
+
+def dict_more_specifics(table, prefix):
+    addr, length = prefix.split('/')
+    length = int(length)
+    network = _network(addr, length)
+    dests = []
+    for dest in table.itervalues():
+        dest_addr, dest_length = dest.nlri.prefix.split('/')
+        if (int(dest_length) >= length and
+                _network(dest_addr, length) == network):
+            dests.append(dest)
+    return dests
+
+
+def run(name, func, queries):
+    _ret, elapsed = util.measure(lambda: [func(q) for q in queries])
+    util.report(name, len(queries), elapsed, 'queries')
+
+
+def main():
+    parser = optparse.OptionParser()
+    parser.add_option('-n', '--count', type='int', default=800000,
+                      help='number of prefixes in the table')
+    parser.add_option('-q', '--queries', type='int', default=100000,
+                      help='number of lookups of each kind')
+    parser.add_option('--scans', type='int', default=10,
+                      help='number of more specifics queries answered '
+                      'by scanning the table')
+    options, _args = parser.parse_args()
+
+    nlris = table_memory.generate_nlris('ipv4', options.count)
+    table, elapsed = util.measure(fill, nlris)
+    util.report('fill ipv4 table', options.count, elapsed, 'prefixes')
+    _index, elapsed = util.measure(table._get_prefix_index)
+    util.report('build prefix index', options.count, elapsed, 'prefixes')
+
+    rand = random.Random(1)
+    prefixes = [dest.nlri.prefix for dest in
+                rand.sample(list(table.itervalues()), options.queries)]
+    addrs = [socket.inet_ntoa(struct.pack('!I', rand.randint(0x01000000,
+                                                             0xdfffffff)))
+             for _i in xrange(options.queries)]
+    supernets = ['%d.%d.0.0/14' % (rand.randint(1, 223),
+                                   rand.randrange(0, 256, 4))
+                 for _i in xrange(options.queries / 10)]
+
+    run('exact, dict', lambda p: table._destinations.get(p), prefixes)
+    run('exact, index', table.get_dest_by_prefix, prefixes)
+    run('longest match, dict', lambda a: dict_longest_match(table, a),
+        addrs)
+    run('longest match, index', table.get_longest_match_dest, addrs)
+    run('more specifics /14, scan',
+        lambda p: dict_more_specifics(table, p), supernets[:options.scans])
+    run('more specifics /14, index', table.get_more_specific_dests,
+        supernets)
+    found = sum(len(table.get_more_specific_dests(p)) for p in supernets)
+    print '%.1f prefixes per more specifics query' % (
+        float(found) / len(supernets))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+# Copyright (C) 2014 Nippon Telegraph and Telephone Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Load the same synthetic full table from several peers into per-peer
+tables of Ipv4Path, the way Peer._extract_and_handle_bgp4_new_paths
+does, and report the resident memory held by the paths.
+
+Each peer sends its own copy of the UPDATE stream, with its AS number
+prepended to every AS_PATH, so paths from one peer share attributes
+with each other but not with other peers' paths.
+
+--legacy gives every path its own copy of the UPDATE's attribute map
+instead of an interned PathAttrMap.  Run each mode in its own process,
+the memory figures are for the whole process.
+"""
+
+import gc
+import optparse
+import time
+
+from ryu.lib.packet import bgp
+from ryu.services.protocols.bgp.info_base.base import PathAttrMap
+from ryu.services.protocols.bgp.info_base.ipv4 import Ipv4Path
+from ryu.tests.benchmark import bench_bgp_convergence as convergence
+from ryu.tests.benchmark import util
+
+
+class _Source(object):
+    # What Path needs of the Peer it was learned from.
+    def __init__(self, remote_as):
+        self.remote_as = remote_as
+        self.version_num = 1
+
+
+def peer_stream(msgs, remote_as):
+    """Return msgs as sent by the peer remote_as."""
+    stream = []
+    for wire in msgs:
+        msg = bgp.BGPMessage.parser(wire)[0]
+        attrs = []
+        for attr in msg.path_attributes:
+            if attr.type == bgp.BGP_ATTR_TYPE_AS_PATH:
+                path_seg_list = attr.path_seg_list
+                path_seg_list[0][0] = remote_as
+                attr = bgp.BGPPathAttributeAsPath(path_seg_list)
+            attrs.append(attr)
+        msg = bgp.BGPUpdate(path_attributes=attrs, nlri=msg.nlri)
+        stream.append(str(msg.serialize()))
+    return stream
+
+
+def load(source, stream, legacy):
+    rib = {}
+    for wire in stream:
+        msg = bgp.BGPMessage.parser(wire)[0]
+        pattrs = msg.pathattr_map
+        if not legacy:
+            pattrs = PathAttrMap(pattrs).intern()
+        next_hop = msg.get_path_attr(bgp.BGP_ATTR_TYPE_NEXT_HOP).value
+        for nlri in msg.nlri:
+            rib[nlri.formatted_nlri_str] = Ipv4Path(
+                source, nlri, source.version_num, pattrs=pattrs,
+                nexthop=next_hop)
+    return rib
+
+
+def main():
+    parser = optparse.OptionParser()
+    parser.add_option('-n', '--count', type='int', default=1000000,
+                      help='total number of paths to load')
+    parser.add_option('-p', '--peers', type='int', default=4,
+                      help='number of peers sending the table')
+    parser.add_option('--legacy', action='store_true', default=False,
+                      help='copy attribute maps per path')
+    options, _args = parser.parse_args()
+
+    msgs, nprefixes = convergence.generate_stream(
+        options.count / options.peers)
+    streams = [peer_stream(msgs, convergence.PEER_AS + i)
+               for i in xrange(options.peers)]
+    del msgs
+    gc.collect()
+
+    rss_before = util.rss_kb()
+    start = time.time()
+    ribs = []
+    for i, stream in enumerate(streams):
+        source = _Source(convergence.PEER_AS + i)
+        ribs.append(load(source, stream, options.legacy))
+    elapsed = time.time() - start
+    gc.collect()
+    rss_after = util.rss_kb()
+
+    npaths = sum(len(rib) for rib in ribs)
+    label = 'copied attrs' if options.legacy else 'interned attrs'
+    util.report('load %s (%d peers)' % (label, options.peers),
+                npaths, elapsed, 'paths')
+    print 'rss %d KiB (+%d KiB), %.1f bytes per path' % (
+        rss_after, rss_after - rss_before,
+        (rss_after - rss_before) * 1024.0 / npaths)
+    if not options.legacy:
+        print 'path attribute maps: %s' % PathAttrMap.intern_stats()
+
+
+if __name__ == '__main__':
+    main()
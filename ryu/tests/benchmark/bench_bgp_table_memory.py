@@ -0,0 +1,147 @@
+# Copyright (C) 2014 Nippon Telegraph and Telephone Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Fill an Ipv4Table or a Vpnv4Table with the same prefixes learned from
+several peers, with NLRIs decoded from the wire for every peer as
+Peer does, run best-path selection on every destination and report the
+resident memory held per route (path) and per destination.
+
+Run it once per route family, the memory figures are for the whole
+process.
+"""
+
+import gc
+import optparse
+import random
+import socket
+import struct
+import time
+
+from ryu.lib.packet import bgp
+from ryu.services.protocols.bgp.info_base.base import PathAttrMap
+from ryu.services.protocols.bgp.info_base.ipv4 import Ipv4Path
+from ryu.services.protocols.bgp.info_base.ipv4 import Ipv4Table
+from ryu.services.protocols.bgp.info_base.vpnv4 import Vpnv4Path
+from ryu.services.protocols.bgp.info_base.vpnv4 import Vpnv4Table
+from ryu.tests.benchmark import util
+
+
+LOCAL_AS = 64512
+PEER_AS = 64513
+
+
+class _CoreService(object):
+    # What tables and destinations need of CoreService.
+    asn = LOCAL_AS
+
+
+class _Source(object):
+    # What paths and best-path selection need of Peer.
+    def __init__(self, remote_as):
+        self.remote_as = remote_as
+        self.version_num = 1
+
+
+def _ipv4_nlri(addr, length, i):
+    return bgp.IPAddrPrefix(length, addr)
+
+
+def _vpnv4_nlri(addr, length, i):
+    return bgp.LabelledVPNIPAddrPrefix(
+        length, addr, route_dist='%d:%d' % (LOCAL_AS, i % 100),
+        labels=[100 + i % 1000])
+
+
+FAMILIES = {
+    'ipv4': (Ipv4Table, Ipv4Path, bgp.IPAddrPrefix, _ipv4_nlri),
+    'vpnv4': (Vpnv4Table, Vpnv4Path, bgp.LabelledVPNIPAddrPrefix,
+              _vpnv4_nlri),
+}
+
+
+def generate_nlris(family, count, seed=0):
+    """Return count distinct NLRIs of family in wire format."""
+    make_nlri = FAMILIES[family][3]
+    rand = random.Random(seed)
+    seen = set()
+    nlris = []
+    while len(nlris) < count:
+        length = rand.choice([16, 20, 22, 23, 24, 24, 24, 24])
+        addr = rand.randint(0x01000000, 0xdfffffff)
+        addr &= (0xffffffff << (32 - length)) & 0xffffffff
+        if (addr, length) in seen:
+            continue
+        seen.add((addr, length))
+        nlri = make_nlri(socket.inet_ntoa(struct.pack('!I', addr)), length,
+                         len(nlris))
+        nlris.append(str(nlri.serialize()))
+    return nlris
+
+
+def _pattrs(remote_as):
+    return PathAttrMap({
+        bgp.BGP_ATTR_TYPE_ORIGIN: bgp.BGPPathAttributeOrigin(
+            bgp.BGP_ATTR_ORIGIN_IGP),
+        bgp.BGP_ATTR_TYPE_AS_PATH: bgp.BGPPathAttributeAsPath(
+            [[remote_as, 65001]]),
+    }).intern()
+
+
+def fill(family, nlris, npeers):
+    table_cls, path_cls, nlri_cls, _make_nlri = FAMILIES[family]
+    table = table_cls(_CoreService(), None)
+    for i in xrange(npeers):
+        source = _Source(PEER_AS + i)
+        pattrs = _pattrs(source.remote_as)
+        next_hop = '192.0.2.%d' % (i + 1)
+        for wire in nlris:
+            nlri, _rest = nlri_cls.parser(wire)
+            table.insert(path_cls(source, nlri, source.version_num,
+                                  pattrs=pattrs, nexthop=next_hop))
+    for dest in table.itervalues():
+        dest._process_paths()
+    return table
+
+
+def main():
+    parser = optparse.OptionParser()
+    parser.add_option('-f', '--family', default='ipv4',
+                      choices=sorted(FAMILIES.keys()))
+    parser.add_option('-n', '--count', type='int', default=250000,
+                      help='number of prefixes')
+    parser.add_option('-p', '--peers', type='int', default=4,
+                      help='number of peers advertising every prefix')
+    options, _args = parser.parse_args()
+
+    nlris = generate_nlris(options.family, options.count)
+    gc.collect()
+
+    rss_before = util.rss_kb()
+    table, elapsed = util.measure(fill, options.family, nlris,
+                                  options.peers)
+    gc.collect()
+    held = (util.rss_kb() - rss_before) * 1024.0
+
+    npaths = options.count * options.peers
+    util.report('fill %s table (%d peers)' % (options.family, options.peers),
+                npaths, elapsed, 'paths')
+    print '%d KiB, %.1f bytes per route, %.1f bytes per destination' % (
+        held / 1024, held / npaths, held / options.count)
+    del table
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+# Copyright (C) 2014 Nippon Telegraph and Telephone Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Construct and serialize the UPDATEs advertising a full IPv4 table to 50
+iBGP clients, as Peer._send_outgoing_routes does in batches of
+Peer.OUTGOING_ROUTE_BATCH_SIZE routes, and report the rate of prefixes
+advertised
+
+- with the outgoing path attributes constructed and serialized for
+  every client, as it was done before, and
+- with the outgoing path attributes cached by path attributes and
+  outbound policy, together with the cache hit ratio.
+
+Paths share their interned path attributes by a few prefixes, the way
+routes learned from a full-table feed do, and come in random order.
+"""
+
+import optparse
+import random
+import socket
+import struct
+
+from ryu.lib.packet import bgp
+from ryu.services.protocols.bgp import peer
+from ryu.services.protocols.bgp.base import OrderedDict
+from ryu.services.protocols.bgp.info_base.base import PathAttrMap
+from ryu.services.protocols.bgp.info_base.ipv4 import Ipv4Path
+from ryu.services.protocols.bgp.signals.emit import BgpSignalBus
+from ryu.tests.benchmark import util
+
+
+LOCAL_AS = 64512
+
+
+class _Conf(object):
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+def _client():
+    p = peer.Peer.__new__(peer.Peer)
+    p._common_conf = _Conf(local_as=LOCAL_AS)
+    p._neigh_conf = _Conf(remote_as=LOCAL_AS,
+                          next_hop='192.0.2.1', multi_exit_disc=None,
+                          soo_list=None, is_route_server_client=False,
+                          is_next_hop_self=False)
+    p._core_service = _Conf(asn=LOCAL_AS)
+    p._attribute_maps = {}
+    p.state = peer.PeerState(p, BgpSignalBus())
+    return p
+
+
+def full_table(count, per_pathattrs, rand):
+    """Return `count` IPv4 paths sharing path attributes by about
+    `per_pathattrs` prefixes, in random order.
+    """
+    paths = []
+    seen = set()
+    pattrs = None
+    while len(paths) < count:
+        length = rand.choice([16, 19, 20, 21, 22, 22, 23, 24, 24, 24, 24])
+        addr = rand.randint(0x01000000, 0xdfffffff)
+        addr &= (0xffffffff << (32 - length)) & 0xffffffff
+        if (addr, length) in seen:
+            continue
+        seen.add((addr, length))
+        if pattrs is None or rand.randint(1, per_pathattrs) == 1:
+            as_path = [rand.randint(1, 65000)
+                       for _j in xrange(rand.randint(1, 6))]
+            pattrs = OrderedDict()
+            pattrs[bgp.BGP_ATTR_TYPE_ORIGIN] = bgp.BGPPathAttributeOrigin(
+                bgp.BGP_ATTR_ORIGIN_IGP)
+            pattrs[bgp.BGP_ATTR_TYPE_AS_PATH] = bgp.BGPPathAttributeAsPath(
+                [as_path])
+            pattrs[bgp.BGP_ATTR_TYPE_MULTI_EXIT_DISC] = \
+                bgp.BGPPathAttributeMultiExitDisc(rand.randint(0, 100))
+            pattrs = PathAttrMap(pattrs).intern()
+        nlri = bgp.IPAddrPrefix(length,
+                                socket.inet_ntoa(struct.pack('!I', addr)))
+        paths.append(Ipv4Path(None, nlri, 1, pattrs=pattrs,
+                              nexthop='192.0.2.2'))
+    rand.shuffle(paths)
+    return paths
+
+
+def advertise(clients, paths):
+    batch = peer.Peer.OUTGOING_ROUTE_BATCH_SIZE
+    nupdates = 0
+    for client in clients:
+        for i in xrange(0, len(paths), batch):
+            for update in client._construct_updates(paths[i:i + batch]):
+                update.serialize()
+                nupdates += 1
+    return nupdates
+
+
+_cached_path_attrs = peer.Peer.__dict__['_cached_path_attrs']
+
+
+def _use(cache):
+    if cache:
+        peer.Peer._cached_path_attrs = _cached_path_attrs
+    else:
+        peer.Peer._cached_path_attrs = lambda self, path: None
+
+
+def main():
+    parser = optparse.OptionParser()
+    parser.add_option('-n', '--count', type='int', default=100000,
+                      help='number of prefixes in the table')
+    parser.add_option('-c', '--clients', type='int', default=50,
+                      help='number of iBGP clients')
+    parser.add_option('-s', '--share', type='int', default=4,
+                      help='average number of prefixes sharing path '
+                      'attributes')
+    options, _args = parser.parse_args()
+
+    paths = full_table(options.count, options.share, random.Random(0))
+    print '%d prefixes, %d path attribute sets, %d clients' % (
+        len(paths), len(set(id(p.shared_pathattr_map) for p in paths)),
+        options.clients)
+
+    for name, cache in [('not cached', False), ('cached', True)]:
+        _use(cache)
+        clients = [_client() for _i in xrange(options.clients)]
+        nupdates, elapsed = util.measure(advertise, clients, paths)
+        util.report(name, len(paths) * len(clients), elapsed, 'prefixes')
+        print '    %d updates' % nupdates
+        if cache:
+            names = peer.PeerCounterNames
+            hits = sum(c.state.get_count(names.SENT_PATHATTRS_CACHE_HITS)
+                       for c in clients)
+            misses = sum(c.state.get_count(
+                names.SENT_PATHATTRS_CACHE_MISSES) for c in clients)
+            print '    hit ratio %.3f (%d hits, %d misses)' % (
+                float(hits) / (hits + misses), hits, misses)
+    _use(True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+# Copyright (C) 2014 Nippon Telegraph and Telephone Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Connect 100 iBGP client stand-ins to a BGPSpeaker, then feed a table
+into it from an eBGP peer stand-in and report the time and CPU time
+until the speaker has advertised the whole table to every client.
+
+The clients share an update group, so that the routes are filtered and
+their UPDATEs serialized once for all of them.  --no-groups sends them
+to every client on its own as before.
+
+--establish feeds the table first, then connects the clients and
+reports the time until they have been sent the table on session
+establishment.
+"""
+
+from ryu.lib import hub
+hub.patch()
+
+import logging
+import optparse
+import resource
+import socket
+import time
+
+from ryu.lib.packet import bgp
+from ryu.services.protocols.bgp import peer
+from ryu.services.protocols.bgp.bgpspeaker import BGPSpeaker
+from ryu.services.protocols.bgp.core_manager import CORE_MANAGER
+from ryu.tests.benchmark import bench_bgp_convergence as convergence
+from ryu.tests.benchmark import util
+
+
+def _cpu_time():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _keepalive(sock, interval=10):
+    # within the hold time of the speaker
+    msg = str(bgp.BGPKeepAlive().serialize())
+    try:
+        while True:
+            sock.sendall(msg)
+            hub.sleep(interval)
+    except socket.error:
+        pass
+
+
+def _wait(cond, timeout, interval=0.01):
+    end = time.time() + timeout
+    while not cond():
+        if time.time() > end:
+            raise RuntimeError('timed out')
+        hub.sleep(interval)
+
+
+def main():
+    parser = optparse.OptionParser()
+    parser.add_option('-n', '--count', type='int', default=100000,
+                      help='number of prefixes to generate')
+    parser.add_option('-c', '--clients', type='int', default=100,
+                      help='number of iBGP clients')
+    parser.add_option('--port', type='int', default=17900,
+                      help='BGP server port of the speaker')
+    parser.add_option('--no-groups', action='store_true', default=False,
+                      help='do not group the clients')
+    parser.add_option('--establish', action='store_true', default=False,
+                      help='connect the clients once the table is loaded')
+    parser.add_option('--timeout', type='int', default=3600)
+    options, _args = parser.parse_args()
+
+    logging.basicConfig(level=logging.CRITICAL)
+    if options.no_groups:
+        peer.Peer.USE_UPDATE_GROUPS = False
+    msgs, nprefixes = convergence.generate_stream(options.count)
+
+    bgp_speaker = BGPSpeaker(
+        as_number=convergence.LOCAL_AS, router_id='10.255.255.1',
+        bgp_server_port=options.port)
+    bgp_speaker.neighbor_add('127.0.0.1', convergence.PEER_AS)
+    addrs = ['127.0.%d.%d' % (1 + i / 250, 1 + i % 250)
+             for i in xrange(options.clients)]
+    for addr in addrs:
+        bgp_speaker.neighbor_add(addr, convergence.LOCAL_AS)
+    core_service = CORE_MANAGER.get_core_service()
+    peer_manager = core_service.peer_manager
+    clients = []
+
+    def connect(i, addr):
+        sock = convergence.open_session(options.port, addr,
+                                        convergence.LOCAL_AS,
+                                        '10.254.%d.%d' % (i / 250, i % 250))
+        hub.spawn(convergence._drain, sock)
+        hub.spawn(_keepalive, sock)
+        clients.append((sock, peer_manager.get_by_addr(addr)))
+
+    def connect_all():
+        # all at once, as after a restart of the speaker
+        hub.joinall([hub.spawn(connect, i, addr)
+                     for i, addr in enumerate(addrs)])
+
+    def advertised():
+        return all(p.state.get_count(peer.PeerCounterNames.SENT_PREFIXES) >=
+                   nprefixes for _sock, p in clients)
+
+    if options.establish:
+        table = core_service.table_manager.get_ipv4_table()
+        feeder, _start = convergence.run_peer(options.port, msgs)
+        _wait(lambda: sum(1 for dest in table.itervalues()
+                          if dest.best_path) >= nprefixes, options.timeout,
+              interval=1)
+        cpu = _cpu_time()
+        start = time.time()
+        connect_all()
+        _wait(advertised, options.timeout)
+    else:
+        connect_all()
+        _wait(lambda: all(p.in_established() for _sock, p in clients),
+              options.timeout)
+        # let the clients join their update group
+        hub.sleep(0.1)
+        cpu = _cpu_time()
+        feeder, start = convergence.run_peer(options.port, msgs)
+        _wait(advertised, options.timeout)
+    elapsed = time.time() - start
+    cpu = _cpu_time() - cpu
+
+    label = 'per client' if options.no_groups else 'update group'
+    if options.establish:
+        label = 'establish ' + label
+    util.report('advertise %s' % label, nprefixes * len(clients), elapsed,
+                'prefixes')
+    print '%d prefixes to %d clients, %.3f sec CPU time' % (
+        nprefixes, len(clients), cpu)
+    feeder.close()
+    for sock, _peer in clients:
+        sock.close()
+    bgp_speaker.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,205 @@
+# Copyright (C) 2014 Nippon Telegraph and Telephone Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Parse the BGP messages of ryu/tests/packet_data/bgp4 and synthetic
+UPDATEs of up to 4 KiB, full of IPv4 NLRIs, of withdrawn IPv4 routes,
+and of IPv6 and VPNv4 NLRIs in MP_REACH_NLRI, with BGPMessage.parser,
+and report the rates of messages and prefixes parsed
+
+- with the prefixes parsed a prefix at a time and decoded to text as
+  it was done before,
+- with _AddrPrefix.parser_list, the text form being left to be decoded
+  when it is used, and
+- with _AddrPrefix.parser_list, and the text form of every prefix
+  asked for afterwards, as the BGP speaker does for its tables.
+"""
+
+import optparse
+import random
+import struct
+
+from ryu.lib.packet import afi
+from ryu.lib.packet import bgp
+from ryu.lib.packet import safi
+from ryu.tests.benchmark import util
+
+
+MAX_MESSAGE_LEN = 4096
+
+
+def _parser_list_one_at_a_time(cls, buf):
+    # _AddrPrefix.parser as it was, called in a loop as it was
+    prefixes = []
+    while buf:
+        (length, ) = struct.unpack_from(cls._PACK_STR, buffer(buf))
+        rest = buf[struct.calcsize(cls._PACK_STR):]
+        byte_length = (length + 7) / 8
+        addr = cls._from_bin(rest[:byte_length])
+        rest = rest[byte_length:]
+        prefixes.append(cls(length=length, addr=addr))
+        buf = rest
+    return prefixes
+
+
+_parser_list = bgp._AddrPrefix.__dict__['parser_list']
+
+
+def _use(name):
+    if name == 'one at a time':
+        bgp._AddrPrefix.parser_list = classmethod(_parser_list_one_at_a_time)
+    else:
+        bgp._AddrPrefix.parser_list = _parser_list
+
+
+def _ipv4_prefix(rand):
+    length = rand.choice([16, 20, 22, 24, 24, 24, 24])
+    addr = rand.randint(0x01000000, 0xdfffffff)
+    addr &= (0xffffffff << (32 - length)) & 0xffffffff
+    return length, '%d.%d.%d.%d' % (addr >> 24, (addr >> 16) & 0xff,
+                                    (addr >> 8) & 0xff, addr & 0xff)
+
+
+def _ipv6_prefix(rand):
+    length = rand.choice([32, 40, 48, 48, 48, 56, 64])
+    groups = [0x2001, rand.randint(0, 0xffff), rand.randint(0, 0xffff),
+              rand.randint(0, 0xffff)]
+    return length, '%x:%x:%x:%x::' % tuple(groups)
+
+
+def _fill(make_update, make_prefix, rand):
+    # as many prefixes as fit in a message
+    prefixes = [make_prefix(rand)]
+    msg_len = len(make_update(prefixes).serialize())
+    prefix_len = msg_len - len(make_update([]).serialize())
+    while msg_len + prefix_len < MAX_MESSAGE_LEN:
+        prefixes.append(make_prefix(rand))
+        msg_len += prefix_len
+    while True:
+        binmsg = make_update(prefixes).serialize()
+        if len(binmsg) <= MAX_MESSAGE_LEN:
+            return binmsg, len(prefixes)
+        prefixes.pop()
+
+
+def _pattrs(rand):
+    return [bgp.BGPPathAttributeOrigin(value=bgp.BGP_ATTR_ORIGIN_IGP),
+            bgp.BGPPathAttributeAsPath(
+                value=[[rand.randint(1, 65000) for _i in range(4)]]),
+            bgp.BGPPathAttributeNextHop(value='192.0.2.1'),
+            bgp.BGPPathAttributeMultiExitDisc(value=100)]
+
+
+def synthetic_updates(rand):
+    """Return a list of (name, message, number of prefixes)."""
+    updates = []
+
+    def ipv4_nlri(prefixes):
+        return bgp.BGPUpdate(
+            path_attributes=_pattrs(rand),
+            nlri=[bgp.BGPNLRI(length=length, addr=addr)
+                  for length, addr in prefixes])
+
+    def ipv4_withdrawn(prefixes):
+        return bgp.BGPUpdate(
+            withdrawn_routes=[bgp.BGPWithdrawnRoute(length=length, addr=addr)
+                              for length, addr in prefixes])
+
+    def ipv6_nlri(prefixes):
+        nlri = [bgp.IP6AddrPrefix(length=length, addr=addr)
+                for length, addr in prefixes]
+        return bgp.BGPUpdate(path_attributes=_pattrs(rand)[:2] + [
+            bgp.BGPPathAttributeMpReachNLRI(afi=afi.IP6,
+                                            safi=safi.UNICAST,
+                                            next_hop='2001:db8::1',
+                                            nlri=nlri)])
+
+    def vpnv4_prefix(rand):
+        length, addr = _ipv4_prefix(rand)
+        return length, addr, '65000:%d' % rand.randint(1, 100), \
+            rand.randint(16, 1048575)
+
+    def vpnv4_nlri(prefixes):
+        nlri = [bgp.LabelledVPNIPAddrPrefix(length, addr,
+                                            route_dist=route_dist,
+                                            labels=[label])
+                for length, addr, route_dist, label in prefixes]
+        return bgp.BGPUpdate(path_attributes=_pattrs(rand)[:2] + [
+            bgp.BGPPathAttributeMpReachNLRI(afi=afi.IP,
+                                            safi=safi.MPLS_VPN,
+                                            next_hop='192.0.2.1',
+                                            nlri=nlri)])
+
+    for name, make_update, make_prefix in [
+            ('ipv4 nlri', ipv4_nlri, _ipv4_prefix),
+            ('ipv4 withdrawn', ipv4_withdrawn, _ipv4_prefix),
+            ('ipv6 mp_reach', ipv6_nlri, _ipv6_prefix),
+            ('vpnv4 mp_reach', vpnv4_nlri, vpnv4_prefix)]:
+        msg, count = _fill(make_update, make_prefix, rand)
+        updates.append((name, msg, count))
+    return updates
+
+
+def _prefixes(msg):
+    prefixes = list(msg.withdrawn_routes) + list(msg.nlri)
+    for pattr in msg.path_attributes:
+        if isinstance(pattr, bgp.BGPPathAttributeMpReachNLRI):
+            prefixes.extend(pattr.nlri)
+        elif isinstance(pattr, bgp.BGPPathAttributeMpUnreachNLRI):
+            prefixes.extend(pattr.withdrawn_routes)
+    return prefixes
+
+
+def parse(binmsg, count, text):
+    for _i in xrange(count):
+        msg, _rest = bgp.BGPMessage.parser(binmsg)
+        if text and isinstance(msg, bgp.BGPUpdate):
+            for prefix in _prefixes(msg):
+                prefix.formatted_nlri_str
+
+
+def main():
+    parser = optparse.OptionParser()
+    parser.add_option('-n', '--count', type='int', default=2000,
+                      help='number of times each message is parsed')
+    options, _args = parser.parse_args()
+
+    messages = []
+    for f in util.packet_data_files('bgp4'):
+        binmsg = util.packet_data('bgp4', f)
+        msg, _rest = bgp.BGPMessage.parser(binmsg)
+        nprefixes = 0
+        if isinstance(msg, bgp.BGPUpdate):
+            nprefixes = len(_prefixes(msg))
+        messages.append((f, binmsg, nprefixes))
+    messages.extend(synthetic_updates(random.Random(0)))
+
+    for name, binmsg, nprefixes in messages:
+        print '%s: %d bytes, %d prefixes' % (name, len(binmsg), nprefixes)
+        for mode, parser_list, text in [
+                ('one at a time', 'one at a time', True),
+                ('parser_list', 'parser_list', False),
+                ('parser_list, then text', 'parser_list', True)]:
+            _use(parser_list)
+            _ret, elapsed = util.measure(parse, binmsg, options.count, text)
+            util.report('  ' + mode, options.count, elapsed, 'messages')
+            if nprefixes:
+                util.report('  ' + mode, options.count * nprefixes, elapsed,
+                            'prefixes')
+    _use('parser_list')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+# Copyright (C) 2014 Nippon Telegraph and Telephone Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Dispatch PACKET_IN events from the ofp_event brick to three observing
+applications, the way Datapath._recv_loop does, and report the per
+event overhead.
+
+The "legacy" dispatch reproduces the former uncached observer lookup,
+eager debug formatting and per message handler filtering.
+"""
+
+from ryu.lib import hub
+hub.patch()
+
+import optparse
+
+from ryu.base import app_manager
+from ryu.controller import handler
+from ryu.controller import ofp_event
+from ryu.controller import ofp_handler
+from ryu.ofproto import ofproto_protocol
+from ryu.ofproto import ofproto_v1_3
+from ryu.tests.benchmark import util
+
+
+class _Observer(app_manager.RyuApp):
+    def __init__(self, *args, **kwargs):
+        super(_Observer, self).__init__(*args, **kwargs)
+        self.count = 0
+
+    @handler.set_ev_cls(ofp_event.EventOFPPacketIn, handler.MAIN_DISPATCHER)
+    def packet_in_handler(self, ev):
+        self.count += 1
+
+
+class Observer1(_Observer):
+    pass
+
+
+class Observer2(_Observer):
+    pass
+
+
+class Observer3(_Observer):
+    pass
+
+
+def _legacy_get_observers(brick, ev, state):
+    observers = []
+    for k, v in brick.observers.get(ev.__class__, {}).iteritems():
+        if not state or not v or state in v:
+            observers.append(k)
+    return observers
+
+
+def _legacy_dispatch(brick, ev, state):
+    for observer in _legacy_get_observers(brick, ev, state):
+        app_manager.LOG.debug("EVENT %s->%s %s" %
+                              (brick.name, observer, ev.__class__.__name__))
+        app_manager.SERVICE_BRICKS[observer]._send_event(ev, state)
+    dispatchers = lambda x: x.callers[ev.__class__].dispatchers
+    handlers = [h for h in brick.event_handlers.get(ev.__class__, [])
+                if state in dispatchers(h)]
+    for h in handlers:
+        h(ev)
+
+
+def _dispatch(brick, ev, state):
+    brick.send_event_to_observers(ev, state)
+    for h in brick.get_handlers(ev, state):
+        h(ev)
+
+
+def _run(brick, observers, dispatch, count):
+    dp = ofproto_protocol.ProtocolDesc(ofproto_v1_3.OFP_VERSION)
+    msg = dp.ofproto_parser.OFPPacketIn(dp, data='\x00' * 64)
+    for o in observers:
+        o.count = 0
+
+    def _loop():
+        for _i in xrange(count):
+            dispatch(brick, ofp_event.EventOFPPacketIn(msg),
+                     handler.MAIN_DISPATCHER)
+        while any(o.count < count for o in observers):
+            hub.sleep(0)
+    _ret, elapsed = util.measure(_loop)
+    return elapsed
+
+
+def main():
+    parser = optparse.OptionParser()
+    parser.add_option('-n', '--count', type='int', default=100000,
+                      help='number of PACKET_IN events to dispatch')
+    options, _args = parser.parse_args()
+
+    app_mgr = app_manager.AppManager.get_instance()
+    brick = app_mgr._instantiate(None, ofp_handler.OFPHandler)
+    observers = [app_mgr.instantiate(cls)
+                 for cls in (Observer1, Observer2, Observer3)]
+    for o in observers:
+        o.start()
+    for name, dispatch in [('legacy dispatch', _legacy_dispatch),
+                           ('cached dispatch', _dispatch)]:
+        elapsed = _run(brick, observers, dispatch, options.count)
+        util.report(name, options.count, elapsed, 'events')
+        print '    %.2f usec/event' % (elapsed * 1000000 / options.count)
+
+
+if __name__ == '__main__':
+    main()
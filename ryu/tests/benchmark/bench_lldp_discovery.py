@@ -0,0 +1,259 @@
+# Copyright (C) 2014 Nippon Telegraph and Telephone Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Run the link discovery of topology.switches against a synthetic fabric
+of fake datapaths, 500 switches of 64 ports by default, and report the
+time until every link is discovered and the rate LLDP probes are sent
+at afterwards, i.e. how long a probe round of every port takes.
+
+This is done with the switches app as it is, and with the app sending
+a probe every LLDP_SEND_GUARD, looking ports up through the whole
+switch, decoding LLDP with Packet and scanning every link for expiry
+as it did before.
+
+The fake datapaths serialize the messages sent to them, and the frames
+of PACKET_OUTs to a port come back as PACKET_INs from its peer in a
+single thread, as Datapath._recv_loop does.
+"""
+
+from ryu.lib import hub
+hub.patch()
+
+import collections
+import optparse
+import random
+import time
+
+from ryu import cfg
+from ryu.controller import handler
+from ryu.controller import ofp_event
+from ryu.ofproto import ofproto_protocol
+from ryu.ofproto import ofproto_v1_3
+from ryu.topology import event
+from ryu.topology import switches
+
+
+class FakeDatapath(ofproto_protocol.ProtocolDesc):
+    def __init__(self, fabric, dpid, nports):
+        super(FakeDatapath, self).__init__(ofproto_v1_3.OFP_VERSION)
+        self.fabric = fabric
+        self.id = dpid
+        self.xid = 0
+        self.ports = {}
+        for port_no in range(1, nports + 1):
+            hw_addr = '02:%02x:%02x:%02x:%02x:%02x' % (
+                (dpid >> 16) & 0xff, (dpid >> 8) & 0xff, dpid & 0xff,
+                port_no >> 8, port_no & 0xff)
+            self.ports[port_no] = self.ofproto_parser.OFPPort(
+                port_no, hw_addr, 'port%d' % port_no, 0, 0, 0, 0, 0, 0, 0, 0)
+
+    def set_xid(self, msg):
+        self.xid += 1
+        msg.set_xid(self.xid)
+
+    def send_msg(self, msg):
+        self.set_xid(msg)
+        msg.serialize()
+        if isinstance(msg, self.ofproto_parser.OFPPacketOut):
+            self.fabric.packet_out(self, msg)
+
+
+class Fabric(object):
+    # Port 2k-1 of switch i is linked to port 2k of switch i+k.
+    def __init__(self, nswitches, nports):
+        self.dps = {}
+        self.peers = {}
+        for dpid in range(1, nswitches + 1):
+            self.dps[dpid] = FakeDatapath(self, dpid, nports)
+            for port_no in range(1, nports, 2):
+                k = (port_no + 1) / 2
+                peer_dpid = (dpid - 1 + k) % nswitches + 1
+                self.peers[(dpid, port_no)] = (peer_dpid, port_no + 1)
+                self.peers[(peer_dpid, port_no + 1)] = (dpid, port_no)
+        self.connected = set()
+        self.packet_outs = 0
+        self.pending = collections.deque()
+        self._pending = hub.Event()
+        self.app = None
+
+    def packet_out(self, dp, msg):
+        self.packet_outs += 1
+        peer = self.peers.get((dp.id, msg.actions[0].port))
+        if peer is not None and peer[0] in self.connected:
+            self.pending.append((peer, str(msg.data)))
+            self._pending.set()
+
+    def recv_loop(self):
+        count = 0
+        while True:
+            if not self.pending:
+                self._pending.clear()
+                self._pending.wait()
+                continue
+            (dpid, port_no), data = self.pending.popleft()
+            dp = self.dps[dpid]
+            msg = dp.ofproto_parser.OFPPacketIn(
+                dp, buffer_id=dp.ofproto.OFP_NO_BUFFER,
+                match=dp.ofproto_parser.OFPMatch(in_port=port_no),
+                data=data)
+            self.app.packet_in_handler(ofp_event.EventOFPPacketIn(msg))
+            count += 1
+            if count > 2048:
+                count = 0
+                hub.sleep(0)
+
+    def connect(self, dp):
+        self.connected.add(dp.id)
+        ev = ofp_event.EventOFPStateChange(dp)
+        ev.state = handler.MAIN_DISPATCHER
+        self.app.state_change_handler(ev)
+
+
+class SerialSwitches(switches.Switches):
+    # switches as it was.
+    def _get_port(self, dpid, port_no):
+        switch = self._get_switch(dpid)
+        if switch:
+            for p in switch.ports:
+                if p.port_no == port_no:
+                    return p
+
+    def _port_added(self, port):
+        lldp_data = switches.LLDPPacket._lldp_frame(
+            port.dpid, port.port_no, port.hw_addr, self.DEFAULT_TTL)
+        self.ports.add_port(port, lldp_data)
+
+    def packet_in_handler(self, ev):
+        # lldp_parse() is given the decoded packet as it was
+        ev.msg.data = ev.packet
+        super(SerialSwitches, self).packet_in_handler(ev)
+
+    def lldp_loop(self):
+        while self.is_active:
+            self.lldp_event.clear()
+
+            now = time.time()
+            timeout = None
+            ports_now = []
+            ports = []
+            for (key, data) in self.ports.items():
+                if data.timestamp is None:
+                    ports_now.append(key)
+                    continue
+
+                expire = data.timestamp + self.LLDP_SEND_PERIOD_PER_PORT
+                if expire <= now:
+                    ports.append(key)
+                    continue
+
+                timeout = expire - now
+                break
+
+            for port in ports_now:
+                self.send_lldp_packet(port)
+            for port in ports:
+                self.send_lldp_packet(port)
+                hub.sleep(self.LLDP_SEND_GUARD)      # don't burst
+
+            if timeout is not None and ports:
+                timeout = 0     # We have already slept
+            self.lldp_event.wait(timeout=timeout)
+
+    def link_loop(self):
+        while self.is_active:
+            self.link_event.clear()
+
+            now = time.time()
+            deleted = []
+            for (link, timestamp) in self.links.items():
+                if timestamp + self.LINK_TIMEOUT < now:
+                    src = link.src
+                    if src in self.ports:
+                        port_data = self.ports.get_port(src)
+                        if port_data.lldp_dropped() > self.LINK_LLDP_DROP:
+                            deleted.append(link)
+
+            for link in deleted:
+                self.links.link_down(link)
+                self.send_event_to_observers(event.EventLinkDelete(link))
+
+                dst = link.dst
+                rev_link = switches.Link(dst, link.src)
+                if rev_link not in deleted:
+                    expire = now - self.LINK_TIMEOUT
+                    self.links.rev_link_set_timestamp(rev_link, expire)
+                    if dst in self.ports:
+                        self.ports.move_front(dst)
+                        self.lldp_event.set()
+
+            self.link_event.wait(timeout=self.TIMEOUT_CHECK_PERIOD)
+
+
+def run(cls, nswitches, nports, duration, timeout):
+    fabric = Fabric(nswitches, nports)
+    app = cls()
+    fabric.app = app
+    recv_thread = hub.spawn(fabric.recv_loop)
+
+    nlinks = len(fabric.peers)
+    dps = fabric.dps.values()
+    random.Random(0).shuffle(dps)
+    start = time.time()
+    for dp in dps:
+        fabric.connect(dp)
+        hub.sleep(0)
+    while len(app.links) < nlinks and time.time() - start < timeout:
+        hub.sleep(0.01)
+    converged = time.time() - start
+    discovered = len(app.links)
+
+    packet_outs = fabric.packet_outs
+    hub.sleep(duration)
+    rate = (fabric.packet_outs - packet_outs) / duration
+
+    app.close()
+    hub.kill(recv_thread)
+    return discovered, nlinks, converged, rate
+
+
+def main():
+    parser = optparse.OptionParser()
+    parser.add_option('-s', '--switches', type='int', default=500,
+                      help='number of switches')
+    parser.add_option('-p', '--ports', type='int', default=64,
+                      help='number of ports per switch')
+    parser.add_option('-d', '--duration', type='float', default=5,
+                      help='seconds to measure probes after convergence')
+    parser.add_option('-t', '--timeout', type='float', default=120,
+                      help='seconds to wait for the full topology')
+    options, _args = parser.parse_args()
+
+    cfg.CONF(args=[], project='ryu')
+    cfg.CONF.set_override('observe_links', True)
+    nports = options.switches * options.ports
+    for name, cls in [('serial probes', SerialSwitches),
+                      ('batched probes', switches.Switches)]:
+        discovered, nlinks, converged, rate = run(
+            cls, options.switches, options.ports, options.duration,
+            options.timeout)
+        print '%s: %d/%d links in %.2f sec' % (
+            name, discovered, nlinks, converged)
+        print '    %.0f probes/sec, a round of %d ports in %.1f sec' % (
+            rate, nports, nports / rate if rate else float('inf'))
+
+
+if __name__ == '__main__':
+    main()
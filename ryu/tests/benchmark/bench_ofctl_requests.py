@@ -0,0 +1,178 @@
+# Copyright (C) 2014 Nippon Telegraph and Telephone Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Query port stats of 1000 fake datapaths through ryu.app.ofctl and
+report the aggregate request rates
+
+- with send_msg(), a request at a time,
+- with send_msg_async(), all the requests at once,
+- with several requests per datapath, each followed by a barrier, and
+  sharing a barrier with send_msgs_async().
+
+The fake datapaths answer the requests in order after a round trip
+time, 1 ms by default, and deliver the replies to the ofp_event brick
+as Datapath._recv_loop does.
+"""
+
+from ryu.lib import hub
+hub.patch()
+
+import collections
+import optparse
+import time
+
+from ryu.app.ofctl import api
+from ryu.app.ofctl import service
+from ryu.base import app_manager
+from ryu.controller import handler
+from ryu.controller import ofp_event
+from ryu.controller import ofp_handler
+from ryu.ofproto import ofproto_protocol
+from ryu.ofproto import ofproto_v1_3
+from ryu.tests.benchmark import util
+
+
+class FakeDatapath(ofproto_protocol.ProtocolDesc):
+    def __init__(self, brick, dpid, rtt):
+        super(FakeDatapath, self).__init__(ofproto_v1_3.OFP_VERSION)
+        self.brick = brick
+        self.id = dpid
+        self.xid = 0
+        self.rtt = rtt
+        self.barriers = 0
+        self._q = collections.deque()
+        self._ready = hub.Event()
+        self._thread = hub.spawn(self._reply_loop)
+
+    def set_xid(self, msg):
+        self.xid += 1
+        msg.set_xid(self.xid)
+
+    def send_msg(self, msg):
+        if msg.xid is None:
+            self.set_xid(msg)
+        msg.serialize()
+        self._q.append((time.time() + self.rtt, msg))
+        self._ready.set()
+
+    def _reply(self, msg):
+        parser = self.ofproto_parser
+        if isinstance(msg, parser.OFPBarrierRequest):
+            self.barriers += 1
+            return parser.OFPBarrierReply(self)
+        elif isinstance(msg, parser.OFPPortStatsRequest):
+            return parser.OFPPortStatsReply(self, body=[], flags=0)
+
+    def _reply_loop(self):
+        while True:
+            if not self._q:
+                self._ready.clear()
+                self._ready.wait()
+                continue
+            due, msg = self._q.popleft()
+            delay = due - time.time()
+            if delay > 0:
+                hub.sleep(delay)
+            reply = self._reply(msg)
+            reply.xid = msg.xid
+            ev = ofp_event.ofp_msg_to_ev(reply)
+            self.brick.send_event_to_observers(ev, handler.MAIN_DISPATCHER)
+
+    def close(self):
+        hub.kill(self._thread)
+
+
+class Client(app_manager.RyuApp):
+    pass
+
+
+def _request(dp, port_no=None):
+    parser = dp.ofproto_parser
+    if port_no is None:
+        port_no = dp.ofproto.OFPP_ANY
+    return parser.OFPPortStatsRequest(dp, 0, port_no)
+
+
+def one_at_a_time(app, dps, per_dp):
+    for dp in dps:
+        for port_no in range(1, per_dp + 1):
+            api.send_msg(app, _request(dp, port_no),
+                         reply_cls=dp.ofproto_parser.OFPPortStatsReply,
+                         reply_multi=True, timeout=10)
+
+
+def all_at_once(app, dps, per_dp):
+    futures = [api.send_msg_async(app, _request(dp, port_no),
+                                  reply_cls=dp.ofproto_parser.
+                                  OFPPortStatsReply,
+                                  reply_multi=True, timeout=10)
+               for dp in dps for port_no in range(1, per_dp + 1)]
+    return [f.result() for f in futures]
+
+
+def shared_barriers(app, dps, per_dp):
+    msgs = [_request(dp, port_no)
+            for dp in dps for port_no in range(1, per_dp + 1)]
+    futures = api.send_msgs_async(app, msgs,
+                                  reply_cls=dps[0].ofproto_parser.
+                                  OFPPortStatsReply,
+                                  reply_multi=True, timeout=10)
+    return [f.result() for f in futures]
+
+
+def main():
+    parser = optparse.OptionParser()
+    parser.add_option('-n', '--datapaths', type='int', default=1000,
+                      help='number of datapaths')
+    parser.add_option('-p', '--per-datapath', type='int', default=4,
+                      help='number of requests per datapath in a batch')
+    parser.add_option('-r', '--rtt', type='float', default=1,
+                      help='round trip time of the datapaths in ms')
+    options, _args = parser.parse_args()
+
+    app_mgr = app_manager.AppManager.get_instance()
+    brick = app_mgr._instantiate(None, ofp_handler.OFPHandler)
+    ofctl = app_mgr.instantiate(service.OfctlService)
+    ofctl.start()
+    client = app_mgr.instantiate(Client)
+
+    dps = []
+    for dpid in range(1, options.datapaths + 1):
+        dp = FakeDatapath(brick, dpid, options.rtt / 1000.0)
+        features = dp.ofproto_parser.OFPSwitchFeatures(dp)
+        ofctl._switch_features_handler(
+            ofp_event.EventOFPSwitchFeatures(features))
+        dps.append(dp)
+
+    for name, func, per_dp in [
+            ('send_msg, one at a time', one_at_a_time, 1),
+            ('send_msg_async, all at once', all_at_once, 1),
+            ('send_msg_async, %d per datapath' % options.per_datapath,
+             all_at_once, options.per_datapath),
+            ('send_msgs_async, %d per datapath' % options.per_datapath,
+             shared_barriers, options.per_datapath)]:
+        barriers = sum(dp.barriers for dp in dps)
+        _ret, elapsed = util.measure(func, client, dps, per_dp)
+        count = len(dps) * per_dp
+        util.report(name, count, elapsed, 'requests')
+        print '    %d barriers' % (sum(dp.barriers for dp in dps) - barriers)
+
+    for dp in dps:
+        dp.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+# Copyright (C) 2014 Nippon Telegraph and Telephone Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Collect the port stats of 500 fake switches through ofctl_rest and
+report the time taken
+
+- by a poller asking /stats/port/<dpid> for a switch after another,
+- by a single request to /stats/port, and
+- by several dashboards asking /stats/port at once, each asking the
+  switches, and sharing the replies with max_age, at first and again
+  within max_age.
+
+The fake switches reply after a round trip time, 5 ms by default, with
+the stats of 16 ports. The requests are made to the WSGI application
+directly, without HTTP.
+"""
+
+from ryu.lib import hub
+hub.patch()
+
+import optparse
+
+from webob.request import Request
+
+from ryu.app import ofctl_rest
+from ryu.app.wsgi import WSGIApplication
+from ryu.controller import dpset
+from ryu.controller import ofp_event
+from ryu.ofproto import ofproto_protocol
+from ryu.ofproto import ofproto_v1_3
+from ryu.tests.benchmark import util
+
+
+class FakeDatapath(ofproto_protocol.ProtocolDesc):
+    def __init__(self, app, dpid, nports, rtt):
+        super(FakeDatapath, self).__init__(ofproto_v1_3.OFP_VERSION)
+        self.app = app
+        self.id = dpid
+        self.xid = 0
+        self.rtt = rtt
+        self.requests = 0
+        parser = self.ofproto_parser
+        self.body = [parser.OFPPortStats(*([port_no] + [12345] * 14))
+                     for port_no in range(1, nports + 1)]
+
+    def set_xid(self, msg):
+        self.xid += 1
+        msg.set_xid(self.xid)
+
+    def send_msg(self, msg):
+        self.requests += 1
+        msg.serialize()
+        reply = self.ofproto_parser.OFPPortStatsReply(self, body=self.body,
+                                                      flags=0)
+        reply.xid = msg.xid
+        hub.call_later(self.rtt, self.app.stats_reply_handler,
+                       ofp_event.ofp_msg_to_ev(reply))
+
+
+def get(wsgi, path):
+    res = Request.blank(path).get_response(wsgi)
+    assert res.status_int == 200
+    return res.body
+
+
+def one_at_a_time(wsgi, dpids):
+    for dpid in dpids:
+        get(wsgi, '/stats/port/%d' % dpid)
+
+
+def dashboards(wsgi, count, path):
+    threads = [hub.spawn(get, wsgi, path) for _i in range(count)]
+    hub.joinall(threads)
+
+
+def main():
+    parser = optparse.OptionParser()
+    parser.add_option('-n', '--switches', type='int', default=500,
+                      help='number of switches')
+    parser.add_option('-p', '--ports', type='int', default=16,
+                      help='number of ports per switch')
+    parser.add_option('-r', '--rtt', type='float', default=5,
+                      help='round trip time of the switches in ms')
+    parser.add_option('-d', '--dashboards', type='int', default=10,
+                      help='number of dashboards asking at once')
+    options, _args = parser.parse_args()
+
+    wsgi = WSGIApplication()
+    dps = dpset.DPSet()
+    app = ofctl_rest.RestStatsApi(dpset=dps, wsgi=wsgi)
+    for dpid in range(1, options.switches + 1):
+        dps.dps[dpid] = FakeDatapath(app, dpid, options.ports,
+                                     options.rtt / 1000.0)
+    dpids = sorted(dps.dps)
+
+    for name, func, args in [
+            ('/stats/port/<dpid>, one at a time', one_at_a_time, [dpids]),
+            ('/stats/port', get, ['/stats/port']),
+            ('/stats/port, %d dashboards' % options.dashboards,
+             dashboards, [options.dashboards, '/stats/port']),
+            ('/stats/port?max_age=1, %d dashboards' % options.dashboards,
+             dashboards, [options.dashboards, '/stats/port?max_age=1']),
+            ('/stats/port?max_age=1, %d dashboards again' %
+             options.dashboards,
+             dashboards, [options.dashboards, '/stats/port?max_age=1'])]:
+        requests = sum(dp.requests for dp in dps.dps.values())
+        _ret, elapsed = util.measure(func, wsgi, *args)
+        requests = sum(dp.requests for dp in dps.dps.values()) - requests
+        print '%s: %.3f sec, %d requests to the switches' % (
+            name, elapsed, requests)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+# Copyright (C) 2014 Nippon Telegraph and Telephone Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Compare eager and lazy parsing of the PacketIn, FlowRemoved, PortStatus
+and multipart/stats reply captures under ryu/tests/packet_data for an
+application which only reads msg.xid and msg.data.
+"""
+
+import fnmatch
+import optparse
+
+from ryu.ofproto import ofproto_parser
+from ryu.ofproto import ofproto_protocol
+from ryu.tests.benchmark import util
+
+
+PATTERNS = ['*packet_in*', '*flow_removed*', '*port_status*',
+            '*stats_reply*', '*port_desc_reply*']
+
+
+def _captures():
+    for ver in ['of10', 'of12', 'of13', 'of14']:
+        for name in util.packet_data_files(ver):
+            if any(fnmatch.fnmatch(name, p) for p in PATTERNS):
+                yield ver, name, util.packet_data(ver, name)
+
+
+def _parse(buf, lazy_parse, count):
+    (version, msg_type, msg_len, xid) = ofproto_parser.header(buf)
+    dp = ofproto_protocol.ProtocolDesc(version=version)
+    dp.lazy_parse = lazy_parse
+    for _i in xrange(count):
+        msg = ofproto_parser.msg(dp, version, msg_type, msg_len, xid, buf)
+        msg.xid
+        getattr(msg, 'data', None)
+
+
+def main():
+    parser = optparse.OptionParser()
+    parser.add_option('-n', '--count', type='int', default=20000,
+                      help='number of parses per capture')
+    options, _args = parser.parse_args()
+
+    total = {False: 0.0, True: 0.0}
+    for ver, name, buf in _captures():
+        for lazy_parse in (False, True):
+            _ret, elapsed = util.measure(_parse, buf, lazy_parse,
+                                         options.count)
+            total[lazy_parse] += elapsed
+            util.report('%s %s %s' % (ver, name[:-len('.packet')],
+                                      'lazy' if lazy_parse else 'eager'),
+                        options.count, elapsed, 'msgs')
+    print 'total eager %.3f sec lazy %.3f sec' % (total[False], total[True])
+
+
+if __name__ == '__main__':
+    main()
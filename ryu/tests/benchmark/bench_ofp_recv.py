@@ -0,0 +1,121 @@
+# Copyright (C) 2014 Nippon Telegraph and Telephone Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Replay a stream of mixed OpenFlow 1.3 switch-to-controller messages
+through a loopback socket pair into Datapath._recv_loop and report
+messages/sec.
+
+The "legacy" loop reproduces the former exact-length recv() and
+bytearray reslicing for comparison.
+"""
+
+from ryu.lib import hub
+hub.patch()
+
+import optparse
+
+from ryu.base import app_manager
+from ryu.controller import controller
+from ryu.controller import ofp_event
+from ryu.ofproto import ofproto_common
+from ryu.ofproto import ofproto_parser
+from ryu.ofproto import ofproto_v1_3
+from ryu.tests.benchmark import util
+
+
+CAPTURES = [
+    '4-4-ofp_packet_in.packet',
+    '4-59-ofp_packet_in.packet',
+    '4-40-ofp_flow_removed.packet',
+    '4-39-ofp_port_status.packet',
+    '4-13-ofp_echo_request.packet',
+    '4-18-ofp_barrier_reply.packet',
+    '4-12-ofp_flow_stats_reply.packet',
+    '4-30-ofp_port_stats_reply.packet',
+]
+
+
+class _Brick(object):
+    def send_event_to_observers(self, ev, state=None):
+        pass
+
+    def get_handlers(self, ev, state=None):
+        return []
+
+
+def _legacy_recv_loop(dp):
+    buf = bytearray()
+    required_len = ofproto_common.OFP_HEADER_SIZE
+    while dp.is_active:
+        ret = dp.socket.recv(required_len)
+        if len(ret) == 0:
+            dp.is_active = False
+            break
+        buf += ret
+        while len(buf) >= required_len:
+            (version, msg_type, msg_len, xid) = ofproto_parser.header(buf)
+            required_len = msg_len
+            if len(buf) < required_len:
+                break
+            msg = ofproto_parser.msg(dp, version, msg_type, msg_len, xid,
+                                     buf)
+            if msg:
+                ev = ofp_event.ofp_msg_to_ev(msg)
+                dp.ofp_brick.send_event_to_observers(ev, dp.state)
+            buf = buf[required_len:]
+            required_len = ofproto_common.OFP_HEADER_SIZE
+
+
+def _stream(count):
+    msgs = [util.packet_data('of13', name) for name in CAPTURES]
+    return ''.join(msgs[i % len(msgs)] for i in xrange(count))
+
+
+def _run(stream, recv_loop):
+    app_manager.SERVICE_BRICKS['ofp_event'] = _Brick()
+    rsock, wsock = util.tcp_socketpair()
+
+    def _writer():
+        wsock.sendall(stream)
+        wsock.close()
+
+    dp = controller.Datapath(rsock, ('127.0.0.1', 0))
+    dp.set_version(ofproto_v1_3.OFP_VERSION)
+    writer = hub.spawn(_writer)
+    _ret, elapsed = util.measure(recv_loop, dp)
+    hub.joinall([writer])
+    rsock.close()
+    return elapsed
+
+
+def main():
+    parser = optparse.OptionParser()
+    parser.add_option('-n', '--count', type='int', default=100000,
+                      help='number of messages to replay')
+    parser.add_option('-b', '--buf-size', type='int', default=64 * 1024,
+                      help='ofp-recv-buf-size for the new loop')
+    options, _args = parser.parse_args()
+
+    controller.CONF.set_override('ofp_recv_buf_size', options.buf_size)
+    stream = _stream(options.count)
+    util.report('legacy recv loop', options.count,
+                _run(stream, _legacy_recv_loop), 'msgs')
+    util.report('chunked recv loop', options.count,
+                _run(stream, controller.Datapath._recv_loop), 'msgs')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+# Copyright (C) 2014 Nippon Telegraph and Telephone Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Install flows on a Datapath over a loopback socket pair and report
+the flow programming rate.
+
+The "legacy" datapath reproduces the former 16 entry message queue
+with one sendall() per message for comparison.
+"""
+
+from ryu.lib import hub
+hub.patch()
+
+import optparse
+
+from ryu.base import app_manager
+from ryu.controller import controller
+from ryu.ofproto import ofproto_v1_3
+from ryu.tests.benchmark import util
+
+
+class _Brick(object):
+    def send_event_to_observers(self, ev, state=None):
+        pass
+
+
+class _LegacyDatapath(controller.Datapath):
+    def __init__(self, *args, **kwargs):
+        super(_LegacyDatapath, self).__init__(*args, **kwargs)
+        self.send_q = hub.Queue(16)
+
+    def _send_loop(self):
+        while self.is_active:
+            buf = self.send_q.get()
+            self.socket.sendall(buf)
+            self.send_flushes += 1
+
+    def send(self, buf):
+        self.send_q.put(buf)
+
+
+def _flow_mod(dp, i):
+    parser = dp.ofproto_parser
+    match = parser.OFPMatch(eth_type=0x0800, ipv4_dst=(i & 0xffffffff))
+    actions = [parser.OFPActionOutput(1)]
+    inst = [parser.OFPInstructionActions(
+        dp.ofproto.OFPIT_APPLY_ACTIONS, actions)]
+    return parser.OFPFlowMod(dp, priority=1, match=match, instructions=inst)
+
+
+def _run(dp_cls, count):
+    app_manager.SERVICE_BRICKS['ofp_event'] = _Brick()
+    rsock, wsock = util.tcp_socketpair()
+    received = [0]
+
+    def _reader():
+        while True:
+            ret = rsock.recv(64 * 1024)
+            if not ret:
+                break
+            received[0] += len(ret)
+
+    dp = dp_cls(wsock, ('127.0.0.1', 0))
+    dp.set_version(ofproto_v1_3.OFP_VERSION)
+    msgs = [_flow_mod(dp, i) for i in xrange(count)]
+    for msg in msgs:
+        msg.serialize()
+    total = sum(len(msg.buf) for msg in msgs)
+
+    reader = hub.spawn(_reader)
+    sender = hub.spawn(dp._send_loop)
+
+    def _program():
+        for msg in msgs:
+            dp.send(msg.buf)
+        while received[0] < total:
+            hub.sleep(0.001)
+    _ret, elapsed = util.measure(_program)
+
+    dp.is_active = False
+    hub.kill(sender)
+    wsock.close()
+    hub.joinall([sender, reader])
+    rsock.close()
+    return elapsed, dp
+
+
+def main():
+    parser = optparse.OptionParser()
+    parser.add_option('-n', '--count', type='int', default=50000,
+                      help='number of flow mods to send')
+    options, _args = parser.parse_args()
+
+    for name, dp_cls in [('legacy send path', _LegacyDatapath),
+                         ('batched send path', controller.Datapath)]:
+        elapsed, dp = _run(dp_cls, options.count)
+        util.report(name, options.count, elapsed, 'msgs')
+        print '    flushes %d stalls %d' % (dp.send_flushes, dp.send_stalls)
+
+
+if __name__ == '__main__':
+    main()
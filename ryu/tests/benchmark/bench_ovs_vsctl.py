@@ -0,0 +1,95 @@
+# Copyright (C) 2014 Nippon Telegraph and Telephone Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Run ovs-vsctl commands through VSCtl against a bridge of 5k ports
+served by the dummy ovsdb-server of the unit tests, and report the
+latency per command.
+
+Commands are run on the database replica VSCtl keeps per remote, and
+with the replica closed before every command, which fetches the whole
+database again for each of them as VSCtl did before replicas were
+kept. The dummy server runs in this process, its share of the time is
+included.
+"""
+
+from ryu.lib import hub
+hub.patch()
+
+import optparse
+
+from ryu.lib.ovs import vsctl
+from ryu.tests.benchmark import util
+from ryu.tests.unit.lib.ovs.dummy_ovsdb import DummyOvsdbServer
+
+
+COMMANDS = ['list-ports', 'find', 'list-ifaces-verbose', 'add-port',
+            'del-port']
+
+
+def _args(command, i):
+    return {
+        'list-ports': ('br0',),
+        'find': ('Interface', 'name=p%d' % i),
+        'list-ifaces-verbose': ('0000000000000001', 'p%d' % i),
+        'add-port': ('br0', 'new%d' % i),
+        'del-port': ('br0', 'new%d' % i),
+    }[command]
+
+
+def run(remote, count, persistent):
+    vsctl.close_replica(remote)
+    ctl = vsctl.VSCtl(remote)
+    ctl.run_command([vsctl.VSCtlCommand('init')])
+    for command in COMMANDS:
+        elapsed = 0
+        for i in xrange(count):
+            if not persistent:
+                vsctl.close_replica(remote)
+            commands = [vsctl.VSCtlCommand(command, _args(command, i))]
+            _ret, secs = util.measure(ctl.run_command, commands)
+            elapsed += secs
+        name = '%s, %s' % (command, 'replica' if persistent
+                           else 'fetch per command')
+        util.report(name, count, elapsed, 'commands')
+
+
+def main():
+    parser = optparse.OptionParser()
+    parser.add_option('-p', '--ports', type='int', default=5000,
+                      help='number of ports on the bridge')
+    parser.add_option('-n', '--count', type='int', default=100,
+                      help='number of commands of each kind')
+    parser.add_option('--fetch-count', type='int', default=2,
+                      help='number of commands of each kind run with a '
+                      'fetch of the database per command')
+    options, _rest = parser.parse_args()
+
+    server = DummyOvsdbServer()
+    server.add_bridge('br0', ['p%d' % i for i in xrange(options.ports)])
+    server.transact([{'op': 'update', 'table': 'Bridge',
+                      'where': [['name', '==', 'br0']],
+                      'row': {'datapath_id': '0000000000000001'}}])
+    remote = server.start()
+    try:
+        run(remote, options.count, True)
+        run(remote, options.fetch_count, False)
+    finally:
+        vsctl.close_replica(remote)
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
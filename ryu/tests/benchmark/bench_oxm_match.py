@@ -0,0 +1,130 @@
+# Copyright (C) 2014 Nippon Telegraph and Telephone Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Compare the old two-pass OFPMatch.parser (OFPMatchField objects plus
+oxm_parse/oxm_to_user with byte-by-byte integer conversion) with the
+single-pass decoder, over the matches found in the PacketIn, FlowRemoved
+and flow stats reply captures under ryu/tests/packet_data.
+"""
+
+import fnmatch
+import optparse
+import struct
+
+from ryu.ofproto import ofproto_parser
+from ryu.ofproto import ofproto_protocol
+from ryu.ofproto import oxm_fields
+from ryu.tests.benchmark import util
+
+
+PATTERNS = ['*packet_in*', '*flow_removed*', '*flow_stats_reply*']
+
+
+def _matches(msg):
+    if hasattr(msg, 'match'):
+        yield msg.match
+    for stats in getattr(msg, 'body', None) or []:
+        if hasattr(stats, 'match'):
+            yield stats.match
+
+
+def _corpus():
+    for ver in ['of12', 'of13', 'of14']:
+        for name in util.packet_data_files(ver):
+            if not any(fnmatch.fnmatch(name, p) for p in PATTERNS):
+                continue
+            buf = util.packet_data(ver, name)
+            (version, msg_type, msg_len, xid) = ofproto_parser.header(buf)
+            dp = ofproto_protocol.ProtocolDesc(version=version)
+            msg = ofproto_parser.msg(dp, version, msg_type, msg_len, xid, buf)
+            for match in _matches(msg):
+                wire = bytearray()
+                match.serialize(wire, 0)
+                yield ver, dp, str(wire)
+
+
+def _legacy_to_user(ofp, n, v, m):
+    t = ofp._oxm_field_desc(n).type
+
+    def conv(bin):
+        if not isinstance(t, oxm_fields.IntDescr):
+            return t.to_user(bin)
+        i = 0
+        for x in xrange(t.size):
+            c = bin[:1]
+            i = i * 256 + ord(c)
+            bin = bin[1:]
+        return i
+    if m is None:
+        return conv(v)
+    return (conv(v), conv(m))
+
+
+def _legacy_parser(dp, buf, offset):
+    ofp = dp.ofproto
+    ofpp = dp.ofproto_parser
+    match = ofpp.OFPMatch()
+    type_, length = struct.unpack_from('!HH', buf, offset)
+    match.type = type_
+    match.length = length
+    offset += 4
+    length -= 4
+    if hasattr(ofpp.OFPMatch, 'parser_old'):
+        ofpp.OFPMatch.parser_old(match, buf, offset, length)
+    fields = []
+    while length > 0:
+        n, value, mask, field_len = ofp.oxm_parse(buf, offset)
+        k = ofp._oxm_field_desc(n).name
+        fields.append((k, _legacy_to_user(ofp, n, value, mask)))
+        offset += field_len
+        length -= field_len
+    match._fields2 = fields
+    return match
+
+
+def _parse(parser, corpus, count):
+    for _i in xrange(count):
+        for _ver, dp, buf in corpus:
+            parser(dp, buf, 0)
+
+
+def main():
+    parser = optparse.OptionParser()
+    parser.add_option('-n', '--count', type='int', default=20000,
+                      help='number of passes over the corpus')
+    options, _args = parser.parse_args()
+
+    corpus = list(_corpus())
+    for _ver, dp, buf in corpus:
+        assert (_legacy_parser(dp, buf, 0)._fields2 ==
+                dp.ofproto_parser.OFPMatch.parser(buf, 0)._fields2)
+
+    parsers = [
+        ('legacy', _legacy_parser),
+        ('single-pass',
+         lambda dp, buf, offset: dp.ofproto_parser.OFPMatch.parser(buf,
+                                                                   offset)),
+    ]
+    for ver in sorted(set(v for v, _dp, _buf in corpus)):
+        sub = [c for c in corpus if c[0] == ver]
+        for label, func in parsers:
+            _ret, elapsed = util.measure(_parse, func, sub, options.count)
+            util.report('%s %d matches %s' % (ver, len(sub), label),
+                        options.count * len(sub), elapsed, 'matches')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+# Copyright (C) 2014 Nippon Telegraph and Telephone Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Decode frames typical of PACKET_IN payloads with Packet and report the
+rates, decoding headers in place as Packet does, and copying the rest
+of the frame at each header as Packet did before.
+"""
+
+import optparse
+import struct
+
+from ryu.lib.packet import ethernet
+from ryu.lib.packet import ipv4
+from ryu.lib.packet import ipv6
+from ryu.lib.packet import mpls
+from ryu.lib.packet import packet
+from ryu.lib.packet import tcp
+from ryu.lib.packet import udp
+from ryu.lib.packet import vlan
+from ryu.ofproto import ether
+from ryu.ofproto import inet
+from ryu.tests.benchmark import util
+
+
+SRC_MAC = '00:00:00:00:00:01'
+DST_MAC = '00:00:00:00:00:02'
+
+
+def _frames():
+    yield 'tcp syn', [
+        ethernet.ethernet(DST_MAC, SRC_MAC, ether.ETH_TYPE_IP),
+        ipv4.ipv4(src='10.0.0.1', dst='10.0.0.2', proto=inet.IPPROTO_TCP),
+        tcp.tcp(1024, 80, bits=0x02,
+                option='\x02\x04\x05\xb4\x01\x01\x04\x02')]
+    yield 'vlan udp 1400', [
+        ethernet.ethernet(DST_MAC, SRC_MAC, ether.ETH_TYPE_8021Q),
+        vlan.vlan(vid=10, ethertype=ether.ETH_TYPE_IP),
+        ipv4.ipv4(src='10.0.0.1', dst='10.0.0.2', proto=inet.IPPROTO_UDP),
+        udp.udp(1024, 4789), 'x' * 1400]
+    yield 'ipv6 tcp 1400', [
+        ethernet.ethernet(DST_MAC, SRC_MAC, ether.ETH_TYPE_IPV6),
+        ipv6.ipv6(src='2001:db8::1', dst='2001:db8::2',
+                  nxt=inet.IPPROTO_TCP),
+        tcp.tcp(1024, 80, bits=0x10), 'x' * 1400]
+    yield 'qinq mpls udp 9000', [
+        ethernet.ethernet(DST_MAC, SRC_MAC, ether.ETH_TYPE_8021Q),
+        vlan.vlan(vid=10, ethertype=ether.ETH_TYPE_8021Q),
+        vlan.vlan(vid=20, ethertype=ether.ETH_TYPE_MPLS),
+        mpls.mpls(label=100, bsb=0),
+        mpls.mpls(label=200, bsb=1),
+        ipv4.ipv4(src='10.0.0.1', dst='10.0.0.2', proto=inet.IPPROTO_UDP),
+        udp.udp(1024, 4789), 'x' * 9000]
+
+
+class CopyingPacket(packet.Packet):
+    # Packet as it was, with the rest of the frame copied at each header.
+    def _parser(self, cls):
+        rest_data = self.data
+        while cls:
+            try:
+                proto, cls, rest_data = cls.parser(rest_data)
+            except struct.error:
+                break
+            if proto:
+                self.protocols.append(proto)
+        if rest_data:
+            self.protocols.append(rest_data)
+
+
+def decode(cls, data, count):
+    for _i in xrange(count):
+        cls(data)
+
+
+def encode(protocols):
+    pkt = packet.Packet(protocols=protocols)
+    pkt.serialize()
+    return str(pkt.data)
+
+
+def main():
+    parser = optparse.OptionParser()
+    parser.add_option('-n', '--count', type='int', default=20000,
+                      help='number of frames of each kind')
+    options, _args = parser.parse_args()
+
+    count = options.count
+    for name, protocols in _frames():
+        data = encode(protocols)
+        assert str(packet.Packet(data)) == str(CopyingPacket(data))
+
+        _ret, elapsed = util.measure(decode, packet.Packet, data, count)
+        util.report('%s, in place' % name, count, elapsed, 'frames')
+        _ret, elapsed = util.measure(decode, CopyingPacket, data, count)
+        util.report('%s, copying' % name, count, elapsed, 'frames')
+
+
+if __name__ == '__main__':
+    main()
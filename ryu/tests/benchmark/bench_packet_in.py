@@ -0,0 +1,110 @@
+# Copyright (C) 2014 Nippon Telegraph and Telephone Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Deliver PACKET_IN events to three handlers modeled on simple_switch_13,
+the LLDP discovery of topology.switches and the BFD filter of bfdlib,
+and report the rates with each handler decoding the payload with
+Packet as they did before, and with the handlers sharing the key and
+the packet cached on the event.
+"""
+
+import optparse
+
+from ryu.controller import ofp_event
+from ryu.lib.packet import ethernet
+from ryu.lib.packet import lldp
+from ryu.lib.packet import packet
+from ryu.lib.packet import udp
+from ryu.ofproto import ether
+from ryu.ofproto import inet
+from ryu.ofproto import ofproto_protocol
+from ryu.ofproto import ofproto_v1_3
+from ryu.tests.benchmark import bench_packet
+from ryu.tests.benchmark import util
+
+
+BFD_CONTROL_UDP_PORT = 3784
+
+
+def switch_decoding(ev, mac_to_port):
+    pkt = packet.Packet(ev.msg.data)
+    eth = pkt.get_protocols(ethernet.ethernet)[0]
+    mac_to_port[eth.src] = 1
+    return mac_to_port.get(eth.dst)
+
+
+def switch_sharing(ev, mac_to_port):
+    key = ev.key
+    mac_to_port[key.eth_src] = 1
+    return mac_to_port.get(key.eth_dst)
+
+
+def lldp_decoding(ev):
+    pkt = packet.Packet(ev.msg.data)
+    return pkt.get_protocol(lldp.lldp) is not None
+
+
+def lldp_sharing(ev):
+    key = ev.key
+    if key.eth_type != ether.ETH_TYPE_LLDP or key.vlan_vid is not None:
+        return False
+    return ev.packet.get_protocol(lldp.lldp) is not None
+
+
+def bfd_decoding(ev):
+    pkt = packet.Packet(ev.msg.data)
+    udp_hdr = pkt.get_protocol(udp.udp)
+    return udp_hdr is not None and udp_hdr.dst_port == BFD_CONTROL_UDP_PORT
+
+
+def bfd_sharing(ev):
+    key = ev.key
+    return (key.eth_type == ether.ETH_TYPE_IP and
+            key.ip_proto == inet.IPPROTO_UDP and
+            key.dst_port == BFD_CONTROL_UDP_PORT)
+
+
+def deliver(msgs, handlers):
+    mac_to_port = {}
+    switch, lldp, bfd = handlers
+    for msg in msgs:
+        ev = ofp_event.EventOFPPacketIn(msg)
+        switch(ev, mac_to_port)
+        lldp(ev)
+        bfd(ev)
+
+
+def main():
+    parser = optparse.OptionParser()
+    parser.add_option('-n', '--count', type='int', default=20000,
+                      help='number of events of each kind')
+    options, _args = parser.parse_args()
+
+    dp = ofproto_protocol.ProtocolDesc(ofproto_v1_3.OFP_VERSION)
+    count = options.count
+    for name, protocols in bench_packet._frames():
+        data = bench_packet.encode(protocols)
+        msgs = [dp.ofproto_parser.OFPPacketIn(dp, data=data)] * count
+        for how, handlers in [
+                ('decoding', (switch_decoding, lldp_decoding,
+                              bfd_decoding)),
+                ('sharing', (switch_sharing, lldp_sharing, bfd_sharing))]:
+            _ret, elapsed = util.measure(deliver, msgs, handlers)
+            util.report('%s, %s' % (name, how), count, elapsed, 'events')
+
+
+if __name__ == '__main__':
+    main()
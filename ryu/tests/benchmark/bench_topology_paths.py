@@ -0,0 +1,152 @@
+# Copyright (C) 2014 Nippon Telegraph and Telephone Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Query a shortest path and the ECMP next hops between random switches
+of a k-ary fat-tree, k = 32 by default for 1280 switches, and report
+the rates of
+
+- a routing app building a graph from the link list and searching it
+  for every query, as apps did with topology.api.get_link(),
+- a search of the TopologyGraph of the switches app for every query,
+- the cached TopologyGraph of the switches app, at first and once every
+  source has been asked for, and after a link failure,
+
+and the rate all the equal cost paths are enumerated at.
+"""
+
+import optparse
+import random
+
+from ryu.topology import switches
+from ryu.tests.benchmark import util
+
+
+def fat_tree(k):
+    # Returns the list of links as (src, src_port, dst, dst_port).
+    half = k / 2
+    ncore = half * half
+    links = []
+
+    def link(a, a_port, b, b_port):
+        links.append((a, a_port, b, b_port))
+        links.append((b, b_port, a, a_port))
+
+    for pod in range(k):
+        base = ncore + pod * k + 1
+        aggs = range(base, base + half)
+        edges = range(base + half, base + k)
+        for i, agg in enumerate(aggs):
+            for j in range(half):
+                link(agg, half + j + 1, i * half + j + 1, pod + 1)
+            for j, edge in enumerate(edges):
+                link(agg, j + 1, edge, i + 1)
+    return ncore + k * k, links
+
+
+def rebuilding_path(links, src, dst):
+    graph = {}
+    for link in links:
+        graph.setdefault(link[0], set()).add(link[2])
+    preds = {src: None}
+    frontier = [src]
+    while frontier and dst not in preds:
+        next_frontier = []
+        for u in frontier:
+            for v in graph[u]:
+                if v not in preds:
+                    preds[v] = u
+                    next_frontier.append(v)
+        frontier = next_frontier
+    path = []
+    while dst is not None:
+        path.append(dst)
+        dst = preds[dst]
+    return path[::-1]
+
+
+def query(graph, pairs, uncached=False):
+    for src, dst in pairs:
+        if uncached:
+            graph._trees.clear()
+        graph.shortest_path(src, dst)
+        graph.first_hops(src, dst)
+
+
+def enumerate_paths(graph, pairs):
+    return sum(len(graph.ecmp_paths(src, dst)) for src, dst in pairs)
+
+
+def main():
+    parser = optparse.OptionParser()
+    parser.add_option('-k', type='int', default=32,
+                      help='number of ports of the fat-tree switches')
+    parser.add_option('-n', '--count', type='int', default=100000,
+                      help='number of queries')
+    options, _args = parser.parse_args()
+
+    nswitches, links = fat_tree(options.k)
+    print '%d switches, %d links' % (nswitches, len(links))
+    graph = switches.TopologyGraph()
+    _ret, elapsed = util.measure(
+        lambda: [graph.add_link(*link) for link in links])
+    util.report('graph built', len(links), elapsed, 'links')
+
+    rand = random.Random(0)
+    dpids = range(1, nswitches + 1)
+    count = options.count
+    pairs = [(rand.choice(dpids), rand.choice(dpids)) for _i in xrange(count)]
+
+    n = max(count / 1000, 10)
+    _ret, elapsed = util.measure(
+        lambda: [rebuilding_path(links, src, dst) for src, dst in pairs[:n]])
+    util.report('rebuilding graph per query', n, elapsed, 'queries')
+    _ret, elapsed = util.measure(query, graph, pairs[:n], True)
+    util.report('searching per query', n, elapsed, 'queries')
+
+    _ret, elapsed = util.measure(query, graph, pairs)
+    util.report('cached, from cold', count, elapsed, 'queries')
+    _ret, elapsed = util.measure(graph.all_shortest_paths)
+    util.report('all pairs', nswitches, elapsed, 'sources')
+    _ret, elapsed = util.measure(query, graph, pairs)
+    util.report('cached, warm', count, elapsed, 'queries')
+    npaths, elapsed = util.measure(enumerate_paths, graph, pairs[:n * 10])
+    util.report('ecmp paths', npaths, elapsed, 'paths')
+
+    # an edge to aggregation link going down and coming back
+    for name, change in [('link down', graph.del_link),
+                         ('link up', graph.add_link)]:
+        trees = len(graph._trees)
+        change(*links[-2])
+        change(*links[-1])
+        print '%s: %d of %d cached sources dropped' % (
+            name, trees - len(graph._trees), trees)
+        _ret, elapsed = util.measure(query, graph, pairs)
+        util.report('cached, after %s' % name, count, elapsed, 'queries')
+
+    # a link between two pods added and removed leaves the rest of the
+    # cache
+    a, b = nswitches - 1, nswitches - options.k - 1
+    for name, change in [('cross-pod link added', graph.add_link),
+                         ('cross-pod link removed', graph.del_link)]:
+        trees = len(graph._trees)
+        change(a, options.k + 1, b, options.k + 1)
+        change(b, options.k + 1, a, options.k + 1)
+        print '%s: %d of %d cached sources dropped' % (
+            name, trees - len(graph._trees), trees)
+
+
+if __name__ == '__main__':
+    main()
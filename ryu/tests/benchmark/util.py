@@ -0,0 +1,88 @@
+# Copyright (C) 2014 Nippon Telegraph and Telephone Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Helpers shared by the micro benchmarks in this directory.
+
+Each benchmark is a standalone script, e.g.::
+
+    % python -m ryu.tests.benchmark.bench_ofp_recv
+"""
+
+import os
+import resource
+import socket
+import time
+
+
+PACKET_DATA_DIR = os.path.join(os.path.dirname(__file__), '..',
+                               'packet_data')
+
+
+def packet_data(*path):
+    """Return the contents of a file under ryu/tests/packet_data."""
+    with open(os.path.join(PACKET_DATA_DIR, *path), 'rb') as f:
+        return f.read()
+
+
+def packet_data_files(*path):
+    """Return sorted file names of a directory under packet_data."""
+    return sorted(os.listdir(os.path.join(PACKET_DATA_DIR, *path)))
+
+
+def tcp_socketpair():
+    """Return a connected pair of loopback TCP sockets.
+
+    socket.socketpair() can't be used where the code under test sets
+    TCP options such as TCP_NODELAY.
+    """
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(('127.0.0.1', 0))
+    server.listen(1)
+    client = socket.create_connection(server.getsockname())
+    accepted, _addr = server.accept()
+    server.close()
+    return accepted, client
+
+
+def measure(func, *args, **kwargs):
+    """Call func and return a tuple of (result, elapsed seconds)."""
+    start = time.time()
+    ret = func(*args, **kwargs)
+    return ret, time.time() - start
+
+
+def max_rss_kb():
+    """Peak resident set size of this process in KiB."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def rss_kb():
+    """Current resident set size of this process in KiB.
+
+    Falls back to the peak where /proc is not available.
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+    except IOError:
+        return max_rss_kb()
+    return pages * resource.getpagesize() / 1024
+
+
+def report(name, count, elapsed, unit='ops'):
+    rate = count / elapsed if elapsed else float('inf')
+    print '%-40s %10d %s in %8.3f sec  %12.1f %s/sec' % (
+        name, count, unit, elapsed, rate, unit)
@@ -0,0 +1,134 @@
+# Copyright (C) 2014 Nippon Telegraph and Telephone Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import unittest
+from nose.tools import eq_, ok_
+from webob.request import Request
+
+from ryu.app import ofctl_rest
+from ryu.app.wsgi import WSGIApplication
+from ryu.controller import dpset
+from ryu.controller import ofp_event
+from ryu.lib import hub
+from ryu.ofproto import ofproto_protocol
+from ryu.ofproto import ofproto_v1_0
+from ryu.ofproto import ofproto_v1_3
+
+
+class _Datapath(ofproto_protocol.ProtocolDesc):
+    def __init__(self, app, dpid, version=ofproto_v1_3.OFP_VERSION,
+                 delay=0):
+        super(_Datapath, self).__init__(version)
+        self.app = app
+        self.id = dpid
+        self.xid = 0
+        self.delay = delay
+        self.requests = 0
+
+    def set_xid(self, msg):
+        self.xid += 1
+        msg.set_xid(self.xid)
+
+    def send_msg(self, msg):
+        self.requests += 1
+        parser = self.ofproto_parser
+        if isinstance(msg, parser.OFPPortStatsRequest):
+            stats = parser.OFPPortStats(*([self.id] + [0] * 14))
+            reply = parser.OFPPortStatsReply(self, body=[stats], flags=0)
+        else:
+            reply = parser.OFPGroupStatsReply(self, body=[], flags=0)
+        reply.xid = msg.xid
+        hub.spawn_after(self.delay, self.app.stats_reply_handler,
+                        ofp_event.ofp_msg_to_ev(reply))
+
+
+class Test_ofctl_rest(unittest.TestCase):
+    """ Test case for the stats of all switches of ofctl_rest
+    """
+
+    def setUp(self):
+        self.wsgi = WSGIApplication()
+        self.dpset = dpset.DPSet()
+        self.app = ofctl_rest.RestStatsApi(dpset=self.dpset, wsgi=self.wsgi)
+        for dpid in range(1, 4):
+            self.dpset.dps[dpid] = _Datapath(self.app, dpid,
+                                             delay=(4 - dpid) * 0.01)
+
+    def _get(self, path):
+        res = Request.blank(path).get_response(self.wsgi)
+        eq_(res.status_int, 200)
+        eq_(res.content_type, 'application/json')
+        return res
+
+    def test_port_stats(self):
+        res = self._get('/stats/port')
+        chunks = list(res.app_iter)
+        # streamed in the order the switches reply
+        eq_([json.loads('{%s}' % c.lstrip(', ')).keys()
+             for c in chunks[1:-1]], [['3'], ['2'], ['1']])
+        stats = json.loads(''.join(chunks))
+        eq_(sorted(stats.keys()), ['1', '2', '3'])
+        eq_([s['port_no'] for s in stats['2']], [2])
+
+    def test_unsupported_version(self):
+        dp = _Datapath(self.app, 4, ofproto_v1_0.OFP_VERSION)
+        self.dpset.dps[4] = dp
+        stats = json.loads(self._get('/stats/group').body)
+        eq_(stats, {'1': [], '2': [], '3': []})
+        eq_(dp.requests, 0)
+
+    def test_max_age(self):
+        json.loads(self._get('/stats/port?max_age=10').body)
+        stats = json.loads(self._get('/stats/port?max_age=10').body)
+        eq_(sorted(stats.keys()), ['1', '2', '3'])
+        eq_([dp.requests for dp in self.dpset.dps.values()], [1, 1, 1])
+        json.loads(self._get('/stats/port').body)
+        eq_([dp.requests for dp in self.dpset.dps.values()], [2, 2, 2])
+
+    def test_max_age_in_flight(self):
+        bodies = []
+
+        def get():
+            bodies.append(self._get('/stats/port?max_age=10').body)
+
+        hub.joinall([hub.spawn(get) for _i in range(5)])
+        eq_(len(bodies), 5)
+        for body in bodies:
+            eq_(sorted(json.loads(body).keys()), ['1', '2', '3'])
+        eq_([dp.requests for dp in self.dpset.dps.values()], [1, 1, 1])
+
+    def test_max_age_dead(self):
+        json.loads(self._get('/stats/port?max_age=10').body)
+        dp = self.dpset.dps[2]
+        self.app.state_change_handler(ofp_event.EventOFPStateChange(dp))
+        eq_(self.app.data['cache'].peek((2, 'port'), 10), None)
+        json.loads(self._get('/stats/port?max_age=10').body)
+        eq_([dp.requests for dp in self.dpset.dps.values()], [1, 2, 1])
+
+    def test_max_age_dead_in_flight(self):
+        # the stats being got when the switch dies are not kept
+        dp = self.dpset.dps[1]
+        thr = hub.spawn(lambda: self._get('/stats/port?max_age=10').body)
+        while not dp.requests:
+            hub.sleep(0)
+        self.app.state_change_handler(ofp_event.EventOFPStateChange(dp))
+        hub.joinall([thr])
+        eq_(self.app.data['cache'].peek((1, 'port'), 10), None)
+        ok_(self.app.data['cache'].peek((2, 'port'), 10) is not None)
+
+    def test_invalid_max_age(self):
+        res = Request.blank('/stats/port?max_age=x').get_response(self.wsgi)
+        eq_(res.status_int, 400)
@@ -0,0 +1,179 @@
+# Copyright (C) 2014 Nippon Telegraph and Telephone Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+from nose.tools import eq_, ok_, raises
+
+from ryu.app.ofctl import api
+from ryu.app.ofctl import event
+from ryu.app.ofctl import exception
+from ryu.app.ofctl import service
+from ryu.controller import ofp_event
+from ryu.lib import hub
+from ryu.ofproto import ofproto_protocol
+from ryu.ofproto import ofproto_v1_3
+
+
+class _Datapath(ofproto_protocol.ProtocolDesc):
+    def __init__(self, dpid):
+        super(_Datapath, self).__init__(ofproto_v1_3.OFP_VERSION)
+        self.id = dpid
+        self.xid = 0
+        self.sent = []
+
+    def set_xid(self, msg):
+        self.xid += 1
+        msg.set_xid(self.xid)
+
+    def send_msg(self, msg):
+        self.sent.append(msg)
+
+
+class Test_OfctlService(unittest.TestCase):
+    """ Test case for ryu.app.ofctl.service and its async api
+    """
+
+    def setUp(self):
+        self.service = service.OfctlService()
+        self.dp = _Datapath(1)
+        self.parser = self.dp.ofproto_parser
+        features = self.parser.OFPSwitchFeatures(self.dp)
+        self.service._switch_features_handler(
+            ofp_event.EventOFPSwitchFeatures(features))
+
+    def _send(self, req):
+        # as api._send_request() but handled right away
+        req.src = 'client'
+        req.sync = True
+        req.reply_q = api._Reply()
+        self.service._handle_send_msg(req)
+        return req
+
+    def _recv(self, msg, xid):
+        msg.xid = xid
+        ev = ofp_event.ofp_msg_to_ev(msg)
+        if isinstance(msg, self.parser.OFPBarrierReply):
+            self.service._handle_barrier(ev)
+        else:
+            self.service._handle_reply(ev)
+
+    def _stats_request(self, port_no):
+        return self.parser.OFPPortStatsRequest(self.dp, 0, port_no)
+
+    def test_send_msg(self):
+        req = self._send(event.SendMsgRequest(
+            msg=self._stats_request(1),
+            reply_cls=self.parser.OFPPortStatsReply, reply_multi=True))
+        future = api.Future(req)
+        msg, barrier = self.dp.sent
+        ok_(isinstance(barrier, self.parser.OFPBarrierRequest))
+        ok_(not future.done())
+
+        reply = self.parser.OFPPortStatsReply(self.dp, body=[], flags=0)
+        self._recv(reply, msg.xid)
+        ok_(not future.done())
+        self._recv(self.parser.OFPBarrierReply(self.dp), barrier.xid)
+        ok_(future.done())
+        eq_(future.result(), [reply])
+        eq_(future.result(), [reply])
+        eq_(self.service._switches[1].xids, {})
+        eq_(self.service._switches[1].barriers, {})
+        eq_(self.service._observing_events, {
+            ofp_event.EventOFPPortStatsReply: 0})
+
+    def test_send_msgs(self):
+        req = self._send(event.SendMsgsRequest(
+            msgs=[self._stats_request(port_no) for port_no in [1, 2, 3]],
+            reply_cls=self.parser.OFPPortStatsReply))
+        futures = [api.Future(req, i) for i in range(3)]
+        eq_(len(self.dp.sent), 4)
+        msgs, barrier = self.dp.sent[:3], self.dp.sent[3]
+        ok_(isinstance(barrier, self.parser.OFPBarrierRequest))
+
+        replies = [self.parser.OFPPortStatsReply(self.dp, body=[], flags=0)
+                   for _i in range(2)]
+        self._recv(replies[0], msgs[0].xid)
+        self._recv(replies[1], msgs[2].xid)
+        self._recv(self.parser.OFPBarrierReply(self.dp), barrier.xid)
+        eq_(futures[0].result(), replies[0])
+        eq_(futures[1].result(), None)
+        eq_(futures[2].result(), replies[1])
+
+    def test_send_msgs_waiters(self):
+        # futures of a request waited for by several threads at once
+        req = self._send(event.SendMsgsRequest(
+            msgs=[self._stats_request(port_no) for port_no in [1, 2]],
+            reply_cls=self.parser.OFPPortStatsReply))
+        msgs, barrier = self.dp.sent[:2], self.dp.sent[2]
+        results = []
+
+        def _wait(i):
+            results.append((i, api.Future(req, i).result()))
+
+        with hub.Timeout(2):
+            threads = [hub.spawn(_wait, i) for i in [0, 1, 0]]
+            hub.sleep(0)
+            replies = [self.parser.OFPPortStatsReply(self.dp, body=[],
+                                                     flags=0)
+                       for _i in range(2)]
+            self._recv(replies[0], msgs[0].xid)
+            self._recv(replies[1], msgs[1].xid)
+            self._recv(self.parser.OFPBarrierReply(self.dp), barrier.xid)
+            hub.joinall(threads)
+        eq_(sorted(results), sorted([(0, replies[0]), (1, replies[1]),
+                                     (0, replies[0])]))
+
+    def test_send_msgs_error(self):
+        req = self._send(event.SendMsgsRequest(
+            msgs=[self._stats_request(port_no) for port_no in [1, 2]],
+            reply_cls=self.parser.OFPPortStatsReply))
+        msgs, barrier = self.dp.sent[:2], self.dp.sent[2]
+        error = self.parser.OFPErrorMsg(self.dp, type_=1, code=2)
+        self._recv(error, msgs[1].xid)
+        self._recv(self.parser.OFPBarrierReply(self.dp), barrier.xid)
+        eq_(api.Future(req, 0).result(), None)
+        self.assertRaises(exception.OFError, api.Future(req, 1).result)
+
+    @raises(exception.RequestTimeout)
+    def test_timeout(self):
+        req = self._send(event.SendMsgRequest(
+            msg=self._stats_request(1),
+            reply_cls=self.parser.OFPPortStatsReply, timeout=0.01))
+        future = api.Future(req)
+        try:
+            future.result()
+        finally:
+            eq_(self.service._switches[1].xids, {})
+            eq_(self.service._switches[1].barriers, {})
+            # a barrier reply coming late is ignored
+            barrier = self.dp.sent[1]
+            self._recv(self.parser.OFPBarrierReply(self.dp), barrier.xid)
+
+    @raises(exception.InvalidDatapath)
+    def test_invalid_datapath(self):
+        dp = _Datapath(2)
+        req = self._send(event.SendMsgRequest(
+            msg=dp.ofproto_parser.OFPBarrierRequest(dp)))
+        eq_(dp.sent, [])
+        api.Future(req).result()
+
+    @raises(exception.InvalidDatapath)
+    def test_dead(self):
+        req = self._send(event.SendMsgRequest(
+            msg=self._stats_request(1),
+            reply_cls=self.parser.OFPPortStatsReply))
+        self.service._handle_dead(ofp_event.EventOFPStateChange(self.dp))
+        eq_(self.service._switches, {})
+        api.Future(req).result()
@@ -0,0 +1,111 @@
+# Copyright (C) 2014 Nippon Telegraph and Telephone Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+import logging
+
+from nose.tools import eq_
+
+from ryu.base import app_manager
+from ryu.controller import event
+from ryu.controller import handler
+
+
+LOG = logging.getLogger('test_app_manager')
+
+
+class _Event(event.EventBase):
+    pass
+
+
+class _Provider(app_manager.RyuApp):
+    _EVENTS = [_Event]
+
+
+class _Consumer(app_manager.RyuApp):
+    def __init__(self, *args, **kwargs):
+        super(_Consumer, self).__init__(*args, **kwargs)
+        self.received = []
+
+    @handler.set_ev_cls(_Event, handler.MAIN_DISPATCHER)
+    def _handler(self, ev):
+        self.received.append(ev)
+
+    def _send_event(self, ev, state):
+        self.received.append((ev, state))
+
+
+class Test_RyuApp_dispatch(unittest.TestCase):
+
+    """ Test case for cached dispatch tables of RyuApp
+    """
+
+    def setUp(self):
+        self.provider = _Provider()
+        self.consumer = _Consumer()
+        app_manager.register_app(self.provider)
+        app_manager.register_app(self.consumer)
+
+    def tearDown(self):
+        app_manager.unregister_app(self.provider)
+        app_manager.unregister_app(self.consumer)
+
+    def test_get_handlers_state(self):
+        ev = _Event()
+        eq_((self.consumer._handler,),
+            self.consumer.get_handlers(ev, handler.MAIN_DISPATCHER))
+        eq_((), self.consumer.get_handlers(ev, handler.CONFIG_DISPATCHER))
+        eq_((self.consumer._handler,), self.consumer.get_handlers(ev))
+
+    def test_get_handlers_invalidate(self):
+        ev = _Event()
+        eq_(1, len(self.consumer.get_handlers(ev, handler.MAIN_DISPATCHER)))
+
+        def _dynamic(ev):
+            pass
+        self.consumer.register_handler(_Event, _dynamic)
+        eq_(2, len(self.consumer.get_handlers(ev, handler.MAIN_DISPATCHER)))
+        self.consumer.unregister_handler(_Event, _dynamic)
+        eq_(1, len(self.consumer.get_handlers(ev, handler.MAIN_DISPATCHER)))
+
+    def test_send_event_to_observers(self):
+        ev = _Event()
+        self.provider.send_event_to_observers(ev, handler.MAIN_DISPATCHER)
+        eq_([], self.consumer.received)
+
+        self.provider.register_observer(_Event, self.consumer.name,
+                                        [handler.MAIN_DISPATCHER])
+        self.provider.send_event_to_observers(ev, handler.MAIN_DISPATCHER)
+        self.provider.send_event_to_observers(ev, handler.CONFIG_DISPATCHER)
+        eq_([(ev, handler.MAIN_DISPATCHER)], self.consumer.received)
+
+        self.provider.unregister_observer(_Event, self.consumer.name)
+        self.provider.send_event_to_observers(ev, handler.MAIN_DISPATCHER)
+        eq_(1, len(self.consumer.received))
+
+    def test_send_event_to_observers_unregister_app(self):
+        ev = _Event()
+        self.provider.register_observer(_Event, self.consumer.name)
+        self.provider.send_event_to_observers(ev)
+        eq_(1, len(self.consumer.received))
+
+        app_manager.unregister_app(self.consumer)
+        try:
+            self.provider.send_event_to_observers(ev)
+            eq_(1, len(self.consumer.received))
+        finally:
+            app_manager.register_app(self.consumer)
+        self.provider.send_event_to_observers(ev)
+        eq_(2, len(self.consumer.received))
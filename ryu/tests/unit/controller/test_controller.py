@@ -0,0 +1,212 @@
+# Copyright (C) 2014 Nippon Telegraph and Telephone Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+import logging
+import socket
+
+import mock
+from nose.tools import eq_, ok_
+
+from ryu.base import app_manager
+from ryu.controller import controller
+from ryu.controller import handler
+from ryu.lib import hub
+from ryu.ofproto import ofproto_v1_3
+from ryu.ofproto import ofproto_v1_3_parser
+
+
+LOG = logging.getLogger('test_controller')
+
+
+class _Socket(object):
+    """A socket stand-in which returns pre-recorded chunks on recv()."""
+
+    def __init__(self, chunks):
+        self.chunks = list(chunks)
+        self.recv_sizes = []
+        self.sent = []
+        self.broken = False
+
+    def setsockopt(self, *args):
+        pass
+
+    def recv(self, bufsize):
+        self.recv_sizes.append(bufsize)
+        if not self.chunks:
+            return ''
+        return self.chunks.pop(0)
+
+    def sendall(self, buf):
+        if self.broken:
+            raise socket.error('broken pipe')
+        self.sent.append(str(buf))
+
+
+class Test_Datapath(unittest.TestCase):
+
+    """ Test case for Datapath
+    """
+
+    def setUp(self):
+        self.brick = mock.Mock()
+        self.brick.get_handlers.return_value = []
+        self.patcher = mock.patch.object(app_manager, 'lookup_service_brick',
+                                         return_value=self.brick)
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+
+    def _serialize(self, msgs):
+        dp = controller.Datapath(_Socket([]), ('127.0.0.1', 6633))
+        dp.set_version(ofproto_v1_3.OFP_VERSION)
+        buf = ''
+        for msg in msgs:
+            msg.datapath = dp
+            dp.set_xid(msg)
+            msg.serialize()
+            buf += str(msg.buf)
+        return buf
+
+    def _recv(self, chunks):
+        dp = controller.Datapath(_Socket(chunks), ('127.0.0.1', 6633))
+        dp.set_version(ofproto_v1_3.OFP_VERSION)
+        self.brick.reset_mock()
+        dp._recv_loop()
+        return dp, [c[0][0].msg for c in
+                    self.brick.send_event_to_observers.call_args_list]
+
+    def _msgs(self):
+        return [ofproto_v1_3_parser.OFPEchoRequest(None, data='ping'),
+                ofproto_v1_3_parser.OFPBarrierReply(None),
+                ofproto_v1_3_parser.OFPEchoReply(None, data='x' * 100)]
+
+    def test_recv_loop_single_chunk(self):
+        buf = self._serialize(self._msgs())
+        dp, msgs = self._recv([buf])
+        eq_(3, len(msgs))
+        ok_(isinstance(msgs[0], ofproto_v1_3_parser.OFPEchoRequest))
+        eq_('ping', msgs[0].data)
+        ok_(isinstance(msgs[1], ofproto_v1_3_parser.OFPBarrierReply))
+        eq_('x' * 100, msgs[2].data)
+        eq_(False, dp.is_active)
+        # a whole chunk is requested instead of the remaining length
+        eq_(set([controller.CONF.ofp_recv_buf_size]),
+            set(dp.socket.recv_sizes))
+
+    def test_recv_loop_split_chunks(self):
+        buf = self._serialize(self._msgs())
+        chunks = [buf[i:i + 3] for i in range(0, len(buf), 3)]
+        dp, msgs = self._recv(chunks)
+        eq_(3, len(msgs))
+        eq_('ping', msgs[0].data)
+        eq_('x' * 100, msgs[2].data)
+
+    def test_recv_loop_msg_len(self):
+        buf = self._serialize(self._msgs())
+        dp, msgs = self._recv([buf[:20], buf[20:]])
+        xids = [m.xid for m in msgs]
+        eq_(len(set(xids)), 3)
+        for m in msgs:
+            eq_(m.msg_len, len(m.buf))
+
+    def test_recv_loop_malformed_length(self):
+        # msg_len smaller than the header must not loop forever
+        buf = '\x04\x03\x00\x00\x00\x00\x00\x01'
+        dp, msgs = self._recv([buf])
+        eq_([], msgs)
+        eq_(False, dp.is_active)
+
+    def test_recv_loop_handlers(self):
+        called = []
+
+        def _handler(ev):
+            called.append(ev)
+        buf = self._serialize(self._msgs()[:1])
+        self.brick.get_handlers.return_value = (_handler,)
+        self._recv([buf])
+        eq_(1, len(called))
+        ev = called[0]
+        self.brick.get_handlers.assert_called_with(
+            ev, handler.HANDSHAKE_DISPATCHER)
+
+    def test_send_loop_batch(self):
+        dp = controller.Datapath(_Socket([]), ('127.0.0.1', 6633))
+        for buf in ['a' * 8, bytearray('b' * 8), 'c' * 8]:
+            dp.send(buf)
+        eq_(24, dp.send_queued_bytes)
+        thr = hub.spawn(dp._send_loop)
+        hub.sleep(0)
+        eq_(['a' * 8 + 'b' * 8 + 'c' * 8], dp.socket.sent)
+        eq_(0, dp.send_queued_bytes)
+        eq_(1, dp.send_flushes)
+        dp.send('d' * 8)
+        hub.sleep(0)
+        eq_('d' * 8, dp.socket.sent[-1])
+        eq_(2, dp.send_flushes)
+        hub.kill(thr)
+        hub.joinall([thr])
+        eq_(None, dp.send_q)
+        # sending after the loop is gone is silently ignored
+        dp.send('e' * 8)
+        eq_(0, dp.send_queued_bytes)
+
+    def test_send_watermark(self):
+        dp = controller.Datapath(_Socket([]), ('127.0.0.1', 6633))
+        dp.send_high_watermark = 10
+        dp.send_low_watermark = 0
+        sent = []
+
+        def _producer():
+            for i in range(3):
+                dp.send(str(i) * 8)
+                sent.append(i)
+        prod = hub.spawn(_producer)
+        hub.sleep(0)
+        # the third send blocks above the high watermark
+        eq_([0, 1], sent)
+        eq_(1, dp.send_stalls)
+        eq_(16, dp.send_queued_bytes)
+        eq_(True, dp.send_would_block())
+
+        thr = hub.spawn(dp._send_loop)
+        hub.joinall([prod])
+        hub.sleep(0)
+        eq_([0, 1, 2], sent)
+        eq_(False, dp.send_would_block())
+        eq_('0' * 8 + '1' * 8 + '2' * 8, ''.join(dp.socket.sent))
+        hub.kill(thr)
+        hub.joinall([thr])
+
+    def test_send_unblock_on_close(self):
+        dp = controller.Datapath(_Socket([]), ('127.0.0.1', 6633))
+        dp.send_high_watermark = 1
+        dp.send_low_watermark = 0
+        dp.send('x')
+        prod = hub.spawn(dp.send, 'y')
+        hub.sleep(0)
+        eq_(1, dp.send_stalls)
+
+        def _send_loop():
+            try:
+                dp._send_loop()
+            except socket.error:
+                pass
+        dp.socket.broken = True
+        thr = hub.spawn(_send_loop)
+        hub.joinall([thr, prod])
+        eq_(None, dp.send_q)
+        eq_(False, dp.is_active)
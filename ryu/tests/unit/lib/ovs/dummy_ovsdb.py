@@ -0,0 +1,561 @@
+# Copyright (C) 2014 Nippon Telegraph and Telephone Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+An in-process stand-in for ovsdb-server and ovs-vswitchd, enough for
+ryu.lib.ovs.vsctl: get_schema, monitor and transact over JSON-RPC on a
+TCP socket, for a subset of the Open_vSwitch schema.
+
+Transactions are not rolled back on errors, except for failed wait
+operations and aborts, which are checked before anything is changed.
+"""
+
+import collections
+import json
+import select
+import socket
+import threading
+import uuid
+
+
+def _column(key, value=None, min_=1, max_=1, ref_table=None):
+    type_ = {'key': key, 'min': min_, 'max': max_}
+    if ref_table:
+        type_['key'] = {'type': 'uuid', 'refTable': ref_table}
+    if value is not None:
+        type_['value'] = value
+    return {'type': type_}
+
+
+def _optional(key, ref_table=None):
+    return _column(key, min_=0, ref_table=ref_table)
+
+
+def _set(key, ref_table=None, min_=0):
+    return _column(key, min_=min_, max_='unlimited', ref_table=ref_table)
+
+
+def _map(key='string', value='string'):
+    return _column(key, value, min_=0, max_='unlimited')
+
+
+SCHEMA = {
+    'name': 'Open_vSwitch',
+    'version': '7.4.0',
+    'tables': {
+        'Open_vSwitch': {
+            'isRoot': True,
+            'maxRows': 1,
+            'columns': {
+                'bridges': _set('uuid', 'Bridge'),
+                'next_cfg': _column('integer'),
+                'cur_cfg': _column('integer'),
+                'ovs_version': _optional('string'),
+                'external_ids': _map(),
+                'other_config': _map(),
+            },
+        },
+        'Bridge': {
+            'columns': {
+                'name': _column('string'),
+                'datapath_id': _optional('string'),
+                'datapath_type': _column('string'),
+                'ports': _set('uuid', 'Port'),
+                'controller': _set('uuid', 'Controller'),
+                'fail_mode': _optional('string'),
+                'stp_enable': _column('boolean'),
+                'other_config': _map(),
+                'external_ids': _map(),
+            },
+        },
+        'Port': {
+            'columns': {
+                'name': _column('string'),
+                'interfaces': _set('uuid', 'Interface', min_=1),
+                'tag': _optional('integer'),
+                'trunks': _set('integer'),
+                'fake_bridge': _column('boolean'),
+                'bond_fake_iface': _column('boolean'),
+                'qos': _optional('uuid', 'QoS'),
+                'other_config': _map(),
+                'external_ids': _map(),
+                'statistics': _map('string', 'integer'),
+            },
+        },
+        'Interface': {
+            'columns': {
+                'name': _column('string'),
+                'type': _column('string'),
+                'ofport': _optional('integer'),
+                'options': _map(),
+                'other_config': _map(),
+                'external_ids': _map(),
+                'statistics': _map('string', 'integer'),
+                'link_state': _optional('string'),
+            },
+        },
+        'Controller': {
+            'columns': {
+                'target': _column('string'),
+                'is_connected': _column('boolean'),
+                'other_config': _map(),
+                'external_ids': _map(),
+            },
+        },
+        'QoS': {
+            'isRoot': True,
+            'columns': {
+                'type': _column('string'),
+                'queues': _map('integer', {'type': 'uuid',
+                                           'refTable': 'Queue'}),
+                'other_config': _map(),
+                'external_ids': _map(),
+            },
+        },
+        'Queue': {
+            'isRoot': True,
+            'columns': {
+                'dscp': _optional('integer'),
+                'other_config': _map(),
+                'external_ids': _map(),
+            },
+        },
+    },
+}
+
+_ATOM_DEFAULTS = {'integer': 0, 'real': 0.0, 'boolean': False, 'string': ''}
+
+
+def _default(column_schema):
+    type_ = column_schema['type']
+    if 'value' in type_:
+        return ['map', []]
+    if type_['min'] == 0 or type_['max'] != 1:
+        return ['set', []]
+    return _ATOM_DEFAULTS[type_['key']]
+
+
+def _canonical(value):
+    if isinstance(value, list) and value and value[0] == 'set':
+        elems = sorted((_canonical(e) for e in value[1]), key=json.dumps)
+        if len(elems) == 1:
+            return elems[0]
+        return ['set', elems]
+    if isinstance(value, list) and value and value[0] == 'map':
+        return ['map', sorted(([_canonical(k), _canonical(v)]
+                               for k, v in value[1]), key=json.dumps)]
+    return value
+
+
+def _elems(value):
+    # Elements of a set, or pairs of a map.
+    if isinstance(value, list) and value and value[0] in ('set', 'map'):
+        return list(value[1])
+    return [value]
+
+
+def _uuids(value):
+    if isinstance(value, list) and value:
+        if value[0] == 'uuid':
+            yield value[1]
+        elif value[0] in ('set', 'map'):
+            for elem in value[1]:
+                for uuid_ in _uuids(elem):
+                    yield uuid_
+
+
+class _Error(Exception):
+    pass
+
+
+class DummyOvsdbServer(object):
+
+    def __init__(self, schema=None):
+        self.schema = schema or SCHEMA
+        self.db_name = self.schema['name']
+        self.tables = dict((name, {}) for name in self.schema['tables'])
+        self.transactions = 0   # number of transact requests served
+        self._refs = collections.defaultdict(int)
+        self._row_table = {}
+        self._next_ofport = 1
+        self._monitors = []     # (connection, monitor id, {table: columns})
+        self._lock = threading.Lock()
+        self._sock = None
+        self._thread = None
+        self._running = False
+
+        self.transact([{'op': 'insert', 'table': 'Open_vSwitch',
+                        'row': {}}])
+
+    def start(self):
+        """Starts serving and returns the remote to connect to."""
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind(('127.0.0.1', 0))
+        self._sock.listen(8)
+        self._running = True
+        self._thread = threading.Thread(target=self._serve)
+        self._thread.daemon = True
+        self._thread.start()
+        return 'tcp:127.0.0.1:%d' % self._sock.getsockname()[1]
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _serve(self):
+        conns = {}      # socket -> receive buffer
+        decoder = json.JSONDecoder()
+        while self._running:
+            readable, _w, _x = select.select([self._sock] + list(conns),
+                                             [], [], 0.05)
+            for sock in readable:
+                if sock is self._sock:
+                    conn, _addr = sock.accept()
+                    conns[conn] = ''
+                    continue
+                data = sock.recv(65536)
+                if not data:
+                    self._close(conns, sock)
+                    continue
+                buf = conns[sock] + data
+                while True:
+                    buf = buf.lstrip()
+                    try:
+                        msg, end = decoder.raw_decode(buf)
+                    except ValueError:
+                        break
+                    buf = buf[end:]
+                    self._handle(sock, msg)
+                conns[sock] = buf
+        for sock in list(conns):
+            self._close(conns, sock)
+        self._sock.close()
+
+    def _close(self, conns, sock):
+        del conns[sock]
+        self._monitors = [m for m in self._monitors if m[0] is not sock]
+        sock.close()
+
+    @staticmethod
+    def _send(sock, msg):
+        sock.sendall(json.dumps(msg))
+
+    def _reply(self, sock, msg, result=None, error=None):
+        self._send(sock, {'id': msg['id'], 'result': result,
+                          'error': error})
+
+    def _handle(self, sock, msg):
+        method = msg.get('method')
+        params = msg.get('params')
+        if method is None:
+            return      # reply to one of our echo requests
+        if method == 'echo':
+            self._reply(sock, msg, params)
+        elif method == 'list_dbs':
+            self._reply(sock, msg, [self.db_name])
+        elif method == 'get_schema':
+            if params[0] == self.db_name:
+                self._reply(sock, msg, self.schema)
+            else:
+                self._reply(sock, msg, error='unknown database')
+        elif method == 'monitor':
+            self._reply(sock, msg, self._monitor(sock, params))
+        elif method == 'transact':
+            self._reply(sock, msg, self._transact(params))
+        else:
+            self._reply(sock, msg, error='unknown method')
+
+    def _monitor(self, sock, params):
+        db_name, monitor_id, requests = params
+        columns = {}
+        for table, request in requests.items():
+            if isinstance(request, list):
+                request = request[0]
+            columns[table] = request.get('columns')
+        with self._lock:
+            self._monitors.append((sock, monitor_id, columns))
+            updates = {}
+            for table, table_columns in columns.items():
+                rows = dict((uuid_, {'new': self._project(row,
+                                                          table_columns)})
+                            for uuid_, row in self.tables[table].items())
+                if rows:
+                    updates[table] = rows
+        return updates
+
+    @staticmethod
+    def _project(row, columns):
+        if columns is None:
+            return dict(row)
+        return dict((column, row[column]) for column in columns
+                    if column in row)
+
+    def transact(self, operations):
+        """Runs operations as a transaction and returns their results."""
+        return self._transact([self.db_name] + operations)
+
+    def _transact(self, params):
+        with self._lock:
+            self.transactions += 1
+            changes = collections.OrderedDict()
+            results = self._execute(params[1:], changes)
+            self._notify(changes)
+        return results
+
+    def _execute(self, operations, changes):
+        # Checked first, as there is no roll back.
+        for i, op in enumerate(operations):
+            if op['op'] == 'wait' and not self._wait(op):
+                return [{}] * i + [{'error': 'timed out'}]
+            if op['op'] == 'abort':
+                return [{}] * i + [{'error': 'aborted'}]
+
+        named = {}
+        for op in operations:
+            if op['op'] == 'insert':
+                named[op.get('uuid-name')] = str(uuid.uuid4())
+
+        results = []
+        incremented = False
+        for op in operations:
+            op = self._substitute(op, named)
+            try:
+                result = getattr(self, '_op_' + op['op'])(op, changes, named)
+            except _Error as e:
+                results.append({'error': str(e)})
+                break
+            incremented |= op['op'] == 'mutate' and any(
+                mutation[0] == 'next_cfg' for mutation in op['mutations'])
+            results.append(result)
+        self._collect_garbage(changes)
+        self._vswitchd(changes, incremented)
+        return results
+
+    def _substitute(self, value, named):
+        if isinstance(value, dict):
+            return dict((k, self._substitute(v, named))
+                        for k, v in value.items())
+        if isinstance(value, list):
+            if len(value) == 2 and value[0] == 'named-uuid':
+                return ['uuid', named[value[1]]]
+            return [self._substitute(v, named) for v in value]
+        return value
+
+    def _where(self, table, where):
+        rows = self.tables[table]
+        if (len(where) == 1 and where[0][0] == '_uuid' and
+                where[0][1] == '=='):
+            uuid_ = where[0][2][1]
+            return [uuid_] if uuid_ in rows else []
+        matched = []
+        for uuid_, row in rows.items():
+            for column, function, value in where:
+                if function != '==':
+                    raise _Error('unsupported function %s' % function)
+                if column == '_uuid':
+                    if uuid_ != value[1]:
+                        break
+                elif _canonical(row[column]) != _canonical(value):
+                    break
+            else:
+                matched.append(uuid_)
+        return matched
+
+    def _wait(self, op):
+        assert op['until'] == '==' and len(op['rows']) == 1
+        expected = op['rows'][0]
+        uuids = self._where(op['table'], op['where'])
+        if len(uuids) != 1:
+            return False
+        row = self.tables[op['table']][uuids[0]]
+        return all(_canonical(row[column]) == _canonical(expected[column])
+                   for column in op['columns'])
+
+    def _changing(self, changes, table, uuid_):
+        if (table, uuid_) not in changes:
+            row = self.tables[table].get(uuid_)
+            changes[(table, uuid_)] = dict(row) if row is not None else None
+
+    def _set_column(self, table, uuid_, column, value):
+        row = self.tables[table][uuid_]
+        for ref in _uuids(row.get(column)):
+            self._refs[ref] -= 1
+        for ref in _uuids(value):
+            self._refs[ref] += 1
+        row[column] = value
+
+    def _op_insert(self, op, changes, named):
+        table = op['table']
+        columns = self.schema['tables'][table]['columns']
+        uuid_ = named.get(op.get('uuid-name')) or str(uuid.uuid4())
+        self._changing(changes, table, uuid_)
+        self.tables[table][uuid_] = {}
+        self._row_table[uuid_] = table
+        for column, column_schema in columns.items():
+            self._set_column(table, uuid_, column,
+                             op['row'].get(column, _default(column_schema)))
+        return {'uuid': ['uuid', uuid_]}
+
+    def _op_update(self, op, changes, named):
+        table = op['table']
+        uuids = self._where(table, op['where'])
+        for uuid_ in uuids:
+            self._changing(changes, table, uuid_)
+            for column, value in op['row'].items():
+                self._set_column(table, uuid_, column, value)
+        return {'count': len(uuids)}
+
+    def _op_mutate(self, op, changes, named):
+        table = op['table']
+        columns = self.schema['tables'][table]['columns']
+        uuids = self._where(table, op['where'])
+        for uuid_ in uuids:
+            self._changing(changes, table, uuid_)
+            row = self.tables[table][uuid_]
+            for column, mutator, arg in op['mutations']:
+                value = row[column]
+                if mutator == '+=':
+                    value += arg
+                elif mutator in ('insert', 'delete'):
+                    type_ = columns[column]['type']
+                    kind = 'map' if 'value' in type_ else 'set'
+                    elems = _elems(value)
+                    args = _elems(arg)
+                    if mutator == 'insert':
+                        keys = [e[0] for e in elems] if kind == 'map' else []
+                        elems += [a for a in args if a not in elems and
+                                  (kind != 'map' or a[0] not in keys)]
+                    elif kind == 'map' and arg[0] == 'set':
+                        elems = [e for e in elems if e[0] not in args]
+                    else:
+                        elems = [e for e in elems if e not in args]
+                    value = [kind, elems]
+                else:
+                    raise _Error('unsupported mutator %s' % mutator)
+                self._set_column(table, uuid_, column, value)
+        return {'count': len(uuids)}
+
+    def _op_select(self, op, changes, named):
+        table = op['table']
+        return {'rows': [self._project(self.tables[table][uuid_],
+                                       op.get('columns'))
+                         for uuid_ in self._where(table, op['where'])]}
+
+    def _delete(self, changes, table, uuid_):
+        self._changing(changes, table, uuid_)
+        row = self.tables[table].pop(uuid_)
+        del self._row_table[uuid_]
+        for value in row.values():
+            for ref in _uuids(value):
+                self._refs[ref] -= 1
+
+    def _op_delete(self, op, changes, named):
+        uuids = self._where(op['table'], op['where'])
+        for uuid_ in uuids:
+            self._delete(changes, op['table'], uuid_)
+        return {'count': len(uuids)}
+
+    def _op_wait(self, op, changes, named):
+        return {}
+
+    def _op_comment(self, op, changes, named):
+        return {}
+
+    def _collect_garbage(self, changes):
+        # Deletes the rows of non-root tables no longer referenced.
+        candidates = [uuid_ for (_table, uuid_) in changes]
+        candidates.extend(ref for (table, uuid_), old in changes.items()
+                          if old is not None
+                          for value in old.values() for ref in _uuids(value))
+        while candidates:
+            uuid_ = candidates.pop()
+            table = self._row_table.get(uuid_)
+            if (table is None or self._refs[uuid_] > 0 or
+                    self.schema['tables'][table].get('isRoot')):
+                continue
+            row = self.tables[table][uuid_]
+            candidates.extend(ref for value in row.values()
+                              for ref in _uuids(value))
+            self._delete(changes, table, uuid_)
+
+    def _vswitchd(self, changes, incremented):
+        # What ovs-vswitchd does on reconfiguration.
+        for (table, uuid_), old in changes.items():
+            row = self.tables[table].get(uuid_)
+            if (table == 'Interface' and row is not None and
+                    row['ofport'] == ['set', []]):
+                self._changing(changes, table, uuid_)
+                self._set_column(table, uuid_, 'ofport', self._next_ofport)
+                self._next_ofport += 1
+        if incremented:
+            for uuid_, row in self.tables['Open_vSwitch'].items():
+                self._changing(changes, 'Open_vSwitch', uuid_)
+                self._set_column('Open_vSwitch', uuid_, 'cur_cfg',
+                                 row['next_cfg'])
+
+    def _notify(self, changes):
+        for sock, monitor_id, columns in self._monitors:
+            updates = {}
+            for (table, uuid_), old in changes.items():
+                if table not in columns:
+                    continue
+                table_columns = columns[table]
+                new = self.tables[table].get(uuid_)
+                if old is None and new is None:
+                    continue
+                update = {}
+                if new is not None:
+                    update['new'] = self._project(new, table_columns)
+                if old is not None:
+                    old = self._project(old, table_columns)
+                    if new is not None:
+                        old = dict((column, value)
+                                   for column, value in old.items()
+                                   if new[column] != value)
+                        if not old:
+                            continue
+                    update['old'] = old
+                updates.setdefault(table, {})[uuid_] = update
+            if updates:
+                self._send(sock, {'id': None, 'method': 'update',
+                                  'params': [monitor_id, updates]})
+
+    def add_bridge(self, name, port_names=()):
+        """Adds a bridge with a port of one interface per port name."""
+        ops = []
+        ports = []
+        for i, port_name in enumerate([name] + list(port_names)):
+            ops.append({'op': 'insert', 'table': 'Interface',
+                        'uuid-name': 'iface%d' % i,
+                        'row': {'name': port_name,
+                                'type': 'internal' if i == 0 else ''}})
+            ops.append({'op': 'insert', 'table': 'Port',
+                        'uuid-name': 'port%d' % i,
+                        'row': {'name': port_name,
+                                'interfaces': ['named-uuid', 'iface%d' % i]}})
+            ports.append(['named-uuid', 'port%d' % i])
+        ops.append({'op': 'insert', 'table': 'Bridge', 'uuid-name': 'br',
+                    'row': {'name': name, 'ports': ['set', ports]}})
+        ovs_uuid = self.tables['Open_vSwitch'].keys()[0]
+        ops.append({'op': 'mutate', 'table': 'Open_vSwitch',
+                    'where': [['_uuid', '==', ['uuid', ovs_uuid]]],
+                    'mutations': [['bridges', 'insert',
+                                   ['set', [['named-uuid', 'br']]]]]})
+        results = self.transact(ops)
+        errors = [r['error'] for r in results if 'error' in r]
+        assert not errors, errors
@@ -0,0 +1,130 @@
+# Copyright (C) 2014 Nippon Telegraph and Telephone Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import sys
+import time
+import unittest
+from nose.tools import eq_, ok_
+
+import ryu
+import ryu.contrib
+from ryu.tests.unit.lib.ovs.dummy_ovsdb import DummyOvsdbServer
+
+# nose adds the lib directories of the tree to sys.path while loading
+# tests, and the ovs packages there would shadow the ovs library in
+# ryu/contrib.
+_path = sys.path[:]
+_ryu_dir = os.path.dirname(os.path.abspath(ryu.__file__))
+sys.path[:] = [p for p in sys.path
+               if not (os.path.basename(p) == 'lib' and
+                       os.path.abspath(p).startswith(_ryu_dir))]
+try:
+    from ryu.lib.ovs import vsctl
+finally:
+    sys.path[:] = _path
+
+
+class Test_VSCtl(unittest.TestCase):
+    """ Test case for ryu.lib.ovs.vsctl against a dummy ovsdb-server
+    """
+
+    def setUp(self):
+        self.server = DummyOvsdbServer()
+        self.server.add_bridge('br0', ['p1', 'p2'])
+        self.remote = self.server.start()
+        self.vsctl = vsctl.VSCtl(self.remote)
+
+    def tearDown(self):
+        vsctl.close_replica(self.remote)
+        self.server.stop()
+
+    def _run(self, command, *args):
+        command = vsctl.VSCtlCommand(command, args)
+        self.vsctl.run_command([command])
+        return command.result
+
+    def _wait_for(self, func, *args):
+        # Changes made by other clients reach the replica some time
+        # after the server is done with them.
+        for _i in range(500):
+            result = func(*args)
+            if result:
+                return result
+            time.sleep(0.01)
+        ok_(False, 'timed out waiting for %s' % func)
+
+    def _server_port_names(self):
+        return sorted(row['name']
+                      for row in self.server.tables['Port'].values())
+
+    def test_list(self):
+        eq_(self._run('list-br'), ['br0'])
+        eq_(self._run('list-ports', 'br0'), ['p1', 'p2'])
+        eq_(self._run('list-ifaces', 'br0'), ['p1', 'p2'])
+
+    def test_read_only_commands_do_not_transact(self):
+        transactions = self.server.transactions
+        for _i in range(3):
+            eq_(self._run('list-ports', 'br0'), ['p1', 'p2'])
+            eq_(len(self._run('find', 'Interface', 'name=p1')), 1)
+        eq_(self.server.transactions, transactions)
+
+    def test_add_del_port(self):
+        self._run('add-port', 'br0', 'p3')
+        eq_(self._run('list-ports', 'br0'), ['p1', 'p2', 'p3'])
+        eq_(self._server_port_names(), ['br0', 'p1', 'p2', 'p3'])
+        iface, = self._run('find', 'Interface', 'name=p3')
+        ok_(iface.ofport)
+
+        self._run('del-port', 'br0', 'p1')
+        eq_(self._run('list-ports', 'br0'), ['p2', 'p3'])
+        eq_(self._server_port_names(), ['br0', 'p2', 'p3'])
+
+    def test_replica_shared(self):
+        self._run('init')
+        other = vsctl.VSCtl(self.remote)
+        command = vsctl.VSCtlCommand('add-port', ('br0', 'p3'))
+        other.run_command([command])
+        eq_(self._run('list-ports', 'br0'), ['p1', 'p2', 'p3'])
+        eq_(len(vsctl._replicas), 1)
+
+    def test_changes_from_other_clients(self):
+        eq_(self._run('list-ports', 'br0'), ['p1', 'p2'])
+        self.server.add_bridge('br1', ['p4'])
+        self._wait_for(lambda: self._run('list-br') == ['br0', 'br1'])
+        eq_(self._run('list-ports', 'br1'), ['p4'])
+
+    def test_cache_reuse(self):
+        eq_(self._run('list-ports', 'br0'), ['p1', 'p2'])
+        replica = vsctl._replicas[self.remote]
+        bridges = replica._cache[1]
+
+        # Changes to columns the cache is not built from keep it.
+        uuid_ = [u for u, row in self.server.tables['Interface'].items()
+                 if row['name'] == 'p1'][0]
+        self.server.transact([{
+            'op': 'update', 'table': 'Interface',
+            'where': [['_uuid', '==', ['uuid', uuid_]]],
+            'row': {'statistics': ['map', [['rx_packets', 1]]]}}])
+        self._wait_for(lambda: self._run('find', 'Interface',
+                                         'name=p1')[0].statistics)
+        eq_(self._run('list-ports', 'br0'), ['p1', 'p2'])
+        ok_(replica._cache[1] is bridges)
+
+        # Others rebuild it.
+        self._run('add-port', 'br0', 'p3')
+        eq_(self._run('list-ports', 'br0'), ['p1', 'p2', 'p3'])
+        ok_(replica._cache[1] is not bridges)
@@ -14,8 +14,10 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import netaddr
+import socket
 import unittest
-from nose.tools import eq_
+from nose.tools import eq_, ok_, raises
 
 from ryu.lib import addrconv
 
@@ -54,3 +56,47 @@ class Test_addrconv(unittest.TestCase):
     def test_mac(self):
         self._test_conv(addrconv.mac, 'f2:0b:a4:01:0a:23',
                         '\xf2\x0b\xa4\x01\x0a\x23')
+
+    def test_mac_bytearray(self):
+        eq_(addrconv.mac.bin_to_text(bytearray('\xf2\x0b\xa4\x01\x0a\x23')),
+            'f2:0b:a4:01:0a:23')
+
+    def test_buffer(self):
+        # buffers and memoryviews are looked up and cached as str
+        conv = addrconv._InetConverter(addrconv._ipv4, socket.AF_INET)
+        data = 'xx\x0a\x00\x00\x01yy'
+        for bin in [buffer(data, 2, 4), memoryview(data)[2:6]]:
+            eq_(conv.bin_to_text(bin), '10.0.0.1')
+            eq_(conv._texts.keys(), ['\x0a\x00\x00\x01'])
+            eq_(type(conv._texts.keys()[0]), str)
+
+    def test_other_forms(self):
+        # forms netaddr accepts are still accepted
+        eq_(addrconv.ipv4.text_to_bin('10.1'), '\x0a\x00\x00\x01')
+        eq_(addrconv.ipv6.text_to_bin('FF02::1'),
+            ('\xff\x02\x00\x00\x00\x00\x00\x00'
+             '\x00\x00\x00\x00\x00\x00\x00\x01'))
+        for text in ['F2:0B:A4:01:0A:23', 'f2-0b-a4-01-0a-23',
+                     'f20b.a401.0a23', 'f2:b:a4:1:a:23']:
+            eq_(addrconv.mac.text_to_bin(text), '\xf2\x0b\xa4\x01\x0a\x23')
+
+    @raises(netaddr.AddrFormatError)
+    def test_ipv4_invalid(self):
+        addrconv.ipv4.text_to_bin('256.0.0.1')
+
+    @raises(netaddr.AddrFormatError)
+    def test_ipv6_invalid(self):
+        addrconv.ipv6.text_to_bin('fe80::1::1')
+
+    @raises(netaddr.AddrFormatError)
+    def test_mac_invalid(self):
+        addrconv.mac.text_to_bin('f2:0b:a4:01:0a:zz')
+
+    def test_cache_size(self):
+        conv = addrconv._InetConverter(addrconv._ipv4, socket.AF_INET,
+                                       cache_size=2)
+        for i in range(10):
+            eq_(conv.bin_to_text(chr(i) * 4), '%d.%d.%d.%d' % ((i,) * 4))
+            eq_(conv.text_to_bin('%d.%d.%d.%d' % ((i,) * 4)), chr(i) * 4)
+            ok_(len(conv._texts) + len(conv._old_texts) <= 4)
+            ok_(len(conv._bins) + len(conv._old_bins) <= 4)
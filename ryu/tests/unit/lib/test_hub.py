@@ -237,3 +237,118 @@ class Test_hub(unittest.TestCase):
         # allow multiple sets unlike eventlet Event
         ev.set()
         ev.set()
+
+    def test_call_later(self):
+        result = []
+        with hub.Timeout(2):
+            for delay in [0.3, 0.1, 0, 0.2]:
+                hub.call_later(delay, result.append, delay)
+            hub.sleep(0.5)
+        assert result == [0, 0.1, 0.2, 0.3]
+        assert len(hub._timer_wheel) == 0
+
+    def test_call_later_not_early(self):
+        def _timeout(delay, start, result):
+            result.append(time.time() - start >= delay)
+
+        result = []
+        with hub.Timeout(2):
+            for i in range(100):
+                delay = i * 0.005
+                hub.call_later(delay, _timeout, delay, time.time(), result)
+            hub.sleep(0.7)
+        assert result == [True] * 100
+
+    def test_call_later_cancel(self):
+        result = []
+        with hub.Timeout(2):
+            t1 = hub.call_later(0.1, result.append, 1)
+            t2 = hub.call_later(0.2, result.append, 2)
+            t3 = hub.call_later(0.3, result.append, 3)
+            t2.cancel()
+            hub.sleep(0.15)
+            t1.cancel()  # cancelling a timer which has run is a no-op
+            hub.sleep(0.25)
+            t3.cancel()
+        assert result == [1, 3]
+        assert len(hub._timer_wheel) == 0
+
+    def test_spawn_later_blocking(self):
+        # a callback which blocks does not hold back the other timers
+        def _timeout(delay, start, result):
+            result.append((delay, time.time() - start))
+
+        blocked = hub.Event()
+        result = []
+        with hub.Timeout(2):
+            start = time.time()
+            hub.spawn_later(0.05, blocked.wait)
+            for delay in [0.1, 0.2, 0.3]:
+                hub.call_later(delay, _timeout, delay, start, result)
+                hub.spawn_later(delay, _timeout, delay, start, result)
+            hub.sleep(0.4)
+            assert not blocked.is_set()
+            blocked.set()
+        assert sorted(d for d, _elapsed in result) == [0.1, 0.1, 0.2, 0.2,
+                                                       0.3, 0.3]
+        for delay, elapsed in result:
+            assert delay <= elapsed < delay + 0.05
+        assert len(hub._timer_wheel) == 0
+
+    def test_spawn_later_cancel(self):
+        # a spawned callback is not called when its timer is cancelled
+        # after it is due, before its greenthread starts
+        wheel = hub.TimerWheel()
+        wheel._thread = True  # run the ticks by hand
+        wheel._tick = 0
+        result = []
+        timers = []
+        for i in range(2):
+            timer = hub._WheelTimer(wheel, 0, result.append, (i,), {},
+                                    spawned=True)
+            wheel._add(timer)
+            wheel._count += 1
+            timers.append(timer)
+        wheel._run_tick()
+        assert not any(t.is_pending() for t in timers)
+        timers[1].cancel()
+        with hub.Timeout(2):
+            hub.sleep(0.1)
+        assert result == [0]
+        assert len(wheel) == 0
+
+    def test_timer_wheel_thread(self):
+        # the thread of a wheel is gone with its last timer
+        wheel = hub.TimerWheel()
+        t = wheel.call_later(10, lambda: None)
+        assert wheel._thread is not None
+        t.cancel()
+        wheel.call_later(0.01, lambda: None)
+        with hub.Timeout(2):
+            hub.sleep(0.2)
+        assert wheel._thread is None
+        assert len(wheel) == 0
+
+    def test_timer_wheel_cascade(self):
+        # timers far in the future move down the wheels and run at
+        # their tick
+        class _Wheel(hub.TimerWheel):
+            _BITS = [2, 2, 2]
+
+        wheel = _Wheel()
+        wheel._thread = True  # run the ticks by hand
+        wheel._tick = 0
+        result = []
+        for expires in [0, 3, 4, 5, 16, 17, 63, 64, 65, 100, 1000]:
+            timer = hub._WheelTimer(wheel, expires, result.append,
+                                    (expires,), {})
+            wheel._add(timer)
+            wheel._count += 1
+        ticks = []
+        while len(wheel):
+            tick = wheel._tick
+            count = len(result)
+            wheel._run_tick()
+            ticks.extend([tick] * (len(result) - count))
+        assert result == [0, 3, 4, 5, 16, 17, 63, 64, 65, 100, 1000]
+        assert ticks == result
@@ -31,6 +31,15 @@ class C1(stringify.StringifyMixin):
         self.c = c
 
 
+class C2(stringify.StringifyMixin):
+    __slots__ = ('a', '_b', 'c')
+
+    def __init__(self, a, c):
+        self.a = a
+        self._b = 'B'
+        self.c = c
+
+
 class Test_stringify(unittest.TestCase):
     """ Test case for ryu.lib.stringify
     """
@@ -68,3 +77,11 @@ class Test_stringify(unittest.TestCase):
         eq_(c.__class__, c2.__class__)
         eq_(c.__dict__, c2.__dict__)
         eq_(j, c.to_jsondict(encode_string=my_encode))
+
+    def test_jsondict_slots(self):
+        j = {'C2': {'a': 'QUFB', 'c': 'Q0ND'}}
+        c = C2(a='AAA', c='CCC')
+        eq_(str(c), "C2(a='AAA',c='CCC')")
+        eq_(j, c.to_jsondict())
+        c2 = C2.from_jsondict(j['C2'])
+        eq_((c2.a, c2.c), ('AAA', 'CCC'))
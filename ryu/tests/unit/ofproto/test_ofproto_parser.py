@@ -19,10 +19,13 @@ import binascii
 import unittest
 from nose.tools import *
 import struct
+import mock
 from ryu import exception
 
 from ryu.ofproto import ofproto_common, ofproto_parser
 from ryu.ofproto import ofproto_v1_0, ofproto_v1_0_parser
+from ryu.ofproto import ofproto_v1_3, ofproto_v1_3_parser
+from ryu.ofproto import ofproto_protocol
 
 import logging
 LOG = logging.getLogger(__name__)
@@ -222,6 +225,69 @@ class TestMsgBase(unittest.TestCase):
     def test_serialize(self):
         ok_(self._test_serialize())
 
+    def _test_parse_attr(self, lazy_parse):
+        class Datapath(object):
+            pass
+        dp = Datapath()
+        dp.lazy_parse = lazy_parse
+        called = []
+
+        def _parser(buf, offset):
+            called.append((buf, offset))
+            return buf[offset:]
+
+        c = ofproto_parser.MsgBase(dp)
+        c.match = None
+        c._parse_attr('match', _parser, 'abcd', 2)
+        return c, called
+
+    def test_parse_attr(self):
+        c, called = self._test_parse_attr(False)
+        eq_([('abcd', 2)], called)
+        eq_('cd', c.match)
+
+    def test_parse_attr_lazy(self):
+        c, called = self._test_parse_attr(True)
+        eq_([], called)
+        eq_('cd', c.match)
+        eq_('cd', c.match)
+        eq_([('abcd', 2)], called)
+        ok_(not hasattr(c, 'no_such_attr'))
+
+    def test_parse_attr_lazy_stringify(self):
+        c, called = self._test_parse_attr(True)
+        eq_('cd', dict(c.stringify_attrs())['match'])
+        eq_(1, len(called))
+
+    def test_parse_attr_lazy_malformed(self):
+        # an OF1.3 PacketIn whose match has an OXM longer than the match
+        match = bytearray()
+        ofproto_v1_3_parser.OFPMatch(in_port=1).serialize(match, 0)
+        match[7] = 0xff
+        data = 'abcd'
+        body = struct.pack(ofproto_v1_3.OFP_PACKET_IN_PACK_STR,
+                           0xffffffff, len(data), 0, 0, 0)
+        body += str(match) + '\0\0' + data
+        wire = struct.pack(ofproto_v1_3.OFP_HEADER_PACK_STR, 4,
+                           ofproto_v1_3.OFPT_PACKET_IN, 8 + len(body), 1)
+        wire += body
+
+        dp = ofproto_protocol.ProtocolDesc(version=4)
+        eq_(None, ofproto_parser.msg(dp, 4, ofproto_v1_3.OFPT_PACKET_IN,
+                                     len(wire), 1, wire))
+        dp.lazy_parse = True
+        msg = ofproto_parser.msg(dp, 4, ofproto_v1_3.OFPT_PACKET_IN,
+                                 len(wire), 1, wire)
+        eq_(data, msg.data)
+        # reported as a malformed message on every access, logged once
+        with mock.patch.object(ofproto_parser, '_log_malformed') as log:
+            for _i in range(2):
+                assert_raises(exception.OFPMalformedMessage, getattr, msg,
+                              'match')
+            eq_(1, log.call_count)
+            ok_('match=' not in str(msg))
+            ok_("data='abcd'" in str(msg))
+
 
 class TestMsgPackInto(unittest.TestCase):
     """ Test case for ofproto_parser.msg_pack_into
@@ -161,6 +161,13 @@ class Test_Parser(unittest.TestCase):
             open(('/tmp/%s.json' % name), 'wb').write(json.dumps(json_dict2))
             eq_(json_dict, json_dict2)
 
+            # the same with the decoding deferred until the first access
+            lazy_dp = ofproto_protocol.ProtocolDesc(version=version)
+            lazy_dp.lazy_parse = True
+            msg = ofproto_parser.msg(lazy_dp, version, msg_type, msg_len, xid,
+                                     wire_msg)
+            eq_(json_dict, self._msg_to_jsondict(msg))
+
         # json -> OFPxxx -> json
         msg2 = self._jsondict_to_msg(dp, json_dict)
         if has_serializer:
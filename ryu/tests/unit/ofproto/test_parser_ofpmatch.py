@@ -60,6 +60,28 @@ class Test_Parser_OFPMatch(unittest.TestCase):
             ok_(k in d)
             eq_(d[k], v)
 
+        # the single-pass decoder agrees with oxm_parse/oxm_to_user
+        ofp = self._ofp[ofpp]
+        fields = []
+        offset = 4
+        length = match2.length - 4
+        while length > 0:
+            n, value, mask, field_len = ofp.oxm_parse(b, offset)
+            fields.append(ofp.oxm_to_user(n, value, mask))
+            offset += field_len
+            length -= field_len
+        eq_(match2._fields2, fields)
+        eq_(match.parser(b, 0)._fields2, fields)
+        eq_(match.parser(str(b), 0)._fields2, fields)
+
+        # the old api view is only built when it is used
+        eq_(match2._old_fields, None)
+        old = ofpp.OFPMatch()
+        old.parser_old(old, b, 4, match2.length - 4)
+        eq_([f.__dict__ for f in match2.fields],
+            [f.__dict__ for f in old.fields])
+        ok_(match2._old_fields is not None)
+
 
 def _add_tests():
     import new
@@ -17,6 +17,7 @@
 import unittest
 from nose.tools import eq_
 from nose.tools import ok_
+from nose.tools import raises
 
 from ryu.lib.packet import bgp
 from ryu.lib.packet import afi
@@ -289,3 +290,60 @@ class Test_bgp(unittest.TestCase):
         jsondict = msg1.to_jsondict()
         msg2 = bgp.BGPUpdate.from_jsondict(jsondict['BGPUpdate'])
         eq_(str(msg1), str(msg2))
+
+    def test_prefix_parser_list(self):
+        prefixes = [
+            bgp.IPAddrPrefix(length=0, addr='0.0.0.0'),
+            bgp.IPAddrPrefix(length=8, addr='10.0.0.0'),
+            bgp.IPAddrPrefix(length=22, addr='192.0.4.0'),
+            bgp.IPAddrPrefix(length=32, addr='192.0.2.1'),
+        ]
+        bin_prefixes = ''.join(str(p.serialize()) for p in prefixes)
+        parsed = bgp.IPAddrPrefix.parser_list(buffer(bin_prefixes))
+        eq_([str(p) for p in parsed], [str(p) for p in prefixes])
+        rest = bin_prefixes
+        for p in prefixes:
+            p2, rest = bgp.IPAddrPrefix.parser(rest)
+            eq_(str(p2), str(p))
+        eq_(rest, '')
+
+    @raises(AssertionError)
+    def test_prefix_parser_list_too_long(self):
+        # a 40 bit IPv4 prefix
+        bgp.BGPNLRI.parser_list('\x28\x0a\x00\x00\x01\x02')
+
+    @raises(AssertionError)
+    def test_prefix_parser_list_truncated(self):
+        bgp.BGPNLRI.parser_list('\x18\x0a\x00')
+
+    @raises(AssertionError)
+    def test_prefix_parser_truncated(self):
+        bgp.IP6AddrPrefix.parser('\x30\x20\x01\x0d\xb8')
+
+    def test_prefix_lazy_addr(self):
+        # trailing bits are kept as received, and cleared when sent
+        prefix = bgp.IP6AddrPrefix.parser_list('\x1d\x20\x01\x0d\xbf')[0]
+        eq_(prefix._addr, None)
+        eq_(prefix.packed_addr, '\x20\x01\x0d\xbf' + '\0' * 12)
+        eq_(prefix._addr, None)
+        eq_(prefix.prefix, '2001:dbf::/29')
+        eq_(str(prefix.serialize()), '\x1d\x20\x01\x0d\xb8')
+        eq_(prefix.prefix, '2001:db8::/29')
+        prefix.addr = '2001:db8:1::'
+        eq_(prefix.packed_addr, '\x20\x01\x0d\xb8\x00\x01' + '\0' * 10)
+
+    def test_labelled_vpn_prefix_parser_list(self):
+        prefixes = [
+            bgp.LabelledVPNIPAddrPrefix(24, '192.0.9.0',
+                                        route_dist='100:100',
+                                        labels=[1]),
+            bgp.LabelledVPNIPAddrPrefix(26, '192.0.10.192',
+                                        route_dist='10.0.0.1:10000',
+                                        labels=[1048575]),
+        ]
+        bin_prefixes = ''.join(str(p.serialize()) for p in prefixes)
+        parsed = bgp.LabelledVPNIPAddrPrefix.parser_list(bin_prefixes)
+        eq_([p.formatted_nlri_str for p in parsed],
+            ['100:100:192.0.9.0/24', '10.0.0.1:10000:192.0.10.192/26'])
+        eq_([p.label_list for p in parsed], [[1], [1048575]])
+        eq_(''.join(str(p.serialize()) for p in parsed), bin_prefixes)
@@ -0,0 +1,175 @@
+# Copyright (C) 2014 Nippon Telegraph and Telephone Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+import unittest
+import logging
+import random
+from nose.tools import *
+from ryu.controller import ofp_event
+from ryu.lib.packet import arp
+from ryu.lib.packet import classifier
+from ryu.lib.packet import ethernet
+from ryu.lib.packet import ipv4
+from ryu.lib.packet import ipv6
+from ryu.lib.packet import mpls
+from ryu.lib.packet import packet
+from ryu.lib.packet import sctp
+from ryu.lib.packet import tcp
+from ryu.lib.packet import udp
+from ryu.lib.packet import vlan
+from ryu.ofproto import ether, inet
+from ryu.ofproto import ofproto_v1_3, ofproto_v1_3_parser
+from ryu.ofproto.ofproto_protocol import ProtocolDesc
+
+
+LOG = logging.getLogger('test_classifier')
+
+
+class Test_classifier(unittest.TestCase):
+    """ Test case for classifier
+    """
+
+    dst_mac = '00:00:00:00:00:02'
+    src_mac = '00:00:00:00:00:01'
+
+    def _frame(self, rand):
+        e = ethernet.ethernet(self.dst_mac, self.src_mac)
+        protocols = [e]
+        for _i in range(rand.randint(0, 2)):
+            protocols.append(vlan.vlan(vid=rand.randint(1, 4094)))
+        kind = rand.choice(['arp', 'ipv4', 'ipv6', 'mpls', 'llc'])
+        if kind == 'arp':
+            ethertype = ether.ETH_TYPE_ARP
+            l3 = [arp.arp_ip(arp.ARP_REQUEST, self.src_mac, '10.0.0.1',
+                             '00:00:00:00:00:00', '10.0.0.2')]
+        elif kind == 'llc':
+            ethertype = 100
+            l3 = []
+        else:
+            proto = rand.choice([inet.IPPROTO_TCP, inet.IPPROTO_UDP,
+                                 inet.IPPROTO_ICMP])
+            if kind == 'ipv6':
+                ethertype = ether.ETH_TYPE_IPV6
+                l3 = [ipv6.ipv6(src='2001:db8::1', dst='2001:db8::2',
+                                nxt=proto)]
+            else:
+                ethertype = ether.ETH_TYPE_IP
+                l3 = [ipv4.ipv4(src='10.0.0.1', dst='10.0.0.2',
+                                proto=proto)]
+            if kind == 'mpls':
+                ethertype = ether.ETH_TYPE_MPLS
+                l3.insert(0, mpls.mpls(label=100, bsb=1))
+            if proto == inet.IPPROTO_TCP:
+                l3.append(tcp.tcp(1024, 80))
+            elif proto == inet.IPPROTO_UDP:
+                l3.append(udp.udp(1024, 53))
+        for p in protocols[:-1]:
+            p.ethertype = ether.ETH_TYPE_8021Q
+        protocols[-1].ethertype = ethertype
+        pkt = packet.Packet()
+        for p in protocols + l3:
+            pkt.add_protocol(p)
+        pkt.add_protocol('x' * rand.randint(0, 64))
+        pkt.serialize()
+        return str(pkt.data)
+
+    def test_classify(self):
+        data = self._frame(random.Random(0))
+        key = classifier.classify(data)
+        eq_(key, classifier.packet_key(packet.Packet(data)))
+
+    def test_classify_tcp(self):
+        e = ethernet.ethernet(self.dst_mac, self.src_mac, ether.ETH_TYPE_8021Q)
+        v = vlan.vlan(vid=10, ethertype=ether.ETH_TYPE_IP)
+        i = ipv4.ipv4(src='10.0.0.1', dst='10.0.0.2', proto=inet.IPPROTO_TCP)
+        t = tcp.tcp(1024, 80)
+        pkt = e / v / i / t
+        pkt.serialize()
+        key = classifier.classify(str(pkt.data))
+        eq_(key, (self.dst_mac, self.src_mac, ether.ETH_TYPE_IP, 10,
+                  '10.0.0.1', '10.0.0.2', inet.IPPROTO_TCP, 1024, 80))
+
+    def test_classify_random(self):
+        # frames truncated, padded and corrupted are classified as
+        # Packet decodes them
+        rand = random.Random(0)
+        for _i in range(2000):
+            data = bytearray(self._frame(rand))
+            m = rand.random()
+            if m < 0.3:
+                data = data[:rand.randint(0, len(data))]
+            elif m < 0.5:
+                data.extend('\x00' * rand.randint(1, 40))
+            elif m < 0.9:
+                data[rand.randrange(len(data))] = rand.randrange(256)
+            data = str(data)
+            try:
+                pkt = packet.Packet(data)
+            except Exception:
+                continue
+            eq_(classifier.classify(data), classifier.packet_key(pkt))
+
+    def test_classify_ipv6_ext_hdrs(self):
+        e = ethernet.ethernet(self.dst_mac, self.src_mac,
+                              ether.ETH_TYPE_IPV6)
+        i = ipv6.ipv6(src='2001:db8::1', dst='2001:db8::2',
+                      nxt=inet.IPPROTO_FRAGMENT,
+                      ext_hdrs=[ipv6.fragment(nxt=inet.IPPROTO_UDP)])
+        u = udp.udp(1024, 53)
+        pkt = e / i / u
+        pkt.serialize()
+        data = str(pkt.data)
+        eq_(classifier._classify(data), None)
+        key = classifier.classify(data)
+        eq_(key.ip_proto, inet.IPPROTO_UDP)
+        eq_((key.src_port, key.dst_port), (1024, 53))
+
+    def test_classify_sctp(self):
+        e = ethernet.ethernet(self.dst_mac, self.src_mac, ether.ETH_TYPE_IP)
+        i = ipv4.ipv4(src='10.0.0.1', dst='10.0.0.2', proto=inet.IPPROTO_SCTP)
+        s = sctp.sctp(1024, 2905, chunks=[sctp.chunk_data(payload_data='x')])
+        pkt = e / i / s
+        pkt.serialize()
+        data = str(pkt.data)
+        eq_(classifier.classify(data).dst_port, 2905)
+        # a chunk cut short drops the sctp header from Packet
+        eq_(classifier.classify(data[:-4]).dst_port, None)
+
+    def test_classify_empty(self):
+        eq_(classifier.classify(''), classifier.PacketKey(*[None] * 9))
+
+    def test_event(self):
+        data = self._frame(random.Random(1))
+        datapath = ProtocolDesc(version=ofproto_v1_3.OFP_VERSION)
+        msg = ofproto_v1_3_parser.OFPPacketIn(datapath, data=buffer(data))
+        ev = ofp_event.EventOFPPacketIn(msg)
+        ok_(isinstance(ev, ofp_event.EventOFPPacketInBase))
+        key = ev.key
+        eq_(key, classifier.classify(data))
+        ok_(ev.key is key)
+        pkt = ev.packet
+        eq_(str(pkt), str(packet.Packet(data)))
+        ok_(ev.packet is pkt)
+
+    def test_event_packet_first(self):
+        # the key of a decoded packet is taken from the packet
+        data = self._frame(random.Random(2))
+        datapath = ProtocolDesc(version=ofproto_v1_3.OFP_VERSION)
+        msg = ofproto_v1_3_parser.OFPPacketIn(datapath, data=data)
+        ev = ofp_event.EventOFPPacketIn(msg)
+        pkt = ev.packet
+        eq_(ev.key, classifier.packet_key(pkt))
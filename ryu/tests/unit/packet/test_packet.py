@@ -1526,3 +1526,93 @@ class TestPacket(unittest.TestCase):
         ok_(isinstance(pkt.protocols[0], ethernet.ethernet))
         ok_(isinstance(pkt.protocols[1], ipv4.ipv4))
         ok_(isinstance(pkt.protocols[2], udp.udp))
+
+    def _udp_packet(self, payload):
+        e = ethernet.ethernet(self.dst_mac, self.src_mac, ether.ETH_TYPE_IP)
+        i = ipv4.ipv4(proto=inet.IPPROTO_UDP, src=self.src_ip,
+                      dst=self.dst_ip)
+        u = udp.udp(self.src_port, self.dst_port)
+        pkt = e / i / u / payload
+        pkt.serialize()
+        return str(pkt.data)
+
+    def test_parser_from_trailer(self):
+        # the ethernet padding after the ipv4 total length is not payload
+        data = self._udp_packet(self.payload)
+        for buf in [data + '\x00' * 6, bytearray(data + '\x00' * 6)]:
+            pkt = packet.Packet(buf)
+            eq_(len(pkt), 4)
+            eq_(pkt[3], self.payload)
+
+    def test_parser_from_truncated(self):
+        data = self._udp_packet(self.payload)
+        pkt = packet.Packet(data[:14 + 20 + 4])
+        eq_(len(pkt), 3)
+        ok_(isinstance(pkt[1], ipv4.ipv4))
+        eq_(pkt[2], data[14 + 20:14 + 20 + 4])
+
+    def test_parser_compat(self):
+        # parser() still returns the rest of the packet
+        data = self._udp_packet(self.payload)
+        eth, cls, rest = ethernet.ethernet.parser(data)
+        eq_(cls, ipv4.ipv4)
+        eq_(rest, data[14:])
+        ip, cls, rest = ipv4.ipv4.parser(rest + '\x00' * 6)
+        eq_(cls, udp.udp)
+        eq_(rest, data[14 + 20:])
+
+    def test_parser_from_default(self):
+        # headers which only implement parser() are given a copy of the
+        # rest of the packet
+        class _hdr(packet_base.PacketBase):
+            _MIN_LEN = 2
+
+            def __init__(self, value):
+                super(_hdr, self).__init__()
+                self.value = value
+
+            @classmethod
+            def parser(cls, buf):
+                (value,) = struct.unpack_from('!H', buf)
+                return cls(value), udp.udp, buf[2:]
+
+        data = '\x00\x01' + self._udp_packet(self.payload)[14 + 20:]
+        pkt = packet.Packet(data, parse_cls=_hdr)
+        eq_(len(pkt), 3)
+        eq_(pkt[0].value, 1)
+        eq_(pkt[1].dst_port, self.dst_port)
+        eq_(pkt[2], self.payload)
+
+    def test_parser_from_subclass(self):
+        # a subclass overriding parser() only is decoded by it
+        class _udp(udp.udp):
+            @classmethod
+            def parser(cls, buf):
+                msg, next_cls, rest = super(_udp, cls).parser(buf)
+                msg.decoded_by = 'parser'
+                return msg, next_cls, rest
+
+        data = self._udp_packet(self.payload)[14 + 20:]
+        proto, cls, buf, offset, end = _udp.parser_from(data, 0, len(data))
+        ok_(isinstance(proto, _udp))
+        eq_(proto.decoded_by, 'parser')
+        eq_(buf[offset:end], self.payload)
+        pkt = packet.Packet(data, parse_cls=_udp)
+        eq_(pkt[0].decoded_by, 'parser')
+        eq_(pkt[1], self.payload)
+
+    def test_parser_from_default_no_rest(self):
+        # a header whose parser() returns None for no rest leaves an
+        # empty buffer, not None, to the next header
+        class _hdr(packet_base.PacketBase):
+            _MIN_LEN = 2
+
+            @classmethod
+            def parser(cls, buf):
+                return cls(), udp.udp, None
+
+        proto, cls, buf, offset, end = _hdr.parser_from('\x00\x01', 0, 2)
+        eq_((cls, buf, offset, end), (udp.udp, '', 0, 0))
+        # the next header fails to decode as it did with no rest
+        pkt = packet.Packet('\x00\x01', parse_cls=_hdr)
+        eq_(len(pkt), 1)
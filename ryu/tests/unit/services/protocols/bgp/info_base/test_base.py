@@ -0,0 +1,516 @@
+# Copyright (C) 2014 Nippon Telegraph and Telephone Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+import logging
+import random
+from copy import copy
+
+import mock
+from nose.tools import assert_raises, eq_, ok_, raises
+
+from ryu.lib import hub
+from ryu.lib.packet import bgp
+from ryu.services.protocols.bgp import processor
+from ryu.services.protocols.bgp.core_managers import table_manager
+from ryu.services.protocols.bgp.info_base.base import ASPathFilter
+from ryu.services.protocols.bgp.info_base.base import FilterList
+from ryu.services.protocols.bgp.info_base.base import PathAttrMap
+from ryu.services.protocols.bgp.info_base.base import PrefixFilter
+from ryu.services.protocols.bgp.info_base.ipv4 import Ipv4Path
+from ryu.services.protocols.bgp.info_base.ipv4 import Ipv4Table
+from ryu.services.protocols.bgp.info_base.ipv6 import Ipv6Path
+from ryu.services.protocols.bgp.info_base.ipv6 import Ipv6PrefixFilter
+from ryu.services.protocols.bgp.info_base.ipv6 import Ipv6Table
+from ryu.services.protocols.bgp.info_base.vpnv4 import Vpnv4Path
+from ryu.services.protocols.bgp.info_base.vpnv4 import Vpnv4Table
+
+
+LOG = logging.getLogger('test_base')
+
+
+def _received_pattrs(as_path=[65001], med=None, origin=None,
+                     local_pref=None):
+    # Attributes as parsed from an UPDATE, new objects each time.
+    if origin is None:
+        origin = bgp.BGP_ATTR_ORIGIN_IGP
+    attrs = [bgp.BGPPathAttributeOrigin(origin),
+             bgp.BGPPathAttributeAsPath([as_path]),
+             bgp.BGPPathAttributeNextHop('192.0.2.2')]
+    if med is not None:
+        attrs.append(bgp.BGPPathAttributeMultiExitDisc(med))
+    if local_pref is not None:
+        attrs.append(bgp.BGPPathAttributeLocalPref(local_pref))
+    msg = bgp.BGPUpdate(path_attributes=attrs)
+    msg, _rest = bgp.BGPMessage.parser(str(msg.serialize()))
+    return msg.pathattr_map
+
+
+def _path(pattrs, i=0, source=None):
+    nlri = bgp.IPAddrPrefix(24, '10.0.%d.0' % i)
+    return Ipv4Path(source, nlri, 1, pattrs=pattrs, nexthop='192.0.2.2')
+
+
+class Test_PathAttrMap(unittest.TestCase):
+
+    """ Test case for interned path attribute maps
+    """
+
+    def test_intern(self):
+        pattrs1 = PathAttrMap(_received_pattrs()).intern()
+        pattrs2 = PathAttrMap(_received_pattrs()).intern()
+        ok_(pattrs1 is pattrs2)
+        ok_(pattrs1.intern() is pattrs1)
+        pattrs3 = PathAttrMap(_received_pattrs(as_path=[65002])).intern()
+        ok_(pattrs3 is not pattrs1)
+        eq_(pattrs3[bgp.BGP_ATTR_TYPE_AS_PATH].path_seg_list, [[65002]])
+
+    def test_intern_pathattrs(self):
+        pattrs1 = PathAttrMap(_received_pattrs()).intern()
+        pattrs2 = PathAttrMap(_received_pattrs(med=10)).intern()
+        ok_(pattrs1 is not pattrs2)
+        for attr_type in (bgp.BGP_ATTR_TYPE_ORIGIN,
+                          bgp.BGP_ATTR_TYPE_AS_PATH,
+                          bgp.BGP_ATTR_TYPE_NEXT_HOP):
+            ok_(pattrs1[attr_type] is pattrs2[attr_type])
+
+    def test_mp_reach(self):
+        # two UPDATEs of identical path attributes but their NLRIs
+        def _mp_pattrs(prefix, next_hop='192.0.2.2'):
+            nlri = [bgp.LabelledVPNIPAddrPrefix(24, prefix,
+                                                route_dist='65000:1',
+                                                labels=[100])]
+            pattrs = _received_pattrs()
+            pattrs[bgp.BGP_ATTR_TYPE_MP_REACH_NLRI] = \
+                bgp.BGPPathAttributeMpReachNLRI(1, 128, next_hop, nlri)
+            pattrs[bgp.BGP_ATTR_TYPE_MP_UNREACH_NLRI] = \
+                bgp.BGPPathAttributeMpUnreachNLRI(1, 128, nlri)
+            return pattrs
+
+        pattrs1 = PathAttrMap(_mp_pattrs('10.0.0.0')).intern()
+        pattrs2 = PathAttrMap(_mp_pattrs('10.0.1.0')).intern()
+        ok_(pattrs1 is pattrs2)
+        mpreach_attr = pattrs1[bgp.BGP_ATTR_TYPE_MP_REACH_NLRI]
+        eq_((mpreach_attr.afi, mpreach_attr.safi, mpreach_attr.next_hop,
+             mpreach_attr.nlri), (1, 128, '192.0.2.2', []))
+        ok_(bgp.BGP_ATTR_TYPE_MP_UNREACH_NLRI not in pattrs1)
+
+        pattrs3 = PathAttrMap(_mp_pattrs('10.0.0.0', '192.0.2.3')).intern()
+        ok_(pattrs3 is not pattrs1)
+
+    @raises(TypeError)
+    def test_read_only(self):
+        pattrs = PathAttrMap(_received_pattrs()).intern()
+        pattrs[bgp.BGP_ATTR_TYPE_LOCAL_PREF] = bgp.BGPPathAttributeLocalPref(
+            100)
+
+    def test_copy(self):
+        pattrs = PathAttrMap(_received_pattrs()).intern()
+        for c in (copy(pattrs), pattrs.copy()):
+            eq_(type(c), dict)
+            eq_(c, pattrs)
+            c[bgp.BGP_ATTR_TYPE_LOCAL_PREF] = bgp.BGPPathAttributeLocalPref(
+                100)
+
+    def test_path_shares_pattrs(self):
+        pattrs = PathAttrMap(_received_pattrs()).intern()
+        path1 = _path(pattrs, 1)
+        path2 = _path(PathAttrMap(_received_pattrs()).intern(), 2)
+        ok_(path1.has_same_pattrs(path2))
+        ok_(path1.clone().has_same_pattrs(path1))
+        ok_(path1.is_interned_pattr(pattrs[bgp.BGP_ATTR_TYPE_AS_PATH]))
+        ok_(not path1.is_interned_pattr(bgp.BGPPathAttributeAsPath([[1]])))
+
+        # Maps given by callers are still copied.
+        path3 = _path(_received_pattrs(), 3)
+        path4 = _path(path3.pathattr_map, 4)
+        ok_(not path3.has_same_pattrs(path4))
+        ok_(not path3.is_interned_pattr(
+            path3.get_pattr(bgp.BGP_ATTR_TYPE_AS_PATH)))
+
+    def test_compute_best_path(self):
+        # iBGP peers, tie broken by router id
+        source1 = mock.Mock(version_num=1, remote_as=65000)
+        source1.protocol.recv_open_msg.bgp_identifier = '10.0.0.2'
+        source2 = mock.Mock(version_num=1, remote_as=65000)
+        source2.protocol.recv_open_msg.bgp_identifier = '10.0.0.1'
+        pattrs = PathAttrMap(_received_pattrs()).intern()
+        path1 = _path(pattrs, source=source1)
+        path2 = _path(PathAttrMap(_received_pattrs()).intern(),
+                      source=source2)
+        eq_(processor.compute_best_path(65000, path1, path2),
+            (path2, processor.BPR_ROUTER_ID))
+
+        path3 = _path(PathAttrMap(_received_pattrs(med=10)).intern(),
+                      source=source2)
+        eq_(processor.compute_best_path(65000, path1, path3),
+            (path1, processor.BPR_MED))
+
+
+class Test_DecisionKey(unittest.TestCase):
+
+    """ Test case for best paths computed from decision keys, incrementally
+    """
+
+    LOCAL_AS = 65000
+    ROUTER_ID = '10.0.0.100'
+
+    def _sources(self, rand):
+        sources = [None]
+        for i in range(8):
+            source = mock.Mock(version_num=1,
+                               remote_as=rand.choice([self.LOCAL_AS,
+                                                      65001, 65002]))
+            source.protocol.recv_open_msg.bgp_identifier = \
+                '10.0.0.%d' % rand.randint(1, 4)
+            source.protocol.sent_open_msg.bgp_identifier = self.ROUTER_ID
+            sources.append(source)
+        return sources
+
+    def _random_paths(self, rand, sources, count=None):
+        paths = []
+        if count is None:
+            count = rand.randint(1, 5)
+        for source in rand.sample(sources, count):
+            pattrs = _received_pattrs(
+                as_path=[65001] * rand.randint(1, 3),
+                med=rand.choice([None, 0, 10]),
+                origin=rand.choice([bgp.BGP_ATTR_ORIGIN_IGP,
+                                    bgp.BGP_ATTR_ORIGIN_INCOMPLETE]),
+                local_pref=rand.choice([None, 100, 200]))
+            paths.append(_path(PathAttrMap(pattrs).intern(), source=source))
+        return paths
+
+    def _compute_best_path(self, paths):
+        # What Destination did before best paths were updated incrementally.
+        best_path = paths[0]
+        reason = processor.BPR_ONLY_PATH
+        for path in paths[1:]:
+            new_best_path, reason = processor.compute_best_path(
+                self.LOCAL_AS, best_path, path)
+            if new_best_path is not None:
+                best_path = new_best_path
+        return best_path, reason
+
+    def test_decision_key(self):
+        pattrs = PathAttrMap(_received_pattrs(as_path=[65001, 65002],
+                                              med=10, local_pref=200))
+        pattrs = pattrs.intern()
+        path1 = _path(pattrs, 1)
+        path2 = _path(PathAttrMap(pattrs.copy()).intern(), 2)
+        eq_(path1.decision_key, (200, 2, 3, 10))
+        ok_(path1.decision_key is path2.decision_key)
+        path3 = _path(_received_pattrs(origin=bgp.BGP_ATTR_ORIGIN_EGP), 3)
+        eq_(path3.decision_key, processor.DecisionKey(
+            local_pref=None, as_path_len=1, origin_pref=2, med=0))
+
+    def test_incremental(self):
+        rand = random.Random(2)
+        sources = self._sources(rand)[1:]
+        table = Ipv4Table(mock.Mock(asn=self.LOCAL_AS), None)
+        nlri = bgp.IPAddrPrefix(24, '10.0.0.0')
+        for _ in range(1000):
+            source = rand.choice(sources)
+            if rand.randint(1, 4) == 1:
+                dest = table.insert(Ipv4Path(source, nlri, 1,
+                                             is_withdraw=True))
+            else:
+                dest = table.insert(self._random_paths(rand, [source], 1)[0])
+            if rand.randint(1, 2) == 1:
+                continue
+            dest.process()
+            paths = dest.known_path_list
+            if paths:
+                eq_((dest.best_path, dest.best_path_reason),
+                    self._compute_best_path(paths))
+
+    def test_incremental_compares_new_paths(self):
+        rand = random.Random(3)
+        sources = self._sources(rand)[1:]
+        table = Ipv4Table(mock.Mock(asn=self.LOCAL_AS), None)
+        for path in self._random_paths(rand, sources[:7], 7):
+            dest = table.insert(path)
+        dest.process()
+        with mock.patch.object(processor, 'compute_best_path',
+                               wraps=processor.compute_best_path) as compare:
+            dest = table.insert(self._random_paths(rand, sources[7:], 1)[0])
+            dest.process()
+        eq_(compare.call_count, 1)
+        eq_((dest.best_path, dest.best_path_reason),
+            self._compute_best_path(dest.known_path_list))
+
+
+class Test_Slots(unittest.TestCase):
+
+    """ Test case for the per-route objects of the tables being slotted
+    """
+
+    def _test(self, table_cls, path_cls, nlri):
+        table = table_cls(mock.Mock(), None)
+        source = mock.Mock(version_num=1)
+        path = path_cls(source, nlri, 1,
+                        pattrs=PathAttrMap(_received_pattrs()).intern(),
+                        nexthop='192.0.2.2')
+        dest = table.insert(path)
+        for obj in (path, dest, nlri):
+            ok_(not hasattr(obj, '__dict__'), obj.__class__)
+        dest._process_paths()
+        eq_(dest.known_path_list, [path])
+
+    def test_ipv4(self):
+        self._test(Ipv4Table, Ipv4Path, bgp.IPAddrPrefix(24, '10.0.0.0'))
+
+    def test_vpnv4(self):
+        nlri = bgp.LabelledVPNIPAddrPrefix(24, '10.0.0.0',
+                                           route_dist='65000:1',
+                                           labels=[100])
+        ok_(not hasattr(nlri.addr[1], '__dict__'))
+        self._test(Vpnv4Table, Vpnv4Path, nlri)
+
+
+class Test_PrefixIndex(unittest.TestCase):
+
+    """ Test case for prefix lookups of the tables
+    """
+
+    def _insert(self, table, path_cls, nlri):
+        path = path_cls(mock.Mock(version_num=1), nlri, 1,
+                        pattrs=PathAttrMap(_received_pattrs()).intern(),
+                        nexthop='192.0.2.2')
+        return table.insert(path)
+
+    def _ipv4_table(self):
+        table = Ipv4Table(mock.Mock(), None)
+        for prefix in ['0.0.0.0/0', '10.0.0.0/8', '10.1.0.0/16',
+                       '10.1.2.0/24', '10.2.0.0/16', '192.0.2.0/24']:
+            addr, length = prefix.split('/')
+            self._insert(table, Ipv4Path,
+                         bgp.IPAddrPrefix(int(length), addr))
+        return table
+
+    def _prefixes(self, dests):
+        return [dest.nlri.formatted_nlri_str for dest in dests]
+
+    def test_ipv4(self):
+        table = self._ipv4_table()
+        eq_(table.get_dest_by_prefix('10.1.0.0/16').nlri.prefix,
+            '10.1.0.0/16')
+        eq_(table.get_dest_by_prefix('10.1.0.0/17'), None)
+        eq_(table.get_longest_match_dest('10.1.2.3').nlri.prefix,
+            '10.1.2.0/24')
+        eq_(table.get_longest_match_dest('10.3.0.1').nlri.prefix,
+            '10.0.0.0/8')
+        eq_(table.get_longest_match_dest('11.0.0.1').nlri.prefix,
+            '0.0.0.0/0')
+        eq_(self._prefixes(table.get_covering_dests('10.1.2.0/25')),
+            ['0.0.0.0/0', '10.0.0.0/8', '10.1.0.0/16', '10.1.2.0/24'])
+        eq_(self._prefixes(table.get_more_specific_dests('10.0.0.0/8')),
+            ['10.0.0.0/8', '10.1.0.0/16', '10.1.2.0/24', '10.2.0.0/16'])
+        eq_(table.get_more_specific_dests('172.16.0.0/12'), [])
+
+    def test_delete(self):
+        table = self._ipv4_table()
+        dest = table.get_dest_by_prefix('10.1.0.0/16')
+        table.delete_dest(dest)
+        eq_(table.get_longest_match_dest('10.1.0.1').nlri.prefix,
+            '10.0.0.0/8')
+        ok_(table.delete_dest_by_nlri(bgp.IPAddrPrefix(8, '10.0.0.0')))
+        eq_(table.get_longest_match_dest('10.1.0.1').nlri.prefix,
+            '0.0.0.0/0')
+        eq_(len(list(table.itervalues())), 4)
+
+    def test_build_in_chunks(self):
+        # destinations created and deleted while the index is built are
+        # indexed as they are afterwards
+        table = self._ipv4_table()
+        table.PREFIX_INDEX_BUILD_CHUNK = 2
+        building = []
+        waited = []
+
+        def _change():
+            building.append(table._prefix_index_building is not None)
+            ok_(table.delete_dest_by_nlri(bgp.IPAddrPrefix(16, '10.1.0.0')))
+            ok_(table.delete_dest_by_nlri(bgp.IPAddrPrefix(16, '10.2.0.0')))
+            self._insert(table, Ipv4Path, bgp.IPAddrPrefix(16, '10.2.0.0'))
+            self._insert(table, Ipv4Path, bgp.IPAddrPrefix(24, '10.1.3.0'))
+            # waits for the index to be built
+            waited.append(table.get_longest_match_dest('10.1.0.1'))
+
+        thr = hub.spawn(_change)
+        eq_(table.get_longest_match_dest('10.1.3.1').nlri.prefix,
+            '10.1.3.0/24')
+        hub.joinall([thr])
+        eq_(building, [True])
+        eq_(waited[0].nlri.prefix, '10.0.0.0/8')
+        dests = table.get_more_specific_dests('0.0.0.0/0')
+        eq_(sorted(self._prefixes(dests)),
+            sorted(self._prefixes(table.itervalues())))
+        for dest in dests:
+            ok_(table._get_dest(dest.nlri) is dest)
+
+    def test_build_failed(self):
+        # a thread waiting for a build which fails builds the index
+        table = self._ipv4_table()
+        table.PREFIX_INDEX_BUILD_CHUNK = 2
+        nlri_index_key = table._nlri_index_key
+        calls = []
+
+        def _nlri_index_key(nlri):
+            calls.append(nlri)
+            if len(calls) == 3:
+                raise RuntimeError('failed')
+            return nlri_index_key(nlri)
+
+        waited = []
+        thr = hub.spawn(lambda: waited.append(
+            table.get_longest_match_dest('10.1.0.1')))
+        with mock.patch.object(table, '_nlri_index_key', _nlri_index_key):
+            assert_raises(RuntimeError, table.get_longest_match_dest,
+                          '10.1.2.3')
+            eq_(table._prefix_index, None)
+            hub.joinall([thr])
+        eq_(waited[0].nlri.prefix, '10.1.0.0/16')
+        eq_(len(calls), 3 + 6)
+        eq_(table.get_longest_match_dest('10.1.2.3').nlri.prefix,
+            '10.1.2.0/24')
+
+    @raises(ValueError)
+    def test_invalid_prefix(self):
+        self._ipv4_table().get_dest_by_prefix('10.0.0.0/33')
+
+    def test_ipv6(self):
+        table = Ipv6Table(mock.Mock(), None)
+        for prefix in ['2001:db8::/32', '2001:db8:1::/48', '2001:db9::/32']:
+            addr, length = prefix.split('/')
+            self._insert(table, Ipv6Path,
+                         bgp.IP6AddrPrefix(int(length), addr))
+        eq_(table.get_longest_match_dest('2001:db8:1::1').nlri.prefix,
+            '2001:db8:1::/48')
+        eq_(self._prefixes(table.get_more_specific_dests('2001:db8::/31')),
+            ['2001:db8::/32', '2001:db8:1::/48', '2001:db9::/32'])
+
+    def test_vpnv4(self):
+        table = Vpnv4Table(mock.Mock(), None)
+        for route_dist in ['65000:1', '65000:2']:
+            for prefix in ['10.0.0.0/8', '10.1.0.0/16']:
+                addr, length = prefix.split('/')
+                self._insert(table, Vpnv4Path, bgp.LabelledVPNIPAddrPrefix(
+                    int(length), addr, route_dist=route_dist, labels=[100]))
+        eq_(table.get_longest_match_dest('10.1.0.1', '65000:2')
+            .nlri.formatted_nlri_str, '65000:2:10.1.0.0/16')
+        eq_(self._prefixes(table.get_more_specific_dests('10.0.0.0/8',
+                                                         '65000:1')),
+            ['65000:1:10.0.0.0/8', '65000:1:10.1.0.0/16'])
+        eq_(table.get_dest_by_prefix('10.0.0.0/8', '65000:3'), None)
+
+    @raises(ValueError)
+    def test_vpnv4_requires_route_dist(self):
+        Vpnv4Table(mock.Mock(), None).get_dest_by_prefix('10.0.0.0/8')
+
+    def test_lookup_dests(self):
+        tm = table_manager.TableCoreManager(
+            mock.Mock(), mock.Mock(label_range=(100, 200)))
+        tm._global_tables[bgp.RF_IPv4_UC] = self._ipv4_table()
+        eq_(self._prefixes(tm.lookup_dests(
+            bgp.RF_IPv4_UC, '10.1.2.3',
+            match=table_manager.PREFIX_MATCH_LONGEST)), ['10.1.2.0/24'])
+        eq_(self._prefixes(tm.lookup_dests(
+            bgp.RF_IPv4_UC, '10.2.0.0/16')), ['10.2.0.0/16'])
+        eq_(tm.lookup_dests(bgp.RF_IPv4_UC, '10.2.0.0/15'), [])
+        eq_(len(tm.lookup_dests(
+            bgp.RF_IPv4_UC, '10.0.0.0/8',
+            match=table_manager.PREFIX_MATCH_MORE_SPECIFIC)), 4)
+        self.assertRaises(ValueError, tm.lookup_dests, bgp.RF_IPv4_UC,
+                          '10.0.0.0/8', route_dist='65000:1')
+
+
+class Test_FilterList(unittest.TestCase):
+
+    """ Test case for compiled filter lists
+    """
+
+    def _first_match(self, filters, path):
+        # What Peer did before filter lists were compiled.
+        for filter_ in filters:
+            if filter_.ROUTE_FAMILY != path.ROUTE_FAMILY:
+                continue
+            policy, is_matched = filter_.evaluate(path)
+            if is_matched and policy in (PrefixFilter.POLICY_PERMIT,
+                                         PrefixFilter.POLICY_DENY):
+                return filter_
+        return None
+
+    def _path(self, prefix):
+        addr, length = prefix.split('/')
+        return Ipv4Path(None, bgp.IPAddrPrefix(int(length), addr), 1,
+                        pattrs=_received_pattrs(), nexthop='192.0.2.2')
+
+    def test_first_match(self):
+        deny_26 = PrefixFilter('10.5.111.0/24', PrefixFilter.POLICY_DENY,
+                               ge=26, le=28)
+        permit_8 = PrefixFilter('10.0.0.0/8', PrefixFilter.POLICY_PERMIT)
+        deny_all = PrefixFilter('0.0.0.0/0', PrefixFilter.POLICY_DENY)
+        filters = FilterList([deny_26, permit_8, deny_all])
+        eq_(filters.first_match(self._path('10.5.111.64/26')), deny_26)
+        eq_(filters.first_match(self._path('10.5.111.0/24')), permit_8)
+        eq_(filters.first_match(self._path('10.5.111.128/29')), permit_8)
+        eq_(filters.first_match(self._path('192.0.2.0/24')), deny_all)
+        eq_(FilterList([deny_26]).first_match(self._path('10.0.0.0/8')),
+            None)
+        eq_(len(filters), 3)
+        eq_(list(filters), [deny_26, permit_8, deny_all])
+
+    def test_other_filters(self):
+        as_path = ASPathFilter(65001, ASPathFilter.POLICY_TOP)
+        deny_all = PrefixFilter('0.0.0.0/0', PrefixFilter.POLICY_DENY)
+        ipv6 = Ipv6PrefixFilter('::/0', PrefixFilter.POLICY_DENY)
+        path = self._path('10.0.0.0/8')
+        eq_(FilterList([as_path, ipv6, deny_all]).first_match(path),
+            deny_all)
+
+        evaluated = []
+
+        class _PermitAll(PrefixFilter):
+            def evaluate(self, path):
+                evaluated.append(path)
+                return self.POLICY_PERMIT, True
+
+        other = _PermitAll('192.0.2.0/24', PrefixFilter.POLICY_PERMIT)
+        eq_(FilterList([other, deny_all]).first_match(path), other)
+        eq_(FilterList([deny_all, other]).first_match(path), deny_all)
+        eq_(evaluated, [path])
+
+    def test_random(self):
+        rand = random.Random(0)
+
+        def prefix(min_length, max_length):
+            length = rand.randint(min_length, max_length)
+            addr = rand.randint(0, 0xffff) << 16
+            addr &= (0xffffffff << (32 - length)) & 0xffffffff
+            return '%d.%d.0.0/%d' % (addr >> 24, (addr >> 16) & 0xff, length)
+
+        filters = []
+        for _ in range(300):
+            ge = rand.choice([None, 0, 8, 12, 16])
+            le = rand.choice([None, 0, 16, 20, 24])
+            filters.append(PrefixFilter(
+                prefix(0, 14), rand.choice([PrefixFilter.POLICY_PERMIT,
+                                            PrefixFilter.POLICY_DENY]),
+                ge=ge, le=le))
+        filter_list = FilterList(filters)
+        for _ in range(1000):
+            path = self._path(prefix(8, 24))
+            ok_(filter_list.first_match(path) is
+                self._first_match(filters, path))
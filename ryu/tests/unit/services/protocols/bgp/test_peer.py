@@ -0,0 +1,462 @@
+# Copyright (C) 2014 Nippon Telegraph and Telephone Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+import logging
+
+import mock
+from nose.tools import eq_, ok_
+
+from ryu.lib.packet import bgp
+from ryu.services.protocols.bgp import constants as const
+from ryu.services.protocols.bgp import peer
+from ryu.services.protocols.bgp import speaker
+from ryu.services.protocols.bgp.base import OrderedDict
+from ryu.services.protocols.bgp.base import Sink
+from ryu.services.protocols.bgp.base import Source
+from ryu.services.protocols.bgp.core_managers.peer_manager import PeerManager
+from ryu.services.protocols.bgp.info_base.base import FilterList
+from ryu.services.protocols.bgp.info_base.base import PathAttrMap
+from ryu.services.protocols.bgp.info_base.base import PrefixFilter
+from ryu.services.protocols.bgp.info_base.ipv4 import Ipv4Path
+from ryu.services.protocols.bgp.info_base.vpnv4 import Vpnv4Path
+from ryu.services.protocols.bgp.model import OutgoingRoute
+
+
+LOG = logging.getLogger('test_peer')
+
+
+def _pattrs(as_path):
+    pattrs = OrderedDict()
+    pattrs[bgp.BGP_ATTR_TYPE_ORIGIN] = bgp.BGPPathAttributeOrigin(
+        bgp.BGP_ATTR_ORIGIN_IGP)
+    pattrs[bgp.BGP_ATTR_TYPE_AS_PATH] = bgp.BGPPathAttributeAsPath(
+        [as_path])
+    return pattrs
+
+
+def _ipv4_path(i, as_path=[65001], is_withdraw=False):
+    nlri = bgp.IPAddrPrefix(24, '10.%d.%d.0' % (i / 256, i % 256))
+    if is_withdraw:
+        return Ipv4Path(None, nlri, 1, is_withdraw=True)
+    return Ipv4Path(None, nlri, 1, pattrs=_pattrs(as_path),
+                    nexthop='192.0.2.2')
+
+
+def _vpnv4_path(i, is_withdraw=False):
+    nlri = bgp.LabelledVPNIPAddrPrefix(
+        24, '10.%d.%d.0' % (i / 256, i % 256), route_dist='65000:1',
+        labels=[100])
+    if is_withdraw:
+        return Vpnv4Path(None, nlri, 1, is_withdraw=True)
+    return Vpnv4Path(None, nlri, 1, pattrs=_pattrs([65001]),
+                     nexthop='192.0.2.2')
+
+
+class Test_Peer(unittest.TestCase):
+
+    """ Test case for packing outgoing routes into UPDATE messages
+    """
+
+    def setUp(self):
+        self.peer = self._peer(65002)
+
+    def _peer(self, remote_as):
+        p = peer.Peer.__new__(peer.Peer)
+        p._common_conf = mock.Mock(local_as=65000)
+        p._neigh_conf = mock.Mock(remote_as=remote_as, next_hop='192.0.2.1',
+                                  multi_exit_disc=None, soo_list=None,
+                                  is_route_server_client=False,
+                                  is_next_hop_self=False)
+        p._core_service = mock.Mock(asn=65000)
+        p._attribute_maps = {}
+        p._update_group = None
+        p.state = peer.PeerState(p, mock.Mock())
+        return p
+
+    def _parse(self, update):
+        buf = update.serialize()
+        ok_(len(buf) <= speaker.BGP_MAX_MSG_LEN)
+        msg, rest = bgp.BGPMessage.parser(str(buf))
+        eq_(rest, '')
+        return msg
+
+    def _prefixes(self, nlri_list):
+        return [n.formatted_nlri_str for n in nlri_list]
+
+    def test_construct_update(self):
+        path = _ipv4_path(1)
+        update = self.peer._construct_update(OutgoingRoute(path))
+        msg = self._parse(update)
+        eq_(self._prefixes(msg.nlri), ['10.0.1.0/24'])
+        eq_(msg.get_path_attr(bgp.BGP_ATTR_TYPE_AS_PATH).path_seg_list,
+            [[65000, 65001]])
+        eq_(msg.get_path_attr(bgp.BGP_ATTR_TYPE_NEXT_HOP).value,
+            '192.0.2.1')
+
+    def test_construct_updates_grouped(self):
+        paths = [_ipv4_path(i, as_path=[65001 + i % 2]) for i in xrange(10)]
+        updates = self.peer._construct_updates(paths)
+        eq_(len(updates), 2)
+        for i, update in enumerate(updates):
+            msg = self._parse(update)
+            eq_(self._prefixes(msg.nlri),
+                self._prefixes(p.nlri for p in paths[i::2]))
+            eq_(msg.get_path_attr(bgp.BGP_ATTR_TYPE_AS_PATH).path_seg_list,
+                [[65000, 65001 + i]])
+
+    def test_construct_updates_interned(self):
+        paths = []
+        for i in xrange(10):
+            pattrs = PathAttrMap(_pattrs([65001 + i % 2])).intern()
+            paths.append(Ipv4Path(None, _ipv4_path(i).nlri, 1, pattrs=pattrs,
+                                  nexthop='192.0.2.2'))
+        ok_(paths[0].has_same_pattrs(paths[2]))
+        updates = self.peer._construct_updates(paths)
+        eq_(len(updates), 2)
+        for i, update in enumerate(updates):
+            eq_(self._prefixes(self._parse(update).nlri),
+                self._prefixes(p.nlri for p in paths[i::2]))
+
+    def _cache_counts(self, p):
+        return (p.state.get_count(
+                peer.PeerCounterNames.SENT_PATHATTRS_CACHE_HITS),
+                p.state.get_count(
+                    peer.PeerCounterNames.SENT_PATHATTRS_CACHE_MISSES))
+
+    def test_construct_updates_cached(self):
+        pattrs = PathAttrMap(_pattrs([64512])).intern()
+        paths = [Ipv4Path(None, _ipv4_path(i).nlri, 1, pattrs=pattrs,
+                          nexthop='192.0.2.2') for i in xrange(3)]
+        updates = self.peer._construct_updates(paths)
+        eq_(self._cache_counts(self.peer), (2, 1))
+
+        # Another peer of the same outbound policy
+        other = self._peer(65003)
+        eq_([str(u.serialize()) for u in other._construct_updates(paths)],
+            [str(u.serialize()) for u in updates])
+        eq_(self._cache_counts(other), (3, 0))
+        eq_(other.state.pathattrs_cache_hit_ratio, 1.0)
+
+        msg = self._parse(updates[0])
+        eq_(self._prefixes(msg.nlri), self._prefixes(p.nlri for p in paths))
+        eq_(msg.get_path_attr(bgp.BGP_ATTR_TYPE_AS_PATH).path_seg_list,
+            [[65000, 64512]])
+        # The shared path attributes are left as they are.
+        eq_(paths[0].get_pattr(bgp.BGP_ATTR_TYPE_AS_PATH).path_seg_list,
+            [[64512]])
+
+        # An iBGP peer
+        ibgp = self._peer(65000)
+        msg = self._parse(ibgp._construct_update(OutgoingRoute(paths[0])))
+        eq_(self._cache_counts(ibgp), (0, 1))
+        eq_(msg.get_path_attr(bgp.BGP_ATTR_TYPE_AS_PATH).path_seg_list,
+            [[64512]])
+        eq_(msg.get_path_attr(bgp.BGP_ATTR_TYPE_LOCAL_PREF).value, 100)
+        eq_(msg.get_path_attr(bgp.BGP_ATTR_TYPE_NEXT_HOP).value, '192.0.2.1')
+
+    def test_construct_updates_cached_mp(self):
+        pattrs = PathAttrMap(_pattrs([64513])).intern()
+        paths = [Vpnv4Path(None, _vpnv4_path(i).nlri, 1, pattrs=pattrs,
+                           nexthop='192.0.2.2') for i in xrange(3)]
+        updates = self.peer._construct_updates(paths[:1])
+        updates += self.peer._construct_updates(paths[1:])
+        eq_(self._cache_counts(self.peer), (2, 1))
+        eq_(len(updates), 2)
+        for update, nlri_list in zip(updates, [paths[:1], paths[1:]]):
+            msg = self._parse(update)
+            attr = msg.get_path_attr(bgp.BGP_ATTR_TYPE_MP_REACH_NLRI)
+            eq_(attr.next_hop, '192.0.2.1')
+            eq_(self._prefixes(attr.nlri),
+                self._prefixes(p.nlri for p in nlri_list))
+            eq_(msg.get_path_attr(bgp.BGP_ATTR_TYPE_AS_PATH).path_seg_list,
+                [[65000, 64513]])
+
+    def test_construct_updates_route_server_client(self):
+        # MP_REACH_NLRI of shared path attributes carries no NLRIs
+        paths = []
+        for i in xrange(2):
+            pattrs = _pattrs([64514])
+            pattrs[bgp.BGP_ATTR_TYPE_MP_REACH_NLRI] = \
+                bgp.BGPPathAttributeMpReachNLRI(
+                    1, 128, '192.0.2.2', [_vpnv4_path(i).nlri])
+            paths.append(Vpnv4Path(None, _vpnv4_path(i).nlri, 1,
+                                   pattrs=PathAttrMap(pattrs).intern(),
+                                   nexthop='192.0.2.2'))
+        ok_(paths[0].has_same_pattrs(paths[1]))
+        self.peer._neigh_conf.is_route_server_client = True
+        updates = self.peer._construct_updates(paths)
+        eq_(len(updates), 2)
+        for update, path in zip(updates, paths):
+            msg = self._parse(update)
+            attr = msg.get_path_attr(bgp.BGP_ATTR_TYPE_MP_REACH_NLRI)
+            eq_(attr.next_hop, '192.0.2.2')
+            eq_(self._prefixes(attr.nlri), self._prefixes([path.nlri]))
+            eq_(msg.get_path_attr(bgp.BGP_ATTR_TYPE_AS_PATH).path_seg_list,
+                [[64514]])
+
+    def test_construct_updates_max_len(self):
+        paths = [_ipv4_path(i) for i in xrange(3000)]
+        updates = self.peer._construct_updates(paths)
+        nlri_list = []
+        for update in updates:
+            nlri_list.extend(self._parse(update).nlri)
+        eq_(self._prefixes(nlri_list), self._prefixes(p.nlri for p in paths))
+        eq_(len(updates), 3)
+
+    def test_construct_updates_withdraw(self):
+        paths = [_ipv4_path(i, is_withdraw=True) for i in xrange(2000)]
+        paths.append(_ipv4_path(2000))
+        updates = self.peer._construct_updates(paths)
+        eq_(len(updates), 3)
+        withdrawn = []
+        for update in updates[:2]:
+            msg = self._parse(update)
+            eq_(msg.nlri, [])
+            withdrawn.extend(msg.withdrawn_routes)
+        eq_(self._prefixes(withdrawn),
+            self._prefixes(p.nlri for p in paths[:-1]))
+        eq_(self._prefixes(self._parse(updates[2]).nlri), ['10.7.208.0/24'])
+
+    def test_construct_updates_mp(self):
+        paths = [_vpnv4_path(i) for i in xrange(1000)]
+        paths.extend(_vpnv4_path(i, is_withdraw=True)
+                     for i in xrange(1000, 2000))
+        updates = self.peer._construct_updates(paths)
+        reach = []
+        unreach = []
+        for update in updates:
+            msg = self._parse(update)
+            attr = msg.get_path_attr(bgp.BGP_ATTR_TYPE_MP_REACH_NLRI)
+            if attr:
+                eq_(attr.next_hop, '192.0.2.1')
+                reach.extend(attr.nlri)
+            else:
+                attr = msg.get_path_attr(bgp.BGP_ATTR_TYPE_MP_UNREACH_NLRI)
+                unreach.extend(attr.withdrawn_routes)
+        eq_(self._prefixes(reach),
+            self._prefixes(p.nlri for p in paths[:1000]))
+        eq_(self._prefixes(unreach),
+            self._prefixes(p.nlri for p in paths[1000:]))
+        ok_(len(updates) < 20)
+
+    def test_pop_outgoing_routes(self):
+        self.peer.OUTGOING_ROUTE_BATCH_WINDOW = 0
+        self.peer.outgoing_msg_list = peer.Peer.OutgoingMsgList()
+        routes = [OutgoingRoute(_ipv4_path(i)) for i in xrange(5)]
+        dup = OutgoingRoute(_ipv4_path(2, is_withdraw=True))
+        eor = bgp.BGPUpdate()
+        for msg in routes[1:3] + [dup] + routes[3:] + [eor]:
+            self.peer.outgoing_msg_list.append(msg)
+
+        eq_(self.peer._pop_outgoing_routes(routes[0]), routes[:3])
+        first = self.peer.outgoing_msg_list.pop_first()
+        ok_(first is dup)
+        eq_(self.peer._pop_outgoing_routes(first), [dup] + routes[3:])
+        ok_(self.peer.outgoing_msg_list.pop_first() is eor)
+
+    def test_apply_filter(self):
+        self.peer._adj_rib_in = {}
+        self.peer._adj_rib_out = {}
+        self.peer.out_filters = []
+        self.peer.in_filters = [
+            PrefixFilter('10.0.1.0/24', PrefixFilter.POLICY_PERMIT),
+            PrefixFilter('10.0.0.0/8', PrefixFilter.POLICY_DENY, le=24)]
+        eq_(self.peer._apply_in_filter(_ipv4_path(1)), (False, None))
+        eq_(self.peer._apply_in_filter(_ipv4_path(2)),
+            (True, '10.0.0.0/8 - DENY'))
+        eq_(self.peer._apply_out_filter(_ipv4_path(2)), (False, None))
+
+        self.peer.out_filters = [
+            PrefixFilter('10.0.2.0/24', PrefixFilter.POLICY_DENY)]
+        eq_(self.peer._apply_out_filter(_ipv4_path(2)),
+            (True, '10.0.2.0/24 - DENY'))
+        eq_(self.peer._apply_out_filter(_ipv4_path(1)), (False, None))
+
+
+class Test_UpdateGroup(unittest.TestCase):
+
+    """ Test case for sending routes to the peers of an update group
+    """
+
+    def setUp(self):
+        self.peer_manager = PeerManager(mock.Mock(), None)
+        self.global_tables = {bgp.RF_IPv4_UC: OrderedDict()}
+        self.a = self._member()
+        self.b = self._member()
+        for member in [self.a, self.b]:
+            ok_(not member._send_update_group_batch())
+        self.group = self.a.update_group
+        ok_(self.group is not None)
+        ok_(self.b.update_group is self.group)
+
+    def _member(self):
+        p = peer.Peer.__new__(peer.Peer)
+        Source.__init__(p, version_num=1)
+        Sink.__init__(p)
+        p._common_conf = mock.Mock(local_as=65000)
+        p._neigh_conf = mock.Mock(remote_as=65002, next_hop='192.0.2.1',
+                                  multi_exit_disc=None, soo_list=None,
+                                  is_route_server_client=False,
+                                  is_next_hop_self=False)
+        p._core_service = mock.Mock(asn=65000)
+        p._core_service.table_manager.global_tables = self.global_tables
+        p._attribute_maps = {}
+        p._out_filters = []
+        p._out_filter_list = FilterList([])
+        p._adj_rib_out = {}
+        p._signal_bus = mock.Mock()
+        p._peer_manager = self.peer_manager
+        p._update_group = None
+        p._protocol = mock.Mock(negotiated_afs=[bgp.RF_IPv4_UC])
+        p._protocol.is_mbgp_cap_valid.side_effect = \
+            lambda rf: rf == bgp.RF_IPv4_UC
+        p.state = peer.PeerState(p, mock.Mock())
+        p.state._bgp_state = const.BGP_FSM_ESTABLISHED
+        return p
+
+    def _sent(self, member):
+        return [args[0] for args, _kwargs
+                in member._protocol.send_serialized.call_args_list]
+
+    def _queued(self, member):
+        return [(r.path.nlri.formatted_nlri_str, r.path.is_withdraw)
+                for r in member.outgoing_msg_list]
+
+    def test_shared_batch(self):
+        for i in xrange(3):
+            self.group.communicate_path(_ipv4_path(i))
+        for member in [self.a, self.b]:
+            ok_(member._send_update_group_batch())
+            ok_(not member._send_update_group_batch())
+            eq_(sorted(member._adj_rib_out),
+                ['10.0.0.0/24', '10.0.1.0/24', '10.0.2.0/24'])
+            eq_(member.state.get_count(peer.PeerCounterNames.SENT_PREFIXES),
+                3)
+        eq_(len(self._sent(self.a)), 1)
+        eq_(self._sent(self.a), self._sent(self.b))
+        msg, _rest = bgp.BGPMessage.parser(self._sent(self.a)[0])
+        eq_(msg.get_path_attr(bgp.BGP_ATTR_TYPE_AS_PATH).path_seg_list,
+            [[65000, 65001]])
+        eq_(self.group._batches, [])
+
+    def test_withdrawal(self):
+        for member in [self.a, self.b]:
+            member.enque_outgoing_msg(
+                OutgoingRoute(_ipv4_path(1, is_withdraw=True)))
+        eq_(self._queued(self.group), [('10.0.1.0/24', True)])
+        eq_(self._queued(self.a), [])
+
+        # A route of its own makes a member leave the group.
+        self.a.enque_outgoing_msg(OutgoingRoute(_ipv4_path(2)))
+        eq_(self.a.update_group, None)
+        eq_(self.group.members, [self.b])
+        eq_(self._queued(self.a),
+            [('10.0.1.0/24', True), ('10.0.2.0/24', False)])
+        eq_(self._queued(self.group), [('10.0.1.0/24', True)])
+
+    def test_leave(self):
+        self.group.communicate_path(_ipv4_path(1))
+        ok_(self.a._send_update_group_batch())
+        self.group.communicate_path(_ipv4_path(2))
+        self.b._leave_update_group()
+        eq_(self._queued(self.b),
+            [('10.0.1.0/24', False), ('10.0.2.0/24', False)])
+        eq_(self.group._batches, [])
+        eq_(self._queued(self.group), [('10.0.2.0/24', False)])
+
+        self.a._leave_update_group(requeue=False)
+        eq_(self._queued(self.a), [])
+        eq_(self.peer_manager._update_groups, {})
+
+    def test_join(self):
+        self.group.communicate_path(_ipv4_path(1))
+        c = self._member()
+        ok_(not c._send_update_group_batch())
+        ok_(c.update_group is self.group)
+        self.group.communicate_path(_ipv4_path(2))
+        ok_(c._send_update_group_batch())
+        eq_(sorted(c._adj_rib_out), ['10.0.2.0/24'])
+        for member in [self.a, self.b]:
+            ok_(member._send_update_group_batch())
+            ok_(member._send_update_group_batch())
+            eq_(sorted(member._adj_rib_out), ['10.0.1.0/24', '10.0.2.0/24'])
+
+    def test_excluded(self):
+        own = _ipv4_path(1)
+        own._source = self.a
+        self.group.communicate_path(own)
+        self.group.communicate_path(_ipv4_path(2))
+        for member in [self.a, self.b]:
+            ok_(member._send_update_group_batch())
+        eq_(sorted(self.a._adj_rib_out), ['10.0.2.0/24'])
+        eq_(sorted(self.b._adj_rib_out), ['10.0.1.0/24', '10.0.2.0/24'])
+        eq_(self._sent(self.a), [])
+        eq_(len(self._sent(self.b)), 1)
+        (update, ), _kwargs = self.a._protocol.send.call_args
+        eq_(self._prefixes_sent(update), ['10.0.2.0/24'])
+
+    def _prefixes_sent(self, update):
+        msg, _rest = bgp.BGPMessage.parser(str(update.serialize()))
+        return [n.formatted_nlri_str for n in msg.nlri]
+
+    def _learn(self, *paths):
+        table = self.global_tables[bgp.RF_IPv4_UC]
+        for path in paths:
+            table[path.nlri.formatted_nlri_str] = mock.Mock(best_path=path)
+
+    def test_dump(self):
+        self._learn(_ipv4_path(1), _ipv4_path(2), _ipv4_path(3))
+        self.global_tables[bgp.RF_IPv4_UC]['10.0.2.0/24'].best_path = None
+        c = self._member()
+        c.OUTGOING_ROUTE_BATCH_SIZE = 1
+        c._enqueue_init_updates()
+        ok_(c.update_group is self.group)
+        eq_(self._queued(c), [])
+        ok_(c._send_update_group_batch())
+        eq_(sorted(c._adj_rib_out), ['10.0.1.0/24'])
+
+        # Changes made during the dump are sent after it.
+        self._learn(_ipv4_path(4))
+        self.group.communicate_path(_ipv4_path(4))
+        d = self._member()
+        d._enqueue_init_updates()
+        for member in [c, d]:
+            while member._send_update_group_batch():
+                pass
+            eq_(sorted(member._adj_rib_out),
+                ['10.0.1.0/24', '10.0.3.0/24', '10.0.4.0/24'])
+        eq_(self._sent(c), self._sent(d))
+        eq_(len(self._sent(c)), 3)
+        eq_(self.group._dump, None)
+
+        for member in [self.a, self.b]:
+            ok_(member._send_update_group_batch())
+            ok_(not member._send_update_group_batch())
+            eq_(sorted(member._adj_rib_out), ['10.0.4.0/24'])
+        eq_(self.group._batches, [])
+
+    def test_dump_leave(self):
+        self._learn(_ipv4_path(1), _ipv4_path(2), _ipv4_path(3))
+        c = self._member()
+        c.OUTGOING_ROUTE_BATCH_SIZE = 1
+        c._enqueue_init_updates()
+        ok_(c._send_update_group_batch())
+        self.group.communicate_path(_ipv4_path(4))
+        c._leave_update_group()
+        eq_(self._queued(c), [('10.0.2.0/24', False), ('10.0.3.0/24', False),
+                              ('10.0.4.0/24', False)])
+        eq_(self.group._dump, None)
+        eq_(set(self.group.members), set([self.a, self.b]))
@@ -0,0 +1,137 @@
+# Copyright (C) 2014 Nippon Telegraph and Telephone Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+import logging
+
+import mock
+from nose.tools import eq_, raises
+
+from ryu.lib.packet import bgp
+from ryu.services.protocols.bgp import speaker
+
+
+LOG = logging.getLogger('test_speaker')
+
+
+class _Socket(object):
+    """A socket stand-in which returns pre-recorded chunks on recv()."""
+
+    def __init__(self, chunks):
+        self.chunks = list(chunks)
+        self.recv_sizes = []
+
+    def setsockopt(self, *args):
+        pass
+
+    def getpeername(self):
+        return ('192.0.2.2', 179)
+
+    def getsockname(self):
+        return ('192.0.2.1', 10179)
+
+    def recv(self, bufsize):
+        self.recv_sizes.append(bufsize)
+        if not self.chunks:
+            return ''
+        return self.chunks.pop(0)
+
+    def close(self):
+        pass
+
+
+def _messages():
+    nlri = [bgp.BGPNLRI(24, '10.%d.%d.0' % (i / 256, i % 256))
+            for i in xrange(300)]
+    attrs = [bgp.BGPPathAttributeOrigin(bgp.BGP_ATTR_ORIGIN_IGP),
+             bgp.BGPPathAttributeAsPath([[65001]]),
+             bgp.BGPPathAttributeNextHop('192.0.2.2')]
+    return [bgp.BGPKeepAlive(),
+            bgp.BGPUpdate(path_attributes=attrs, nlri=nlri),
+            bgp.BGPUpdate(withdrawn_routes=nlri[:10]),
+            bgp.BGPKeepAlive(),
+            bgp.BGPRouteRefresh(afi=1, safi=1)]
+
+
+class Test_BgpProtocol(unittest.TestCase):
+
+    """ Test case for BgpProtocol framing
+    """
+
+    def _protocol(self, chunks=()):
+        sock = _Socket(chunks)
+        proto = speaker.BgpProtocol(sock, signal_bus=None)
+        proto._handle_msg = mock.Mock()
+        return proto, sock
+
+    def _stream(self):
+        msgs = _messages()
+        return msgs, ''.join(str(m.serialize()) for m in msgs)
+
+    def _received(self, proto):
+        return [str(c[0][0].serialize())
+                for c in proto._handle_msg.call_args_list]
+
+    def _test_data_received(self, chunk_size):
+        msgs, stream = self._stream()
+        proto, _sock = self._protocol()
+        for i in xrange(0, len(stream), chunk_size):
+            proto.data_received(stream[i:i + chunk_size])
+        eq_(self._received(proto), [str(m.serialize()) for m in msgs])
+        eq_(proto._recv_buff, '')
+
+    def test_data_received_whole(self):
+        self._test_data_received(65536)
+
+    def test_data_received_byte_by_byte(self):
+        self._test_data_received(1)
+
+    def test_data_received_split(self):
+        self._test_data_received(7)
+        self._test_data_received(speaker.BGP_MIN_MSG_LEN)
+        self._test_data_received(1000)
+
+    def test_data_received_partial(self):
+        msgs, stream = self._stream()
+        proto, _sock = self._protocol()
+        proto.data_received(stream[:-3])
+        eq_(len(proto._handle_msg.call_args_list), len(msgs) - 1)
+        eq_(proto._recv_buff, stream[-len(msgs[-1].serialize()):-3])
+        proto.data_received(stream[-3:])
+        eq_(len(proto._handle_msg.call_args_list), len(msgs))
+        eq_(proto._recv_buff, '')
+
+    @raises(bgp.NotSync)
+    def test_data_received_bad_marker(self):
+        proto, _sock = self._protocol()
+        proto.send_notification = mock.Mock()
+        proto.data_received('\x00' * 16 + '\x00\x13\x04')
+
+    @raises(bgp.BadLen)
+    def test_data_received_bad_len(self):
+        proto, _sock = self._protocol()
+        proto.send_notification = mock.Mock()
+        stream = str(bgp.BGPKeepAlive().serialize())
+        proto.data_received(stream[:16] + '\x00\x14\x04\x00')
+
+    def test_recv_loop(self):
+        msgs, stream = self._stream()
+        proto, sock = self._protocol([stream[:500], stream[500:]])
+        proto.connection_lost = mock.Mock()
+        proto._recv_loop()
+        eq_(self._received(proto), [str(m.serialize()) for m in msgs])
+        eq_(sock.recv_sizes, [speaker.BGP_RECV_BUF_SIZE] * 3)
+        proto.connection_lost.assert_called_once_with(
+            'Peer closed connection')
@@ -0,0 +1,128 @@
+# Copyright (C) 2014 Nippon Telegraph and Telephone Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+import logging
+import random
+
+from nose.tools import eq_, ok_, raises
+
+from ryu.services.protocols.bgp.utils.radix import RadixTree
+
+
+LOG = logging.getLogger('test_radix')
+
+
+def _contains(outer, inner):
+    (okey, olen), (ikey, ilen) = outer, inner
+    return olen <= ilen and (okey >> (8 - olen)) == (ikey >> (8 - olen))
+
+
+class Test_RadixTree(unittest.TestCase):
+
+    """ Test case for the prefix trie
+    """
+
+    def setUp(self):
+        self.tree = RadixTree(8)
+        for key, length in [(0x00, 0), (0x80, 1), (0xa0, 3), (0xa0, 4),
+                            (0xa8, 5), (0xc0, 4), (0x10, 4)]:
+            self.tree.insert(key, length, (key, length))
+
+    def test_get(self):
+        eq_(len(self.tree), 7)
+        eq_(self.tree.get(0xa0, 3), (0xa0, 3))
+        eq_(self.tree.get(0xa0, 4), (0xa0, 4))
+        eq_(self.tree.get(0xa0, 5), None)
+        eq_(self.tree.get(0xc0, 2, 'x'), 'x')
+        ok_((0xc0, 4) in self.tree)
+        ok_((0x20, 4) not in self.tree)
+
+    def test_insert_replace(self):
+        self.tree.insert(0xa0, 3, 'new')
+        eq_(len(self.tree), 7)
+        eq_(self.tree.get(0xa0, 3), 'new')
+
+    def test_insert_masks_key(self):
+        self.tree.insert(0xff, 2, 'c0')
+        eq_(self.tree.get(0xc0, 2), 'c0')
+
+    @raises(ValueError)
+    def test_insert_invalid_length(self):
+        self.tree.insert(0, 9, None)
+
+    def test_longest_match(self):
+        eq_(self.tree.longest_match(0xa9), (0xa8, 5))
+        eq_(self.tree.longest_match(0xa7), (0xa0, 4))
+        eq_(self.tree.longest_match(0xc0), (0xc0, 4))
+        eq_(self.tree.longest_match(0xe0), (0x80, 1))
+        eq_(self.tree.longest_match(0xa0, 3), (0xa0, 3))
+        eq_(self.tree.longest_match(0x40), (0x00, 0))
+        self.tree.remove(0x00, 0)
+        eq_(self.tree.longest_match(0x40), None)
+
+    def test_covering(self):
+        eq_(self.tree.covering(0xa8, 6),
+            [(0x00, 0), (0x80, 1), (0xa0, 3), (0xa0, 4), (0xa8, 5)])
+        eq_(self.tree.covering(0x20, 4), [(0x00, 0)])
+
+    def test_more_specifics(self):
+        eq_(self.tree.more_specifics(0xa0, 3),
+            [(0xa0, 3), (0xa0, 4), (0xa8, 5)])
+        eq_(self.tree.more_specifics(0x80, 2),
+            [(0xa0, 3), (0xa0, 4), (0xa8, 5)])
+        eq_(self.tree.more_specifics(0xc0, 2), [(0xc0, 4)])
+        eq_(self.tree.more_specifics(0xe0, 3), [])
+        eq_(self.tree.more_specifics(0xa8, 8), [])
+        eq_(len(self.tree.more_specifics(0, 0)), 7)
+
+    def test_remove(self):
+        eq_(self.tree.remove(0xa0, 3), (0xa0, 3))
+        eq_(self.tree.get(0xa0, 3), None)
+        eq_(self.tree.more_specifics(0xa0, 3), [(0xa0, 4), (0xa8, 5)])
+        eq_(self.tree.remove(0xa8, 5), (0xa8, 5))
+        eq_(self.tree.remove(0xa0, 4), (0xa0, 4))
+        eq_(len(self.tree), 4)
+        eq_(list(self.tree.itervalues()),
+            [(0x00, 0), (0x10, 4), (0x80, 1), (0xc0, 4)])
+
+    @raises(KeyError)
+    def test_remove_missing(self):
+        self.tree.remove(0xa0, 2)
+
+    def test_random(self):
+        rand = random.Random(0)
+        tree = RadixTree(8)
+        prefixes = set()
+        for _ in range(2000):
+            length = rand.randint(0, 8)
+            key = rand.randint(0, 255) >> (8 - length) << (8 - length)
+            if (key, length) in prefixes and rand.random() < 0.5:
+                eq_(tree.remove(key, length), (key, length))
+                prefixes.remove((key, length))
+            else:
+                tree.insert(key, length, (key, length))
+                prefixes.add((key, length))
+            eq_(len(tree), len(prefixes))
+
+            length = rand.randint(0, 8)
+            key = rand.randint(0, 255) >> (8 - length) << (8 - length)
+            covering = sorted((p for p in prefixes
+                               if _contains(p, (key, length))),
+                              key=lambda p: p[1])
+            eq_(tree.covering(key, length), covering)
+            eq_(tree.more_specifics(key, length),
+                sorted(p for p in prefixes if _contains((key, length), p)))
+        eq_(list(tree.itervalues()), sorted(prefixes))
@@ -42,6 +42,12 @@ class Test_utils(unittest.TestCase):
         data = bytearray('\01\02\03\04')
         eq_(expected_result, utils.hex_array(data))
 
+    def test_hex_array_buffer(self):
+        ''' Test buffer conversion into array of hexes '''
+        expected_result = '0x2 0x3'
+        data = buffer('\01\02\03\04', 1, 2)
+        eq_(expected_result, utils.hex_array(data))
+
     def test_hex_array_invalid(self):
         ''' Test conversion into array of hexes with invalid data type '''
         expected_result = None
@@ -0,0 +1,244 @@
+# Copyright (C) 2014 Nippon Telegraph and Telephone Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+import unittest
+import logging
+import random
+from nose.tools import *
+from ryu.lib.packet import ethernet
+from ryu.lib.packet import lldp
+from ryu.lib.packet import packet
+from ryu.ofproto import ether
+from ryu.ofproto import ofproto_v1_3, ofproto_v1_3_parser
+from ryu.topology import switches
+
+
+LOG = logging.getLogger('test_switches')
+
+
+class Test_LLDPPacket(unittest.TestCase):
+    """ Test case for switches.LLDPPacket
+    """
+
+    def test_lldp_packet(self):
+        for args in [(0, 0, '00:00:00:00:00:00', 0),
+                     (1, 2, '00:11:22:33:44:55', 120),
+                     (0xffffffffffffffff, 0xfffffffe,
+                      'ff:ff:ff:ff:ff:ff', 0xffff)]:
+            eq_(switches.LLDPPacket.lldp_packet(*args),
+                switches.LLDPPacket._lldp_frame(*args))
+
+    def test_lldp_parse(self):
+        data = switches.LLDPPacket.lldp_packet(
+            0x1234, 5, '00:11:22:33:44:55', 120)
+        eq_(switches.LLDPPacket._parse_frame(data), (0x1234, 5))
+        eq_(switches.LLDPPacket.lldp_parse(str(data)), (0x1234, 5))
+        eq_(switches.LLDPPacket.lldp_parse(packet.Packet(str(data))),
+            (0x1234, 5))
+
+    def test_lldp_parse_other_tlvs(self):
+        # frames not laid out as the template are decoded with Packet
+        e = ethernet.ethernet(lldp.LLDP_MAC_NEAREST_BRIDGE,
+                              '00:11:22:33:44:55', ether.ETH_TYPE_LLDP)
+        tlvs = (lldp.ChassisID(subtype=lldp.ChassisID.SUB_LOCALLY_ASSIGNED,
+                               chassis_id='dpid:0000000000001234'),
+                lldp.PortID(subtype=lldp.PortID.SUB_PORT_COMPONENT,
+                            port_id='\x00\x00\x00\x05'),
+                lldp.TTL(ttl=120),
+                lldp.SystemName(system_name='switch'),
+                lldp.End())
+        pkt = e / lldp.lldp(tlvs)
+        pkt.serialize()
+        data = str(pkt.data)
+        eq_(switches.LLDPPacket._parse_frame(data), None)
+        eq_(switches.LLDPPacket.lldp_parse(data), (0x1234, 5))
+
+    @raises(switches.LLDPPacket.LLDPUnknownFormat)
+    def test_lldp_parse_unknown(self):
+        data = switches.LLDPPacket.lldp_packet(
+            0x1234, 5, '00:11:22:33:44:55', 120)
+        # the chassis id is not a dpid
+        data[switches.LLDPPacket._DPID_OFFSET - 1] = '-'
+        eq_(switches.LLDPPacket._parse_frame(data), None)
+        switches.LLDPPacket.lldp_parse(data)
+
+
+class Test_LinkState(unittest.TestCase):
+    """ Test case for switches.LinkState
+    """
+
+    def _port(self, dpid, port_no):
+        ofpport = ofproto_v1_3_parser.OFPPort(
+            port_no, '00:00:00:00:00:00', 'port', 0, 0, 0, 0, 0, 0, 0, 0)
+        return switches.Port(dpid, ofproto_v1_3, ofpport)
+
+    def setUp(self):
+        self.links = switches.LinkState()
+        self.ports = [self._port(dpid, 1) for dpid in range(1, 5)]
+        self.link1 = switches.Link(self.ports[0], self.ports[1])
+        self.link2 = switches.Link(self.ports[2], self.ports[3])
+        self.links.update_link(self.ports[0], self.ports[1])
+        self.links.update_link(self.ports[2], self.ports[3])
+        self.links.rev_link_set_timestamp(self.link1, 10)
+        self.links.rev_link_set_timestamp(self.link2, 20)
+
+    def test_expired(self):
+        eq_(self.links.expired(10), [])
+        eq_(self.links.expired(15), [self.link1])
+        # taken off the queue until put back
+        eq_(self.links.expired(15), [])
+        self.links.recheck(self.link1, 15)
+        eq_(self.links.expired(16), [self.link1])
+        eq_(self.links.expired(25), [self.link2])
+
+    def test_expired_updated(self):
+        self.links.update_link(self.ports[0], self.ports[1])
+        updated = self.links[self.link1]
+        eq_(self.links.expired(updated), [self.link2])
+        eq_(self.links.expired(updated + 1), [self.link1])
+
+    def test_expired_deleted(self):
+        self.links.link_down(self.link1)
+        eq_(self.links.port_deleted(self.ports[2]), (self.ports[3], None))
+        eq_(self.links.expired(25), [])
+        eq_(len(self.links), 0)
+
+
+class Test_TopologyGraph(unittest.TestCase):
+    """ Test case for switches.TopologyGraph
+    """
+
+    def setUp(self):
+        # 1 - 2 - 4 - 5
+        #  \- 3 -/
+        self.graph = switches.TopologyGraph()
+        for src, dst in [(1, 2), (1, 3), (2, 4), (3, 4), (4, 5)]:
+            self._add(self.graph, src, dst)
+        self.graph.add_switch(6)
+
+    def _add(self, graph, src, dst):
+        graph.add_link(src, dst, dst, src)
+        graph.add_link(dst, src, src, dst)
+
+    def test_shortest_path(self):
+        eq_(self.graph.shortest_path(1, 1), (1,))
+        ok_(self.graph.shortest_path(1, 4) in [(1, 2, 4), (1, 3, 4)])
+        eq_(self.graph.shortest_path(5, 2), (5, 4, 2))
+        eq_(self.graph.shortest_path(1, 6), None)
+        paths = self.graph.shortest_paths(1)
+        eq_(sorted(paths), [1, 2, 3, 4, 5])
+        eq_(paths[5], self.graph.shortest_path(1, 5))
+        eq_(self.graph.distances(1), {1: 0, 2: 1, 3: 1, 4: 2, 5: 3})
+        eq_(sorted(self.graph.all_shortest_paths()), [1, 2, 3, 4, 5, 6])
+
+    @raises(KeyError)
+    def test_shortest_path_unknown(self):
+        self.graph.shortest_path(7, 1)
+
+    def test_ecmp_paths(self):
+        eq_(sorted(self.graph.ecmp_paths(1, 5)),
+            [(1, 2, 4, 5), (1, 3, 4, 5)])
+        eq_(self.graph.ecmp_paths(5, 5), [(5,)])
+        eq_(self.graph.ecmp_paths(1, 6), [])
+        eq_(self.graph.first_hops(1, 5), frozenset([2, 3]))
+        eq_(self.graph.first_hops(5, 1), frozenset([4]))
+        eq_(self.graph.first_hops(1, 1), frozenset())
+        eq_(self.graph.ports(1, 2), set([(2, 1)]))
+
+    def test_parallel_links(self):
+        self.graph.add_link(1, 7, 2, 7)
+        eq_(self.graph.ports(1, 2), set([(2, 1), (7, 7)]))
+        self.graph.del_link(1, 2, 2, 1)
+        eq_(self.graph.ports(1, 2), set([(7, 7)]))
+        eq_(self.graph.first_hops(1, 4), frozenset([2, 3]))
+        self.graph.del_link(1, 7, 2, 7)
+        eq_(self.graph.first_hops(1, 4), frozenset([3]))
+
+    def test_del_switch(self):
+        self.graph.del_switch(3)
+        ok_(3 not in self.graph)
+        eq_(self.graph.ecmp_paths(1, 5), [(1, 2, 4, 5)])
+        self.graph.del_switch(4)
+        eq_(self.graph.shortest_path(1, 5), None)
+        eq_(self.graph.neighbors(5), [])
+
+    def test_cache(self):
+        graph = self.graph
+        tree = graph._tree(1)
+        # a new switch, links out of reach, longer than the shortest
+        # paths or in parallel leave the paths as they are
+        graph.add_switch(7)
+        self._add(graph, 6, 7)
+        graph.add_link(5, 1, 1, 5)
+        graph.add_link(2, 8, 4, 8)
+        ok_(graph._tree(1) is tree)
+        # a link of no shortest path going
+        graph.del_link(5, 1, 1, 5)
+        graph.del_link(3, 2, 2, 3)
+        ok_(graph._tree(1) is tree)
+        graph.add_link(2, 9, 3, 9)
+        ok_(graph._tree(1) is tree)
+        # equal cost paths going and coming are patched in
+        graph.del_link(2, 4, 4, 2)
+        graph.del_link(2, 8, 4, 8)
+        eq_(graph.first_hops(1, 5), frozenset([3]))
+        ok_(graph._tree(1) is tree)
+        graph.add_link(2, 4, 4, 2)
+        eq_(graph.first_hops(1, 5), frozenset([2, 3]))
+        ok_(graph._tree(1) is tree)
+        # shorter ones are not
+        graph.add_link(1, 9, 4, 9)
+        ok_(graph._tree(1) is not tree)
+        tree = graph._tree(1)
+        graph.del_link(1, 9, 4, 9)
+        ok_(graph._tree(1) is not tree)
+
+    def test_random(self):
+        # the cached paths are those of a graph built from scratch
+        rand = random.Random(0)
+        graph = switches.TopologyGraph()
+        links = set()
+        for _i in range(500):
+            src, dst = rand.randint(1, 12), rand.randint(1, 12)
+            link = (src, rand.randint(1, 2), dst, rand.randint(1, 2))
+            if src == dst:
+                graph.del_switch(src)
+                links = set(l for l in links
+                            if src != l[0] and src != l[2])
+            elif link in links:
+                graph.del_link(*link)
+                links.remove(link)
+            else:
+                graph.add_link(*link)
+                links.add(link)
+
+            fresh = switches.TopologyGraph()
+            for dpid in graph.switches():
+                fresh.add_switch(dpid)
+            for l in links:
+                fresh.add_link(*l)
+            eq_(sorted(graph.switches()), sorted(fresh.switches()))
+            for src in graph.switches():
+                eq_(graph.distances(src), fresh.distances(src))
+                for dst in graph.switches():
+                    eq_(sorted(graph.ecmp_paths(src, dst)),
+                        sorted(fresh.ecmp_paths(src, dst)))
+                    eq_(graph.first_hops(src, dst),
+                        fresh.first_hops(src, dst))
+                    path = graph.shortest_paths(src).get(dst)
+                    eq_(path, graph.shortest_path(src, dst))
+                    ok_(path is None or path in fresh.ecmp_paths(src, dst))
@@ -35,4 +35,21 @@ def get_all_link(app):
     return get_link(app)
 
 
+def get_graph(app):
+    """Return the TopologyGraph of the switches app.
+
+    The graph is updated as switches and links come and go, and its
+    shortest paths are queried without a request to the switches app.
+    """
+    return app_manager.lookup_service_brick('switches').graph
+
+
+def get_shortest_path(app, src, dst):
+    return get_graph(app).shortest_path(src, dst)
+
+
+def get_ecmp_paths(app, src, dst):
+    return get_graph(app).ecmp_paths(src, dst)
+
+
 app_manager.require_app('ryu.topology.switches', api_style=True)
@@ -13,6 +13,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import heapq
 import logging
 import struct
 import time
@@ -310,6 +311,15 @@ class LinkState(dict):
     def __init__(self):
         super(LinkState, self).__init__()
         self._map = {}
+        # heap of (timestamp, link) ordered by the time links expire.
+        # Entries are not removed when links are refreshed or deleted;
+        # only the entry matching _queued[link] is current.
+        self._expiry = []
+        self._queued = {}
+
+    def _queue(self, link, timestamp):
+        self._queued[link] = timestamp
+        heapq.heappush(self._expiry, (timestamp, link))
 
     def get_peer(self, src):
         return self._map.get(src, None)
@@ -317,7 +327,10 @@ class LinkState(dict):
     def update_link(self, src, dst):
         link = Link(src, dst)
 
-        self[link] = time.time()
+        now = time.time()
+        if link not in self._queued:
+            self._queue(link, now)
+        self[link] = now
         self._map[src] = dst
 
         # return if the reverse link is also up or not
@@ -327,11 +340,13 @@ class LinkState(dict):
     def link_down(self, link):
         del self[link]
         del self._map[link.src]
+        self._queued.pop(link, None)
 
     def rev_link_set_timestamp(self, rev_link, timestamp):
         # rev_link may or may not in LinkSet
         if rev_link in self:
             self[rev_link] = timestamp
+            self._queue(rev_link, timestamp)
 
     def port_deleted(self, src):
         dst = self.get_peer(src)
@@ -342,12 +357,262 @@ class LinkState(dict):
         rev_link = Link(dst, src)
         del self[link]
         del self._map[src]
+        self._queued.pop(link, None)
         # reverse link might not exist
         self.pop(rev_link, None)
+        self._queued.pop(rev_link, None)
         rev_link_dst = self._map.pop(dst, None)
 
         return dst, rev_link_dst
 
+    def expired(self, timestamp):
+        """Return the links last updated before *timestamp*.
+
+        The links returned are taken off the expiry queue, so they are
+        to be either deleted with link_down() or put back with
+        recheck().
+        """
+        links = []
+        expiry = self._expiry
+        while expiry and expiry[0][0] < timestamp:
+            queued, link = heapq.heappop(expiry)
+            if self._queued.get(link) != queued:
+                continue
+            updated = self[link]
+            if updated < timestamp:
+                del self._queued[link]
+                links.append(link)
+            else:
+                self._queue(link, updated)
+        return links
+
+    def recheck(self, link, timestamp):
+        """Put *link* back to be returned by expired() after *timestamp*
+        unless it is updated in the meantime."""
+        self._queue(link, timestamp)
+
+
+class _PathTree(object):
+    # breadth first search result from a source switch
+    __slots__ = ('dist', 'preds', 'paths', 'first_hops')
+
+    def __init__(self, dist, preds):
+        self.dist = dist        # dpid -> hop count
+        self.preds = preds      # dpid -> dpids a hop nearer to the source
+        self.paths = None
+        self.first_hops = {}
+
+    def changed(self):
+        self.paths = None
+        self.first_hops = {}
+
+
+class TopologyGraph(object):
+    """Adjacency of the switches discovered by the switches app, with
+    shortest paths by hop count.
+
+    The shortest paths from a switch are computed by a breadth first
+    search when first asked for, and cached.  A link coming or going
+    drops the cache of a switch only if it changes the distance to
+    some switch.  A link which adds or takes an equal cost path is
+    patched into the cache, and links neither reachable from a switch
+    nor on its shortest paths leave its cache as it is.
+
+    Paths are tuples of dpids from the source to the destination.  The
+    ports of the links between two adjacent switches are given by
+    ports().
+    """
+
+    def __init__(self):
+        super(TopologyGraph, self).__init__()
+        # src dpid -> {dst dpid -> set of (src port_no, dst port_no)}
+        self._links = {}
+        # dst dpid -> set of src dpids
+        self._rlinks = {}
+        # src dpid -> _PathTree
+        self._trees = {}
+
+    def __contains__(self, dpid):
+        return dpid in self._links
+
+    def __len__(self):
+        return len(self._links)
+
+    def switches(self):
+        return self._links.keys()
+
+    def neighbors(self, dpid):
+        """Return the dpids *dpid* has links to."""
+        return self._links.get(dpid, {}).keys()
+
+    def ports(self, src, dst):
+        """Return the set of (src port_no, dst port_no) of the links
+        from *src* to *dst*."""
+        return self._links.get(src, {}).get(dst, set())
+
+    def add_switch(self, dpid):
+        if dpid not in self._links:
+            self._links[dpid] = {}
+            self._rlinks[dpid] = set()
+
+    def del_switch(self, dpid):
+        if dpid not in self._links:
+            return
+        for dst in self._links[dpid].keys():
+            self._del_edge(dpid, dst)
+        for src in list(self._rlinks[dpid]):
+            self._del_edge(src, dpid)
+        del self._links[dpid]
+        del self._rlinks[dpid]
+        self._trees.pop(dpid, None)
+
+    def add_link(self, src, src_port_no, dst, dst_port_no):
+        self.add_switch(src)
+        self.add_switch(dst)
+        ports = self._links[src].get(dst)
+        if ports is None:
+            ports = self._links[src][dst] = set()
+            self._rlinks[dst].add(src)
+            self._edge_added(src, dst)
+        ports.add((src_port_no, dst_port_no))
+
+    def del_link(self, src, src_port_no, dst, dst_port_no):
+        ports = self._links.get(src, {}).get(dst)
+        if ports is None:
+            return
+        ports.discard((src_port_no, dst_port_no))
+        if not ports:
+            self._del_edge(src, dst)
+
+    def _del_edge(self, src, dst):
+        del self._links[src][dst]
+        self._rlinks[dst].discard(src)
+        # the edge was on the shortest paths of the sources it is a hop
+        # further from than its source.  The distances stay unless it
+        # was the last of them to its destination.
+        for dpid, tree in self._trees.items():
+            dist = tree.dist.get(src)
+            if dist is None or tree.dist.get(dst) != dist + 1:
+                continue
+            preds = tree.preds[dst]
+            if len(preds) == 1:
+                del self._trees[dpid]
+            else:
+                preds.remove(src)
+                tree.changed()
+
+    def _edge_added(self, src, dst):
+        # the edge makes shorter or equal paths from the sources it is
+        # reachable from, unless its destination is nearer already.
+        for dpid, tree in self._trees.items():
+            dist = tree.dist.get(src)
+            if dist is None:
+                continue
+            dst_dist = tree.dist.get(dst)
+            if dst_dist is None or dist + 1 < dst_dist:
+                del self._trees[dpid]
+            elif dist + 1 == dst_dist:
+                tree.preds[dst].append(src)
+                tree.changed()
+
+    def _tree(self, src):
+        tree = self._trees.get(src)
+        if tree is None:
+            if src not in self._links:
+                raise KeyError(src)
+            links = self._links
+            dist = {src: 0}
+            preds = {src: ()}
+            frontier = [src]
+            hops = 0
+            while frontier:
+                hops += 1
+                next_frontier = []
+                for u in frontier:
+                    for v in links[u]:
+                        v_dist = dist.get(v)
+                        if v_dist is None:
+                            dist[v] = hops
+                            preds[v] = [u]
+                            next_frontier.append(v)
+                        elif v_dist == hops:
+                            preds[v].append(u)
+                frontier = next_frontier
+            tree = self._trees[src] = _PathTree(dist, preds)
+        return tree
+
+    @staticmethod
+    def _path(tree, dst):
+        path = [dst]
+        preds = tree.preds[dst]
+        while preds:
+            path.append(preds[0])
+            preds = tree.preds[preds[0]]
+        path.reverse()
+        return tuple(path)
+
+    def distances(self, src):
+        """Return a dict of the hop counts from *src* to the switches
+        reachable from it.  The dict must be treated as read-only."""
+        return self._tree(src).dist
+
+    def shortest_path(self, src, dst):
+        """Return a shortest path from *src* to *dst*, or None if *dst*
+        is not reachable."""
+        tree = self._tree(src)
+        if tree.paths is not None:
+            return tree.paths.get(dst)
+        if dst not in tree.dist:
+            return None
+        return self._path(tree, dst)
+
+    def shortest_paths(self, src):
+        """Return a dict of a shortest path from *src* to every switch
+        reachable from it.  The dict must be treated as read-only."""
+        tree = self._tree(src)
+        if tree.paths is None:
+            paths = {src: (src,)}
+            # the path to a switch extends the path to its predecessor
+            for dst in sorted(tree.dist, key=tree.dist.get)[1:]:
+                paths[dst] = paths[tree.preds[dst][0]] + (dst,)
+            tree.paths = paths
+        return tree.paths
+
+    def all_shortest_paths(self):
+        """Return a dict of shortest_paths() of every switch."""
+        return dict((src, self.shortest_paths(src)) for src in self._links)
+
+    def ecmp_paths(self, src, dst):
+        """Return the list of all the shortest paths from *src* to
+        *dst*, which is empty if *dst* is not reachable.
+
+        The paths are enumerated for every call, as they can be too many
+        to be cached for every pair of switches.
+        """
+        tree = self._tree(src)
+        if dst not in tree.dist:
+            return []
+        preds = tree.preds
+        paths = [(dst,)]
+        for _i in range(tree.dist[dst]):
+            paths = [(u,) + path for path in paths for u in preds[path[0]]]
+        return paths
+
+    def first_hops(self, src, dst):
+        """Return the set of the neighbors of *src* on the shortest
+        paths to *dst*.  The ports to them are given by ports()."""
+        tree = self._tree(src)
+        hops = tree.first_hops.get(dst)
+        if hops is None:
+            if dst not in tree.dist or dst == src:
+                return frozenset()
+            preds = tree.preds
+            nodes = set([dst])
+            for _i in range(tree.dist[dst] - 1):
+                nodes = set(u for v in nodes for u in preds[v])
+            hops = tree.first_hops[dst] = frozenset(nodes)
+        return hops
+
 
 class LLDPPacket(object):
     # make a LLDP packet for link discovery.
@@ -363,7 +628,7 @@ class LLDPPacket(object):
         message = '%(msg)s'
 
     @staticmethod
-    def lldp_packet(dpid, port_no, dl_addr, ttl):
+    def _lldp_frame(dpid, port_no, dl_addr, ttl):
         pkt = packet.Packet()
 
         dst = lldp.LLDP_MAC_NEAREST_BRIDGE
@@ -392,9 +657,55 @@ class LLDPPacket(object):
         pkt.serialize()
         return pkt.data
 
+    # All the frames made by lldp_packet() are of the same layout, so
+    # they are made from a template by patching the fields in, and
+    # lldp_parse() reads the fields from the same offsets.
+    _SRC_OFFSET = 6
+    _DPID_OFFSET = (ethernet.ethernet._MIN_LEN + lldp.LLDP_TLV_SIZE + 1 +
+                    CHASSIS_ID_PREFIX_LEN)
+    _DPID_LEN = len(dpid_to_str(0))
+    _PORT_ID_OFFSET = _DPID_OFFSET + _DPID_LEN + lldp.LLDP_TLV_SIZE + 1
+    _TTL_OFFSET = _PORT_ID_OFFSET + PORT_ID_SIZE + lldp.LLDP_TLV_SIZE
+    _FRAME_LEN = _TTL_OFFSET + 2 + lldp.LLDP_TLV_SIZE
+    _TEMPLATE = None        # set below the class
+    _FIXED = None
+
+    @staticmethod
+    def lldp_packet(dpid, port_no, dl_addr, ttl):
+        data = bytearray(LLDPPacket._TEMPLATE)
+        offset = LLDPPacket._SRC_OFFSET
+        data[offset:offset + 6] = addrconv.mac.text_to_bin(dl_addr)
+        offset = LLDPPacket._DPID_OFFSET
+        data[offset:offset + LLDPPacket._DPID_LEN] = dpid_to_str(dpid)
+        struct.pack_into(LLDPPacket.PORT_ID_STR, data,
+                         LLDPPacket._PORT_ID_OFFSET, port_no)
+        struct.pack_into('!H', data, LLDPPacket._TTL_OFFSET, ttl)
+        return data
+
+    @staticmethod
+    def _parse_frame(data):
+        # Returns None unless data is laid out as the template.
+        if len(data) < LLDPPacket._FRAME_LEN:
+            return None
+        for start, end, fixed in LLDPPacket._FIXED:
+            if data[start:end] != fixed:
+                return None
+        offset = LLDPPacket._DPID_OFFSET
+        src_dpid = str_to_dpid(str(data[offset:offset +
+                                        LLDPPacket._DPID_LEN]))
+        (src_port_no, ) = struct.unpack_from(LLDPPacket.PORT_ID_STR, data,
+                                             LLDPPacket._PORT_ID_OFFSET)
+        return src_dpid, src_port_no
+
     @staticmethod
     def lldp_parse(data):
-        pkt = packet.Packet(data)
+        if isinstance(data, packet.Packet):
+            pkt = data
+        else:
+            ret = LLDPPacket._parse_frame(data)
+            if ret is not None:
+                return ret
+            pkt = packet.Packet(data)
         i = iter(pkt)
         eth_pkt = i.next()
         assert type(eth_pkt) == ethernet.ethernet
@@ -426,6 +737,23 @@ class LLDPPacket(object):
         return src_dpid, src_port_no
 
 
+def _lldp_template():
+    data = str(LLDPPacket._lldp_frame(0, 0, DONTCARE_STR, 0))
+    assert len(data) == LLDPPacket._FRAME_LEN
+    # the bytes other than the source address, dpid, port and TTL
+    fixed = []
+    start = ethernet.ethernet._MIN_LEN - 2
+    for offset, size in [(LLDPPacket._DPID_OFFSET, LLDPPacket._DPID_LEN),
+                         (LLDPPacket._PORT_ID_OFFSET, LLDPPacket.PORT_ID_SIZE),
+                         (LLDPPacket._TTL_OFFSET, 2),
+                         (LLDPPacket._FRAME_LEN, 0)]:
+        fixed.append((start, offset, data[start:offset]))
+        start = offset + size
+    return data, tuple(fixed)
+
+LLDPPacket._TEMPLATE, LLDPPacket._FIXED = _lldp_template()
+
+
 class Switches(app_manager.RyuApp):
     OFP_VERSIONS = [ofproto_v1_0.OFP_VERSION, ofproto_v1_2.OFP_VERSION,
                     ofproto_v1_3.OFP_VERSION, ofproto_v1_4.OFP_VERSION]
@@ -451,6 +779,7 @@ class Switches(app_manager.RyuApp):
         self.port_state = {}          # datapath_id => ports
         self.ports = PortDataState()  # Port class -> PortData class
         self.links = LinkState()      # Link class -> timestamp
+        self.graph = TopologyGraph()  # adjacency of self.dps by self.links
         self.is_active = True
 
         self.link_discovery = self.CONF.observe_links
@@ -473,6 +802,7 @@ class Switches(app_manager.RyuApp):
         assert dp.id is not None
 
         self.dps[dp.id] = dp
+        self.graph.add_switch(dp.id)
         if dp.id not in self.port_state:
             self.port_state[dp.id] = PortState()
             for port in dp.ports.values():
@@ -482,6 +812,7 @@ class Switches(app_manager.RyuApp):
         if dp.id in self.dps:
             del self.dps[dp.id]
             del self.port_state[dp.id]
+            self.graph.del_switch(dp.id)
 
     def _get_switch(self, dpid):
         if dpid in self.dps:
@@ -491,11 +822,15 @@ class Switches(app_manager.RyuApp):
             return switch
 
     def _get_port(self, dpid, port_no):
-        switch = self._get_switch(dpid)
-        if switch:
-            for p in switch.ports:
-                if p.port_no == port_no:
-                    return p
+        dp = self.dps.get(dpid)
+        if dp is None:
+            return None
+        ofpport = self.port_state[dpid].get(port_no)
+        if ofpport is None:
+            return None
+        port = Port(dpid, dp.ofproto, ofpport)
+        if not port.is_reserved():
+            return port
 
     def _port_added(self, port):
         lldp_data = LLDPPacket.lldp_packet(
@@ -504,6 +839,16 @@ class Switches(app_manager.RyuApp):
         # LOG.debug('_port_added dpid=%s, port_no=%s, live=%s',
         #           port.dpid, port.port_no, port.is_live())
 
+    def _link_added(self, link):
+        self.graph.add_link(link.src.dpid, link.src.port_no,
+                            link.dst.dpid, link.dst.port_no)
+        self.send_event_to_observers(event.EventLinkAdd(link))
+
+    def _link_deleted(self, link):
+        self.graph.del_link(link.src.dpid, link.src.port_no,
+                            link.dst.dpid, link.dst.port_no)
+        self.send_event_to_observers(event.EventLinkDelete(link))
+
     def _link_down(self, port):
         try:
             dst, rev_link_dst = self.links.port_deleted(port)
@@ -512,10 +857,10 @@ class Switches(app_manager.RyuApp):
             #           port, self.links.get_peer(port))
             return
         link = Link(port, dst)
-        self.send_event_to_observers(event.EventLinkDelete(link))
+        self._link_deleted(link)
         if rev_link_dst:
             rev_link = Link(dst, rev_link_dst)
-            self.send_event_to_observers(event.EventLinkDelete(rev_link))
+            self._link_deleted(rev_link)
         self.ports.move_front(dst)
 
     @set_ev_cls(ofp_event.EventOFPStateChange,
@@ -684,6 +1029,11 @@ class Switches(app_manager.RyuApp):
         if not self.link_discovery:
             return
 
+        # This handler receives all the packets, decode LLDP ones only.
+        key = ev.key
+        if key.eth_type != ETH_TYPE_LLDP or key.vlan_vid is not None:
+            return
+
         msg = ev.msg
         try:
             src_dpid, src_port_no = LLDPPacket.lldp_parse(msg.data)
@@ -724,11 +1074,13 @@ class Switches(app_manager.RyuApp):
         # LOG.debug("  old_peer=%s", old_peer)
         if old_peer and old_peer != dst:
             old_link = Link(src, old_peer)
-            self.send_event_to_observers(event.EventLinkDelete(old_link))
+            if old_link in self.links:
+                self.links.link_down(old_link)
+            self._link_deleted(old_link)
 
         link = Link(src, dst)
         if link not in self.links:
-            self.send_event_to_observers(event.EventLinkAdd(link))
+            self._link_added(link)
 
         if not self.links.update_link(src, dst):
             # reverse link is not detected yet.
@@ -738,66 +1090,78 @@ class Switches(app_manager.RyuApp):
         if self.explicit_drop:
             self._drop_packet(msg)
 
-    def send_lldp_packet(self, port):
-        try:
-            port_data = self.ports.lldp_sent(port)
-        except KeyError as e:
-            # ports can be modified during our sleep in self.lldp_loop()
-            # LOG.debug('send_lldp: KeyError %s', e)
-            return
-        if port_data.is_down:
-            return
-
-        dp = self.dps.get(port.dpid, None)
-        if dp is None:
-            # datapath was already deleted
-            return
-
-        # LOG.debug('lldp sent dpid=%s, port_no=%d', dp.id, port.port_no)
+    def _lldp_packet_out(self, dp, port_no, data):
         # TODO:XXX
+        actions = [dp.ofproto_parser.OFPActionOutput(port_no)]
         if dp.ofproto.OFP_VERSION == ofproto_v1_0.OFP_VERSION:
-            actions = [dp.ofproto_parser.OFPActionOutput(port.port_no)]
-            dp.send_packet_out(actions=actions, data=port_data.lldp_data)
+            return dp.ofproto_parser.OFPPacketOut(
+                datapath=dp, buffer_id=dp.ofproto.OFP_NO_BUFFER,
+                in_port=dp.ofproto.OFPP_NONE, actions=actions, data=data)
         elif dp.ofproto.OFP_VERSION >= ofproto_v1_2.OFP_VERSION:
-            actions = [dp.ofproto_parser.OFPActionOutput(port.port_no)]
-            out = dp.ofproto_parser.OFPPacketOut(
+            return dp.ofproto_parser.OFPPacketOut(
                 datapath=dp, in_port=dp.ofproto.OFPP_CONTROLLER,
                 buffer_id=dp.ofproto.OFP_NO_BUFFER, actions=actions,
-                data=port_data.lldp_data)
-            dp.send_msg(out)
+                data=data)
         else:
             LOG.error('cannot send lldp packet. unsupported version. %x',
                       dp.ofproto.OFP_VERSION)
 
+    def send_lldp_packets(self, dpid, ports):
+        # The packet-outs for a datapath are queued without yielding,
+        # so that the send loop of the datapath writes them at once.
+        dp = self.dps.get(dpid, None)
+        for port in ports:
+            try:
+                port_data = self.ports.lldp_sent(port)
+            except KeyError as e:
+                # ports can be modified while self.lldp_loop() yields
+                # LOG.debug('send_lldp: KeyError %s', e)
+                continue
+            if port_data.is_down:
+                continue
+
+            if dp is None:
+                # datapath was already deleted
+                continue
+
+            # LOG.debug('lldp sent dpid=%s, port_no=%d', dpid, port.port_no)
+            out = self._lldp_packet_out(dp, port.port_no, port_data.lldp_data)
+            if out is None:
+                return
+            dp.send_msg(out)
+
+    def send_lldp_packet(self, port):
+        self.send_lldp_packets(port.dpid, [port])
+
     def lldp_loop(self):
         while self.is_active:
             self.lldp_event.clear()
 
             now = time.time()
             timeout = None
-            ports_now = []
-            ports = []
-            for (key, data) in self.ports.items():
-                if data.timestamp is None:
-                    ports_now.append(key)
-                    continue
-
-                expire = data.timestamp + self.LLDP_SEND_PERIOD_PER_PORT
-                if expire <= now:
-                    ports.append(key)
-                    continue
-
-                timeout = expire - now
-                break
-
-            for port in ports_now:
-                self.send_lldp_packet(port)
-            for port in ports:
-                self.send_lldp_packet(port)
-                hub.sleep(self.LLDP_SEND_GUARD)      # don't burst
-
-            if timeout is not None and ports:
-                timeout = 0     # We have already slept
+            ports = {}          # dpid -> ports to send LLDP
+            for (key, data) in self.ports.iteritems():
+                if data.timestamp is not None:
+                    expire = data.timestamp + self.LLDP_SEND_PERIOD_PER_PORT
+                    if expire > now:
+                        timeout = expire - now
+                        break
+                ports.setdefault(key.dpid, []).append(key)
+
+            # a burst per datapath rather than a packet every
+            # LLDP_SEND_GUARD, so that a round takes about as long for
+            # a large fabric as for a single switch.
+            for dpid, dp_ports in ports.items():
+                self.send_lldp_packets(dpid, dp_ports)
+                hub.sleep(0)
+
+            if ports:
+                # the ports just sent expire after a period, and the
+                # ports expiring meanwhile are sent together after a
+                # guard time at least.
+                if timeout is None:
+                    timeout = self.LLDP_SEND_PERIOD_PER_PORT
+                timeout = max(timeout, self.LLDP_SEND_GUARD)
             # LOG.debug('lldp sleep %s', timeout)
             self.lldp_event.wait(timeout=timeout)
 
@@ -806,28 +1170,29 @@ class Switches(app_manager.RyuApp):
             self.link_event.clear()
 
             now = time.time()
+            expire = now - self.LINK_TIMEOUT
             deleted = []
-            for (link, timestamp) in self.links.items():
-                # LOG.debug('%s timestamp %d (now %d)', link, timestamp, now)
-                if timestamp + self.LINK_TIMEOUT < now:
-                    src = link.src
-                    if src in self.ports:
-                        port_data = self.ports.get_port(src)
-                        # LOG.debug('port_data %s', port_data)
-                        if port_data.lldp_dropped() > self.LINK_LLDP_DROP:
-                            deleted.append(link)
+            for link in self.links.expired(expire):
+                # LOG.debug('%s expired (now %d)', link, now)
+                src = link.src
+                if src in self.ports:
+                    port_data = self.ports.get_port(src)
+                    # LOG.debug('port_data %s', port_data)
+                    if port_data.lldp_dropped() > self.LINK_LLDP_DROP:
+                        deleted.append(link)
+                        continue
+                self.links.recheck(link, expire)
 
             for link in deleted:
                 self.links.link_down(link)
                 # LOG.debug('delete %s', link)
-                self.send_event_to_observers(event.EventLinkDelete(link))
+                self._link_deleted(link)
 
                 dst = link.dst
                 rev_link = Link(dst, link.src)
                 if rev_link not in deleted:
                     # It is very likely that the reverse link is also
                     # disconnected. Check it early.
-                    expire = now - self.LINK_TIMEOUT
                     self.links.rev_link_set_timestamp(rev_link, expire)
                     if dst in self.ports:
                         self.ports.move_front(dst)
@@ -109,8 +109,9 @@ def _bytearray_to_hex(data):
 
 
 def hex_array(data):
-    """Convert string or bytearray into array of hexes to be printed."""
+    """Convert string, buffer or bytearray into array of hexes to print."""
     to_hex = {str: _str_to_hex,
+              buffer: _str_to_hex,
               bytearray: _bytearray_to_hex}
     try:
         return to_hex[type(data)](data)